@@ -0,0 +1,157 @@
+"""
+Export en flux des analyses (CSV multi-sections ou archive ZIP)
+Chaque section de l'analyse complète (déjà en cache) est convertie en tables puis
+écrite et envoyée l'une après l'autre
+"""
+
+import csv
+import io
+import json
+import zipfile
+from typing import Any, Dict, Iterator, List, Sequence, Tuple
+
+# Sections exportées, dans l'ordre : (clé dans les statistiques complètes, nom de la section)
+ANALYSIS_SECTIONS = [
+    ('basic_stats', 'basic_stats'),
+    ('hot_cold_analysis', 'hot_cold'),
+    ('sum_analysis', 'sums'),
+    ('parity_analysis', 'parity'),
+    ('sequences', 'sequences'),
+    ('yearly_stats', 'yearly_stats'),
+    ('patterns', 'patterns'),
+    ('frequent_combinations', 'combinations'),
+]
+
+# Une table : (nom, en-tête, lignes)
+Table = Tuple[str, List[str], List[List[Any]]]
+
+
+def _is_scalar(value: Any) -> bool:
+    return value is None or isinstance(value, (str, int, float, bool))
+
+
+def _format_cell(value: Any) -> Any:
+    """Valeur d'une cellule : paires (numéro, fréquence) et listes aplaties, le reste en JSON"""
+    if _is_scalar(value):
+        return value
+    if isinstance(value, (list, tuple)):
+        if all(isinstance(item, (list, tuple)) and len(item) == 2 for item in value):
+            return ' '.join(f"{first}:{second}" for first, second in value)
+        if all(_is_scalar(item) for item in value):
+            return ' '.join(str(item) for item in value)
+    return json.dumps(value, ensure_ascii=False, default=str)
+
+
+def _records_table(name: str, records: List[Dict], key_column: str = None, keys: Sequence = ()) -> Table:
+    """Liste de dictionnaires (éventuellement indexés par keys) vers une table"""
+    header = [key_column] if key_column else []
+    for record in records:
+        header.extend(column for column in record if column not in header)
+    rows = []
+    for key, record in zip(keys or [None] * len(records), records):
+        row = [key] if key_column else []
+        rows.append(row + [_format_cell(record.get(column)) for column in header[len(row):]])
+    return name, header, rows
+
+
+def section_tables(name: str, data: Any) -> List[Table]:
+    """
+    Convertit une section d'analyse en tables
+
+    Les valeurs simples d'une section forment une table clé/valeur ; chaque sous-partie
+    (liste d'enregistrements, dictionnaire de dictionnaires, liste de paires) devient
+    sa propre table.
+    """
+    if isinstance(data, (list, tuple)):
+        if data and all(isinstance(item, dict) for item in data):
+            return [_records_table(name, data)]
+        if data and all(isinstance(item, (list, tuple)) for item in data):
+            width = max(len(item) for item in data)
+            return [(name, [f"valeur_{i + 1}" for i in range(width)], [[_format_cell(v) for v in item] for item in data])]
+        return [(name, ['valeur'], [[_format_cell(item)] for item in data])]
+
+    if not isinstance(data, dict):
+        return [(name, ['valeur'], [[_format_cell(data)]])]
+
+    if data and all(isinstance(value, dict) for value in data.values()):
+        return [_records_table(name, list(data.values()), 'cle', list(data.keys()))]
+
+    tables = []
+    scalars = [[key, value] for key, value in data.items() if _is_scalar(value)]
+    if scalars:
+        tables.append((name, ['cle', 'valeur'], scalars))
+
+    for key, value in data.items():
+        if _is_scalar(value):
+            continue
+        if isinstance(value, dict) and value and all(_is_scalar(v) for v in value.values()):
+            tables.append((f"{name}.{key}", ['cle', 'valeur'], [[k, v] for k, v in value.items()]))
+        else:
+            tables.extend(section_tables(f"{name}.{key}", value))
+    return tables
+
+
+def iter_analysis_tables(stats: Dict[str, Any], sections: Sequence[str]) -> Iterator[Table]:
+    """Tables de chaque section demandée, section après section"""
+    for stats_key, section in ANALYSIS_SECTIONS:
+        if section in sections and stats_key in stats:
+            yield from section_tables(section, stats[stats_key])
+
+
+def _csv_text(header: List[str], rows: List[List[Any]], title: str = None) -> str:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    if title:
+        writer.writerow([f"# {title}"])
+    writer.writerow(header)
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def stream_analysis_csv(stats: Dict[str, Any], sections: Sequence[str]) -> Iterator[bytes]:
+    """CSV multi-sections : chaque table précédée d'une ligne '# nom' et suivie d'une ligne vide"""
+    yield _csv_text(['total_draws', 'start', 'end'], [[
+        stats.get('total_draws', 0),
+        stats.get('date_range', {}).get('start'),
+        stats.get('date_range', {}).get('end')
+    ]], 'summary').encode('utf-8')
+
+    for name, header, rows in iter_analysis_tables(stats, sections):
+        yield ('\n' + _csv_text(header, rows, name)).encode('utf-8')
+
+
+class _ZipOutput(io.RawIOBase):
+    """Sortie non positionnable : zipfile écrit alors l'archive au fil de l'eau"""
+
+    def __init__(self):
+        self._chunks: List[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b''.join(self._chunks)
+        self._chunks = []
+        return data
+
+
+def stream_analysis_zip(stats: Dict[str, Any], sections: Sequence[str]) -> Iterator[bytes]:
+    """Archive ZIP avec un fichier CSV par table, envoyée au fur et à mesure de sa construction"""
+    output = _ZipOutput()
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr('summary.json', json.dumps({
+            'total_draws': stats.get('total_draws', 0),
+            'date_range': stats.get('date_range', {}),
+            'sections': list(sections)
+        }, ensure_ascii=False, default=str))
+        yield output.drain()
+
+        for name, header, rows in iter_analysis_tables(stats, sections):
+            archive.writestr(f"{name}.csv", _csv_text(header, rows))
+            yield output.drain()
+
+    yield output.drain()
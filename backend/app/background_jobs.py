@@ -0,0 +1,154 @@
+"""
+Tâches de fond de l'API (imports de fichiers)
+Les tâches passent par Celery si configuré (USE_CELERY), sinon par un exécuteur
+local au processus de l'API qui expose les mêmes états (PENDING, PROGRESS, SUCCESS, FAILURE)
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from config import settings
+from .latency_metrics import latency_store
+
+# Nombre de tâches locales dont on conserve l'état
+MAX_TRACKED_JOBS = 200
+
+
+class LocalJobRegistry:
+    """
+    Exécuteur de tâches local (sans broker)
+
+    Les tâches s'exécutent une par une dans un thread dédié ; leur état est conservé
+    en mémoire (les plus anciennes sont oubliées au-delà de MAX_TRACKED_JOBS).
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="background-job")
+        self._jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, func: Callable[..., Dict], *args, **kwargs) -> str:
+        """Planifie func(*args, on_progress=..., **kwargs) et retourne l'identifiant de la tâche"""
+        task_id = str(uuid.uuid4())
+        with self._lock:
+            self._jobs[task_id] = {"state": "PENDING", "info": None}
+            while len(self._jobs) > MAX_TRACKED_JOBS:
+                self._jobs.popitem(last=False)
+
+        self._executor.submit(self._run, task_id, func, args, kwargs)
+        return task_id
+
+    def _run(self, task_id: str, func: Callable[..., Dict], args: tuple, kwargs: Dict) -> None:
+        self._update(task_id, "PROGRESS", {"current": 0, "total": 100, "status": "Démarrage..."})
+        start_time = time.perf_counter()
+        try:
+            result = func(*args, on_progress=lambda meta: self._update(task_id, "PROGRESS", meta), **kwargs)
+            if isinstance(result, dict) and result.get("status") == "error":
+                # Import en échec rapporté par son état final (voir run_draws_import)
+                raise RuntimeError(result.get("error", "Erreur inconnue"))
+            self._update(task_id, "SUCCESS", result)
+            state = "success"
+        except Exception as e:
+            print(f"❌ Tâche de fond {task_id} en échec: {e}")
+            self._update(task_id, "FAILURE", e)
+            state = "failure"
+        latency_store.record("task", getattr(func, "__name__", "job"), time.perf_counter() - start_time, state)
+
+    def _update(self, task_id: str, state: str, info: Any) -> None:
+        with self._lock:
+            if task_id in self._jobs:
+                self._jobs[task_id] = {"state": state, "info": info}
+
+    def get(self, task_id: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            job = self._jobs.get(task_id)
+            return dict(job) if job else None
+
+    def state_counts(self) -> Dict[str, int]:
+        """Nombre de tâches suivies par état"""
+        with self._lock:
+            counts: Dict[str, int] = {}
+            for job in self._jobs.values():
+                counts[job["state"]] = counts.get(job["state"], 0) + 1
+            return counts
+
+
+def submit_import_job(file_path: str, game_type: str, chunk_size: int = 5000) -> Tuple[str, str]:
+    """
+    Lance l'import d'un fichier déposé en tâche de fond
+
+    Retourne (identifiant de la tâche, mode utilisé : 'celery' ou 'local').
+    """
+    if settings.USE_CELERY:
+        try:
+            from .tasks import import_draws_file
+            task = import_draws_file.delay(file_path, game_type, chunk_size)
+            return task.id, "celery"
+        except Exception as e:
+            print(f"⚠️ Celery indisponible pour l'import, exécution locale: {e}")
+
+    from .streaming_import import run_draws_import
+    return local_jobs.submit(run_draws_import, file_path, game_type, chunk_size), "local"
+
+
+def _status_response(task_id: str, state: str, info: Any) -> Dict[str, Any]:
+    """Construit la réponse de statut d'une tâche (format commun Celery / local)"""
+    if state == 'PENDING':
+        return {
+            'task_id': task_id,
+            'state': state,
+            'status': 'En attente...'
+        }
+    elif state == 'PROGRESS':
+        info = info or {}
+        return {
+            'task_id': task_id,
+            'state': state,
+            **{key: value for key, value in info.items() if key not in ('status', 'current', 'total')},
+            'status': info.get('status', ''),
+            'current': info.get('current', 0),
+            'total': info.get('total', 100)
+        }
+    elif state == 'SUCCESS':
+        return {
+            'task_id': task_id,
+            'state': state,
+            'status': 'Terminé avec succès',
+            'result': info
+        }
+    return {
+        'task_id': task_id,
+        'state': state,
+        'status': 'Échec',
+        'error': str(info)
+    }
+
+
+def get_task_status(task_id: str) -> Optional[Dict[str, Any]]:
+    """
+    Statut d'une tâche de fond, qu'elle soit locale ou exécutée par Celery
+
+    None si la tâche est inconnue : ni locale, ni consultable côté Celery (Celery
+    désactivé ou backend de résultats injoignable).
+    """
+    job = local_jobs.get(task_id)
+    if job is not None:
+        return _status_response(task_id, job["state"], job["info"])
+    if not settings.USE_CELERY:
+        return None
+
+    from .celery_app import celery_app
+    try:
+        task = celery_app.AsyncResult(task_id)
+        return _status_response(task_id, task.state, task.result if task.state == 'SUCCESS' else task.info)
+    except Exception as e:
+        print(f"⚠️ Statut Celery indisponible pour la tâche {task_id}: {e}")
+        return None
+
+
+# Instance globale
+local_jobs = LocalJobRegistry()
@@ -1,41 +1,93 @@
 import json
-import redis
-from typing import Optional, Any, Dict, List
+import gzip
+import threading
+from typing import Optional, Any, Dict, List, Tuple, Callable
 from datetime import datetime, timedelta
 import hashlib
+from .fast_json import json_default
+
+# Seuil (en octets) au-delà duquel les corps de réponse sont compressés en gzip
+RESPONSE_GZIP_MIN_SIZE = 1024
+
+# Nombre maximal de familles de clés suivies par les compteurs de consultation
+MAX_CACHE_FAMILIES = 200
+
+def cache_family(key: str) -> str:
+    """Famille d'une clé : la clé sans son suffixe de hachage (ex. analysis:loto:gaps)"""
+    return key.rsplit(':', 1)[0] if ':' in key else key
 
 class CacheManager:
     """Gestionnaire de cache Redis pour optimiser les performances"""
     
-    def __init__(self, host='localhost', port=6379, db=0, default_ttl=3600):
+    def __init__(self, host='localhost', port=6379, db=0, default_ttl=3600, connect_in_background=True):
         """
         Initialise le gestionnaire de cache
         
+        La connexion à Redis est tentée dans un thread : l'import du module (et donc le
+        démarrage de l'API) n'attend pas Redis. Tant qu'elle n'est pas établie, le cache
+        se comporte comme désactivé.
+        
         Args:
             host: Adresse du serveur Redis
             port: Port du serveur Redis
             db: Base de données Redis à utiliser
             default_ttl: TTL par défaut en secondes (1 heure)
+            connect_in_background: Se connecter dans un thread plutôt qu'immédiatement
         """
+        self.host = host
+        self.port = port
+        self.db = db
+        self.default_ttl = default_ttl
+        self.connected = False
+        self.redis_client = None
+        self.redis_binary_client = None
+        self._connection_attempted = threading.Event()
+        # Consultations par famille de clés : {famille: {hit, miss, unavailable}}
+        self._lookups: Dict[str, Dict[str, int]] = {}
+        self._lookups_lock = threading.Lock()
+        
+        if connect_in_background:
+            threading.Thread(target=self._connect, name="redis-connect", daemon=True).start()
+        else:
+            self._connect()
+    
+    def _connect(self) -> None:
+        """Établit la connexion à Redis (les clients ne sont publiés qu'en cas de succès)"""
         try:
-            self.redis_client = redis.Redis(
-                host=host, 
-                port=port, 
-                db=db, 
+            import redis
+            
+            redis_client = redis.Redis(
+                host=self.host, 
+                port=self.port, 
+                db=self.db, 
                 decode_responses=True,
                 socket_connect_timeout=5,
                 socket_timeout=5
             )
             # Test de connexion
-            self.redis_client.ping()
+            redis_client.ping()
+            # Client binaire pour les corps de réponse pré-sérialisés (éventuellement gzip)
+            redis_binary_client = redis.Redis(
+                host=self.host, 
+                port=self.port, 
+                db=self.db, 
+                decode_responses=False,
+                socket_connect_timeout=5,
+                socket_timeout=5
+            )
+            self.redis_client = redis_client
+            self.redis_binary_client = redis_binary_client
             self.connected = True
             print("✅ Connexion Redis établie")
         except Exception as e:
             print(f"⚠️ Impossible de se connecter à Redis: {e}")
-            self.connected = False
-            self.redis_client = None
-        
-        self.default_ttl = default_ttl
+        finally:
+            self._connection_attempted.set()
+    
+    def wait_until_ready(self, timeout: float = 5.0) -> bool:
+        """Attend la fin de la tentative de connexion ; retourne True si Redis est disponible"""
+        self._connection_attempted.wait(timeout)
+        return self.connected
     
     def _generate_cache_key(self, prefix: str, **kwargs) -> str:
         """Génère une clé de cache unique basée sur les paramètres"""
@@ -49,17 +101,36 @@ class CacheManager:
         
         return f"{prefix}:{hash_hex}"
     
+    def _count_lookup(self, key: str, result: str) -> None:
+        """Compte une consultation du cache (hit, miss ou unavailable) pour la famille de la clé"""
+        family = cache_family(key)
+        with self._lookups_lock:
+            counters = self._lookups.get(family)
+            if counters is None:
+                if len(self._lookups) >= MAX_CACHE_FAMILIES:
+                    family = '<other>'
+                counters = self._lookups.setdefault(family, {'hit': 0, 'miss': 0, 'unavailable': 0})
+            counters[result] += 1
+    
+    def lookup_counts(self) -> Dict[str, Dict[str, int]]:
+        """Copie des compteurs de consultation par famille de clés"""
+        with self._lookups_lock:
+            return {family: dict(counters) for family, counters in self._lookups.items()}
+    
     def get(self, key: str) -> Optional[Any]:
         """Récupère une valeur du cache"""
         if not self.connected or not self.redis_client:
+            self._count_lookup(key, 'unavailable')
             return None
         
         try:
             value = self.redis_client.get(key)
+            self._count_lookup(key, 'hit' if value else 'miss')
             if value:
                 return json.loads(value)
             return None
         except Exception as e:
+            self._count_lookup(key, 'unavailable')
             print(f"Erreur lors de la récupération du cache: {e}")
             return None
     
@@ -70,12 +141,51 @@ class CacheManager:
         
         try:
             ttl = ttl or self.default_ttl
-            serialized_value = json.dumps(value, default=str)
+            serialized_value = json.dumps(value, default=json_default)
             return self.redis_client.setex(key, ttl, serialized_value)
         except Exception as e:
             print(f"Erreur lors du stockage en cache: {e}")
             return False
     
+    def get_response_bytes(self, key: str) -> Optional[Tuple[bytes, bool]]:
+        """
+        Récupère un corps de réponse pré-sérialisé
+        
+        Returns:
+            Tuple (octets du corps, compressé en gzip) ou None si absent
+        """
+        if not self.connected or not self.redis_binary_client:
+            self._count_lookup(key, 'unavailable')
+            return None
+        
+        try:
+            value = self.redis_binary_client.get(key)
+            self._count_lookup(key, 'hit' if value else 'miss')
+            if not value:
+                return None
+            # Le premier octet indique si le corps est compressé
+            return value[1:], value[:1] == b'1'
+        except Exception as e:
+            self._count_lookup(key, 'unavailable')
+            print(f"Erreur lors de la récupération du corps de réponse: {e}")
+            return None
+    
+    def set_response_bytes(self, key: str, body: bytes, ttl: Optional[int] = None, compress: bool = True) -> bool:
+        """Stocke un corps de réponse déjà encodé (compressé en gzip s'il est volumineux)"""
+        if not self.connected or not self.redis_binary_client:
+            return False
+        
+        try:
+            ttl = ttl or self.default_ttl
+            if compress and len(body) >= RESPONSE_GZIP_MIN_SIZE:
+                payload = b'1' + gzip.compress(body, compresslevel=6)
+            else:
+                payload = b'0' + body
+            return self.redis_binary_client.setex(key, ttl, payload)
+        except Exception as e:
+            print(f"Erreur lors du stockage du corps de réponse: {e}")
+            return False
+    
     def delete(self, key: str) -> bool:
         """Supprime une clé du cache"""
         if not self.connected or not self.redis_client:
@@ -137,6 +247,40 @@ class CacheManager:
         )
         return self.set(cache_key, stats, ttl)
     
+    def quick_stats_response_key(self, game_type: str, year: Optional[int] = None, month: Optional[int] = None) -> str:
+        """Clé du corps de réponse pré-sérialisé des statistiques rapides"""
+        return self._generate_cache_key(
+            f"response:quick_stats:{game_type}", 
+            year=year, 
+            month=month
+        )
+    
+    def get_analysis_cache(self, game_type: str, analysis: str, **params) -> Optional[Any]:
+        """Récupère le résultat d'une analyse (stats complètes, gaps, combinaisons...)"""
+        cache_key = self._generate_cache_key(f"analysis:{game_type}:{analysis}", **params)
+        return self.get(cache_key)
+    
+    def set_analysis_cache(self, game_type: str, analysis: str, result: Any, ttl: int = 1800, **params) -> bool:
+        """Stocke le résultat d'une analyse (TTL: 30 minutes)"""
+        cache_key = self._generate_cache_key(f"analysis:{game_type}:{analysis}", **params)
+        return self.set(cache_key, result, ttl)
+    
+    def get_or_compute_analysis(self, game_type: str, analysis: str, compute: Callable[[], Any],
+                                ttl: int = 1800, **params) -> Any:
+        """
+        Retourne le résultat d'une analyse depuis le cache, ou le calcule et le met en cache
+        
+        Les résultats contenant une clé "error" ne sont pas mis en cache.
+        """
+        cached_result = self.get_analysis_cache(game_type, analysis, **params)
+        if cached_result is not None:
+            return cached_result
+        
+        result = compute()
+        if not (isinstance(result, dict) and "error" in result):
+            self.set_analysis_cache(game_type, analysis, result, ttl, **params)
+        return result
+    
     def get_generation_cache(self, game_type: str, strategy: str, params: Dict) -> Optional[List]:
         """Récupère une génération du cache"""
         cache_key = self._generate_cache_key(
@@ -161,6 +305,19 @@ class CacheManager:
         """Nettoie le cache des générations pour un jeu"""
         return self.clear_pattern(f"generation:{game_type}:*")
     
+    def clear_response_cache(self, game_type: str) -> int:
+        """Nettoie les corps de réponse pré-sérialisés pour un jeu"""
+        return self.clear_pattern(f"response:*:{game_type}:*")
+    
+    def invalidate_game_caches(self, game_type: str) -> int:
+        """Invalide tous les caches dérivés des tirages d'un jeu (après un import par exemple)"""
+        cleared = 0
+        for pattern in (f"stats:{game_type}:*", f"quick_stats:{game_type}:*",
+                        f"analysis:{game_type}:*", f"generation:{game_type}:*"):
+            cleared += self.clear_pattern(pattern)
+        cleared += self.clear_response_cache(game_type)
+        return cleared
+    
     def get_cache_info(self) -> Dict:
         """Récupère les informations sur le cache"""
         if not self.connected or not self.redis_client:
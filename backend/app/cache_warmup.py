@@ -0,0 +1,249 @@
+"""
+Préchauffage du cache
+Précalcule les statistiques standard des deux jeux (stats rapides, statistiques complètes,
+analyses des gaps et des combinaisons, ventilations annuelles) pour que les premiers
+utilisateurs après un déploiement ou un import ne paient pas le coût du calcul
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional
+
+from config import settings
+from .cache_manager import cache_manager
+from .database import session_scope
+
+GAME_TYPES = ['euromillions', 'loto']
+
+
+class WarmupStep:
+    """Étape de préchauffage : un calcul mis en cache, avec ses dépendances"""
+
+    def __init__(self, name: str, game_type: str, run: Callable[[Any, Dict[str, Any]], Any],
+                 depends_on: Optional[List[str]] = None):
+        self.name = name
+        self.game_type = game_type
+        self.run = run
+        self.depends_on = depends_on or []
+
+    @property
+    def key(self) -> str:
+        return f"{self.game_type}:{self.name}"
+
+
+# --- Étapes Euromillions ---
+
+def _euromillions_quick_stats(db, results: Dict[str, Any]) -> None:
+    from .routers.euromillions import get_quick_stats
+    get_quick_stats(request=None, year=None, month=None, db=db)
+
+
+def _euromillions_comprehensive(db, results: Dict[str, Any]) -> List[str]:
+    from .routers.euromillions_advanced import get_cached_comprehensive_stats
+    stats = get_cached_comprehensive_stats(db)
+    return [str(year) for year in stats.get("yearly_stats", {})]
+
+
+def _euromillions_gap_analysis(db, results: Dict[str, Any]) -> None:
+    from .routers.euromillions import get_gap_analysis
+    get_gap_analysis(db=db)
+
+
+def _euromillions_combination_analysis(db, results: Dict[str, Any]) -> None:
+    from .routers.euromillions import get_combination_analysis
+    get_combination_analysis(min_size=2, max_size=4, db=db)
+
+
+def _euromillions_number_analysis(db, results: Dict[str, Any]) -> None:
+    from .routers.advanced_stats import get_cached_number_analysis, get_cached_prediction_insights
+    get_cached_number_analysis(db, None)
+    get_cached_prediction_insights(db, None)
+
+
+def _euromillions_yearly(db, results: Dict[str, Any]) -> int:
+    from .routers.euromillions import get_quick_stats
+    from .routers.advanced_stats import get_cached_number_analysis
+    years = results.get("euromillions:comprehensive") or []
+    for year in years:
+        get_quick_stats(request=None, year=int(year), month=None, db=db)
+        get_cached_number_analysis(db, int(year))
+    return len(years)
+
+
+# --- Étapes Loto ---
+
+def _loto_quick_stats(db, results: Dict[str, Any]) -> None:
+    from .routers.loto import get_quick_stats
+    get_quick_stats(request=None, year=None, month=None, db=db)
+
+
+def _loto_comprehensive(db, results: Dict[str, Any]) -> List[str]:
+    from .routers.loto_advanced import get_cached_comprehensive_stats
+    stats = get_cached_comprehensive_stats(db)
+    return [str(year) for year in stats.get("yearly_stats", {})]
+
+
+def _loto_yearly(db, results: Dict[str, Any]) -> int:
+    from .routers.loto import get_quick_stats
+    years = results.get("loto:comprehensive") or []
+    for year in years:
+        get_quick_stats(request=None, year=int(year), month=None, db=db)
+    return len(years)
+
+
+WARMUP_STEPS = [
+    WarmupStep("quick_stats", "euromillions", _euromillions_quick_stats),
+    WarmupStep("comprehensive", "euromillions", _euromillions_comprehensive),
+    WarmupStep("gap_analysis", "euromillions", _euromillions_gap_analysis),
+    WarmupStep("combination_analysis", "euromillions", _euromillions_combination_analysis),
+    WarmupStep("number_analysis", "euromillions", _euromillions_number_analysis),
+    WarmupStep("yearly", "euromillions", _euromillions_yearly, depends_on=["comprehensive"]),
+    WarmupStep("quick_stats", "loto", _loto_quick_stats),
+    WarmupStep("comprehensive", "loto", _loto_comprehensive),
+    WarmupStep("yearly", "loto", _loto_yearly, depends_on=["comprehensive"]),
+]
+
+
+class CacheWarmupPipeline:
+    """Exécute les étapes de préchauffage par vagues, dans l'ordre des dépendances"""
+
+    def __init__(self, steps: List[WarmupStep], max_workers: int = 2):
+        self.steps = steps
+        self.max_workers = max(1, max_workers)
+        self._lock = threading.Lock()
+        self._running = False
+        self._pending_games = set()
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def _build_waves(self, game_types: List[str]) -> List[List[WarmupStep]]:
+        """Regroupe les étapes en vagues : une étape ne démarre qu'après ses dépendances"""
+        remaining = [step for step in self.steps if step.game_type in game_types]
+        done = set()
+        waves = []
+
+        while remaining:
+            wave = [
+                step for step in remaining
+                if all(f"{step.game_type}:{dep}" in done for dep in step.depends_on)
+            ]
+            if not wave:
+                raise ValueError(f"Dépendances circulaires: {[step.key for step in remaining]}")
+            waves.append(wave)
+            done.update(step.key for step in wave)
+            remaining = [step for step in remaining if step not in wave]
+
+        return waves
+
+    def _run_step(self, step: WarmupStep, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Exécute une étape avec sa propre session de base de données"""
+        start_time = time.time()
+        try:
+            with session_scope() as db:
+                results[step.key] = step.run(db, results)
+            status = "success"
+            error = None
+        except Exception as e:
+            status = "error"
+            error = str(e)
+
+        return {
+            "step": step.key,
+            "status": status,
+            "error": error,
+            "duration": round(time.time() - start_time, 3)
+        }
+
+    def run(self, game_types: Optional[List[str]] = None) -> Dict[str, Any]:
+        """Préchauffe le cache pour les jeux demandés (tous par défaut)"""
+        game_types = [game for game in (game_types or GAME_TYPES) if game in GAME_TYPES]
+
+        # Au démarrage, la connexion Redis peut encore être en cours
+        if not cache_manager.wait_until_ready():
+            return {"status": "skipped", "reason": "Redis non connecté", "game_types": game_types}
+
+        start_time = time.time()
+        results: Dict[str, Any] = {}
+        step_reports = []
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            for wave in self._build_waves(game_types):
+                step_reports.extend(executor.map(lambda step: self._run_step(step, results), wave))
+
+        errors = [report for report in step_reports if report["status"] == "error"]
+        report = {
+            "status": "error" if errors else "success",
+            "game_types": game_types,
+            "steps": step_reports,
+            "errors": len(errors),
+            "duration": round(time.time() - start_time, 3),
+            "timestamp": datetime.now().isoformat()
+        }
+        self.last_report = report
+
+        print(f"🔥 Préchauffage du cache {game_types}: {len(step_reports) - len(errors)}/{len(step_reports)} "
+              f"étapes en {report['duration']}s")
+        return report
+
+    def run_in_background(self, game_types: Optional[List[str]] = None) -> bool:
+        """
+        Lance le préchauffage dans un thread de l'API
+
+        Si un préchauffage est déjà en cours, les jeux demandés sont regroupés et
+        traités par une passe supplémentaire dès la fin de la passe courante.
+        Retourne True si un nouveau thread a été démarré.
+        """
+        with self._lock:
+            self._pending_games.update(game_types or GAME_TYPES)
+            if self._running:
+                return False
+            self._running = True
+
+        def worker():
+            while True:
+                with self._lock:
+                    games = sorted(self._pending_games)
+                    self._pending_games.clear()
+                    if not games:
+                        self._running = False
+                        return
+                try:
+                    self.run(games)
+                except Exception as e:
+                    print(f"❌ Erreur lors du préchauffage du cache: {e}")
+
+        threading.Thread(target=worker, name="cache-warmup", daemon=True).start()
+        return True
+
+
+def schedule_cache_warmup(game_types: Optional[List[str]] = None, invalidate: bool = True) -> str:
+    """
+    Invalide les caches des jeux concernés puis planifie leur préchauffage
+
+    Utilise Celery si configuré (USE_CELERY), sinon un thread dans le processus de l'API.
+    Retourne le mode utilisé : 'celery', 'thread' ou 'disabled'.
+    """
+    game_types = game_types or GAME_TYPES
+
+    if invalidate:
+        for game_type in game_types:
+            cache_manager.invalidate_game_caches(game_type)
+
+    if not settings.CACHE_WARMUP_ENABLED:
+        return "disabled"
+
+    if settings.USE_CELERY:
+        try:
+            from .tasks import warm_up_cache
+            warm_up_cache.delay(list(game_types))
+            return "celery"
+        except Exception as e:
+            print(f"⚠️ Celery indisponible pour le préchauffage, exécution locale: {e}")
+
+    cache_warmup.run_in_background(list(game_types))
+    return "thread"
+
+
+# Instance globale
+cache_warmup = CacheWarmupPipeline(WARMUP_STEPS, max_workers=settings.CACHE_WARMUP_MAX_WORKERS)
@@ -1,6 +1,8 @@
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_prerun, task_postrun
 import os
+import time
 
 # Configuration Celery
 celery_app = Celery(
@@ -41,5 +43,20 @@ celery_app.conf.beat_schedule = {
     },
 }
 
+# Durée des tâches (série 'task' du latency_store du processus qui les exécute)
+_task_start_times = {}
+
+@task_prerun.connect
+def record_task_start(task_id=None, task=None, **kwargs):
+    _task_start_times[task_id] = time.perf_counter()
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    start_time = _task_start_times.pop(task_id, None)
+    if start_time is None:
+        return
+    from .latency_metrics import latency_store
+    latency_store.record('task', task.name, time.perf_counter() - start_time, (state or 'unknown').lower())
+
 if __name__ == '__main__':
     celery_app.start() 
\ No newline at end of file
@@ -0,0 +1,276 @@
+"""
+Import et export colonnes (Parquet et Arrow IPC)
+Les tirages et les tables d'analyse sont écrits avec un schéma typé (dates, entiers) ;
+les fichiers importés sont lus par projection mémoire, sans copie des colonnes
+"""
+
+import itertools
+import os
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from .exporters import (
+    DRAW_EXPORT_COLUMNS, EXPORT_BATCH_SIZE, draws_query, iter_draw_rows, new_temp_path, stream_temp_file
+)
+from .utils import CSV_TO_EXCEL_COLUMNS, NUMBER_RANGES, parse_euromillions_excel, parse_loto_excel
+
+# Groupes de numéros par jeu : type -> (colonnes, numéro maximal)
+NUMBER_GROUPS = {
+    'euromillions': {
+        'numero': (['n1', 'n2', 'n3', 'n4', 'n5'], NUMBER_RANGES['euromillions']['numero']),
+        'etoile': (['e1', 'e2'], NUMBER_RANGES['euromillions']['etoile']),
+    },
+    'loto': {
+        'numero': (['n1', 'n2', 'n3', 'n4', 'n5', 'n6'], NUMBER_RANGES['loto']['numero']),
+        'complementaire': (['complementaire'], NUMBER_RANGES['loto']['complementaire']),
+    },
+}
+
+ANALYSIS_TABLES = ('frequencies', 'pairs', 'gaps')
+
+# Extensions de fichier acceptées à l'import
+COLUMNAR_EXTENSIONS = {
+    '.parquet': 'parquet',
+    '.arrow': 'arrow',
+    '.feather': 'arrow',
+    '.ipc': 'arrow',
+}
+
+# Colonnes des fichiers colonnes (noms du modèle) vers les en-têtes Excel (mêmes règles de validation)
+COLUMNAR_TO_EXCEL_COLUMNS = {
+    'date': 'Date du tirage',
+    **{f'n{i}': f'N°{i}' for i in range(1, 7)},
+    'e1': 'Étoile 1', 'e2': 'Étoile 2',
+    'complementaire': 'Bonus'
+}
+
+REQUIRED_EXCEL_COLUMNS = {
+    'euromillions': ['Date du tirage'] + [f'N°{i}' for i in range(1, 6)] + ['Étoile 1', 'Étoile 2'],
+    'loto': ['Date du tirage'] + [f'N°{i}' for i in range(1, 7)] + ['Bonus'],
+}
+
+
+def columnar_format_for(filename: str) -> Optional[str]:
+    """Format colonnes ('parquet' ou 'arrow') d'après l'extension du fichier"""
+    return COLUMNAR_EXTENSIONS.get(os.path.splitext(filename or '')[1].lower())
+
+
+def draws_schema(game_type: str):
+    """Schéma Arrow des tirages : date typée et numéros en entiers 8 bits"""
+    import pyarrow as pa
+
+    _, columns = DRAW_EXPORT_COLUMNS[game_type]
+    return pa.schema(
+        [pa.field('date', pa.date32())] + [pa.field(attribute, pa.int8()) for _, attribute in columns[1:]]
+    )
+
+
+def _open_writer(path: str, schema, export_format: str):
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if export_format == 'parquet':
+        return pq.ParquetWriter(path, schema, compression='zstd')
+    return pa.ipc.new_file(path, schema)
+
+
+def stream_draws_columnar(game_type: str, export_format: str, year: Optional[int] = None) -> Iterator[bytes]:
+    """
+    Exporte les tirages en Parquet ou Arrow par paquets de EXPORT_BATCH_SIZE lignes
+
+    Chaque paquet devient un RecordBatch écrit aussitôt sur disque ; le fichier
+    (dont les métadonnées sont écrites en dernier) est ensuite envoyé par blocs.
+    """
+    import pyarrow as pa
+
+    schema = draws_schema(game_type)
+    rows = iter_draw_rows(game_type, year, format_dates=False)
+    path = new_temp_path(f'.{export_format}')
+
+    try:
+        writer = _open_writer(path, schema, export_format)
+        try:
+            while True:
+                batch = list(itertools.islice(rows, EXPORT_BATCH_SIZE))
+                if not batch:
+                    break
+                columns = [pa.array(values, type=field.type) for values, field in zip(zip(*batch), schema)]
+                writer.write_batch(pa.record_batch(columns, schema=schema))
+        finally:
+            writer.close()
+    except Exception:
+        os.unlink(path)
+        raise
+
+    yield from stream_temp_file(path)
+
+
+def _write_table(table, export_format: str) -> str:
+    """Écrit une table Arrow dans un fichier temporaire et retourne son chemin"""
+    path = new_temp_path(f'.{export_format}')
+    try:
+        writer = _open_writer(path, table.schema, export_format)
+        try:
+            writer.write_table(table)
+        finally:
+            writer.close()
+    except Exception:
+        os.unlink(path)
+        raise
+    return path
+
+
+def load_draws_frame(db, game_type: str, year: Optional[int] = None) -> pd.DataFrame:
+    """Tirages d'un jeu en DataFrame (colonnes du modèle), du plus ancien au plus récent"""
+    _, columns = DRAW_EXPORT_COLUMNS[game_type]
+    rows = draws_query(db, game_type, year).all()
+    df = pd.DataFrame(rows, columns=[attribute for _, attribute in columns])
+    return df.iloc[::-1].reset_index(drop=True)
+
+
+def presence_matrix(values: np.ndarray, max_number: int) -> np.ndarray:
+    """Matrice booléenne tirages x numéros (colonne k = numéro k + 1)"""
+    size = max(max_number, int(values.max()) if values.size else 0)
+    presence = np.zeros((len(values), size + 1), dtype=bool)
+    presence[np.repeat(np.arange(len(values)), values.shape[1]), values.ravel()] = True
+    return presence[:, 1:]
+
+
+def _frequencies_table(snapshot):
+    import pyarrow as pa
+
+    kinds, numbers, counts, frequencies = [], [], [], []
+    for kind in NUMBER_GROUPS[snapshot.game_type]:
+        group_counts = snapshot.counts(kind)
+        kinds.extend([kind] * len(group_counts))
+        numbers.append(np.arange(1, len(group_counts) + 1))
+        counts.append(group_counts)
+        frequencies.append(group_counts / max(snapshot.draw_count, 1) * 100)
+
+    return pa.table({
+        'kind': pa.array(kinds, type=pa.string()),
+        'number': pa.array(np.concatenate(numbers), type=pa.int8()),
+        'count': pa.array(np.concatenate(counts), type=pa.int32()),
+        'frequency_pct': pa.array(np.round(np.concatenate(frequencies), 4), type=pa.float64()),
+    })
+
+
+def _pairs_table(snapshot):
+    """Matrice des paires de numéros principaux, sous forme longue (number_a < number_b)"""
+    import pyarrow as pa
+
+    co_occurrences = snapshot.arrays['numero_pairs']
+    number_a, number_b = np.triu_indices(len(co_occurrences), k=1)
+
+    return pa.table({
+        'number_a': pa.array(number_a + 1, type=pa.int8()),
+        'number_b': pa.array(number_b + 1, type=pa.int8()),
+        'count': pa.array(co_occurrences[number_a, number_b], type=pa.int32()),
+    })
+
+
+def _gaps_table(snapshot):
+    """État des écarts par numéro : dernière sortie, écart actuel, écarts moyen et maximal"""
+    import pyarrow as pa
+
+    rows: Dict[str, List] = {key: [] for key in
+                             ('kind', 'number', 'appearances', 'last_date', 'current_gap', 'mean_gap', 'max_gap')}
+    dates = snapshot.arrays['dates']
+
+    for kind in NUMBER_GROUPS[snapshot.game_type]:
+        state = snapshot.gap_state(kind)
+        for index, last_seen in enumerate(state['last_seen']):
+            seen = last_seen >= 0
+            has_gaps = state['gap_count'][index] > 0
+            rows['kind'].append(kind)
+            rows['number'].append(index + 1)
+            rows['appearances'].append(int(state['appearances'][index]))
+            rows['last_date'].append(dates[last_seen].item() if seen else None)
+            rows['current_gap'].append(int(state['current_gap'][index]) if seen else None)
+            rows['mean_gap'].append(float(state['mean_gap'][index]) if has_gaps else None)
+            rows['max_gap'].append(int(state['max_gap'][index]) if has_gaps else None)
+
+    return pa.table({
+        'kind': pa.array(rows['kind'], type=pa.string()),
+        'number': pa.array(rows['number'], type=pa.int8()),
+        'appearances': pa.array(rows['appearances'], type=pa.int32()),
+        'last_date': pa.array(rows['last_date'], type=pa.date32()),
+        'current_gap': pa.array(rows['current_gap'], type=pa.int32()),
+        'mean_gap': pa.array(rows['mean_gap'], type=pa.float64()),
+        'max_gap': pa.array(rows['max_gap'], type=pa.int32()),
+    })
+
+
+ANALYSIS_BUILDERS = {
+    'frequencies': _frequencies_table,
+    'pairs': _pairs_table,
+    'gaps': _gaps_table,
+}
+
+
+def build_analysis_table(db, game_type: str, table: str, year: Optional[int] = None):
+    """
+    Calcule une table d'analyse (fréquences, paires ou écarts) en table Arrow typée
+
+    Sans filtre d'année, les agrégats viennent de l'instantané courant du jeu, partagé
+    entre les workers (voir shared_draw_store) ; pour une année, ils sont calculés sur
+    les tirages de l'année.
+    """
+    from .draw_snapshot import DrawSnapshot
+    from .shared_draw_store import shared_draws
+
+    if year is None:
+        snapshot = shared_draws.get(db, game_type)
+    else:
+        snapshot = DrawSnapshot.build(db, game_type, year)
+    return ANALYSIS_BUILDERS[table](snapshot)
+
+
+def stream_analysis_table(db, game_type: str, table: str, export_format: str,
+                          year: Optional[int] = None) -> Iterator[bytes]:
+    """Calcule la table d'analyse (quelques milliers de lignes au plus) puis l'envoie par blocs"""
+    path = _write_table(build_analysis_table(db, game_type, table, year), export_format)
+    return stream_temp_file(path)
+
+
+def read_columnar_file(path: str, file_format: str) -> pd.DataFrame:
+    """
+    Lit un fichier Parquet ou Arrow par projection mémoire
+
+    Les fichiers Arrow sont lus sans copie ; les deux formats conservent les types
+    (dates comprises) écrits à l'export.
+    """
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if file_format == 'parquet':
+        table = pq.read_table(path, memory_map=True)
+    else:
+        with pa.memory_map(path, 'r') as source:
+            try:
+                table = pa.ipc.open_file(source).read_all()
+            except pa.ArrowInvalid:
+                source.seek(0)
+                table = pa.ipc.open_stream(source).read_all()
+    return table.to_pandas()
+
+
+def parse_columnar_draws(path: str, file_format: str, game_type: str) -> Tuple[List[Dict], List[str]]:
+    """
+    Lit et valide les tirages d'un fichier Parquet ou Arrow
+
+    Les colonnes peuvent porter les noms du modèle (date, n1, ...) ou les en-têtes CSV ;
+    la validation est celle de l'import Excel. Retourne (tirages valides, erreurs par ligne).
+    """
+    df = read_columnar_file(path, file_format)
+    df = df.rename(columns={**CSV_TO_EXCEL_COLUMNS, **COLUMNAR_TO_EXCEL_COLUMNS}).reset_index(drop=True)
+
+    missing_columns = [column for column in REQUIRED_EXCEL_COLUMNS[game_type] if column not in df.columns]
+    if missing_columns:
+        raise ValueError(f"Colonnes manquantes: {', '.join(missing_columns)}")
+
+    if game_type == 'euromillions':
+        return parse_euromillions_excel(df)
+    return parse_loto_excel(df)
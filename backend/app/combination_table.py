@@ -0,0 +1,509 @@
+"""
+Table énumérée de toutes les combinaisons d'un groupe de numéros et de leurs caractéristiques
+Les C(50,5) = 2 118 760 combinaisons Euromillions et C(49,6) = 13 983 816 combinaisons Loto
+sont énumérées une fois (ordre lexicographique), avec pour chacune sa somme, son nombre
+d'impairs, de numéros bas, sa signature par dizaines et ses suites de numéros consécutifs.
+Les colonnes sont enregistrées en .npy et projetées en mémoire : une génération sous
+contraintes devient un filtre indexé suivi d'un tirage uniforme ou pondéré, exact et sans
+nouvel essai.
+"""
+
+import json
+import math
+import os
+import shutil
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from .latency_metrics import latency_store
+
+# Version du format : une table d'une autre version est reconstruite
+COMBINATION_TABLE_FORMAT_VERSION = 1
+
+# Groupes énumérés : (jeu, groupe) -> (numéro maximal, numéros par combinaison, plus grand numéro "bas")
+# Bas/hauts selon les analyses de patterns : 1-25 à l'Euromillions, 1-22 au Loto
+COMBINATION_GROUPS = {
+    ('euromillions', 'numero'): (50, 5, 25),
+    ('euromillions', 'etoile'): (12, 2, 6),
+    ('loto', 'numero'): (49, 6, 22),
+}
+
+# Caractéristiques précalculées (colonnes de la table) et leur type
+FEATURES = {
+    'sum': np.uint16,
+    'odd': np.uint8,
+    'low': np.uint8,
+    'decades': np.uint16,
+    'consecutive': np.uint8,
+    'longest_run': np.uint8,
+}
+
+# Dizaines 1-10, 11-20, ..., 41-50 ; 3 bits par dizaine dans la signature compactée
+DECADE_COUNT = 5
+DECADE_BITS = 3
+
+# Contraintes acceptées : nom -> (caractéristique, comparaison)
+CONSTRAINTS = {
+    'sum_min': ('sum', 'min'),
+    'sum_max': ('sum', 'max'),
+    'odd': ('odd', 'eq'),
+    'low': ('low', 'eq'),
+    'decades': ('decades', 'eq'),
+    'consecutive': ('consecutive', 'eq'),
+    'max_consecutive': ('consecutive', 'max'),
+    'max_run': ('longest_run', 'max'),
+}
+
+# Listes d'indices gardées par table pour les contraintes les plus récentes
+SELECTION_CACHE_SIZE = 8
+
+# Combinaisons pondérées par paquet lors d'un tirage pondéré
+WEIGHT_CHUNK_ROWS = 1_000_000
+
+
+def enumerate_combinations(max_number: int, size: int) -> np.ndarray:
+    """
+    Toutes les combinaisons de size numéros parmi 1..max_number, en ordre lexicographique
+
+    Construction par blocs : les combinaisons commençant par f sont f suivi des
+    combinaisons de size - 1 numéros pris au-delà de f (blocs partagés entre préfixes).
+    """
+    blocks: Dict[Tuple[int, int], np.ndarray] = {}
+
+    def block(width: int, start: int) -> np.ndarray:
+        if width == 0:
+            return np.zeros((1, 0), dtype=np.int8)
+        key = (width, start)
+        if key not in blocks:
+            parts = []
+            for first in range(start, max_number - width + 2):
+                rest = block(width - 1, first + 1)
+                part = np.empty((len(rest), width), dtype=np.int8)
+                part[:, 0] = first
+                part[:, 1:] = rest
+                parts.append(part)
+            blocks[key] = np.concatenate(parts)
+        return blocks[key]
+
+    return block(size, 1)
+
+
+def pack_decades(counts) -> int:
+    """Signature compactée d'une répartition par dizaines (nombre de numéros de chaque dizaine)"""
+    return sum(int(count) << (DECADE_BITS * decade) for decade, count in enumerate(counts))
+
+
+def unpack_decades(signature: int) -> str:
+    """Répartition par dizaines d'une signature compactée, au format des analyses ("21110")"""
+    mask = (1 << DECADE_BITS) - 1
+    return ''.join(str((int(signature) >> (DECADE_BITS * decade)) & mask) for decade in range(DECADE_COUNT))
+
+
+def parse_decades(pattern: str) -> int:
+    """Signature compactée d'une répartition "21110" (un chiffre par dizaine)"""
+    if len(pattern) != DECADE_COUNT or not pattern.isdigit():
+        raise ValueError(f"Répartition par dizaines invalide: {pattern} ({DECADE_COUNT} chiffres attendus)")
+    return pack_decades(int(digit) for digit in pattern)
+
+
+def combination_features(numbers: np.ndarray, low_max: int) -> Dict[str, np.ndarray]:
+    """Caractéristiques de chaque ligne d'une matrice de combinaisons triées"""
+    numbers = np.asarray(numbers, dtype=np.int8)
+    features = {
+        'sum': numbers.sum(axis=1, dtype=np.uint16),
+        'odd': (numbers & 1).sum(axis=1, dtype=np.uint8),
+        'low': (numbers <= low_max).sum(axis=1, dtype=np.uint8),
+    }
+
+    decades = np.zeros(len(numbers), dtype=np.uint16)
+    decade_index = ((numbers - 1) // 10).astype(np.uint16)
+    for column in range(numbers.shape[1]):
+        decades += np.left_shift(np.uint16(1), decade_index[:, column] * DECADE_BITS)
+    features['decades'] = decades
+
+    steps = np.diff(numbers, axis=1) == 1
+    features['consecutive'] = steps.sum(axis=1, dtype=np.uint8)
+    run = np.ones(len(numbers), dtype=np.uint8)
+    longest = np.ones(len(numbers), dtype=np.uint8)
+    for column in range(steps.shape[1]):
+        run = np.where(steps[:, column], run + 1, 1).astype(np.uint8)
+        np.maximum(longest, run, out=longest)
+    features['longest_run'] = longest
+    return features
+
+
+class CombinationTable:
+    """
+    Combinaisons d'un groupe de numéros et leurs caractéristiques
+
+    arrays contient 'numbers' (une combinaison triée par ligne, int8) et une colonne par
+    caractéristique de FEATURES ; ils peuvent être des projections mémoire en lecture seule.
+    """
+
+    def __init__(self, game_type: str, kind: str, arrays: Dict[str, np.ndarray]):
+        self.game_type = game_type
+        self.kind = kind
+        self.arrays = arrays
+        self.max_number, self.size, self.low_max = COMBINATION_GROUPS[(game_type, kind)]
+        self._selections: 'OrderedDict[Tuple, np.ndarray]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def build(cls, game_type: str, kind: str) -> 'CombinationTable':
+        """Énumère les combinaisons du groupe et calcule leurs caractéristiques"""
+        max_number, size, low_max = COMBINATION_GROUPS[(game_type, kind)]
+        numbers = enumerate_combinations(max_number, size)
+        return cls(game_type, kind, {'numbers': numbers, **combination_features(numbers, low_max)})
+
+    def __len__(self) -> int:
+        return len(self.arrays['numbers'])
+
+    # --- Filtre ---
+
+    def mask(self, **constraints) -> Optional[np.ndarray]:
+        """
+        Masque des combinaisons respectant les contraintes (None : aucune contrainte)
+
+        Contraintes (voir CONSTRAINTS) : sum_min, sum_max, odd, low, decades (signature
+        compactée ou répartition "21110"), consecutive, max_consecutive, max_run.
+        """
+        mask = None
+        for name, value in constraints.items():
+            if value is None:
+                continue
+            if name not in CONSTRAINTS:
+                raise ValueError(f"Contrainte inconnue: {name}")
+            feature, comparison = CONSTRAINTS[name]
+            if name == 'decades' and isinstance(value, str):
+                value = parse_decades(value)
+            column = self.arrays[feature]
+            if comparison == 'eq':
+                condition = column == value
+            elif comparison == 'min':
+                condition = column >= value
+            else:
+                condition = column <= value
+            mask = condition if mask is None else mask & condition
+        return mask
+
+    def select(self, **constraints) -> Optional[np.ndarray]:
+        """Indices des combinaisons respectant les contraintes (None : toutes), gardés pour les contraintes récentes"""
+        key = tuple(sorted((name, value) for name, value in constraints.items() if value is not None))
+        if not key:
+            return None
+        with self._lock:
+            if key in self._selections:
+                self._selections.move_to_end(key)
+                return self._selections[key]
+
+        indices = np.flatnonzero(self.mask(**constraints)).astype(np.int32)
+        with self._lock:
+            self._selections[key] = indices
+            while len(self._selections) > SELECTION_CACHE_SIZE:
+                self._selections.popitem(last=False)
+        return indices
+
+    def count(self, **constraints) -> int:
+        """Nombre de combinaisons respectant les contraintes"""
+        indices = self.select(**constraints)
+        return len(self) if indices is None else len(indices)
+
+    # --- Tirage ---
+
+    def sample(self, count: int = 1, weights: Optional[np.ndarray] = None,
+               rng: Optional[np.random.Generator] = None, **constraints) -> np.ndarray:
+        """
+        count combinaisons distinctes respectant les contraintes (une par ligne)
+
+        Sans poids, le tirage est uniforme parmi les combinaisons retenues. Avec weights
+        (un poids par numéro, 1..max_number), une combinaison a pour poids le produit des
+        poids de ses numéros (tirage sans remise par clés de Gumbel).
+        """
+        rng = rng or np.random.default_rng()
+        indices = self.select(**constraints)
+        available = len(self) if indices is None else len(indices)
+        if available == 0:
+            raise ValueError("Aucune combinaison ne respecte ces contraintes")
+        count = min(count, available)
+
+        if weights is None:
+            picked = rng.choice(available, size=count, replace=False)
+        else:
+            picked = self._weighted_positions(self._log_weights(weights, indices), count, rng)
+
+        if indices is not None:
+            picked = indices[picked]
+        return np.asarray(self.arrays['numbers'][np.sort(picked)])[rng.permutation(count)]
+
+    def _log_weights(self, weights: np.ndarray, indices: Optional[np.ndarray]) -> np.ndarray:
+        """Logarithme du poids de chaque combinaison retenue, par paquets (mémoire bornée)"""
+        log_weights = np.zeros(self.max_number + 1, dtype=np.float32)
+        log_weights[1:] = np.log(np.maximum(np.asarray(weights, dtype=float)[:self.max_number], 1e-12))
+        numbers = self.arrays['numbers']
+        total = len(numbers) if indices is None else len(indices)
+        keys = np.zeros(total, dtype=np.float32)
+        for first in range(0, total, WEIGHT_CHUNK_ROWS):
+            last = min(first + WEIGHT_CHUNK_ROWS, total)
+            rows = np.asarray(numbers[first:last] if indices is None else numbers[indices[first:last]])
+            chunk = keys[first:last]
+            for column in range(rows.shape[1]):
+                chunk += log_weights.take(rows[:, column])
+        return keys
+
+    @staticmethod
+    def _weighted_positions(log_keys: np.ndarray, count: int, rng: np.random.Generator) -> np.ndarray:
+        """
+        count positions distinctes, chacune tirée proportionnellement à son poids parmi les restantes
+
+        Peu de grilles parmi beaucoup de combinaisons : tirages avec remise sur la fonction
+        de répartition, les doublons étant écartés (même loi qu'un tirage sans remise).
+        Sinon : clés de Gumbel et plus grandes clés.
+        """
+        if count * 4 > len(log_keys):
+            keys = log_keys + rng.gumbel(size=len(log_keys))
+            picked = np.argpartition(keys, -count)[-count:] if count < len(keys) else np.arange(len(keys))
+            rng.shuffle(picked)
+            return picked
+
+        cumulative = np.cumsum(np.exp(log_keys - log_keys.max(), dtype=np.float64))
+        picked: Dict[int, None] = {}
+        while len(picked) < count:
+            draws = np.searchsorted(cumulative, rng.random(count) * cumulative[-1], side='right')
+            for position in np.minimum(draws, len(cumulative) - 1).tolist():
+                picked.setdefault(position)
+                if len(picked) == count:
+                    break
+        return np.fromiter(picked, dtype=np.int64, count=count)
+
+    def describe(self) -> Dict[str, Any]:
+        return {
+            'game_type': self.game_type,
+            'kind': self.kind,
+            'combinations': len(self),
+            'numbers_per_combination': self.size,
+            'size_bytes': int(sum(array.nbytes for array in self.arrays.values())),
+            'cached_selections': len(self._selections),
+        }
+
+    # --- Disque ---
+
+    def save(self, directory: str) -> str:
+        """Écrit la table dans un dossier temporaire puis le renomme (un lecteur ne voit jamais une table partielle)"""
+        os.makedirs(directory, exist_ok=True)
+        target = os.path.join(directory, f"{self.game_type}_{self.kind}")
+        staging = tempfile.mkdtemp(prefix=f'.{self.game_type}_{self.kind}-', dir=directory)
+        try:
+            for name, array in self.arrays.items():
+                np.save(os.path.join(staging, f'{name}.npy'), np.ascontiguousarray(array))
+            with open(os.path.join(staging, 'meta.json'), 'w') as meta_file:
+                json.dump({
+                    'game_type': self.game_type,
+                    'kind': self.kind,
+                    'format_version': COMBINATION_TABLE_FORMAT_VERSION,
+                    'group': list(COMBINATION_GROUPS[(self.game_type, self.kind)]),
+                    'arrays': sorted(self.arrays),
+                }, meta_file)
+            if os.path.exists(target):
+                shutil.rmtree(target, ignore_errors=True)
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # Même table enregistrée au même moment par un autre processus
+                if not os.path.isdir(target):
+                    raise
+                shutil.rmtree(staging, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+        return target
+
+    @classmethod
+    def load(cls, directory: str, game_type: str, kind: str, mmap: bool = True) -> Optional['CombinationTable']:
+        """Charge une table enregistrée (projection mémoire en lecture seule) ou None"""
+        table_dir = os.path.join(directory, f"{game_type}_{kind}")
+        try:
+            with open(os.path.join(table_dir, 'meta.json')) as meta_file:
+                meta = json.load(meta_file)
+            if (meta.get('format_version') != COMBINATION_TABLE_FORMAT_VERSION
+                    or meta.get('group') != list(COMBINATION_GROUPS[(game_type, kind)])):
+                return None
+            arrays = {
+                name: np.load(os.path.join(table_dir, f'{name}.npy'), mmap_mode='r' if mmap else None)
+                for name in meta['arrays']
+            }
+        except (OSError, ValueError, KeyError):
+            return None
+
+        max_number, size, _ = COMBINATION_GROUPS[(game_type, kind)]
+        if not set(FEATURES) <= set(arrays) or arrays.get('numbers') is None or arrays['numbers'].shape != (math.comb(max_number, size), size):
+            return None
+        return cls(game_type, kind, arrays)
+
+
+@contextmanager
+def table_build_lock(directory: str, game_type: str, kind: str) -> Iterator[bool]:
+    """
+    Verrou de fichier (bloquant) réservant la construction d'une table à un seul processus
+
+    Les autres processus attendent puis chargent la table enregistrée. Produit False si le
+    verrou n'a pas pu être pris (dossier en lecture seule) : la table est alors construite sans.
+    """
+    import fcntl
+
+    try:
+        os.makedirs(directory, exist_ok=True)
+        lock_file = open(os.path.join(directory, f'.{game_type}_{kind}.lock'), 'a')
+    except OSError:
+        yield False
+        return
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield True
+    finally:
+        lock_file.close()
+
+
+class CombinationTableStore:
+    """
+    Tables des combinaisons, préparées au démarrage (voir start) ou au premier usage
+
+    Une table enregistrée dans le dossier est projetée en mémoire (pages partagées entre
+    les processus d'un même hôte) ; sinon un seul processus l'énumère puis l'enregistre
+    (verrou de fichier), les autres attendent puis projettent la table enregistrée.
+    """
+
+    def __init__(self, directory: str, persist: bool = True):
+        self.directory = directory
+        self.persist = persist
+        self._tables: Dict[Tuple[str, str], CombinationTable] = {}
+        self._lock = threading.Lock()
+        # Un verrou par table : la construction d'une table ne bloque pas l'accès aux autres
+        self._table_locks = {key: threading.Lock() for key in COMBINATION_GROUPS}
+        self.stats = {'loaded': 0, 'built': 0, 'saved': 0, 'save_errors': 0}
+
+    def get(self, game_type: str, kind: str = 'numero') -> CombinationTable:
+        """Table d'un groupe de numéros (voir COMBINATION_GROUPS)"""
+        if (game_type, kind) not in COMBINATION_GROUPS:
+            raise ValueError(f"Pas de table de combinaisons pour {game_type}/{kind}")
+
+        with self._lock:
+            table = self._tables.get((game_type, kind))
+        if table is not None:
+            return table
+
+        with self._table_locks[(game_type, kind)]:
+            with self._lock:
+                table = self._tables.get((game_type, kind))
+            if table is not None:
+                return table
+
+            table = self._load(game_type, kind)
+            if table is None and self.persist:
+                with table_build_lock(self.directory, game_type, kind):
+                    # Construite et enregistrée par un autre processus pendant l'attente
+                    table = self._load(game_type, kind)
+                    if table is None:
+                        table = self._build(game_type, kind)
+                        self._save(table)
+            elif table is None:
+                table = self._build(game_type, kind)
+
+            with self._lock:
+                self._tables[(game_type, kind)] = table
+            return table
+
+    def _load(self, game_type: str, kind: str) -> Optional[CombinationTable]:
+        if not self.persist:
+            return None
+        table = CombinationTable.load(self.directory, game_type, kind)
+        if table is not None:
+            with self._lock:
+                self.stats['loaded'] += 1
+        return table
+
+    def _build(self, game_type: str, kind: str) -> CombinationTable:
+        start_time = time.perf_counter()
+        table = CombinationTable.build(game_type, kind)
+        latency_store.record('combinations', f"{game_type} {kind}", time.perf_counter() - start_time)
+        with self._lock:
+            self.stats['built'] += 1
+        return table
+
+    def _save(self, table: CombinationTable) -> None:
+        """Persiste la table (ignoré si le disque est en lecture seule)"""
+        try:
+            table.save(self.directory)
+        except OSError as e:
+            with self._lock:
+                self.stats['save_errors'] += 1
+            print(f"⚠️ Impossible d'enregistrer la table de combinaisons {table.game_type}/{table.kind}: {e}")
+            return
+        with self._lock:
+            self.stats['saved'] += 1
+
+    def start(self) -> None:
+        """Prépare toutes les tables en arrière-plan (les requêtes n'attendent plus leur construction)"""
+        def worker():
+            for game_type, kind in COMBINATION_GROUPS:
+                try:
+                    self.get(game_type, kind)
+                except Exception as e:
+                    print(f"⚠️ Préparation de la table de combinaisons {game_type}/{kind} impossible: {e}")
+
+        threading.Thread(target=worker, name="combination-tables", daemon=True).start()
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                'persist': self.persist,
+                'directory': self.directory,
+                'tables': {f"{game}/{kind}": table.describe() for (game, kind), table in self._tables.items()},
+                **self.stats,
+            }
+
+
+def generate_constrained_grids(game_type: str, num_grids: int, constraints: Dict[str, Any],
+                               weighted: bool = False,
+                               rng: Optional[np.random.Generator] = None) -> Dict[str, Any]:
+    """
+    Grilles distinctes dont les numéros respectent les contraintes (voir CombinationTable.mask)
+
+    Les autres groupes (étoiles, numéro complémentaire) sont tirés sans contrainte ;
+    weighted : tous les groupes pondérés par les sorties de chaque numéro.
+    """
+    from .grid_stream import GRID_GROUPS, _frequency_weights
+    from .synthetic_draws import sample_without_replacement
+
+    rng = rng or np.random.default_rng()
+    weights = _frequency_weights(game_type) if weighted else None
+    table = combination_tables.get(game_type, 'numero')
+    matching = table.count(**constraints)
+    numbers = table.sample(num_grids, weights=weights['numeros'] if weights else None, rng=rng, **constraints)
+
+    grids = [{'numeros': row} for row in numbers.tolist()]
+    for field, _, picks, max_number in GRID_GROUPS[game_type][1:]:
+        group_weights = weights[field] if weights else np.ones(max_number)
+        values = sample_without_replacement(rng, group_weights, len(grids), picks).tolist()
+        for grid, value in zip(grids, values):
+            grid[field] = value if picks > 1 else value[0]
+    for grid in grids:
+        grid['type'] = 'constrained'
+
+    return {
+        'grids': grids,
+        'matching_combinations': matching,
+        'total_combinations': len(table),
+        'constraints': {name: value for name, value in constraints.items() if value is not None},
+        'weighted': weighted,
+    }
+
+
+# Instance globale
+combination_tables = CombinationTableStore(settings.COMBINATION_TABLE_DIR, persist=settings.COMBINATION_TABLE_PERSIST)
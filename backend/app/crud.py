@@ -1,10 +1,11 @@
 from typing import List, Dict, Any, Optional
+from datetime import datetime
 from .database import supabase, SQLALCHEMY_AVAILABLE
 
 if SQLALCHEMY_AVAILABLE:
     from sqlalchemy.orm import Session
     from .models import DrawEuromillions, DrawLoto, Statistique
-    from sqlalchemy import extract, or_
+    from sqlalchemy import extract, or_, insert
 else:
     from typing import Session
 
@@ -56,6 +57,68 @@ def insert_statistique(db, data: dict):
             print(f"Erreur lors de l'insertion statistique: {e}")
             return None
 
+def _bulk_insert_draws(db, model, table_name: str, draws: List[Dict], chunk_size: int = 1000,
+                       commit: bool = True) -> Dict[str, Any]:
+    """
+    Insère un lot de tirages en ignorant les dates déjà présentes
+    
+    Les dates existantes sont chargées en une seule requête (sur la plage du fichier),
+    les doublons internes au fichier sont écartés (première occurrence conservée),
+    puis les nouveaux tirages sont insérés par paquets de chunk_size lignes.
+    Le résultat contient aussi l'ensemble des dates effectivement ajoutées (added_dates).
+    """
+    result = {"added_count": 0, "skipped_count": 0, "duplicates_in_file": 0, "added_dates": set()}
+    if not draws:
+        return result
+    
+    dates = [draw['date'] for draw in draws]
+    min_date, max_date = min(dates), max(dates)
+    
+    if SQLALCHEMY_AVAILABLE:
+        existing_dates = {
+            row[0] for row in db.query(model.date).filter(model.date.between(min_date, max_date))
+        }
+    else:
+        response = supabase.table(table_name).select('date').gte('date', min_date.isoformat()).lte('date', max_date.isoformat()).execute()
+        existing_dates = {datetime.strptime(row['date'][:10], '%Y-%m-%d').date() for row in (response.data or [])}
+    
+    new_draws = []
+    seen_dates = set()
+    for draw in draws:
+        if draw['date'] in existing_dates:
+            result["skipped_count"] += 1
+        elif draw['date'] in seen_dates:
+            result["duplicates_in_file"] += 1
+        else:
+            seen_dates.add(draw['date'])
+            new_draws.append(draw)
+    
+    for start in range(0, len(new_draws), chunk_size):
+        chunk = new_draws[start:start + chunk_size]
+        if SQLALCHEMY_AVAILABLE:
+            db.execute(insert(model.__table__), chunk)
+        else:
+            supabase.table(table_name).insert([
+                {**draw, 'date': draw['date'].isoformat()} for draw in chunk
+            ]).execute()
+    
+    if SQLALCHEMY_AVAILABLE and commit:
+        db.commit()
+    
+    result["added_count"] = len(new_draws)
+    result["added_dates"] = seen_dates
+    return result
+
+def bulk_insert_draws_euromillions(db, draws: List[Dict], chunk_size: int = 1000, commit: bool = True) -> Dict[str, int]:
+    """Insère en masse des tirages Euromillions (dates déjà présentes ignorées)"""
+    return _bulk_insert_draws(db, DrawEuromillions if SQLALCHEMY_AVAILABLE else None, 'draws_euromillions',
+                              draws, chunk_size, commit)
+
+def bulk_insert_draws_loto(db, draws: List[Dict], chunk_size: int = 1000, commit: bool = True) -> Dict[str, int]:
+    """Insère en masse des tirages Loto (dates déjà présentes ignorées)"""
+    return _bulk_insert_draws(db, DrawLoto if SQLALCHEMY_AVAILABLE else None, 'draws_loto',
+                              draws, chunk_size, commit)
+
 def get_all_draws_euromillions(db) -> List[Dict]:
     """Récupère tous les tirages Euromillions"""
     if SQLALCHEMY_AVAILABLE:
@@ -1,33 +1,210 @@
-from supabase import create_client
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, Tuple
+
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import QueuePool, StaticPool
 from config import settings
+from .latency_metrics import latency_store
+from .query_counter import record_query
 
 # Configuration Supabase
 SUPABASE_URL = settings.SUPABASE_URL
 SUPABASE_ANON_KEY = settings.SUPABASE_ANON_KEY
 SUPABASE_SECRET_KEY = settings.SUPABASE_SECRET_KEY
 
-# Créer le client Supabase (approche principale)
-try:
-    if SUPABASE_URL and SUPABASE_ANON_KEY:
-        supabase = create_client(SUPABASE_URL, SUPABASE_ANON_KEY)
-        SUPABASE_AVAILABLE = True
-    else:
-        print("⚠️ Variables Supabase non configurées, utilisation de SQLite uniquement")
-        supabase = None
-        SUPABASE_AVAILABLE = False
-except Exception as e:
-    print(f"❌ Erreur de connexion Supabase: {e}")
+class LazySupabaseClient:
+    """
+    Client Supabase créé à la première utilisation
+    
+    L'import du SDK et la création du client coûtent plusieurs centaines de
+    millisecondes : ils sont évités au démarrage quand la base SQL suffit.
+    """
+    
+    def __init__(self, url: str, key: str):
+        self._url = url
+        self._key = key
+        self._client = None
+        self._lock = threading.Lock()
+    
+    def __bool__(self) -> bool:
+        return bool(self._url and self._key)
+    
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    from supabase import create_client
+                    try:
+                        self._client = create_client(self._url, self._key)
+                    except Exception as e:
+                        print(f"❌ Erreur de connexion Supabase: {e}")
+                        raise
+        return self._client
+    
+    def __getattr__(self, name: str):
+        return getattr(self._get_client(), name)
+
+# Client Supabase (approche principale), créé à la première utilisation
+if SUPABASE_URL and SUPABASE_ANON_KEY:
+    supabase = LazySupabaseClient(SUPABASE_URL, SUPABASE_ANON_KEY)
+    SUPABASE_AVAILABLE = True
+else:
+    print("⚠️ Variables Supabase non configurées, utilisation de SQLite uniquement")
     supabase = None
     SUPABASE_AVAILABLE = False
 
 # URL de connexion depuis la configuration
 DATABASE_URL = settings.DATABASE_URL
 
+class PoolMetrics:
+    """Compteurs du pool de connexions (attente au checkout, connexions ouvertes, saturation)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.connections_opened = 0
+        self.connections_invalidated = 0
+        self.checkouts = 0
+        self.checkout_timeouts = 0
+        self.checkout_wait_total = 0.0
+        self.checkout_wait_max = 0.0
+
+    def record_checkout(self, wait: float) -> None:
+        with self._lock:
+            self.checkouts += 1
+            self.checkout_wait_total += wait
+            self.checkout_wait_max = max(self.checkout_wait_max, wait)
+
+    def record_timeout(self) -> None:
+        with self._lock:
+            self.checkout_timeouts += 1
+
+    def record_connect(self) -> None:
+        with self._lock:
+            self.connections_opened += 1
+
+    def record_invalidate(self) -> None:
+        with self._lock:
+            self.connections_invalidated += 1
+
+    def snapshot(self, pool) -> Dict:
+        with self._lock:
+            metrics = {
+                "connections_opened": self.connections_opened,
+                "connections_invalidated": self.connections_invalidated,
+                "checkouts": self.checkouts,
+                "checkout_timeouts": self.checkout_timeouts,
+                "checkout_wait_avg_ms": round(self.checkout_wait_total / self.checkouts * 1000, 3) if self.checkouts else 0,
+                "checkout_wait_max_ms": round(self.checkout_wait_max * 1000, 3),
+            }
+
+        metrics["pool_class"] = type(pool).__name__
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(settings.DB_MAX_OVERFLOW, 0)
+            metrics.update({
+                "pool_size": pool.size(),
+                "max_overflow": settings.DB_MAX_OVERFLOW,
+                "checked_out": pool.checkedout(),
+                "checked_in": pool.checkedin(),
+                "overflow": pool.overflow(),
+                "saturation": round(pool.checkedout() / capacity, 3) if capacity > 0 else 0,
+            })
+        return metrics
+
+pool_metrics = PoolMetrics()
+
+class MeteredQueuePool(QueuePool):
+    """QueuePool qui mesure le temps d'attente de chaque checkout"""
+
+    def _do_get(self):
+        start_time = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            pool_metrics.record_timeout()
+            raise
+        pool_metrics.record_checkout(time.perf_counter() - start_time)
+        return connection
+
+def _is_memory_sqlite(url: str) -> bool:
+    return url.startswith("sqlite") and (":memory:" in url or url.rstrip("/") in ("sqlite:", "sqlite:/", "sqlite://"))
+
+def _engine_options(url: str) -> Tuple[str, Dict]:
+    """URL et options de l'engine selon la base (pool, pre-ping, recyclage, options SQLite)"""
+    if _is_memory_sqlite(url):
+        # Base en mémoire : une seule connexion partagée entre les threads
+        return url, {"poolclass": StaticPool, "connect_args": {"check_same_thread": False}}
+
+    options = {
+        "poolclass": MeteredQueuePool,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+    if url.startswith("sqlite"):
+        options["connect_args"] = {"check_same_thread": False, "timeout": settings.SQLITE_BUSY_TIMEOUT}
+        if settings.SQLITE_SHARED_CACHE and "file:" not in url:
+            # Cache partagé entre les connexions du processus (URI SQLite)
+            path = url.split(":///", 1)[1]
+            url = f"sqlite:///file:{path}?cache=shared&uri=true"
+
+    return url, options
+
+# Types de requêtes suivis séparément dans les métriques (les autres sont regroupés)
+QUERY_TYPES = ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH", "PRAGMA")
+
+def _query_type(statement: str) -> str:
+    keyword = statement.lstrip().split(None, 1)[0].upper() if statement and statement.strip() else ""
+    return keyword if keyword in QUERY_TYPES else "OTHER"
+
+def _record_query(conn, statement: str, status: str) -> None:
+    """Enregistre la durée d'une requête SQL (série 'db' du latency_store, par type de requête)"""
+    start_times = conn.info.get("query_start_times")
+    if not start_times:
+        return
+    elapsed = time.perf_counter() - start_times.pop()
+    latency_store.record("db", _query_type(statement), elapsed, status)
+    record_query(elapsed)
+
+def _configure_engine_events(engine) -> None:
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_start_times", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        _record_query(conn, statement, "ok")
+
+    @event.listens_for(engine, "handle_error")
+    def on_query_error(exception_context):
+        if exception_context.connection is not None and exception_context.statement:
+            _record_query(exception_context.connection, exception_context.statement, "error")
+
+
+    @event.listens_for(engine, "connect")
+    def on_connect(dbapi_connection, connection_record):
+        pool_metrics.record_connect()
+        if engine.dialect.name == "sqlite" and settings.SQLITE_WAL and not _is_memory_sqlite(DATABASE_URL):
+            # WAL : les lectures ne sont plus bloquées par une écriture en cours
+            cursor = dbapi_connection.cursor()
+            cursor.execute("PRAGMA journal_mode=WAL")
+            cursor.execute("PRAGMA synchronous=NORMAL")
+            cursor.close()
+
+    @event.listens_for(engine, "invalidate")
+    def on_invalidate(dbapi_connection, connection_record, exception):
+        pool_metrics.record_invalidate()
+
 # Créer l'engine SQLAlchemy
 try:
-    engine = create_engine(DATABASE_URL, connect_args={"check_same_thread": False} if "sqlite" in DATABASE_URL else {})
+    engine_url, engine_options = _engine_options(DATABASE_URL)
+    engine = create_engine(engine_url, **engine_options)
+    _configure_engine_events(engine)
     SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
     SQLALCHEMY_AVAILABLE = True
     print(f"✅ Connexion à la base de données établie: {DATABASE_URL}")
@@ -50,4 +227,27 @@ def get_db():
         yield supabase
     else:
         # Fallback vers une session vide
-        yield None 
\ No newline at end of file
+        yield None
+
+@contextmanager
+def session_scope() -> Iterator[Session]:
+    """
+    Session pour le code hors requête (tâches Celery, préchauffage, scripts)
+    
+    Validée en fin de bloc, annulée en cas d'erreur, toujours rendue au pool.
+    """
+    db = SessionLocal()
+    try:
+        yield db
+        db.commit()
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+def get_pool_status() -> Dict:
+    """État du pool de connexions (taille, connexions en cours, saturation, attente au checkout)"""
+    if not SQLALCHEMY_AVAILABLE:
+        return {"available": False}
+    return {"available": True, **pool_metrics.snapshot(engine.pool)}
@@ -0,0 +1,473 @@
+"""
+Instantanés sur disque des tirages et de leurs agrégats
+Pour chaque jeu, un lot de fichiers .npy versionné contient la matrice des tirages, les
+sommes cumulées de présence, l'état des écarts et les tables de paires et de triplets.
+Les instances projettent ce lot en mémoire au démarrage (pages partagées entre les
+processus d'un même hôte) et ne rejouent que les tirages plus récents que l'instantané
+"""
+
+import itertools
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import settings
+from .columnar_io import NUMBER_GROUPS, presence_matrix
+from .latency_metrics import latency_store
+
+# Version du format : un instantané d'une autre version est reconstruit
+SNAPSHOT_FORMAT_VERSION = 2
+
+# Nombre de générations conservées sur disque par jeu
+SNAPSHOT_KEEP_GENERATIONS = 2
+
+# Fichier désignant la génération courante d'un jeu (remplacé de manière atomique)
+CURRENT_FILE = 'CURRENT'
+
+# Groupe de numéros dont on tient les tables de paires et de triplets
+SUBSET_GROUP = 'numero'
+
+# Somme de contrôle du contenu : la date d'un tirage (jours depuis 1970, décalés pour rester
+# positifs) est réduite modulo ce nombre premier avant de pondérer ses numéros
+CHECKSUM_DATE_MODULUS = 9973
+CHECKSUM_DAY_OFFSET = 1_000_000
+
+
+def _group_state(values: np.ndarray, max_number: int) -> Dict[str, np.ndarray]:
+    """Sommes cumulées de présence et état des écarts d'un groupe de numéros"""
+    presence = presence_matrix(values.astype(np.int64), max_number)
+    prefix = np.zeros((len(values) + 1, presence.shape[1]), dtype=np.int32)
+    np.cumsum(presence, axis=0, dtype=np.int32, out=prefix[1:])
+
+    last_seen = np.full(presence.shape[1], -1, dtype=np.int32)
+    gap_sum = np.zeros(presence.shape[1], dtype=np.int64)
+    gap_max = np.zeros(presence.shape[1], dtype=np.int32)
+    for index in range(presence.shape[1]):
+        positions = np.flatnonzero(presence[:, index])
+        if len(positions):
+            last_seen[index] = positions[-1]
+            gap_sum[index] = positions[-1] - positions[0]
+            gap_max[index] = np.diff(positions).max() if len(positions) > 1 else 0
+
+    return {'prefix': prefix, 'last_seen': last_seen, 'gap_sum': gap_sum, 'gap_max': gap_max}
+
+
+def _subset_tables(values: np.ndarray, size: int) -> Dict[str, np.ndarray]:
+    """Nombre de sorties communes de chaque paire et de chaque triplet (indices croissants)"""
+    ordered = np.sort(values.astype(np.int64), axis=1) - 1
+    pairs = np.zeros((size, size), dtype=np.int32)
+    triples = np.zeros((size, size, size), dtype=np.int32)
+    for i, j in itertools.combinations(range(ordered.shape[1]), 2):
+        np.add.at(pairs, (ordered[:, i], ordered[:, j]), 1)
+    for i, j, k in itertools.combinations(range(ordered.shape[1]), 3):
+        np.add.at(triples, (ordered[:, i], ordered[:, j], ordered[:, k]), 1)
+    return {'pairs': pairs, 'triples': triples}
+
+
+def _checksum_columns(game_type: str) -> List[Tuple[str, int]]:
+    """Colonnes de numéros d'un jeu et leur poids dans la somme de contrôle (1, 2, 3...)"""
+    columns = [column for group_columns, _ in NUMBER_GROUPS[game_type].values() for column in group_columns]
+    return [(column, weight) for weight, column in enumerate(columns, start=1)]
+
+
+def content_checksum(dates: np.ndarray, values: Dict[str, np.ndarray], game_type: str) -> int:
+    """
+    Somme de contrôle des tirages : somme sur les tirages de (numéros pondérés par colonne)
+    x (date réduite + 1), calculée à l'identique en SQL par draw_state
+    """
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    if not len(dates):
+        return 0
+    date_key = dates.astype(np.int64) + CHECKSUM_DAY_OFFSET
+    weighted = np.zeros(len(dates), dtype=np.int64)
+    weights = iter(weight for _, weight in _checksum_columns(game_type))
+    for kind in NUMBER_GROUPS[game_type]:
+        group = np.asarray(values[kind], dtype=np.int64).reshape(len(dates), -1)
+        for column in range(group.shape[1]):
+            weighted += group[:, column] * next(weights)
+    return int((weighted * (date_key % CHECKSUM_DATE_MODULUS + 1)).sum())
+
+
+class DrawSnapshot:
+    """
+    Tirages d'un jeu (du plus ancien au plus récent) et agrégats précalculés
+
+    Les tableaux sont indexés par nom ('dates', '<groupe>_values', '<groupe>_prefix',
+    '<groupe>_last_seen', '<groupe>_gap_sum', '<groupe>_gap_max', 'numero_pairs',
+    'numero_triples') ; ils peuvent être des projections mémoire en lecture seule.
+    """
+
+    def __init__(self, game_type: str, arrays: Dict[str, np.ndarray], generation: int = 0):
+        self.game_type = game_type
+        self.arrays = arrays
+        self.generation = generation
+        self._checksum: Optional[int] = None
+
+    # --- Construction ---
+
+    @classmethod
+    def from_arrays(cls, game_type: str, dates: np.ndarray, values: Dict[str, np.ndarray],
+                    generation: int = 0) -> 'DrawSnapshot':
+        """Calcule tous les agrégats à partir des dates et des numéros de chaque groupe"""
+        arrays = {'dates': np.asarray(dates, dtype='datetime64[D]')}
+        for kind, (columns, max_number) in NUMBER_GROUPS[game_type].items():
+            group_values = np.asarray(values[kind], dtype=np.int8).reshape(len(arrays['dates']), len(columns))
+            arrays[f'{kind}_values'] = group_values
+            for name, array in _group_state(group_values, max_number).items():
+                arrays[f'{kind}_{name}'] = array
+
+        width = arrays[f'{SUBSET_GROUP}_prefix'].shape[1]
+        for name, array in _subset_tables(arrays[f'{SUBSET_GROUP}_values'], width).items():
+            arrays[f'{SUBSET_GROUP}_{name}'] = array
+        return cls(game_type, arrays, generation)
+
+    @classmethod
+    def from_frame(cls, df, game_type: str, generation: int = 0) -> 'DrawSnapshot':
+        """Instantané d'un DataFrame de tirages (colonnes du modèle, du plus ancien au plus récent)"""
+        values = {
+            kind: df[columns].to_numpy(dtype='int64')
+            for kind, (columns, _) in NUMBER_GROUPS[game_type].items()
+        }
+        return cls.from_arrays(game_type, df['date'].to_numpy(dtype='datetime64[D]'), values, generation)
+
+    @classmethod
+    def build(cls, db, game_type: str, year: Optional[int] = None, generation: int = 0) -> 'DrawSnapshot':
+        """Instantané calculé depuis la base (éventuellement limité à une année)"""
+        from .columnar_io import load_draws_frame
+        return cls.from_frame(load_draws_frame(db, game_type, year), game_type, generation)
+
+    def extended(self, dates: Sequence, values: Dict[str, np.ndarray]) -> Optional['DrawSnapshot']:
+        """
+        Nouvel instantané avec des tirages plus récents ajoutés à la fin
+
+        Seuls les nouveaux tirages sont parcourus : sommes cumulées prolongées, écarts
+        et tables de paires/triplets mis à jour. Retourne None si un numéro dépasse la
+        largeur des tables (reconstruction nécessaire).
+        """
+        arrays = dict(self.arrays)
+        start = self.draw_count
+        arrays['dates'] = np.concatenate([self.arrays['dates'], np.asarray(dates, dtype='datetime64[D]')])
+
+        for kind, (columns, _) in NUMBER_GROUPS[self.game_type].items():
+            new_values = np.asarray(values[kind], dtype=np.int8).reshape(len(dates), len(columns))
+            prefix = self.arrays[f'{kind}_prefix']
+            if new_values.size and int(new_values.max()) > prefix.shape[1]:
+                return None
+
+            presence = presence_matrix(new_values.astype(np.int64), prefix.shape[1])
+            arrays[f'{kind}_values'] = np.concatenate([self.arrays[f'{kind}_values'], new_values])
+            arrays[f'{kind}_prefix'] = np.concatenate(
+                [prefix, prefix[-1] + np.cumsum(presence, axis=0, dtype=np.int32)]
+            )
+
+            last_seen = np.array(self.arrays[f'{kind}_last_seen'])
+            gap_sum = np.array(self.arrays[f'{kind}_gap_sum'])
+            gap_max = np.array(self.arrays[f'{kind}_gap_max'])
+            for offset, drawn in enumerate(presence):
+                position = start + offset
+                indices = np.flatnonzero(drawn)
+                seen = indices[last_seen[indices] >= 0]
+                gaps = position - last_seen[seen]
+                gap_sum[seen] += gaps
+                gap_max[seen] = np.maximum(gap_max[seen], gaps)
+                last_seen[indices] = position
+            arrays[f'{kind}_last_seen'] = last_seen
+            arrays[f'{kind}_gap_sum'] = gap_sum
+            arrays[f'{kind}_gap_max'] = gap_max
+
+        width = arrays[f'{SUBSET_GROUP}_prefix'].shape[1]
+        new_values = arrays[f'{SUBSET_GROUP}_values'][start:]
+        for name, table in _subset_tables(new_values, width).items():
+            arrays[f'{SUBSET_GROUP}_{name}'] = self.arrays[f'{SUBSET_GROUP}_{name}'] + table
+
+        return DrawSnapshot(self.game_type, arrays, self.generation + 1)
+
+    # --- Lecture ---
+
+    @property
+    def draw_count(self) -> int:
+        return len(self.arrays['dates'])
+
+    @property
+    def last_date(self):
+        """Date du tirage le plus récent (datetime.date) ou None"""
+        return self.arrays['dates'][-1].item() if self.draw_count else None
+
+    @property
+    def checksum(self) -> int:
+        """Somme de contrôle du contenu (voir content_checksum), calculée une fois"""
+        if self._checksum is None:
+            values = {kind: self.arrays[f'{kind}_values'] for kind in NUMBER_GROUPS[self.game_type]}
+            self._checksum = content_checksum(self.arrays['dates'], values, self.game_type)
+        return self._checksum
+
+    def counts(self, kind: str, start: int = 0, end: Optional[int] = None) -> np.ndarray:
+        """Sorties de chaque numéro sur les tirages [start, end) (différence de sommes cumulées)"""
+        prefix = self.arrays[f'{kind}_prefix']
+        return prefix[self.draw_count if end is None else end] - prefix[start]
+
+    def recent_counts(self, kind: str, last_draws: int) -> np.ndarray:
+        """Sorties de chaque numéro sur les last_draws tirages les plus récents"""
+        return self.counts(kind, max(0, self.draw_count - last_draws))
+
+    def gap_state(self, kind: str) -> Dict[str, np.ndarray]:
+        """Sorties, dernière position, écart actuel, écarts moyen et maximal de chaque numéro"""
+        appearances = self.counts(kind)
+        last_seen = self.arrays[f'{kind}_last_seen']
+        gap_count = np.maximum(appearances - 1, 0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            mean_gap = np.where(gap_count > 0, self.arrays[f'{kind}_gap_sum'] / np.maximum(gap_count, 1), np.nan)
+        return {
+            'appearances': appearances,
+            'last_seen': last_seen,
+            'current_gap': np.where(last_seen >= 0, self.draw_count - 1 - last_seen, -1),
+            'gap_count': gap_count,
+            'mean_gap': mean_gap,
+            'max_gap': self.arrays[f'{kind}_gap_max'],
+        }
+
+    def pair_count(self, a: int, b: int) -> int:
+        first, second = sorted((a, b))
+        return int(self.arrays[f'{SUBSET_GROUP}_pairs'][first - 1, second - 1])
+
+    def triple_count(self, a: int, b: int, c: int) -> int:
+        first, second, third = sorted((a, b, c))
+        return int(self.arrays[f'{SUBSET_GROUP}_triples'][first - 1, second - 1, third - 1])
+
+    def describe(self) -> Dict:
+        return {
+            'game_type': self.game_type,
+            'generation': self.generation,
+            'draw_count': self.draw_count,
+            'last_date': self.last_date.isoformat() if self.last_date else None,
+            'size_bytes': int(sum(array.nbytes for array in self.arrays.values())),
+        }
+
+    # --- Disque ---
+
+    def save(self, directory: str) -> str:
+        """
+        Écrit l'instantané dans une nouvelle génération puis la désigne comme courante
+
+        Les fichiers sont écrits dans un dossier temporaire renommé une fois complet ;
+        le fichier CURRENT est remplacé en dernier : un lecteur voit l'ancienne ou la
+        nouvelle génération, jamais un lot partiel.
+        """
+        game_dir = os.path.join(directory, self.game_type)
+        os.makedirs(game_dir, exist_ok=True)
+        name = f"g{self.generation:06d}"
+
+        staging = tempfile.mkdtemp(prefix=f'.{name}-', dir=game_dir)
+        try:
+            for array_name, array in self.arrays.items():
+                np.save(os.path.join(staging, f'{array_name}.npy'), np.ascontiguousarray(array))
+            with open(os.path.join(staging, 'meta.json'), 'w') as meta_file:
+                json.dump({
+                    **self.describe(),
+                    'format_version': SNAPSHOT_FORMAT_VERSION,
+                    'arrays': sorted(self.arrays),
+                    'created_at': datetime.now().isoformat(),
+                }, meta_file)
+
+            target = os.path.join(game_dir, name)
+            if os.path.exists(target):
+                shutil.rmtree(target, ignore_errors=True)
+            try:
+                os.rename(staging, target)
+            except OSError:
+                # Même génération enregistrée au même moment par un autre processus
+                if not os.path.isdir(target):
+                    raise
+                shutil.rmtree(staging, ignore_errors=True)
+        except Exception:
+            shutil.rmtree(staging, ignore_errors=True)
+            raise
+
+        current_tmp = os.path.join(game_dir, f'.{CURRENT_FILE}.tmp')
+        with open(current_tmp, 'w') as current_file:
+            current_file.write(name)
+        os.replace(current_tmp, os.path.join(game_dir, CURRENT_FILE))
+
+        _prune_generations(game_dir, keep=SNAPSHOT_KEEP_GENERATIONS)
+        return target
+
+    @classmethod
+    def load(cls, directory: str, game_type: str, mmap: bool = True) -> Optional['DrawSnapshot']:
+        """Charge la génération courante d'un jeu (projection mémoire en lecture seule) ou None"""
+        game_dir = os.path.join(directory, game_type)
+        try:
+            with open(os.path.join(game_dir, CURRENT_FILE)) as current_file:
+                generation_dir = os.path.join(game_dir, current_file.read().strip())
+            with open(os.path.join(generation_dir, 'meta.json')) as meta_file:
+                meta = json.load(meta_file)
+        except (OSError, ValueError):
+            return None
+
+        if meta.get('format_version') != SNAPSHOT_FORMAT_VERSION or meta.get('game_type') != game_type:
+            return None
+
+        arrays = {
+            name: np.load(os.path.join(generation_dir, f'{name}.npy'), mmap_mode='r' if mmap else None)
+            for name in meta['arrays']
+        }
+        return cls(game_type, arrays, meta.get('generation', 0))
+
+
+def _prune_generations(game_dir: str, keep: int) -> None:
+    """Supprime les anciennes générations (les projections déjà ouvertes restent valides)"""
+    generations = sorted(name for name in os.listdir(game_dir) if name.startswith('g'))
+    for name in generations[:-keep]:
+        shutil.rmtree(os.path.join(game_dir, name), ignore_errors=True)
+
+
+def _draw_rows_after(db, game_type: str, after) -> Tuple[List, Dict[str, np.ndarray]]:
+    """Tirages postérieurs à une date, du plus ancien au plus récent : (dates, numéros par groupe)"""
+    from .exporters import DRAW_EXPORT_COLUMNS
+
+    model, columns = DRAW_EXPORT_COLUMNS[game_type]
+    query = db.query(*[getattr(model, attribute) for _, attribute in columns])
+    if after is not None:
+        query = query.filter(model.date > after)
+    rows = query.order_by(model.date.asc()).all()
+
+    attributes = [attribute for _, attribute in columns]
+    values = {}
+    for kind, (group_columns, _) in NUMBER_GROUPS[game_type].items():
+        indices = [attributes.index(column) for column in group_columns]
+        values[kind] = np.array([[row[index] for index in indices] for row in rows], dtype=np.int64)
+    return [row[0] for row in rows], values
+
+
+def draw_state(db, game_type: str) -> Tuple[int, Optional[object], int]:
+    """
+    (nombre de tirages, date du plus récent, somme de contrôle du contenu) d'un jeu : une seule requête
+
+    La somme de contrôle (voir content_checksum) change quand les numéros ou la date
+    d'un tirage sont modifiés, ou quand une suppression est compensée par un ajout.
+    """
+    from sqlalchemy import Date, Integer, cast, func, literal
+    from .exporters import DRAW_EXPORT_COLUMNS
+
+    model, _ = DRAW_EXPORT_COLUMNS[game_type]
+    weighted = sum(func.coalesce(getattr(model, column), 0) * weight
+                   for column, weight in _checksum_columns(game_type))
+    if db.get_bind().dialect.name == 'sqlite':
+        epoch_days = cast(func.julianday(model.date) - 2440587.5, Integer)
+    else:
+        # PostgreSQL : la différence de deux dates est un nombre de jours
+        epoch_days = model.date - cast(literal('1970-01-01'), Date)
+    date_key = epoch_days + CHECKSUM_DAY_OFFSET
+    draw_count, last_date, checksum = db.query(
+        func.count(model.id), func.max(model.date),
+        func.sum(weighted * (date_key % CHECKSUM_DATE_MODULUS + 1))
+    ).one()
+    return draw_count, last_date, int(checksum or 0)
+
+
+def is_current(snapshot: Optional[DrawSnapshot], state: Tuple[int, Optional[object], int]) -> bool:
+    """L'instantané correspond-il à l'état de la base (voir draw_state) ?"""
+    draw_count, last_date, checksum = state
+    return (snapshot is not None and snapshot.draw_count == draw_count and snapshot.last_date == last_date
+            and snapshot.checksum == checksum)
+
+
+class DrawSnapshotStore:
+    """
+    Instantanés courants des deux jeux, tenus à jour à partir de la base
+
+    À chaque accès, une requête (nombre de tirages, date maximale, somme de contrôle du
+    contenu) vérifie la fraîcheur : les tirages plus récents sont rejoués sur
+    l'instantané, toute autre modification (suppression, correction) entraîne une
+    reconstruction complète.
+    """
+
+    def __init__(self, directory: str, persist: bool = True):
+        self.directory = directory
+        self.persist = persist
+        self._snapshots: Dict[str, DrawSnapshot] = {}
+        self._lock = threading.Lock()
+        self.stats = {'loaded': 0, 'built': 0, 'replayed_draws': 0, 'saved': 0, 'save_errors': 0}
+
+    def get(self, db, game_type: str, state: Optional[Tuple] = None) -> DrawSnapshot:
+        """Instantané à jour d'un jeu (state : résultat de draw_state s'il est déjà connu)"""
+        state = state or draw_state(db, game_type)
+        draw_count, last_date, _ = state
+
+        with self._lock:
+            snapshot = self._snapshots.get(game_type)
+            if snapshot is None and self.persist:
+                snapshot = DrawSnapshot.load(self.directory, game_type)
+                if snapshot is not None:
+                    self.stats['loaded'] += 1
+
+            if is_current(snapshot, state):
+                self._snapshots[game_type] = snapshot
+                return snapshot
+
+            updated = None
+            start_time = time.perf_counter()
+            if snapshot is not None and (snapshot.last_date is None or (last_date and last_date > snapshot.last_date)):
+                dates, values = _draw_rows_after(db, game_type, snapshot.last_date)
+                if snapshot.draw_count + len(dates) == draw_count:
+                    updated = snapshot.extended(dates, values)
+                    # Tirages plus anciens modifiés en même temps : reconstruction
+                    if updated is not None and not is_current(updated, state):
+                        updated = None
+                    if updated is not None:
+                        self.stats['replayed_draws'] += len(dates)
+                        latency_store.record('snapshot', f"{game_type} replay", time.perf_counter() - start_time)
+
+            if updated is None:
+                start_time = time.perf_counter()
+                generation = snapshot.generation + 1 if snapshot is not None else 0
+                updated = DrawSnapshot.build(db, game_type, generation=generation)
+                self.stats['built'] += 1
+                latency_store.record('snapshot', f"{game_type} build", time.perf_counter() - start_time)
+
+            self._save(updated)
+            self._snapshots[game_type] = updated
+            return updated
+
+    def _save(self, snapshot: DrawSnapshot) -> None:
+        """Persiste l'instantané (ignoré si le disque est en lecture seule)"""
+        if not self.persist:
+            return
+        try:
+            snapshot.save(self.directory)
+            self.stats['saved'] += 1
+        except OSError as e:
+            self.stats['save_errors'] += 1
+            print(f"⚠️ Impossible d'enregistrer l'instantané {snapshot.game_type}: {e}")
+
+    def preload(self, game_types: Sequence[str] = ('euromillions', 'loto')) -> Dict[str, Dict]:
+        """Charge (et met à jour) les instantanés au démarrage d'une instance"""
+        from .database import session_scope
+
+        loaded = {}
+        for game_type in game_types:
+            try:
+                with session_scope() as db:
+                    loaded[game_type] = self.get(db, game_type).describe()
+            except Exception as e:
+                print(f"⚠️ Instantané {game_type} indisponible: {e}")
+        return loaded
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'persist': self.persist,
+                'directory': self.directory,
+                'snapshots': {game: snapshot.describe() for game, snapshot in self._snapshots.items()},
+                **self.stats,
+            }
+
+
+# Instance globale
+draw_snapshots = DrawSnapshotStore(settings.SNAPSHOT_DIR, persist=settings.SNAPSHOT_PERSIST)
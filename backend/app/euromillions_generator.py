@@ -1,16 +1,24 @@
 import random
 import numpy as np
-from typing import List, Dict, Tuple, Any
+from typing import List, Dict, Tuple, Any, Iterator, Optional
 from sqlalchemy.orm import Session
 from .euromillions_advanced_stats import EuromillionsAdvancedStats
 from .models import DrawEuromillions
 
+# Bornes de la somme des étoiles de chaque pattern (voir EuromillionsAdvancedStats.analyze_number_patterns)
+STAR_PATTERN_SUMS = {
+    "low_stars": (3, 10),
+    "medium_stars": (11, 18),
+    "high_stars": (19, 23),
+}
+
 class EuromillionsAdvancedGenerator:
     def __init__(self, db: Session):
         self.db = db
         self.stats = EuromillionsAdvancedStats(db)
         
-    def generate_probability_based_grid(self, strategy: str = "balanced") -> Dict[str, Any]:
+    def generate_probability_based_grid(self, strategy: str = "balanced",
+                                        stats: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
         """
         Génère une grille basée sur les probabilités avancées
         
@@ -20,8 +28,11 @@ class EuromillionsAdvancedGenerator:
         - "hot": Privilégie les numéros chauds
         - "cold": Privilégie les numéros froids
         - "pattern": Privilégie les patterns les plus probables
+        
+        stats permet de réutiliser les statistiques déjà calculées (plusieurs grilles).
         """
-        stats = self.stats.get_comprehensive_stats()
+        if stats is None:
+            stats = self.stats.get_comprehensive_stats()
         
         if strategy == "frequency":
             return self._generate_frequency_based_grid(stats)
@@ -216,152 +227,39 @@ class EuromillionsAdvancedGenerator:
         }
     
     def _generate_numbers_by_pattern(self, odd_even_pattern: str, high_low_pattern: str) -> List[int]:
-        """Génère des numéros selon les patterns spécifiés"""
-        # Parser les patterns
-        odd_count = int(odd_even_pattern.split('odd')[0])
-        even_count = 5 - odd_count
+        """Génère des numéros selon les patterns spécifiés (tirage uniforme parmi les combinaisons conformes)"""
+        from .combination_table import combination_tables
         
+        # Parser les patterns ("3odd_2even", "2low_3high" avec bas = 1-25)
+        odd_count = int(odd_even_pattern.split('odd')[0])
         low_count = int(high_low_pattern.split('low')[0])
-        high_count = 5 - low_count
         
-        # Créer les pools de numéros
-        odd_numbers = list(range(1, 51, 2))  # 1, 3, 5, ..., 49
-        even_numbers = list(range(2, 51, 2))  # 2, 4, 6, ..., 50
-        low_numbers = list(range(1, 26))  # 1-25
-        high_numbers = list(range(26, 51))  # 26-50
-        
-        # Sélectionner selon les patterns
-        selected_numbers = set()
-        
-        # Sélectionner les pairs/impairs
-        odd_selected = random.sample(odd_numbers, odd_count)
-        even_selected = random.sample(even_numbers, even_count)
-        
-        # Combiner et ajuster selon hauts/bas
-        all_selected = list(set(odd_selected + even_selected))
-        
-        # S'assurer qu'on a exactement 5 numéros uniques
-        while len(all_selected) < 5:
-            if len(all_selected) < odd_count:
-                remaining_odd = [n for n in odd_numbers if n not in all_selected]
-                if remaining_odd:
-                    all_selected.append(random.choice(remaining_odd))
-            else:
-                remaining_even = [n for n in even_numbers if n not in all_selected]
-                if remaining_even:
-                    all_selected.append(random.choice(remaining_even))
-        
-        # Ajuster pour respecter le pattern hauts/bas
-        low_in_selected = sum(1 for n in all_selected if n <= 25)
-        high_in_selected = 5 - low_in_selected
-        
-        if low_in_selected < low_count:
-            # Remplacer des hauts par des bas
-            high_numbers_in_selected = [n for n in all_selected if n > 25]
-            low_numbers_available = [n for n in low_numbers if n not in all_selected]
-            
-            to_replace = low_count - low_in_selected
-            for _ in range(min(to_replace, len(high_numbers_in_selected))):
-                if high_numbers_in_selected and low_numbers_available:
-                    high_num = random.choice(high_numbers_in_selected)
-                    low_num = random.choice(low_numbers_available)
-                    all_selected.remove(high_num)
-                    all_selected.append(low_num)
-                    high_numbers_in_selected.remove(high_num)
-                    low_numbers_available.remove(low_num)
-        
-        elif high_in_selected < high_count:
-            # Remplacer des bas par des hauts
-            low_numbers_in_selected = [n for n in all_selected if n <= 25]
-            high_numbers_available = [n for n in high_numbers if n not in all_selected]
-            
-            to_replace = high_count - high_in_selected
-            for _ in range(min(to_replace, len(low_numbers_in_selected))):
-                if low_numbers_in_selected and high_numbers_available:
-                    low_num = random.choice(low_numbers_in_selected)
-                    high_num = random.choice(high_numbers_available)
-                    all_selected.remove(low_num)
-                    all_selected.append(high_num)
-                    low_numbers_in_selected.remove(low_num)
-                    high_numbers_available.remove(high_num)
-        
-        # S'assurer qu'on a exactement 5 numéros uniques
-        all_selected = list(set(all_selected))
-        while len(all_selected) < 5:
-            remaining = [n for n in range(1, 51) if n not in all_selected]
-            if remaining:
-                all_selected.append(random.choice(remaining))
-        
-        return all_selected[:5]  # Retourner exactement 5 numéros
+        table = combination_tables.get('euromillions', 'numero')
+        return table.sample(1, odd=odd_count, low=low_count)[0].tolist()
     
     def _generate_stars_by_pattern(self, star_pattern: str) -> List[int]:
-        """Génère des étoiles selon le pattern spécifié"""
-        if star_pattern == "low_stars":
-            # Somme <= 10
-            available_stars = list(range(1, 13))
-            stars = []
-            remaining_sum = 10
-            
-            for _ in range(2):
-                valid_stars = [s for s in available_stars if s <= remaining_sum - (2 - len(stars) - 1)]
-                if valid_stars:
-                    star = random.choice(valid_stars)
-                    stars.append(star)
-                    available_stars.remove(star)
-                    remaining_sum -= star
-                else:
-                    star = random.choice(available_stars)
-                    stars.append(star)
-                    available_stars.remove(star)
-            
-            return stars
+        """Génère des étoiles selon le pattern spécifié (somme <= 10, 11-18 ou > 18)"""
+        from .combination_table import combination_tables
         
-        elif star_pattern == "high_stars":
-            # Somme > 18
-            available_stars = list(range(1, 13))
-            stars = []
-            
-            # Forcer une somme élevée
-            for _ in range(2):
-                if len(stars) == 0:
-                    star = random.choice([8, 9, 10, 11, 12])
-                else:
-                    min_needed = 19 - sum(stars)
-                    valid_stars = [s for s in available_stars if s >= min_needed]
-                    star = random.choice(valid_stars) if valid_stars else random.choice(available_stars)
-                
-                stars.append(star)
-                available_stars.remove(star)
-            
-            return stars
-        
-        else:  # medium_stars
-            # Somme entre 11 et 18
-            available_stars = list(range(1, 13))
-            stars = []
-            
-            for _ in range(2):
-                if len(stars) == 0:
-                    star = random.choice([4, 5, 6, 7, 8, 9])
-                else:
-                    current_sum = sum(stars)
-                    min_needed = max(1, 11 - current_sum)
-                    max_allowed = min(12, 18 - current_sum)
-                    valid_stars = [s for s in available_stars if min_needed <= s <= max_allowed]
-                    star = random.choice(valid_stars) if valid_stars else random.choice(available_stars)
-                
-                stars.append(star)
-                available_stars.remove(star)
-            
-            return stars
+        sum_bounds = STAR_PATTERN_SUMS.get(star_pattern, STAR_PATTERN_SUMS["medium_stars"])
+        table = combination_tables.get('euromillions', 'etoile')
+        return table.sample(1, sum_min=sum_bounds[0], sum_max=sum_bounds[1])[0].tolist()
+    
+    @staticmethod
+    def _frequency_maps(stats: Dict[str, Any]) -> Tuple[Dict[int, float], Dict[int, float]]:
+        """Fréquences (0-1) des numéros et étoiles les plus sortis, d'après les statistiques de base"""
+        basic_stats = stats["basic_stats"]
+        return tuple(
+            {item["numero"]: item["pourcentage"] / 100 for item in basic_stats.get(key, [])}
+            for key in ("numeros", "etoiles")
+        )
     
     def _calculate_confidence(self, numbers: List[int], stars: List[int], stats: Dict[str, Any]) -> float:
         """Calcule un score de confiance pour la grille générée"""
         confidence = 0.0
         
         # Score basé sur les fréquences
-        number_freqs = stats["basic_stats"]["number_frequencies"]
-        star_freqs = stats["basic_stats"]["star_frequencies"]
+        number_freqs, star_freqs = self._frequency_maps(stats)
         
         avg_number_freq = sum(number_freqs.get(n, 0) for n in numbers) / 5
         avg_star_freq = sum(star_freqs.get(s, 0) for s in stars) / 2
@@ -392,9 +290,16 @@ class EuromillionsAdvancedGenerator:
     
     def generate_multiple_grids(self, num_grids: int = 5, strategy: str = "balanced") -> List[Dict[str, Any]]:
         """Génère plusieurs grilles avec différentes stratégies"""
-        grids = []
+        return list(self.iter_multiple_grids(num_grids, strategy))
+    
+    def iter_multiple_grids(self, num_grids: int = 5, strategy: str = "balanced") -> Iterator[Dict[str, Any]]:
+        """
+        Grilles produites une à une (génération en flux)
         
+        Les statistiques sont calculées une seule fois pour toutes les grilles.
+        """
         strategies = ["balanced", "frequency", "hot", "cold", "pattern"]
+        stats = self.stats.get_comprehensive_stats()
         
         for i in range(num_grids):
             if i < len(strategies):
@@ -402,10 +307,7 @@ class EuromillionsAdvancedGenerator:
             else:
                 current_strategy = strategy
             
-            grid = self.generate_probability_based_grid(current_strategy)
-            grids.append(grid)
-        
-        return grids
+            yield self.generate_probability_based_grid(current_strategy, stats)
     
     def get_grid_analysis(self, numbers: List[int], stars: List[int]) -> Dict[str, Any]:
         """Analyse une grille spécifique"""
@@ -438,8 +340,7 @@ class EuromillionsAdvancedGenerator:
             analysis["patterns"]["sum_range"] = "high_sum"
         
         # Analyser les fréquences
-        number_freqs = stats["basic_stats"]["number_frequencies"]
-        star_freqs = stats["basic_stats"]["star_frequencies"]
+        number_freqs, star_freqs = self._frequency_maps(stats)
         
         analysis["frequencies"]["numbers"] = {
             n: number_freqs.get(n, 0) for n in numbers
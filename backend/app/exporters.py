@@ -0,0 +1,167 @@
+"""
+Export en flux des tirages (CSV, Excel, Parquet et Arrow)
+Les lignes sont lues par paquets depuis la base (curseur côté serveur quand le moteur
+le permet) et écrites au fil de l'eau : la mémoire utilisée ne dépend pas du nombre de tirages
+"""
+
+import csv
+import io
+import os
+import tempfile
+from datetime import datetime
+from typing import Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from sqlalchemy import extract
+
+from .database import SessionLocal
+from .models import DrawEuromillions, DrawLoto
+
+# Nombre de lignes lues par aller-retour avec la base
+EXPORT_BATCH_SIZE = 2000
+
+# Nombre de lignes CSV regroupées dans un même bloc envoyé au client
+CSV_ROWS_PER_BLOCK = 500
+
+# Taille des blocs lors de la relecture des fichiers construits sur disque (Excel, Parquet, Arrow)
+FILE_BLOCK_SIZE = 64 * 1024
+
+# Colonnes exportées : (en-tête, attribut du modèle) — mêmes en-têtes que les fichiers d'import
+DRAW_EXPORT_COLUMNS = {
+    'euromillions': (DrawEuromillions, [
+        ('Date', 'date'), ('Numéro 1', 'n1'), ('Numéro 2', 'n2'), ('Numéro 3', 'n3'),
+        ('Numéro 4', 'n4'), ('Numéro 5', 'n5'), ('Etoile 1', 'e1'), ('Etoile 2', 'e2')
+    ]),
+    'loto': (DrawLoto, [
+        ('Date', 'date'), ('Numéro 1', 'n1'), ('Numéro 2', 'n2'), ('Numéro 3', 'n3'),
+        ('Numéro 4', 'n4'), ('Numéro 5', 'n5'), ('Numéro 6', 'n6'), ('Complémentaire', 'complementaire')
+    ]),
+}
+
+SHEET_NAMES = {'euromillions': 'Tirages Euromillions', 'loto': 'Tirages Loto'}
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+    'excel': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+    'parquet': ('application/vnd.apache.parquet', 'parquet'),
+    'arrow': ('application/vnd.apache.arrow.file', 'arrow'),
+}
+
+# Formats colonnes typés (voir columnar_io)
+COLUMNAR_FORMATS = ('parquet', 'arrow')
+
+
+def draws_query(db, game_type: str, year: Optional[int]):
+    """Requête des colonnes exportées (sans objets ORM), tirages les plus récents d'abord"""
+    model, columns = DRAW_EXPORT_COLUMNS[game_type]
+    query = db.query(*[getattr(model, attribute) for _, attribute in columns])
+    if year:
+        query = query.filter(extract('year', model.date) == year)
+    return query.order_by(model.date.desc())
+
+
+def has_draws_to_export(db, game_type: str, year: Optional[int] = None) -> bool:
+    """Vérifie qu'au moins un tirage correspond au filtre (avant d'ouvrir le flux)"""
+    return draws_query(db, game_type, year).limit(1).first() is not None
+
+
+def iter_draw_rows(game_type: str, year: Optional[int] = None, batch_size: int = EXPORT_BATCH_SIZE,
+                   format_dates: bool = True) -> Iterator[Tuple]:
+    """
+    Parcourt les tirages par paquets de batch_size lignes
+
+    La session est propre au flux : celle de la requête est fermée avant l'envoi
+    du corps de la réponse. format_dates=False conserve les dates typées.
+    """
+    db = SessionLocal()
+    try:
+        query = draws_query(db, game_type, year).execution_options(yield_per=batch_size)
+        for row in query:
+            if format_dates:
+                yield (row[0].strftime('%Y-%m-%d'),) + tuple(row[1:])
+            else:
+                yield tuple(row)
+    finally:
+        db.close()
+
+
+def stream_csv(header: Sequence[str], rows: Iterable[Sequence]) -> Iterator[bytes]:
+    """Écrit les lignes en CSV et produit des blocs d'octets de CSV_ROWS_PER_BLOCK lignes"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer, lineterminator='\n')
+    writer.writerow(header)
+    pending = 0
+
+    for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= CSV_ROWS_PER_BLOCK:
+            yield buffer.getvalue().encode('utf-8')
+            buffer.seek(0)
+            buffer.truncate()
+            pending = 0
+
+    yield buffer.getvalue().encode('utf-8')
+
+
+def stream_xlsx(header: Sequence[str], rows: Iterable[Sequence], sheet_name: str) -> Iterator[bytes]:
+    """
+    Écrit les lignes dans un classeur openpyxl en mode write_only puis le relit par blocs
+
+    Un fichier xlsx est une archive zip dont l'index est écrit en dernier : le classeur
+    est donc construit sur disque (lignes écrites au fil de l'eau, mémoire constante)
+    avant d'être envoyé.
+    """
+    from openpyxl import Workbook
+
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet(title=sheet_name)
+    sheet.append(list(header))
+    for row in rows:
+        sheet.append(list(row))
+
+    temp_path = new_temp_path('.xlsx')
+    try:
+        workbook.save(temp_path)
+    except Exception:
+        os.unlink(temp_path)
+        raise
+    yield from stream_temp_file(temp_path)
+
+
+def new_temp_path(suffix: str) -> str:
+    """Chemin d'un fichier temporaire vide (à supprimer par l'appelant)"""
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix) as temp_file:
+        return temp_file.name
+
+
+def stream_temp_file(path: str, block_size: int = FILE_BLOCK_SIZE) -> Iterator[bytes]:
+    """Relit un fichier construit sur disque par blocs puis le supprime"""
+    try:
+        with open(path, 'rb') as saved:
+            while True:
+                block = saved.read(block_size)
+                if not block:
+                    break
+                yield block
+    finally:
+        os.unlink(path)
+
+
+def stream_draws_export(game_type: str, export_format: str, year: Optional[int] = None) -> Iterator[bytes]:
+    """Flux d'octets de l'export des tirages d'un jeu au format demandé"""
+    if export_format in COLUMNAR_FORMATS:
+        from .columnar_io import stream_draws_columnar
+        return stream_draws_columnar(game_type, export_format, year)
+
+    _, columns = DRAW_EXPORT_COLUMNS[game_type]
+    header: List[str] = [name for name, _ in columns]
+    rows = iter_draw_rows(game_type, year)
+
+    if export_format == 'excel':
+        return stream_xlsx(header, rows, SHEET_NAMES[game_type])
+    return stream_csv(header, rows)
+
+
+def export_filename(game_type: str, year: Optional[int], export_format: str, table: str = 'tirages') -> str:
+    extension = EXPORT_FORMATS[export_format][1]
+    return f"{game_type}_{table}_{year if year else 'tous'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.{extension}"
@@ -0,0 +1,77 @@
+"""
+Réponses JSON rapides
+Encodage direct en octets (orjson si disponible) et renvoi de corps pré-sérialisés
+depuis le cache, sans repasser par jsonable_encoder
+"""
+
+import gzip
+import json
+from typing import Any, Dict, Optional
+from fastapi import Request
+from fastapi.responses import Response
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def json_default(value: Any) -> Any:
+    """Convertit les types non natifs (numpy, dates, ...) pour l'encodage JSON"""
+    if hasattr(value, 'item'):
+        # Scalaires numpy
+        return value.item()
+    if hasattr(value, 'tolist'):
+        # Tableaux numpy
+        return value.tolist()
+    if hasattr(value, 'isoformat'):
+        return value.isoformat()
+    return str(value)
+
+
+def dumps_json(content: Any) -> bytes:
+    """Encode un contenu en JSON compact (octets UTF-8)"""
+    if orjson is not None:
+        return orjson.dumps(
+            content,
+            default=json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(content, default=json_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def accepts_gzip(request: Optional[Request]) -> bool:
+    """Indique si le client accepte un corps compressé en gzip"""
+    if request is None:
+        return False
+    return 'gzip' in request.headers.get('accept-encoding', '').lower()
+
+
+class FastJSONResponse(Response):
+    """Réponse JSON encodée directement en octets"""
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps_json(content)
+
+
+class PreSerializedJSONResponse(Response):
+    """Réponse construite à partir d'un corps JSON déjà encodé (éventuellement gzip)"""
+    media_type = "application/json"
+
+    def __init__(self, body: bytes, gzipped: bool = False, accept_gzip: bool = False,
+                 status_code: int = 200, headers: Optional[Dict[str, str]] = None):
+        headers = dict(headers or {})
+
+        if gzipped:
+            if accept_gzip:
+                headers['Content-Encoding'] = 'gzip'
+            else:
+                # Client sans support gzip : décompresser une seule fois
+                body = gzip.decompress(body)
+            headers['Vary'] = 'Accept-Encoding'
+
+        super().__init__(content=body, status_code=status_code, headers=headers)
+
+    def render(self, content: Any) -> bytes:
+        return content
@@ -148,7 +148,8 @@ class GapAnalysis:
         # Utiliser l'autocorrélation pour détecter les cycles
         for cycle_len in range(2, min(len(gaps) // 2, 20)):
             correlations = []
-            for i in range(len(gaps) - cycle_len):
+            # Ne comparer que des fenêtres complètes de même longueur
+            for i in range(len(gaps) - 2 * cycle_len + 1):
                 corr = np.corrcoef(gaps[i:i+cycle_len], gaps[i+cycle_len:i+2*cycle_len])[0, 1]
                 if not np.isnan(corr):
                     correlations.append(corr)
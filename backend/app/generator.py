@@ -1,6 +1,6 @@
 import random
 import numpy as np
-from typing import List, Dict, Tuple
+from typing import List, Dict, Iterator, Tuple
 from sqlalchemy.orm import Session
 from .stats import StatistiquesAnalyzer
 from .models import Statistique
@@ -98,7 +98,10 @@ class GridGenerator:
     
     def generate_coverage_grids_euromillions(self, num_grids: int = 5) -> List[Dict]:
         """Génère plusieurs grilles complémentaires pour Euromillions (wheeling system)"""
-        grids = []
+        return list(self.iter_coverage_grids_euromillions(num_grids))
+    
+    def iter_coverage_grids_euromillions(self, num_grids: int = 5) -> Iterator[Dict]:
+        """Grilles complémentaires Euromillions produites une à une (génération en flux)"""
         used_numeros = set()
         used_etoiles = set()
         
@@ -117,30 +120,31 @@ class GridGenerator:
             numeros = sorted(random.sample(available_numeros, 5))
             etoiles = sorted(random.sample(available_etoiles, 2))
             
-            grids.append({
+            yield {
                 "numeros": numeros,
                 "etoiles": etoiles,
                 "type": "coverage"
-            })
+            }
             
             # Marquer comme utilisés
             used_numeros.update(numeros)
             used_etoiles.update(etoiles)
-        
-        return grids
     
     def generate_coverage_grids_loto(self, num_grids: int = 5) -> List[Dict]:
         """Génère plusieurs grilles complémentaires pour Loto"""
-        grids = []
+        return list(self.iter_coverage_grids_loto(num_grids))
+    
+    def iter_coverage_grids_loto(self, num_grids: int = 5) -> Iterator[Dict]:
+        """Grilles complémentaires Loto produites une à une (génération en flux)"""
         used_numeros = set()
         used_complementaires = set()
         
         for i in range(num_grids):
-            available_numeros = list(set(range(1, 46)) - used_numeros)
+            available_numeros = list(set(range(1, 50)) - used_numeros)
             available_complementaires = list(set(range(1, 46)) - used_complementaires)
             
             if len(available_numeros) < 6:
-                available_numeros = list(range(1, 46))
+                available_numeros = list(range(1, 50))
             
             if len(available_complementaires) < 1:
                 available_complementaires = list(range(1, 46))
@@ -148,16 +152,14 @@ class GridGenerator:
             numeros = sorted(random.sample(available_numeros, 6))
             complementaire = random.choice(available_complementaires)
             
-            grids.append({
+            yield {
                 "numeros": numeros,
                 "complementaire": complementaire,
                 "type": "coverage"
-            })
+            }
             
             used_numeros.update(numeros)
             used_complementaires.add(complementaire)
-        
-        return grids
     
     def generate_random_grid_euromillions(self) -> Dict:
         """Génère une grille Euromillions aléatoire"""
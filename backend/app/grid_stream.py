@@ -0,0 +1,169 @@
+"""
+Génération de grilles en flux (NDJSON ou Server-Sent Events)
+Les grilles sont produites par paquets et envoyées au fil de l'eau : le client reçoit les
+premières tout de suite et la mémoire du serveur ne dépend que de la taille d'un paquet.
+Le générateur est synchrone et paresseux : Starlette ne demande le paquet suivant qu'une
+fois le précédent remis au serveur ASGI, qui suspend l'envoi quand le client lit
+lentement (contre-pression). Une déconnexion du client arrête la génération.
+"""
+
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+
+from .fast_json import dumps_json
+from .utils import NUMBER_RANGES
+
+STREAM_MEDIA_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'sse': 'text/event-stream',
+}
+
+# Grilles par écriture sur la connexion
+STREAM_BATCH_SIZE = 100
+
+STREAM_MODES = ('weighted', 'random', 'coverage')
+
+# Groupes de numéros des grilles générées : (champ, groupe de l'instantané, nombre tiré, maximum)
+GRID_GROUPS = {
+    'euromillions': [('numeros', 'numero', 5, NUMBER_RANGES['euromillions']['numero']),
+                     ('etoiles', 'etoile', 2, NUMBER_RANGES['euromillions']['etoile'])],
+    'loto': [('numeros', 'numero', 6, NUMBER_RANGES['loto']['numero']),
+             ('complementaire', 'complementaire', 1, NUMBER_RANGES['loto']['complementaire'])],
+}
+
+STREAM_HEADERS = {
+    'Cache-Control': 'no-cache',
+    # Pas de mise en tampon par un proxy nginx : les grilles arrivent au fil de l'eau
+    'X-Accel-Buffering': 'no',
+}
+
+
+def stream_format(requested: Optional[str], accept: Optional[str]) -> str:
+    """Format demandé, sinon SSE si le client accepte text/event-stream, sinon NDJSON"""
+    if requested:
+        return requested
+    return 'sse' if accept and 'text/event-stream' in accept else 'ndjson'
+
+
+def _frequency_weights(game_type: str) -> Dict[str, np.ndarray]:
+    """Poids de chaque groupe : sorties de chaque numéro sur tout l'historique (0,1 si jamais sorti)"""
+    from .database import SessionLocal
+    from .shared_draw_store import shared_draws
+
+    db = SessionLocal()
+    try:
+        snapshot = shared_draws.get(db, game_type)
+    finally:
+        db.close()
+    weights = {}
+    for field, kind, _, max_number in GRID_GROUPS[game_type]:
+        counts = snapshot.counts(kind)[:max_number].astype(float) if snapshot.draw_count else np.zeros(max_number)
+        weights[field] = np.where(counts > 0, counts, 0.1)
+    return weights
+
+
+def iter_sampled_grids(game_type: str, num_grids: int, mode: str,
+                       rng: Optional[np.random.Generator] = None) -> Iterator[Dict[str, Any]]:
+    """
+    Grilles tirées par paquets vectorisés (mode weighted ou random)
+
+    weighted : numéros pondérés par leurs sorties, calculées une fois pour tout le flux.
+    """
+    from .synthetic_draws import sample_without_replacement
+
+    rng = rng or np.random.default_rng()
+    if mode == 'weighted':
+        weights = _frequency_weights(game_type)
+    else:
+        weights = {field: np.ones(max_number) for field, _, _, max_number in GRID_GROUPS[game_type]}
+
+    for first in range(0, num_grids, STREAM_BATCH_SIZE):
+        rows = min(STREAM_BATCH_SIZE, num_grids - first)
+        columns = {
+            field: sample_without_replacement(rng, weights[field], rows, picks).tolist()
+            for field, _, picks, _ in GRID_GROUPS[game_type]
+        }
+        for index in range(rows):
+            grid = {}
+            for field, _, picks, _ in GRID_GROUPS[game_type]:
+                grid[field] = columns[field][index] if picks > 1 else columns[field][index][0]
+            grid['type'] = mode
+            yield grid
+
+
+def iter_game_grids(game_type: str, num_grids: int, mode: str) -> Iterator[Dict[str, Any]]:
+    """Grilles d'un mode de génération (weighted, random ou coverage)"""
+    if mode == 'coverage':
+        from .generator import GridGenerator
+
+        generator = GridGenerator(None)
+        if game_type == 'euromillions':
+            return generator.iter_coverage_grids_euromillions(num_grids)
+        return generator.iter_coverage_grids_loto(num_grids)
+    return iter_sampled_grids(game_type, num_grids, mode)
+
+
+def iter_advanced_grids(num_grids: int, strategy: str) -> Iterator[Dict[str, Any]]:
+    """Grilles Euromillions avancées (statistiques calculées une fois, session propre au flux)"""
+    from .database import SessionLocal
+    from .euromillions_generator import EuromillionsAdvancedGenerator
+
+    db = SessionLocal()
+    try:
+        yield from EuromillionsAdvancedGenerator(db).iter_multiple_grids(num_grids, strategy)
+    finally:
+        db.close()
+
+
+def _ndjson_line(payload: Dict[str, Any]) -> bytes:
+    return dumps_json(payload) + b'\n'
+
+
+def _sse_event(event: str, payload: Dict[str, Any], event_id: Optional[int] = None) -> bytes:
+    prefix = f"id: {event_id}\n".encode() if event_id is not None else b''
+    return prefix + b'event: ' + event.encode() + b'\ndata: ' + dumps_json(payload) + b'\n\n'
+
+
+def stream_grids(make_grids: Callable[[], Iterator[Dict[str, Any]]], output_format: str,
+                 batch_size: int = STREAM_BATCH_SIZE) -> Iterator[bytes]:
+    """
+    Sérialise les grilles en flux, batch_size grilles par écriture
+
+    NDJSON : une ligne par grille ({"index": ..., grille}), puis une ligne
+    {"status": "completed"} ou {"status": "error"}. SSE : événements "grid", puis
+    "done" ou "error". make_grids n'est appelé qu'au début de l'envoi : le calcul
+    initial (statistiques) ne retarde pas les en-têtes de la réponse.
+    """
+    start_time = time.time()
+    count = 0
+    buffer = []
+    try:
+        for grid in make_grids():
+            payload = {'index': count, **grid}
+            buffer.append(_ndjson_line(payload) if output_format == 'ndjson' else _sse_event('grid', payload, count))
+            count += 1
+            if len(buffer) >= batch_size:
+                yield b''.join(buffer)
+                buffer = []
+        summary = {'status': 'completed', 'count': count, 'duration': round(time.time() - start_time, 3)}
+    except Exception as e:
+        summary = {'status': 'error', 'error': f"Erreur lors de la génération: {str(e)}", 'count': count}
+
+    if output_format == 'ndjson':
+        buffer.append(_ndjson_line(summary))
+    else:
+        buffer.append(_sse_event('done' if summary['status'] == 'completed' else 'error', summary))
+    yield b''.join(buffer)
+
+
+def grid_stream_response(make_grids: Callable[[], Iterator[Dict[str, Any]]], output_format: str):
+    """Réponse HTTP en flux (NDJSON ou SSE) pour un générateur de grilles"""
+    from fastapi.responses import StreamingResponse
+
+    return StreamingResponse(
+        stream_grids(make_grids, output_format),
+        media_type=STREAM_MEDIA_TYPES[output_format],
+        headers=STREAM_HEADERS
+    )
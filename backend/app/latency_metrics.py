@@ -0,0 +1,250 @@
+"""
+Histogrammes de latence par route et par opération
+Mémoire bornée : chaque histogramme a un nombre fixe de compartiments logarithmiques
+(≈19 % de largeur, de 0,1 ms à 2 min), les percentiles p50/p95/p99 sont estimés à
+partir des compartiments sans conserver les mesures individuelles
+"""
+
+import bisect
+import math
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from config import settings
+from .query_counter import track_queries
+
+# Bornes supérieures des compartiments, en secondes : 4 compartiments par puissance de 2
+BUCKETS_PER_OCTAVE = 4
+MIN_LATENCY = 0.0001
+MAX_LATENCY = 120.0
+BUCKET_BOUNDS: List[float] = [
+    MIN_LATENCY * 2 ** (index / BUCKETS_PER_OCTAVE)
+    for index in range(int(math.log2(MAX_LATENCY / MIN_LATENCY) * BUCKETS_PER_OCTAVE) + 2)
+]
+
+# Route des requêtes qui ne correspondent à aucune route déclarée (évite une série par URL)
+UNMATCHED_ROUTE = '<unmatched>'
+
+# Nombre maximal de séries (routes ou opérations) conservées
+MAX_SERIES = 500
+
+
+def cumulative_counts(counts: List[int], bounds: List[float]) -> List[int]:
+    """Cumule les compartiments d'un histogramme jusqu'à chaque borne (bornes prises dans BUCKET_BOUNDS)"""
+    result, seen, index = [], 0, 0
+    for bound in bounds:
+        while index < len(BUCKET_BOUNDS) and BUCKET_BOUNDS[index] <= bound * (1 + 1e-9):
+            seen += counts[index]
+            index += 1
+        result.append(seen)
+    return result
+
+
+class LatencyHistogram:
+    """Histogramme à compartiments logarithmiques fixes (mémoire constante)"""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKET_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(BUCKET_BOUNDS, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def percentile(self, quantile: float) -> float:
+        """Milieu géométrique du compartiment contenant le quantile (erreur relative ≈ 9 %)"""
+        if not self.count:
+            return 0.0
+        rank = max(1, math.ceil(quantile * self.count))
+        seen = 0
+        for index, bucket_count in enumerate(self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                if index == 0 or index >= len(BUCKET_BOUNDS):
+                    return min(BUCKET_BOUNDS[0], self.max) if index == 0 else self.max
+                return min(math.sqrt(BUCKET_BOUNDS[index - 1] * BUCKET_BOUNDS[index]), self.max)
+        return self.max
+
+    def cumulative(self, bounds: List[float]) -> List[int]:
+        """Nombre de mesures inférieures ou égales à chaque borne (bornes prises dans BUCKET_BOUNDS)"""
+        return cumulative_counts(self.counts, bounds)
+
+    def summary(self) -> Dict:
+        return {
+            'count': self.count,
+            'mean_ms': round(self.total / self.count * 1000, 3) if self.count else 0.0,
+            'p50_ms': round(self.percentile(0.50) * 1000, 3),
+            'p95_ms': round(self.percentile(0.95) * 1000, 3),
+            'p99_ms': round(self.percentile(0.99) * 1000, 3),
+            'max_ms': round(self.max * 1000, 3),
+        }
+
+
+class SeriesMetrics:
+    """Latence, codes de statut et succès du cache d'une route ou d'une opération"""
+
+    def __init__(self):
+        self.latency = LatencyHistogram()
+        self.statuses: Dict[str, int] = {}
+        self.cache = {'hit': 0, 'miss': 0}
+        self.db_queries = 0
+        self.db_queries_max = 0
+
+    def record(self, seconds: float, status: str, cache_hit: Optional[bool],
+               db_queries: Optional[int] = None) -> None:
+        self.latency.record(seconds)
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        if cache_hit is not None:
+            self.cache['hit' if cache_hit else 'miss'] += 1
+        if db_queries is not None:
+            self.db_queries += db_queries
+            self.db_queries_max = max(self.db_queries_max, db_queries)
+
+    def summary(self) -> Dict:
+        lookups = self.cache['hit'] + self.cache['miss']
+        return {
+            **self.latency.summary(),
+            'statuses': dict(self.statuses),
+            'cache_hits': self.cache['hit'],
+            'cache_misses': self.cache['miss'],
+            'cache_hit_rate': round(self.cache['hit'] / lookups * 100, 2) if lookups else None,
+            'db_queries_avg': round(self.db_queries / self.latency.count, 2) if self.latency.count else 0.0,
+            'db_queries_max': self.db_queries_max,
+        }
+
+
+class LatencyStore:
+    """Séries de mesures indexées par (type, nom), par exemple ('route', 'GET /api/loto/quick-stats')"""
+
+    def __init__(self, max_series: int = MAX_SERIES):
+        self.max_series = max_series
+        self.started_at = time.time()
+        self._series: Dict[Tuple[str, str], SeriesMetrics] = {}
+        self._lock = threading.Lock()
+
+    def record(self, kind: str, name: str, seconds: float, status: str = 'ok',
+               cache_hit: Optional[bool] = None, db_queries: Optional[int] = None) -> None:
+        key = (kind, name)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                if len(self._series) >= self.max_series:
+                    key = (kind, '<other>')
+                    series = self._series.get(key)
+                if series is None:
+                    series = self._series[key] = SeriesMetrics()
+            series.record(seconds, status, cache_hit, db_queries)
+
+    def series(self, kind: Optional[str] = None) -> Dict[Tuple[str, str], SeriesMetrics]:
+        """Copie de l'index des séries (les séries elles-mêmes ne sont pas copiées)"""
+        with self._lock:
+            return {key: value for key, value in self._series.items() if kind is None or key[0] == kind}
+
+    def summary(self, kind: Optional[str] = None) -> Dict[str, Dict]:
+        with self._lock:
+            return {
+                name: series.summary()
+                for (series_kind, name), series in sorted(self._series.items())
+                if kind is None or series_kind == kind
+            }
+
+    def export(self) -> List[Dict]:
+        """
+        Copie cohérente de toutes les séries (compartiments, somme, statuts, cache)
+
+        La copie est faite sous le verrou : le nombre total de mesures d'une série est
+        toujours égal à la somme de ses compartiments.
+        """
+        with self._lock:
+            return [
+                {
+                    'kind': kind,
+                    'name': name,
+                    'counts': list(series.latency.counts),
+                    'count': series.latency.count,
+                    'sum': series.latency.total,
+                    'statuses': dict(series.statuses),
+                    'cache': dict(series.cache),
+                    'db_queries': series.db_queries,
+                }
+                for (kind, name), series in sorted(self._series.items())
+            ]
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def reset(self) -> None:
+        with self._lock:
+            self._series.clear()
+            self.started_at = time.time()
+
+
+def _status_class(status: int) -> str:
+    return f"{status // 100}xx"
+
+
+class RequestMetricsMiddleware:
+    """
+    Middleware ASGI : mesure chaque requête HTTP jusqu'au dernier octet de la réponse
+
+    La série est le gabarit de la route (/api/loto/draws/{draw_id}) et non l'URL, pour
+    garder un nombre borné de séries ; l'en-tête X-Cache (HIT/MISS) des réponses
+    renseigne le taux de succès du cache de la route. Les requêtes SQL exécutées avant
+    l'envoi des en-têtes sont annoncées par X-DB-Query-Count et X-DB-Query-Time (ms) ;
+    au-delà de DB_QUERY_WARN_THRESHOLD, un avertissement signale un probable N+1.
+    """
+
+    def __init__(self, app, store: Optional[LatencyStore] = None,
+                 query_headers: Optional[bool] = None, query_warn_threshold: Optional[int] = None):
+        self.app = app
+        self.store = store or latency_store
+        self.query_headers = settings.DB_QUERY_HEADERS if query_headers is None else query_headers
+        self.query_warn_threshold = (settings.DB_QUERY_WARN_THRESHOLD
+                                     if query_warn_threshold is None else query_warn_threshold)
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        start_time = time.perf_counter()
+        response = {'status': 500, 'cache_hit': None}
+
+        with track_queries() as queries:
+            async def send_wrapper(message):
+                if message['type'] == 'http.response.start':
+                    response['status'] = message['status']
+                    for name, value in message.get('headers', []):
+                        if name.lower() == b'x-cache':
+                            response['cache_hit'] = value.upper().startswith(b'HIT')
+                    if self.query_headers:
+                        message = {**message, 'headers': [
+                            *message.get('headers', []),
+                            (b'x-db-query-count', str(queries.count).encode()),
+                            (b'x-db-query-time', f"{queries.duration * 1000:.3f}".encode()),
+                        ]}
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_wrapper)
+            finally:
+                route = scope.get('route')
+                route_path = getattr(route, 'path', None) or UNMATCHED_ROUTE
+                series_name = f"{scope['method']} {route_path}"
+                self.store.record(
+                    'route', series_name, time.perf_counter() - start_time,
+                    _status_class(response['status']), response['cache_hit'], queries.count
+                )
+                if self.query_warn_threshold and queries.count > self.query_warn_threshold:
+                    print(f"⚠️ {series_name}: {queries.count} requêtes SQL "
+                          f"({queries.duration * 1000:.1f} ms, seuil {self.query_warn_threshold}) - N+1 probable")
+
+
+# Instance globale
+latency_store = LatencyStore()
@@ -1,10 +1,80 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.responses import HTMLResponse
-from .routers import euromillions, loto, import_csv, history, euromillions_advanced, advanced_stats, loto_advanced
+from .latency_metrics import RequestMetricsMiddleware
+from .routers import euromillions, loto, import_csv, history, euromillions_advanced, advanced_stats, loto_advanced, admin
+from config import settings
 
 app = FastAPI(title="Générateur de grilles Loto & Euromillions")
 
+@app.on_event("startup")
+async def limit_threadpool_size():
+    """Borne le pool de threads qui exécute les routes synchrones (accès base de données)"""
+    from anyio import to_thread
+    to_thread.current_default_thread_limiter().total_tokens = settings.API_THREADPOOL_SIZE
+
+@app.on_event("startup")
+def warm_up_cache_on_startup():
+    """Préchauffe le cache en arrière-plan sans retarder le démarrage"""
+    from .cache_warmup import schedule_cache_warmup
+    schedule_cache_warmup(invalidate=False)
+
+@app.on_event("startup")
+def load_draw_snapshots_on_startup():
+    """Charge les instantanés des tirages (mémoire partagée entre workers) puis suit les nouveaux tirages"""
+    from .shared_draw_store import shared_draws
+    shared_draws.start()
+
+@app.on_event("startup")
+def prepare_combination_tables_on_startup():
+    """Charge (ou construit une seule fois par hôte) les tables des combinaisons en arrière-plan"""
+    if settings.COMBINATION_TABLE_PRELOAD:
+        from .combination_table import combination_tables
+        combination_tables.start()
+
+@app.on_event("shutdown")
+def release_shared_draws():
+    """Libère les segments de mémoire partagée publiés par ce processus"""
+    from .shared_draw_store import shared_draws
+    shared_draws.close()
+
+@app.on_event("shutdown")
+def stop_file_processing_pool():
+    """Arrête les processus de traitement des imports multi-fichiers"""
+    from .parallel_import import file_processing_pool
+    file_processing_pool.shutdown()
+
+@app.on_event("shutdown")
+def stop_wheeling_pool():
+    """Arrête les processus de construction des systèmes réducteurs"""
+    from .wheeling import wheeling_pool
+    wheeling_pool.shutdown()
+
+@app.get("/api/draw-store")
+def get_draw_store_status():
+    """Instantanés des tirages : génération, taille, rôle du processus (coordinateur ou lecteur)"""
+    from .combination_table import combination_tables
+    from .draw_snapshot import draw_snapshots
+    from .shared_draw_store import shared_draws
+    return {
+        "snapshots": draw_snapshots.status(),
+        "shared_memory": shared_draws.status(),
+        "combination_tables": combination_tables.status(),
+    }
+
+@app.get("/metrics", include_in_schema=False)
+def get_prometheus_metrics():
+    """Métriques du processus au format texte Prometheus (latences, cache, base, tâches, instantanés)"""
+    from fastapi.responses import Response
+    from .prometheus_metrics import CONTENT_TYPE, render_metrics
+    return Response(render_metrics(), media_type=CONTENT_TYPE)
+
+@app.get("/api/db-pool")
+def get_database_pool_status():
+    """État du pool de connexions : saturation, attente au checkout, connexions ouvertes"""
+    from .database import get_pool_status
+    return get_pool_status()
+
 @app.get("/", response_class=HTMLResponse)
 async def root():
     return """
@@ -49,6 +119,14 @@ async def root():
     </html>
     """
 
+# Profilage à la demande (installé seulement si un jeton d'administration est configuré)
+if settings.PROFILING_TOKEN:
+    from .request_profiler import RequestProfilerMiddleware
+    app.add_middleware(RequestProfilerMiddleware)
+
+# Latence, statut et succès du cache de chaque requête, par route
+app.add_middleware(RequestMetricsMiddleware)
+
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -63,4 +141,5 @@ app.include_router(advanced_stats.router, prefix="/api", tags=["Advanced Statist
 app.include_router(loto.router, prefix="/api/loto", tags=["Loto"])
 app.include_router(loto_advanced.router, tags=["Loto Advanced"])
 app.include_router(import_csv.router, prefix="/api/import", tags=["Import CSV"])
-app.include_router(history.router, prefix="/api/history", tags=["Historique"]) 
\ No newline at end of file
+app.include_router(history.router, prefix="/api/history", tags=["Historique"])
+app.include_router(admin.router, prefix="/api/admin", tags=["Administration"]) 
\ No newline at end of file
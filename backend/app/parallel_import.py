@@ -0,0 +1,123 @@
+"""
+Traitement parallèle des imports multi-fichiers
+Chaque fichier est validé et parsé dans un processus séparé ; le processus de l'API
+ne fait que fusionner les résultats et insérer les tirages en une seule fois
+"""
+
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Any, Callable, Dict, List, Optional
+
+from config import settings
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _elapsed_ms(start_time: float) -> float:
+    return round((time.perf_counter() - start_time) * 1000, 1)
+
+
+def _ensure_validators_importable() -> None:
+    """Les validateurs sont à la racine du backend (hors du package app)"""
+    if BACKEND_DIR not in sys.path:
+        sys.path.append(BACKEND_DIR)
+
+
+def validate_and_parse_loto_file(file_path: str, filename: str) -> Dict[str, Any]:
+    """
+    Tâche exécutée dans un processus : valide puis parse un fichier CSV Loto
+
+    Retourne le rapport de validation, les tirages parsés (si le fichier est valide)
+    et le temps passé dans chaque étape.
+    """
+    _ensure_validators_importable()
+    from upload_validator import UploadValidator
+    from app.utils import parse_loto_csv
+
+    start_time = time.perf_counter()
+    result = {"filename": filename, "validation": None, "draws": None, "error": None, "timing": {}}
+
+    try:
+        result["validation"] = UploadValidator().validate_csv_file(file_path, 'loto')
+        result["timing"]["validation_ms"] = _elapsed_ms(start_time)
+
+        if result["validation"]["valid"]:
+            parse_start = time.perf_counter()
+            result["draws"] = parse_loto_csv(file_path)
+            result["timing"]["parse_ms"] = _elapsed_ms(parse_start)
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["timing"]["worker_total_ms"] = _elapsed_ms(start_time)
+    return result
+
+
+def validate_loto_file(file_path: str, filename: str) -> Dict[str, Any]:
+    """Tâche exécutée dans un processus : validation détaillée d'un fichier CSV Loto"""
+    _ensure_validators_importable()
+    from enhanced_upload_validator import EnhancedUploadValidator
+
+    start_time = time.perf_counter()
+    result = {"filename": filename, "validation": None, "error": None}
+
+    try:
+        result["validation"] = EnhancedUploadValidator().validate_csv_file(file_path, 'loto')
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["timing"] = {"validation_ms": _elapsed_ms(start_time)}
+    return result
+
+
+class FileProcessingPool:
+    """
+    Pool de processus partagé pour le traitement des fichiers importés
+
+    Le pool est créé à la première utilisation puis réutilisé (le démarrage des
+    processus n'est payé qu'une fois). Les processus sont lancés en mode 'spawn' :
+    l'API a des threads actifs (cache, préchauffage) qu'un fork ne dupliquerait pas
+    proprement. En cas d'indisponibilité du pool, le traitement se fait en séquence.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context('spawn'))
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def map_files(self, task: Callable[[str, str], Dict[str, Any]], files: List[Dict[str, str]]) -> List[Dict[str, Any]]:
+        """Exécute task(path, filename) pour chaque fichier ; les résultats suivent l'ordre des fichiers"""
+        if len(files) <= 1 or self.max_workers == 1:
+            return [task(f["path"], f["filename"]) for f in files]
+
+        try:
+            executor = self._get_executor()
+            futures = [executor.submit(task, f["path"], f["filename"]) for f in files]
+            return [future.result() for future in futures]
+        except (BrokenProcessPool, OSError, RuntimeError) as e:
+            print(f"⚠️ Pool de processus indisponible, traitement séquentiel: {e}")
+            self._reset_executor()
+            return [task(f["path"], f["filename"]) for f in files]
+
+    def shutdown(self) -> None:
+        self._reset_executor()
+
+
+# Instance globale
+file_processing_pool = FileProcessingPool(settings.IMPORT_MAX_WORKERS)
@@ -1,44 +1,62 @@
+import itertools
 import time
 from typing import Dict, List, Optional, Any
 from datetime import datetime, timedelta
 from app.database import SessionLocal
 from .models import DrawEuromillions, DrawLoto
 from .cache_manager import cache_manager
+from .latency_metrics import latency_store
 import json
 
 class PerformanceMetrics:
     """Système de métriques de performance pour les générations"""
     
     def __init__(self):
+        # Chronomètres en cours uniquement : un chronomètre terminé est versé dans
+        # l'histogramme de son opération (voir latency_metrics) puis oublié
         self.metrics = {}
+        self._timer_ids = itertools.count(1)
     
     def start_timer(self, operation: str) -> str:
-        """Démarre un chronomètre pour une opération"""
-        timer_id = f"{operation}_{int(time.time())}"
+        """Démarre un chronomètre pour une opération (identifiant unique, même en parallèle)"""
+        timer_id = f"{operation}_{next(self._timer_ids)}"
         self.metrics[timer_id] = {
             'operation': operation,
-            'start_time': time.time(),
+            'start_time': time.perf_counter(),
             'status': 'running'
         }
         return timer_id
     
     def end_timer(self, timer_id: str, success: bool = True, metadata: Dict = None) -> Dict:
-        """Termine un chronomètre et calcule les métriques"""
-        if timer_id not in self.metrics:
+        """Termine un chronomètre, enregistre sa durée et retourne ses métriques"""
+        timer = self.metrics.pop(timer_id, None)
+        if timer is None:
             return {}
         
-        end_time = time.time()
-        duration = end_time - self.metrics[timer_id]['start_time']
+        metadata = metadata or {}
+        duration = time.perf_counter() - timer['start_time']
+        latency_store.record(
+            'operation', timer['operation'], duration,
+            'ok' if success else 'error', metadata.get('cache_hit')
+        )
         
-        self.metrics[timer_id].update({
-            'end_time': end_time,
+        timer.update({
             'duration': duration,
             'success': success,
-            'metadata': metadata or {},
+            'metadata': metadata,
             'status': 'completed'
         })
-        
-        return self.metrics[timer_id]
+        return timer
+    
+    def get_latency_summary(self) -> Dict:
+        """Percentiles de latence par route HTTP et par opération chronométrée"""
+        return {
+            'window': 'depuis le démarrage du processus',
+            'uptime_seconds': round(time.time() - latency_store.started_at, 1),
+            'running_timers': len(self.metrics),
+            'routes': latency_store.summary('route'),
+            'operations': latency_store.summary('operation')
+        }
     
     def calculate_prediction_accuracy(self, predictions: List[Dict], actual_results: List[Dict], game_type: str) -> Dict:
         """Calcule la précision des prédictions"""
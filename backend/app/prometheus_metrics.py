@@ -0,0 +1,241 @@
+"""
+Exposition des métriques au format texte de Prometheus (GET /metrics)
+Tout est lu en mémoire dans le processus (histogrammes du latency_store, compteurs du
+cache, état du pool et des instantanés) : aucune requête Redis ni base de données n'est
+faite pendant la collecte, qui reste peu coûteuse même avec un scrape toutes les 5 s
+"""
+
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from .cache_manager import cache_manager
+from .latency_metrics import BUCKET_BOUNDS, BUCKETS_PER_OCTAVE, cumulative_counts, latency_store
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Préfixe commun des métriques de l'application
+NAMESPACE = 'lotto'
+
+# Bornes "le" exposées : une par puissance de 2 (0,1 ms, 0,2 ms, ... ≈ 105 s)
+EXPORTED_BOUNDS: List[float] = BUCKET_BOUNDS[::BUCKETS_PER_OCTAVE]
+
+# Séries du latency_store : type -> (histogramme, compteur par statut, labels tirés du nom, aide)
+SERIES_METRICS: Dict[str, Tuple[str, str, Tuple[str, ...], str]] = {
+    'route': ('http_request_duration_seconds', 'http_requests_total', ('method', 'route'),
+              "Durée des requêtes HTTP par route"),
+    'db': ('db_query_duration_seconds', 'db_queries_total', ('statement',),
+           "Durée des requêtes SQL par type de requête"),
+    'task': ('task_duration_seconds', 'task_runs_total', ('task',),
+             "Durée des tâches de fond (Celery ou exécuteur local)"),
+    'snapshot': ('draw_snapshot_update_duration_seconds', 'draw_snapshot_updates_total', ('game', 'mode'),
+                 "Durée de reconstruction (build) ou de mise à jour (replay) des instantanés de tirages"),
+    'combinations': ('combination_table_build_duration_seconds', 'combination_table_builds_total', ('game', 'kind'),
+                     "Durée d'énumération des tables de combinaisons (génération sous contraintes)"),
+    'operation': ('operation_duration_seconds', 'operations_total', ('operation',),
+                  "Durée des opérations chronométrées par PerformanceMetrics"),
+}
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels: Dict[str, object]) -> str:
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in labels.items()) + '}'
+
+
+def _number(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class MetricsWriter:
+    """Accumule les lignes de l'exposition (un bloc HELP/TYPE par métrique)"""
+
+    def __init__(self, namespace: str = NAMESPACE):
+        self.namespace = namespace
+        self.lines: List[str] = []
+
+    def metric(self, name: str, metric_type: str, help_text: str,
+               samples: Iterable[Tuple[Dict[str, object], float]]) -> None:
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} {metric_type}")
+        for labels, value in samples:
+            self.lines.append(f"{full_name}{_labels(labels)} {_number(value)}")
+
+    def histogram(self, name: str, help_text: str, series: Sequence[Tuple[Dict[str, object], Dict]]) -> None:
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        self.lines.append(f"# HELP {full_name} {help_text}")
+        self.lines.append(f"# TYPE {full_name} histogram")
+        for labels, data in series:
+            for bound, count in zip(EXPORTED_BOUNDS, cumulative_counts(data['counts'], EXPORTED_BOUNDS)):
+                self.lines.append(f"{full_name}_bucket{_labels({**labels, 'le': f'{bound:.6g}'})} {count}")
+            self.lines.append(f"{full_name}_bucket{_labels({**labels, 'le': '+Inf'})} {data['count']}")
+            self.lines.append(f"{full_name}_sum{_labels(labels)} {_number(data['sum'])}")
+            self.lines.append(f"{full_name}_count{_labels(labels)} {data['count']}")
+
+    def render(self) -> str:
+        return '\n'.join(self.lines) + '\n'
+
+
+def _series_labels(kind: str, name: str) -> Dict[str, str]:
+    label_names = SERIES_METRICS[kind][2]
+    parts = name.split(' ', len(label_names) - 1)
+    parts += [''] * (len(label_names) - len(parts))
+    return dict(zip(label_names, parts))
+
+
+def _write_latency_series(writer: MetricsWriter) -> None:
+    exported = latency_store.export()
+    for kind, (histogram_name, counter_name, _, help_text) in SERIES_METRICS.items():
+        series = [(_series_labels(kind, data['name']), data) for data in exported if data['kind'] == kind]
+        writer.histogram(histogram_name, help_text, series)
+        writer.metric(counter_name, 'counter', f"{help_text} (nombre, par statut)", (
+            ({**labels, 'status': status}, count)
+            for labels, data in series
+            for status, count in sorted(data['statuses'].items())
+        ))
+        if kind == 'route':
+            writer.metric('http_cache_lookups_total', 'counter',
+                          "Réponses servies depuis le cache (X-Cache HIT) ou calculées (MISS), par route", (
+                              ({**labels, 'result': result}, data['cache'][result])
+                              for labels, data in series
+                              for result in ('hit', 'miss')
+                              if data['cache']['hit'] + data['cache']['miss']
+                          ))
+            writer.metric('http_db_queries_total', 'counter',
+                          "Requêtes SQL exécutées par les requêtes HTTP, par route", (
+                              (labels, data['db_queries']) for labels, data in series
+                          ))
+
+
+def _write_cache(writer: MetricsWriter) -> None:
+    lookups = cache_manager.lookup_counts()
+    writer.metric('cache_lookups_total', 'counter',
+                  "Consultations du cache Redis par famille de clés (hit, miss, unavailable)", (
+                      ({'family': family, 'result': result}, count)
+                      for family, counters in sorted(lookups.items())
+                      for result, count in counters.items()
+                  ))
+    writer.metric('cache_connected', 'gauge', "Connexion Redis établie (1) ou cache désactivé (0)",
+                  [({}, int(cache_manager.connected))])
+
+
+def _write_database(writer: MetricsWriter) -> None:
+    database = sys.modules.get('app.database')
+    if database is None or not database.SQLALCHEMY_AVAILABLE:
+        return
+    pool = database.get_pool_status()
+    writer.metric('db_pool_checkouts_total', 'counter', "Connexions empruntées au pool",
+                  [({}, pool['checkouts'])])
+    writer.metric('db_pool_checkout_timeouts_total', 'counter', "Emprunts abandonnés faute de connexion libre",
+                  [({}, pool['checkout_timeouts'])])
+    writer.metric('db_pool_connections_opened_total', 'counter', "Connexions ouvertes vers la base",
+                  [({}, pool['connections_opened'])])
+    if 'checked_out' in pool:
+        writer.metric('db_pool_checked_out', 'gauge', "Connexions actuellement empruntées",
+                      [({}, pool['checked_out'])])
+        writer.metric('db_pool_size', 'gauge', "Taille du pool (hors débordement)",
+                      [({}, pool['pool_size'])])
+        writer.metric('db_pool_overflow', 'gauge', "Connexions ouvertes au-delà de la taille du pool",
+                      [({}, max(pool['overflow'], 0))])
+
+
+def _write_draw_store(writer: MetricsWriter) -> None:
+    draw_snapshot = sys.modules.get('app.draw_snapshot')
+    if draw_snapshot is not None:
+        status = draw_snapshot.draw_snapshots.status()
+        snapshots = status['snapshots']
+        writer.metric('draw_snapshot_draws', 'gauge', "Nombre de tirages de l'instantané courant",
+                      (({'game': game}, info['draw_count']) for game, info in sorted(snapshots.items())))
+        writer.metric('draw_snapshot_generation', 'gauge', "Génération de l'instantané courant",
+                      (({'game': game}, info['generation']) for game, info in sorted(snapshots.items())))
+        writer.metric('draw_snapshot_bytes', 'gauge', "Mémoire des tableaux de l'instantané courant",
+                      (({'game': game}, info['size_bytes']) for game, info in sorted(snapshots.items())))
+        writer.metric('draw_snapshot_events_total', 'counter',
+                      "Chargements, reconstructions, tirages rejoués et enregistrements des instantanés", (
+                          ({'event': event}, status[event])
+                          for event in ('loaded', 'built', 'replayed_draws', 'saved', 'save_errors')
+                      ))
+
+    combination_table = sys.modules.get('app.combination_table')
+    if combination_table is not None:
+        status = combination_table.combination_tables.status()
+        writer.metric('combination_table_bytes', 'gauge', "Mémoire des tableaux des tables de combinaisons chargées", (
+            (dict(zip(('game', 'kind'), name.split('/'))), info['size_bytes'])
+            for name, info in sorted(status['tables'].items())
+        ))
+        writer.metric('combination_table_events_total', 'counter',
+                      "Chargements, constructions et enregistrements des tables de combinaisons", (
+                          ({'event': event}, status[event])
+                          for event in ('loaded', 'built', 'saved', 'save_errors')
+                      ))
+
+    shared_draw_store = sys.modules.get('app.shared_draw_store')
+    if shared_draw_store is not None:
+        status = shared_draw_store.shared_draws.status()
+        writer.metric('shared_draws_coordinator', 'gauge',
+                      "Processus coordinateur (1) ou lecteur (0) de la mémoire partagée",
+                      [({}, int(status['role'] == 'coordinator'))])
+        writer.metric('shared_draws_segment_bytes', 'gauge', "Taille du segment de mémoire partagée attaché",
+                      (({'game': game}, info['segment_bytes']) for game, info in sorted(status['games'].items())))
+        writer.metric('shared_draws_events_total', 'counter',
+                      "Publications, rattachements et replis locaux de la mémoire partagée", (
+                          ({'event': event}, status[event])
+                          for event in ('published', 'attached', 'local_fallbacks', 'errors')
+                      ))
+
+
+def _resident_memory_bytes() -> Optional[int]:
+    """Mémoire résidente du processus (Linux : /proc/self/statm), None ailleurs"""
+    try:
+        with open('/proc/self/statm') as statm:
+            return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _write_process(writer: MetricsWriter) -> None:
+    writer.metric('latency_series', 'gauge', "Séries de latence tenues en mémoire",
+                  [({}, len(latency_store))])
+
+    performance_metrics = sys.modules.get('app.performance_metrics')
+    if performance_metrics is not None:
+        writer.metric('running_timers', 'gauge', "Chronomètres PerformanceMetrics non terminés",
+                      [({}, len(performance_metrics.performance_metrics.metrics))])
+
+    background_jobs = sys.modules.get('app.background_jobs')
+    if background_jobs is not None:
+        writer.metric('local_jobs', 'gauge', "Tâches de fond locales suivies, par état", (
+            ({'state': state}, count)
+            for state, count in sorted(background_jobs.local_jobs.state_counts().items())
+        ))
+
+    resident_bytes = _resident_memory_bytes()
+    if resident_bytes is not None:
+        writer.metric('process_resident_memory_bytes', 'gauge', "Mémoire résidente du processus",
+                      [({}, resident_bytes)])
+    writer.metric('process_start_time_seconds', 'gauge', "Démarrage des mesures (horodatage Unix)",
+                  [({}, latency_store.started_at)])
+    writer.metric('process_pid', 'gauge', "Identifiant du processus (un worker par série)",
+                  [({}, os.getpid())])
+
+
+def render_metrics() -> str:
+    """Exposition complète des métriques du processus au format texte Prometheus 0.0.4"""
+    start_time = time.perf_counter()
+    writer = MetricsWriter()
+    _write_latency_series(writer)
+    _write_cache(writer)
+    _write_database(writer)
+    _write_draw_store(writer)
+    _write_process(writer)
+    writer.metric('metrics_render_seconds', 'gauge', "Durée de la collecte des métriques",
+                  [({}, time.perf_counter() - start_time)])
+    return writer.render()
@@ -0,0 +1,80 @@
+"""
+Comptage des requêtes SQL par requête HTTP (détection des N+1)
+Les événements SQLAlchemy de l'engine (database.py) incrémentent le compteur du contexte
+courant : le middleware de métriques en ouvre un par requête HTTP (copié dans le thread
+des routes synchrones), assert_max_queries en ouvre un autour d'un bloc de code
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator, Optional
+
+
+class QueryStats:
+    """Nombre et durée cumulée des requêtes SQL d'un bloc (propagés aux blocs englobants)"""
+
+    __slots__ = ('count', 'duration', 'parent')
+
+    def __init__(self, parent: Optional['QueryStats'] = None):
+        self.count = 0
+        self.duration = 0.0
+        self.parent = parent
+
+    def record(self, seconds: float) -> None:
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.duration += seconds
+            stats = stats.parent
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar('db_query_stats', default=None)
+
+
+def record_query(seconds: float) -> None:
+    """Compte une requête SQL dans le contexte courant (sans effet hors d'un bloc suivi)"""
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(seconds)
+
+
+@contextmanager
+def track_queries() -> Iterator[QueryStats]:
+    """Compte les requêtes SQL exécutées dans le bloc (y compris dans les blocs imbriqués)"""
+    stats = QueryStats(_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(max_queries: int, label: str = '') -> Iterator[QueryStats]:
+    """
+    Échoue (AssertionError) si le bloc exécute plus de max_queries requêtes SQL
+
+        with assert_max_queries(3, 'quick-stats'):
+            get_quick_stats(request=None, year=None, month=None, db=db)
+    """
+    with track_queries() as stats:
+        yield stats
+    if stats.count > max_queries:
+        raise AssertionError(
+            f"{label or 'Bloc'}: {stats.count} requêtes SQL exécutées (maximum {max_queries})"
+        )
+
+
+def assert_response_queries(response, max_queries: int, label: str = '') -> int:
+    """
+    Vérifie l'en-tête X-DB-Query-Count d'une réponse HTTP (TestClient ou serveur démarré)
+
+    Retourne le nombre de requêtes ; échoue si l'en-tête est absent ou dépasse max_queries.
+    """
+    header = response.headers.get('X-DB-Query-Count')
+    if header is None:
+        raise AssertionError(f"{label or 'Réponse'}: en-tête X-DB-Query-Count absent (DB_QUERY_HEADERS désactivé ?)")
+    count = int(header)
+    if count > max_queries:
+        raise AssertionError(f"{label or 'Réponse'}: {count} requêtes SQL exécutées (maximum {max_queries})")
+    return count
@@ -0,0 +1,242 @@
+"""
+Profilage à la demande d'une requête HTTP (échantillonnage des piles d'appel)
+Activé requête par requête avec le jeton d'administration (en-tête X-Profile ou paramètre
+_profile) : un thread relève toutes les PROFILING_INTERVAL_MS millisecondes la pile des
+threads qui exécutent cette requête, y compris le thread du pool qui exécute les routes
+synchrones. Le résultat (piles repliées pour flamegraph, fonctions les plus coûteuses)
+est conservé en mémoire sous l'identifiant de la requête.
+Sans jeton configuré, le middleware n'est pas installé : aucun surcoût.
+"""
+
+import contextvars
+import hmac
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, OrderedDict
+from typing import Dict, List, Optional
+from urllib.parse import parse_qs
+
+from config import settings
+
+PROFILE_HEADER = b'x-profile'
+PROFILE_QUERY_PARAM = '_profile'
+
+# Profondeur maximale d'une pile relevée
+MAX_STACK_DEPTH = 200
+
+# Session de profilage de la requête en cours (copiée dans les threads du pool avec le contexte)
+_active_session: contextvars.ContextVar[Optional['ProfileSession']] = contextvars.ContextVar(
+    'profile_session', default=None
+)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _frame_context(frame) -> Optional[contextvars.Context]:
+    """
+    Contexte exécuté par un cadre de l'ordonnanceur, sinon None
+
+    Les routes synchrones tournent dans WorkerThread.run d'anyio (variable locale context),
+    les coroutines dans Handle._run d'asyncio (attribut self._context).
+    """
+    code = frame.f_code
+    if code.co_name == 'run' and 'anyio' in code.co_filename:
+        context = frame.f_locals.get('context')
+    elif code.co_name == '_run' and code.co_filename.endswith(os.path.join('asyncio', 'events.py')):
+        context = getattr(frame.f_locals.get('self'), '_context', None)
+    else:
+        return None
+    return context if isinstance(context, contextvars.Context) else None
+
+
+class ProfileSession:
+    """Échantillons d'une requête profilée : piles repliées (de la racine à la fonction active)"""
+
+    def __init__(self, request_id: str, method: str, path: str, interval: float):
+        self.request_id = request_id
+        self.method = method
+        self.path = path
+        self.interval = interval
+        self.started_at = time.time()
+        self.duration = 0.0
+        self.status: Optional[int] = None
+        self.samples: Counter = Counter()
+        self.sample_count = 0
+
+    def add_stack(self, frame) -> bool:
+        """Ajoute la pile d'un thread si elle appartient à la requête ; retourne True si ajoutée"""
+        stack: List[str] = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            context = _frame_context(frame)
+            if context is not None:
+                if context.get(_active_session) is not self or not stack:
+                    return False
+                self.samples[tuple(reversed(stack))] += 1
+                self.sample_count += 1
+                return True
+            stack.append(_frame_label(frame))
+            frame = frame.f_back
+        return False
+
+    def collapsed(self) -> str:
+        """Piles repliées (format flamegraph.pl / speedscope) : "a;b;c nombre" par ligne"""
+        return '\n'.join(f"{';'.join(stack)} {count}" for stack, count in self.samples.most_common()) + '\n'
+
+    def top_functions(self, limit: int = 30) -> List[Dict]:
+        """Fonctions classées par temps propre (en tête de pile) puis cumulé (présentes dans la pile)"""
+        own, cumulative = Counter(), Counter()
+        for stack, count in self.samples.items():
+            own[stack[-1]] += count
+            for function in set(stack):
+                cumulative[function] += count
+        total = self.sample_count or 1
+        ranked = sorted(cumulative, key=lambda function: (own[function], cumulative[function]), reverse=True)
+        return [
+            {
+                'function': function,
+                'own_samples': own[function],
+                'own_percent': round(own[function] / total * 100, 1),
+                'cumulative_samples': cumulative[function],
+                'cumulative_percent': round(cumulative[function] / total * 100, 1),
+                'own_ms': round(own[function] * self.interval * 1000, 1),
+            }
+            for function in ranked[:limit]
+        ]
+
+    def summary(self) -> Dict:
+        return {
+            'request_id': self.request_id,
+            'method': self.method,
+            'path': self.path,
+            'status': self.status,
+            'started_at': self.started_at,
+            'duration_ms': round(self.duration * 1000, 3),
+            'interval_ms': round(self.interval * 1000, 3),
+            'samples': self.sample_count,
+        }
+
+
+class _Sampler(threading.Thread):
+    """Thread qui relève les piles des threads de la requête jusqu'à la fin de la session"""
+
+    def __init__(self, session: ProfileSession, max_seconds: float):
+        super().__init__(name=f"profiler-{session.request_id[:8]}", daemon=True)
+        self.session = session
+        self.max_seconds = max_seconds
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        deadline = time.perf_counter() + self.max_seconds
+        own_ident = threading.get_ident()
+        while not self.stopped.wait(self.session.interval) and time.perf_counter() < deadline:
+            for thread_ident, frame in sys._current_frames().items():
+                if thread_ident != own_ident:
+                    self.session.add_stack(frame)
+
+
+class ProfileStore:
+    """Derniers profils, indexés par identifiant de requête (les plus anciens sont oubliés)"""
+
+    def __init__(self, max_results: int = 50):
+        self.max_results = max_results
+        self._profiles: 'OrderedDict[str, ProfileSession]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def add(self, session: ProfileSession) -> None:
+        with self._lock:
+            self._profiles[session.request_id] = session
+            self._profiles.move_to_end(session.request_id)
+            while len(self._profiles) > self.max_results:
+                self._profiles.popitem(last=False)
+
+    def get(self, request_id: str) -> Optional[ProfileSession]:
+        with self._lock:
+            return self._profiles.get(request_id)
+
+    def list(self) -> List[Dict]:
+        with self._lock:
+            return [session.summary() for session in reversed(self._profiles.values())]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._profiles.clear()
+
+
+def is_valid_token(token: Optional[str]) -> bool:
+    """Compare le jeton fourni au jeton d'administration (False si le profilage est désactivé)"""
+    expected = settings.PROFILING_TOKEN
+    return bool(expected and token) and hmac.compare_digest(token.encode(), expected.encode())
+
+
+def _requested_token(scope) -> Optional[str]:
+    for name, value in scope.get('headers', []):
+        if name == PROFILE_HEADER:
+            return value.decode('latin-1')
+    query_string = scope.get('query_string', b'')
+    if PROFILE_QUERY_PARAM.encode() in query_string:
+        values = parse_qs(query_string.decode('latin-1')).get(PROFILE_QUERY_PARAM)
+        return values[0] if values else None
+    return None
+
+
+def _request_id(scope) -> str:
+    for name, value in scope.get('headers', []):
+        if name == b'x-request-id' and value:
+            return value.decode('latin-1')[:64]
+    return uuid.uuid4().hex
+
+
+class RequestProfilerMiddleware:
+    """
+    Middleware ASGI : profile les requêtes portant le jeton d'administration
+
+    La réponse d'une requête profilée porte l'en-tête X-Profile-Id ; le profil est
+    consultable via /api/admin/profiles/{id}. Les autres requêtes ne font qu'une
+    recherche d'en-tête.
+    """
+
+    def __init__(self, app, store: Optional[ProfileStore] = None):
+        self.app = app
+        self.store = store or profile_store
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] != 'http' or not is_valid_token(_requested_token(scope)):
+            await self.app(scope, receive, send)
+            return
+
+        session = ProfileSession(
+            _request_id(scope), scope['method'], scope['path'],
+            max(settings.PROFILING_INTERVAL_MS, 0.5) / 1000
+        )
+
+        async def send_wrapper(message):
+            if message['type'] == 'http.response.start':
+                session.status = message['status']
+                message = {**message, 'headers': [
+                    *message.get('headers', []), (b'x-profile-id', session.request_id.encode())
+                ]}
+            await send(message)
+
+        sampler = _Sampler(session, settings.PROFILING_MAX_SECONDS)
+        token = _active_session.set(session)
+        start_time = time.perf_counter()
+        sampler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            sampler.stopped.set()
+            # Le relevé en cours se termine avant publication : plus d'écriture dans session.samples
+            sampler.join()
+            session.duration = time.perf_counter() - start_time
+            _active_session.reset(token)
+            self.store.add(session)
+
+
+# Instance globale
+profile_store = ProfileStore(settings.PROFILING_MAX_RESULTS)
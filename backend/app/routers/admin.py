@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Header, HTTPException, Query
+from fastapi.responses import PlainTextResponse
+from typing import Optional
+
+router = APIRouter()
+
+def _check_admin_token(token: Optional[str]) -> None:
+    """Profilage désactivé : 404 ; jeton absent ou invalide : 403"""
+    from config import settings
+    from ..request_profiler import is_valid_token
+    
+    if not settings.PROFILING_TOKEN:
+        raise HTTPException(status_code=404, detail="Profilage désactivé (PROFILING_TOKEN non configuré)")
+    if not is_valid_token(token):
+        raise HTTPException(status_code=403, detail="Jeton d'administration invalide")
+
+def _get_profile(request_id: str):
+    from ..request_profiler import profile_store
+    
+    session = profile_store.get(request_id)
+    if session is None:
+        raise HTTPException(status_code=404, detail=f"Profil {request_id} introuvable")
+    return session
+
+@router.get("/profiles")
+def list_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Liste des derniers profils de requêtes (du plus récent au plus ancien)"""
+    from ..request_profiler import profile_store
+    
+    _check_admin_token(x_admin_token)
+    return {"profiles": profile_store.list()}
+
+@router.get("/profiles/{request_id}")
+def get_profile(
+    request_id: str,
+    limit: int = Query(30, ge=1, le=500, description="Nombre de fonctions retournées"),
+    x_admin_token: Optional[str] = Header(None)
+):
+    """Profil d'une requête : fonctions les plus coûteuses (temps propre et cumulé)"""
+    _check_admin_token(x_admin_token)
+    session = _get_profile(request_id)
+    return {**session.summary(), "top_functions": session.top_functions(limit)}
+
+@router.get("/profiles/{request_id}/collapsed", response_class=PlainTextResponse)
+def get_profile_collapsed(request_id: str, x_admin_token: Optional[str] = Header(None)):
+    """Piles repliées d'une requête (flamegraph.pl, speedscope, inferno)"""
+    _check_admin_token(x_admin_token)
+    return PlainTextResponse(_get_profile(request_id).collapsed())
+
+@router.delete("/profiles")
+def clear_profiles(x_admin_token: Optional[str] = Header(None)):
+    """Supprime les profils conservés"""
+    from ..request_profiler import profile_store
+    
+    _check_admin_token(x_admin_token)
+    profile_store.clear()
+    return {"message": "Profils supprimés"}
@@ -2,10 +2,30 @@ from fastapi import APIRouter, Depends, HTTPException, Query
 from sqlalchemy.orm import Session
 from typing import Optional, Dict, Any
 from ..database import get_db
-from ..advanced_statistics import AdvancedStatisticsAnalyzer
+from ..cache_manager import cache_manager
 
 router = APIRouter(prefix="/advanced-stats", tags=["Advanced Statistics"])
 
+def get_cached_number_analysis(db: Session, year: Optional[int] = None) -> Dict[str, Any]:
+    """Analyse complète des numéros depuis le cache (calculée et mise en cache si absente)"""
+    from ..advanced_statistics import AdvancedStatisticsAnalyzer
+    
+    return cache_manager.get_or_compute_analysis(
+        'euromillions', 'number_analysis',
+        lambda: AdvancedStatisticsAnalyzer(db).get_comprehensive_number_analysis(year),
+        year=year
+    )
+
+def get_cached_prediction_insights(db: Session, year: Optional[int] = None) -> Dict[str, Any]:
+    """Insights de prédiction depuis le cache (calculés et mis en cache si absents)"""
+    from ..advanced_statistics import AdvancedStatisticsAnalyzer
+    
+    return cache_manager.get_or_compute_analysis(
+        'euromillions', 'prediction_insights',
+        lambda: AdvancedStatisticsAnalyzer(db).get_prediction_insights(year),
+        year=year
+    )
+
 @router.get("/comprehensive-analysis")
 def get_comprehensive_analysis(
     year: Optional[int] = Query(None, description="Année spécifique pour l'analyse"),
@@ -13,8 +33,7 @@ def get_comprehensive_analysis(
 ):
     """Récupère l'analyse complète des statistiques avancées"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return analysis
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'analyse: {str(e)}")
@@ -26,8 +45,7 @@ def get_number_statistics(
 ):
     """Récupère les statistiques détaillées des numéros"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return {
             "number_statistics": analysis["number_statistics"],
             "total_draws": analysis["total_draws"],
@@ -43,8 +61,7 @@ def get_position_analysis(
 ):
     """Récupère l'analyse des positions préférées"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return {
             "position_statistics": analysis["position_statistics"],
             "total_draws": analysis["total_draws"]
@@ -59,8 +76,7 @@ def get_gap_analysis(
 ):
     """Récupère l'analyse des intervalles entre apparitions"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return {
             "gap_statistics": analysis["gap_statistics"],
             "total_draws": analysis["total_draws"]
@@ -75,8 +91,7 @@ def get_sequence_analysis(
 ):
     """Récupère l'analyse des séquences de numéros"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return {
             "sequence_statistics": analysis["sequence_statistics"],
             "total_draws": analysis["total_draws"]
@@ -91,8 +106,7 @@ def get_pattern_analysis(
 ):
     """Récupère l'analyse des patterns de numéros"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return {
             "pattern_statistics": analysis["pattern_statistics"],
             "total_draws": analysis["total_draws"]
@@ -107,8 +121,7 @@ def get_temporal_analysis(
 ):
     """Récupère l'analyse temporelle des numéros"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return {
             "temporal_statistics": analysis["temporal_statistics"],
             "total_draws": analysis["total_draws"]
@@ -123,8 +136,7 @@ def get_combination_analysis(
 ):
     """Récupère l'analyse des combinaisons fréquentes"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return {
             "combination_statistics": analysis["combination_statistics"],
             "total_draws": analysis["total_draws"]
@@ -139,8 +151,7 @@ def get_correlation_analysis(
 ):
     """Récupère l'analyse des corrélations entre numéros"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
+        analysis = get_cached_number_analysis(db, year)
         return {
             "correlation_statistics": analysis["correlation_statistics"],
             "total_draws": analysis["total_draws"]
@@ -155,8 +166,7 @@ def get_prediction_insights(
 ):
     """Récupère les insights pour les prédictions"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        insights = analyzer.get_prediction_insights(year)
+        insights = get_cached_prediction_insights(db, year)
         return insights
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération des insights: {str(e)}")
@@ -168,9 +178,8 @@ def get_summary_dashboard(
 ):
     """Récupère un tableau de bord résumé avec les statistiques clés"""
     try:
-        analyzer = AdvancedStatisticsAnalyzer(db)
-        analysis = analyzer.get_comprehensive_number_analysis(year)
-        insights = analyzer.get_prediction_insights(year)
+        analysis = get_cached_number_analysis(db, year)
+        insights = get_cached_prediction_insights(db, year)
         
         return {
             "summary": {
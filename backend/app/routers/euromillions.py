@@ -1,4 +1,4 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Depends, Body
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Depends, Body, Request
 from typing import List, Optional, Dict
 from pydantic import BaseModel
 from sqlalchemy import extract
@@ -6,9 +6,7 @@ from datetime import datetime, date
 from sqlalchemy import func, extract, or_, and_, desc, asc
 from sqlalchemy.orm import Session
 from ..database import get_db
-from ..utils import parse_euromillions_csv
-from ..stats import StatistiquesAnalyzer
-import pandas as pd
+from ..stats import StatistiquesAnalyzer, appearance_stats, count_appearances
 import io
 import tempfile
 import os
@@ -21,7 +19,7 @@ class DrawEuromillionsCreate(BaseModel):
     etoiles: List[int]
 
 @router.get("/")
-async def get_euromillions_draws(db: Session = Depends(get_db)):
+def get_euromillions_draws(db: Session = Depends(get_db)):
     """Récupérer tous les tirages Euromillions"""
     from ..models import DrawEuromillions
     
@@ -29,48 +27,141 @@ async def get_euromillions_draws(db: Session = Depends(get_db)):
     return {"draws": draws}
 
 @router.get("/draws")
-async def get_euromillions_draws_alias(db: Session = Depends(get_db)):
+def get_euromillions_draws_alias(db: Session = Depends(get_db)):
     """Alias pour /draws - redirige vers l'endpoint principal"""
-    return await get_euromillions_draws(db)
+    return get_euromillions_draws(db)
 
 @router.post("/import")
-async def import_euromillions_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def import_euromillions_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """Importer des tirages Euromillions depuis un fichier CSV"""
     try:
-        content = await file.read()
+        from ..utils import parse_euromillions_csv
+        
+        content = file.file.read()
         draws_data = parse_euromillions_csv(content)
         
-        from ..models import DrawEuromillions
+        from ..crud import bulk_insert_draws_euromillions
         
-        added_count = 0
-        for draw_data in draws_data:
-            # Vérifier si le tirage existe déjà
-            existing_draw = db.query(DrawEuromillions).filter(
-                DrawEuromillions.date == draw_data['date']
-            ).first()
-            
-            if not existing_draw:
-                new_draw = DrawEuromillions(**draw_data)
-                db.add(new_draw)
-                added_count += 1
+        # Dates existantes chargées en une requête, insertion par paquets
+        import_result = bulk_insert_draws_euromillions(db, draws_data)
+        added_count = import_result["added_count"]
         
-        db.commit()
+        # Invalider puis préchauffer les statistiques de ce jeu
+        from app.cache_warmup import schedule_cache_warmup
+        schedule_cache_warmup(['euromillions'])
+        
+        return {
+            "message": f"Import réussi. {added_count} tirages ajoutés.",
+            "added_count": added_count,
+            "skipped_count": import_result["skipped_count"] + import_result["duplicates_in_file"]
+        }
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/import-stream")
+def import_euromillions_csv_stream(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(5000, ge=100, le=100000, description="Nombre de lignes par paquet"),
+):
+    """
+    Importer un gros fichier CSV Euromillions par paquets de lignes
+    
+    Chaque paquet est validé puis inséré au fil de l'eau ; la progression est
+    renvoyée en NDJSON (une ligne JSON par paquet, puis une ligne de synthèse).
+    """
+    from fastapi.responses import StreamingResponse
+    from app.streaming_import import spool_upload_to_disk, stream_draws_import
+    
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Le fichier doit être un CSV")
+    
+    try:
+        file_path = spool_upload_to_disk(file.file)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la réception du fichier: {str(e)}")
+    
+    return StreamingResponse(
+        stream_draws_import(file_path, 'euromillions', chunk_size),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/import-columnar")
+def import_euromillions_columnar(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Importer des tirages Euromillions depuis un fichier Parquet ou Arrow (colonnes typées)"""
+    import os
+    from app.columnar_io import columnar_format_for, parse_columnar_draws
+    from app.crud import bulk_insert_draws_euromillions
+    from app.streaming_import import spool_upload_to_disk
+    
+    file_format = columnar_format_for(file.filename)
+    if not file_format:
+        raise HTTPException(status_code=400, detail="Le fichier doit être au format Parquet (.parquet) ou Arrow (.arrow, .feather)")
+    
+    file_path = spool_upload_to_disk(file.file, suffix=os.path.splitext(file.filename)[1])
+    try:
+        draws_data, errors = parse_columnar_draws(file_path, file_format, 'euromillions')
+        import_result = bulk_insert_draws_euromillions(db, draws_data)
+        added_count = import_result["added_count"]
+        
+        if added_count:
+            # Invalider puis préchauffer les statistiques de ce jeu
+            from app.cache_warmup import schedule_cache_warmup
+            schedule_cache_warmup(['euromillions'])
         
         return {
             "message": f"Import réussi. {added_count} tirages ajoutés.",
-            "added_count": added_count
+            "added_count": added_count,
+            "skipped_count": import_result["skipped_count"] + import_result["duplicates_in_file"],
+            "error_count": len(errors),
+            "errors": errors[:100]
         }
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.unlink(file_path)
+
+@router.post("/import-async")
+def import_euromillions_csv_async(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(5000, ge=100, le=100000, description="Nombre de lignes par paquet"),
+):
+    """
+    Importer un fichier CSV Euromillions en tâche de fond
+    
+    Le fichier est déposé puis importé par une tâche (Celery ou locale) ; la réponse
+    est immédiate et la progression se suit via /task-status/{task_id}.
+    """
+    from config import settings
+    from app.background_jobs import submit_import_job
+    from app.streaming_import import spool_upload_to_disk
+    
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Le fichier doit être un CSV")
+    
+    try:
+        file_path = spool_upload_to_disk(file.file, settings.IMPORT_UPLOAD_DIR)
+        task_id, mode = submit_import_job(file_path, 'euromillions', chunk_size)
+        
+        return {
+            "task_id": task_id,
+            "status": "started",
+            "mode": mode,
+            "message": f"Import du fichier {file.filename} lancé",
+            "check_status_url": f"/api/euromillions/task-status/{task_id}"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du lancement de l'import: {str(e)}")
 
 @router.post("/validate-upload")
-async def validate_euromillions_upload(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def validate_euromillions_upload(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """Valider un fichier CSV avant import"""
     try:
         # Créer un fichier temporaire
         with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_file:
-            content = await file.read()
+            content = file.file.read()
             temp_file.write(content)
             temp_file_path = temp_file.name
         
@@ -105,7 +196,7 @@ async def validate_euromillions_upload(file: UploadFile = File(...), db: Session
         raise HTTPException(status_code=400, detail=f"Erreur lors de la validation: {str(e)}")
 
 @router.get("/stats")
-async def get_euromillions_stats(
+def get_euromillions_stats(
     year: Optional[int] = Query(None, description="Filtrer par année"),
     month: Optional[int] = Query(None, description="Filtrer par mois"),
     db: Session = Depends(get_db)
@@ -179,7 +270,7 @@ async def get_euromillions_stats(
     }
 
 @router.get("/number/{number}")
-async def get_number_history(
+def get_number_history(
     number: int,
     type: str = Query(..., description="Type: 'numero' ou 'etoile'"),
     limit: int = Query(10, description="Nombre de tirages par page"),
@@ -268,15 +359,56 @@ async def get_number_history(
     }
 
 @router.get("/detailed-stats")
-async def get_detailed_stats_euromillions(db: Session = Depends(get_db)):
+def get_detailed_stats_euromillions(db: Session = Depends(get_db)):
     """Récupérer les statistiques détaillées Euromillions"""
     from ..models import DrawEuromillions
     from app.stats import get_detailed_stats_euromillions
     
     return get_detailed_stats_euromillions()
 
+@router.get("/export")
+def export_euromillions_data(
+    format: str = Query("csv", description="Format d'export: 'csv', 'excel', 'parquet' ou 'arrow'"),
+    year: Optional[int] = Query(None, description="Filtrer par année"),
+    table: str = Query("draws", description="Table exportée: 'draws', ou en parquet/arrow 'frequencies', 'pairs', 'gaps'"),
+    db: Session = Depends(get_db)
+):
+    """Exporter les données Euromillions (envoyées en flux, sans tout charger en mémoire)"""
+    from fastapi.responses import StreamingResponse
+    from app.exporters import COLUMNAR_FORMATS, EXPORT_FORMATS, export_filename, has_draws_to_export, stream_draws_export
+    
+    try:
+        export_format = format.lower() if format.lower() in EXPORT_FORMATS else 'csv'
+        
+        if table != 'draws':
+            from app.columnar_io import ANALYSIS_TABLES
+            if table not in ANALYSIS_TABLES or export_format not in COLUMNAR_FORMATS:
+                raise HTTPException(status_code=400, detail="Les tables d'analyse ('frequencies', 'pairs', 'gaps') s'exportent en 'parquet' ou 'arrow'")
+        
+        if not has_draws_to_export(db, 'euromillions', year):
+            raise HTTPException(status_code=404, detail="Aucun tirage trouvé pour l'export")
+        
+        if table == 'draws':
+            content = stream_draws_export('euromillions', export_format, year)
+            filename = export_filename('euromillions', year, export_format)
+        else:
+            from app.columnar_io import stream_analysis_table
+            content = stream_analysis_table(db, 'euromillions', table, export_format, year)
+            filename = export_filename('euromillions', year, export_format, table)
+        
+        return StreamingResponse(
+            content,
+            media_type=EXPORT_FORMATS[export_format][0],
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de l'export: {str(e)}")
+
 @router.get("/search")
-async def search_euromillions_draws(
+def search_euromillions_draws(
     year: Optional[int] = None,
     month: Optional[int] = None,
     start_date: Optional[str] = None,
@@ -335,7 +467,7 @@ async def search_euromillions_draws(
     }
 
 @router.get("/search/advanced")
-async def advanced_search_euromillions(
+def advanced_search_euromillions(
     numeros: Optional[str] = None,
     etoiles: Optional[str] = None,
     min_numeros: Optional[int] = None,
@@ -385,34 +517,34 @@ async def advanced_search_euromillions(
     }
 
 @router.get("/search/stats")
-async def get_search_stats_euromillions(db: Session = Depends(get_db)):
+def get_search_stats_euromillions(db: Session = Depends(get_db)):
     """Récupérer les statistiques pour la recherche"""
     from ..models import DrawEuromillions
     
-    # Années disponibles
-    years = db.query(extract('year', DrawEuromillions.date).distinct()).all()
-    years_available = sorted([int(year[0]) for year in years if year[0] is not None])
+    # Années disponibles et nombre de tirages par année (une seule requête groupée)
+    year_column = extract('year', DrawEuromillions.date)
+    year_counts = db.query(year_column, func.count(DrawEuromillions.id)).group_by(year_column).all()
+    yearly_stats = sorted(
+        ({"year": int(year), "count": count} for year, count in year_counts if year is not None),
+        key=lambda stat: stat["year"]
+    )
+    years_available = [stat["year"] for stat in yearly_stats]
     
     # Mois disponibles
-    months = db.query(extract('month', DrawEuromillions.date).distinct()).all()
+    month_column = extract('month', DrawEuromillions.date)
+    months = db.query(month_column).distinct().all()
     months_available = sorted([int(month[0]) for month in months if month[0] is not None])
     
-    # Plage de dates
-    date_range = db.query(
+    # Plage de dates et nombre total de tirages
+    total_draws, first_date, last_date = db.query(
+        func.count(DrawEuromillions.id),
         func.min(DrawEuromillions.date),
         func.max(DrawEuromillions.date)
-    ).first()
-    
-    # Statistiques par année
-    yearly_stats = []
-    for year in years_available:
-        count = db.query(DrawEuromillions).filter(
-            extract('year', DrawEuromillions.date) == year
-        ).count()
-        yearly_stats.append({"year": year, "count": count})
+    ).one()
+    date_range = (first_date, last_date)
     
     return {
-        "total_draws": db.query(DrawEuromillions).count(),
+        "total_draws": total_draws,
         "years_available": years_available,
         "months_available": months_available,
         "date_range": {
@@ -428,7 +560,7 @@ class DrawEuromillionsUpdate(BaseModel):
     etoiles: List[int]
 
 @router.post("/add-draw")
-async def add_single_draw(draw: DrawEuromillionsCreate, db: Session = Depends(get_db)):
+def add_single_draw(draw: DrawEuromillionsCreate, db: Session = Depends(get_db)):
     """Ajouter un tirage Euromillions manuellement"""
     from ..models import DrawEuromillions
     
@@ -494,6 +626,10 @@ async def add_single_draw(draw: DrawEuromillionsCreate, db: Session = Depends(ge
         db.commit()
         db.refresh(new_draw)
         
+        # Invalider puis préchauffer les statistiques de ce jeu
+        from app.cache_warmup import schedule_cache_warmup
+        schedule_cache_warmup(['euromillions'])
+        
         return {
             "message": "Tirage ajouté avec succès",
             "draw": new_draw
@@ -506,7 +642,7 @@ async def add_single_draw(draw: DrawEuromillionsCreate, db: Session = Depends(ge
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'ajout: {str(e)}")
 
 @router.put("/update-draw/{draw_id}")
-async def update_draw(draw_id: int, draw: DrawEuromillionsUpdate, db: Session = Depends(get_db)):
+def update_draw(draw_id: int, draw: DrawEuromillionsUpdate, db: Session = Depends(get_db)):
     """Modifier un tirage Euromillions existant"""
     from ..models import DrawEuromillions
     
@@ -570,6 +706,10 @@ async def update_draw(draw_id: int, draw: DrawEuromillionsUpdate, db: Session =
         db.commit()
         db.refresh(existing_draw)
         
+        # Invalider puis préchauffer les statistiques de ce jeu
+        from app.cache_warmup import schedule_cache_warmup
+        schedule_cache_warmup(['euromillions'])
+        
         return {
             "message": "Tirage modifié avec succès",
             "draw": existing_draw
@@ -582,7 +722,7 @@ async def update_draw(draw_id: int, draw: DrawEuromillionsUpdate, db: Session =
         raise HTTPException(status_code=500, detail=f"Erreur lors de la modification: {str(e)}")
 
 @router.delete("/delete-draw/{draw_id}")
-async def delete_draw(draw_id: int, db: Session = Depends(get_db)):
+def delete_draw(draw_id: int, db: Session = Depends(get_db)):
     """Supprimer un tirage Euromillions"""
     from ..models import DrawEuromillions
     
@@ -594,6 +734,10 @@ async def delete_draw(draw_id: int, db: Session = Depends(get_db)):
         db.delete(draw)
         db.commit()
         
+        # Invalider puis préchauffer les statistiques de ce jeu
+        from app.cache_warmup import schedule_cache_warmup
+        schedule_cache_warmup(['euromillions'])
+        
         return {
             "message": "Tirage supprimé avec succès",
             "deleted_draw_id": draw_id
@@ -606,7 +750,7 @@ async def delete_draw(draw_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de la suppression: {str(e)}")
 
 @router.post("/import-excel")
-async def import_euromillions_excel(
+def import_euromillions_excel(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -617,7 +761,9 @@ async def import_euromillions_excel(
         raise HTTPException(status_code=400, detail="Format de fichier non supporté. Utilisez .xlsx ou .xls")
     
     try:
-        content = await file.read()
+        import pandas as pd
+        
+        content = file.file.read()
         
         # Lire le fichier Excel
         if file.filename.endswith('.xlsx'):
@@ -635,92 +781,18 @@ async def import_euromillions_excel(
                 detail=f"Colonnes manquantes: {', '.join(missing_columns)}"
             )
         
-        added_count = 0
-        skipped_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                # Traitement de la date
-                date_value = row['Date du tirage']
-                if pd.isna(date_value):
-                    errors.append(f"Ligne {index + 2}: Date manquante")
-                    continue
-                
-                # Conversion de la date
-                if isinstance(date_value, str):
-                    # Essayer différents formats
-                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y']:
-                        try:
-                            draw_date = datetime.strptime(date_value, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        errors.append(f"Ligne {index + 2}: Format de date invalide: {date_value}")
-                        continue
-                else:
-                    draw_date = date_value.date()
-                
-                # Vérification des doublons de date
-                existing_draw = db.query(DrawEuromillions).filter(
-                    DrawEuromillions.date == draw_date
-                ).first()
-                
-                if existing_draw:
-                    skipped_count += 1
-                    continue
-                
-                # Extraction des numéros et étoiles
-                numeros = []
-                for i in range(1, 6):
-                    numero = row[f'N°{i}']
-                    if pd.isna(numero) or not isinstance(numero, (int, float)):
-                        errors.append(f"Ligne {index + 2}: Numéro {i} invalide")
-                        break
-                    numeros.append(int(numero))
-                else:
-                    # Vérification des plages
-                    if not all(1 <= n <= 50 for n in numeros):
-                        errors.append(f"Ligne {index + 2}: Numéros hors de la plage 1-50")
-                        continue
-                    
-                    if len(set(numeros)) != 5:
-                        errors.append(f"Ligne {index + 2}: Numéros en double")
-                        continue
-                    
-                    # Extraction des étoiles
-                    etoiles = []
-                    for i in range(1, 3):
-                        etoile = row[f'Étoile {i}']
-                        if pd.isna(etoile) or not isinstance(etoile, (int, float)):
-                            errors.append(f"Ligne {index + 2}: Étoile {i} invalide")
-                            break
-                        etoiles.append(int(etoile))
-                    else:
-                        # Vérification des plages pour les étoiles
-                        if not all(1 <= e <= 12 for e in etoiles):
-                            errors.append(f"Ligne {index + 2}: Étoiles hors de la plage 1-12")
-                            continue
-                        
-                        if len(set(etoiles)) != 2:
-                            errors.append(f"Ligne {index + 2}: Étoiles en double")
-                            continue
-                        
-                        # Création du tirage
-                        new_draw = DrawEuromillions(
-                            date=draw_date,
-                            numeros=sorted(numeros),
-                            etoiles=sorted(etoiles)
-                        )
-                        
-                        db.add(new_draw)
-                        added_count += 1
-                
-            except Exception as e:
-                errors.append(f"Ligne {index + 2}: Erreur inattendue - {str(e)}")
+        from ..crud import bulk_insert_draws_euromillions
+        from ..utils import parse_euromillions_excel
         
-        db.commit()
+        # Validation vectorisée puis insertion en masse des tirages valides
+        draws_data, errors = parse_euromillions_excel(df)
+        import_result = bulk_insert_draws_euromillions(db, draws_data)
+        added_count = import_result["added_count"]
+        skipped_count = import_result["skipped_count"] + import_result["duplicates_in_file"]
+        
+        # Invalider puis préchauffer les statistiques de ce jeu
+        from app.cache_warmup import schedule_cache_warmup
+        schedule_cache_warmup(['euromillions'])
         
         return {
             "message": f"Import terminé. {added_count} tirages ajoutés, {skipped_count} ignorés.",
@@ -734,7 +806,7 @@ async def import_euromillions_excel(
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'import: {str(e)}")
 
 @router.get("/generate")
-async def generate_euromillions_grids(
+def generate_euromillions_grids(
     num_grids: int = 3,
     mode: str = "weighted",
     db: Session = Depends(get_db)
@@ -758,8 +830,87 @@ async def generate_euromillions_grids(
     
     return {"grids": grids}
 
+@router.get("/generate-stream")
+def generate_euromillions_grids_stream(
+    request: Request,
+    num_grids: int = Query(1000, ge=1, le=1_000_000, description="Nombre de grilles"),
+    mode: str = Query("weighted", pattern="^(weighted|random|coverage)$", description="Mode de génération"),
+    output_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|sse)$",
+                                         description="ndjson ou sse (défaut : selon l'en-tête Accept)")
+):
+    """
+    Générer des grilles Euromillions en flux (NDJSON ou Server-Sent Events)
+    
+    Les grilles sont envoyées par paquets dès qu'elles sont produites ; le flux se
+    termine par une ligne (ou un événement) de synthèse.
+    """
+    from app.grid_stream import grid_stream_response, iter_game_grids, stream_format
+    
+    return grid_stream_response(
+        lambda: iter_game_grids('euromillions', num_grids, mode),
+        stream_format(output_format, request.headers.get('accept'))
+    )
+
+@router.get("/generate-constrained")
+def generate_euromillions_constrained_grids(
+    num_grids: int = Query(5, ge=1, le=1000, description="Nombre de grilles"),
+    odd: Optional[int] = Query(None, ge=0, le=5, description="Nombre de numéros impairs"),
+    low: Optional[int] = Query(None, ge=0, le=5, description="Nombre de numéros bas (1-25)"),
+    sum_min: Optional[int] = Query(None, ge=0, description="Somme minimale des numéros"),
+    sum_max: Optional[int] = Query(None, ge=0, description="Somme maximale des numéros"),
+    decades: Optional[str] = Query(None, pattern="^[0-5]{5}$",
+                                   description="Répartition par dizaines (1-10, 11-20, ...), ex. 21110"),
+    consecutive: Optional[int] = Query(None, ge=0, le=4, description="Nombre de paires de numéros consécutifs"),
+    max_run: Optional[int] = Query(None, ge=1, le=5, description="Longueur maximale d'une suite de numéros consécutifs"),
+    weighted: bool = Query(False, description="Pondérer les numéros par leurs sorties")
+):
+    """
+    Générer des grilles Euromillions sous contraintes (pairs/impairs, bas/hauts, somme, dizaines, suites)
+    
+    Tirage uniforme (ou pondéré) parmi toutes les combinaisons conformes, énumérées à
+    l'avance : le résultat respecte exactement les contraintes, sans nouvel essai.
+    """
+    try:
+        from app.combination_table import generate_constrained_grids
+        
+        constraints = {
+            'odd': odd, 'low': low, 'sum_min': sum_min, 'sum_max': sum_max,
+            'decades': decades, 'consecutive': consecutive, 'max_run': max_run,
+        }
+        return generate_constrained_grids('euromillions', num_grids, constraints, weighted=weighted)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la génération sous contraintes: {str(e)}")
+
+@router.post("/wheel")
+def build_euromillions_wheel(
+    numbers: List[int] = Body(..., embed=True, description="Numéros choisis (5 à 30, entre 1 et 50)"),
+    match: int = Body(3, embed=True, ge=1, le=5, description="Numéros gagnants garantis (k)"),
+    if_drawn: int = Body(3, embed=True, ge=1, le=5, description="Numéros choisis parmi les numéros tirés (m)"),
+    restarts: int = Body(4, embed=True, ge=1, le=8, description="Constructions indépendantes (la plus courte est gardée)"),
+    max_grids: int = Body(2000, embed=True, ge=1, le=5000, description="Nombre maximal de grilles (restarts x max_grids <= 20000)")
+):
+    """
+    Système réducteur Euromillions : grilles garantissant "k si m" sur les numéros choisis
+    
+    Si if_drawn des numéros tirés font partie des numéros choisis, au moins une grille
+    en contient match. "guaranteed" vaut false si max_grids ou la durée maximale
+    (WHEEL_TIME_BUDGET_SECONDS) a été atteint avant la couverture complète ("coverage"
+    donne alors la part des tirages couverts). Erreur 400 si la borne inférieure du
+    nombre de grilles ("lower_bound") dépasse max_grids.
+    """
+    try:
+        from app.wheeling import build_wheel
+        
+        return build_wheel('euromillions', numbers, match, if_drawn, restarts=restarts, max_grids=max_grids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la construction du système réducteur: {str(e)}")
+
 @router.post("/generate")
-async def generate_euromillions_grids_post(
+def generate_euromillions_grids_post(
     num_grids: int = 3,
     strategy: str = "random",
     db: Session = Depends(get_db)
@@ -814,6 +965,7 @@ def get_number_stats(
 
 @router.get("/quick-stats")
 def get_quick_stats(
+    request: Request,
     year: Optional[int] = Query(None, description="Année spécifique"),
     month: Optional[int] = Query(None, description="Mois spécifique (1-12)"),
     db: Session = Depends(get_db)
@@ -821,6 +973,7 @@ def get_quick_stats(
     """Récupère les statistiques rapides des numéros et étoiles"""
     from ..models import DrawEuromillions
     from app.cache_manager import cache_manager
+    from app.fast_json import FastJSONResponse, PreSerializedJSONResponse, accepts_gzip, dumps_json
     from app.performance_metrics import performance_metrics
     from sqlalchemy import extract, func
     import time
@@ -829,15 +982,24 @@ def get_quick_stats(
     timer_id = performance_metrics.start_timer("quick_stats_euromillions")
     
     try:
-        # Vérifier le cache d'abord
-        cached_result = cache_manager.get_quick_stats_cache('euromillions', year, month)
-        if cached_result:
+        # Vérifier le cache d'abord : le corps est renvoyé tel quel, sans décodage
+        cache_key = cache_manager.quick_stats_response_key('euromillions', year, month)
+        cached_body = cache_manager.get_response_bytes(cache_key)
+        if cached_body:
+            body, gzipped = cached_body
             performance_metrics.end_timer(timer_id, True, {'cache_hit': True})
-            return {
-                **cached_result,
+            return PreSerializedJSONResponse(
+                body, gzipped=gzipped, accept_gzip=accepts_gzip(request),
+                headers={"X-Cache": "HIT"}
+            )
+        
+        def cache_result(result: dict):
+            """Stocke la réponse finale encodée qui sera servie lors des prochains hits"""
+            cache_manager.set_response_bytes(cache_key, dumps_json({
+                **result,
                 "cached": True,
                 "cache_info": "Données récupérées du cache"
-            }
+            }), ttl=900)
         
         # Construire la requête de base
         query = db.query(DrawEuromillions)
@@ -848,8 +1010,14 @@ def get_quick_stats(
         if month:
             query = query.filter(extract('month', DrawEuromillions.date) == month)
         
-        # Compter le total de tirages
-        total_draws = query.count()
+        # Une seule requête : les numéros et étoiles de chaque tirage filtré
+        rows = query.with_entities(
+            DrawEuromillions.date,
+            DrawEuromillions.n1, DrawEuromillions.n2, DrawEuromillions.n3,
+            DrawEuromillions.n4, DrawEuromillions.n5,
+            DrawEuromillions.e1, DrawEuromillions.e2
+        ).all()
+        total_draws = len(rows)
         
         if total_draws == 0:
             result = {
@@ -857,61 +1025,25 @@ def get_quick_stats(
                 "numbers": [],
                 "stars": []
             }
-            cache_manager.set_quick_stats_cache('euromillions', result, year, month)
+            cache_result(result)
             performance_metrics.end_timer(timer_id, True, {'cache_hit': False, 'total_draws': 0})
-            return {**result, "cached": False}
+            return FastJSONResponse({**result, "cached": False}, headers={"X-Cache": "MISS"})
+        
+        # Nombre de tirages contenant chaque numéro / étoile et date de dernière apparition
+        number_counts, number_last = count_appearances(rows, range(1, 6))
+        star_counts, star_last = count_appearances(rows, range(6, 8))
         
         # Statistiques des numéros (1-50)
-        number_stats = []
-        for num in range(1, 51):
-            count = query.filter(
-                (DrawEuromillions.n1 == num) |
-                (DrawEuromillions.n2 == num) |
-                (DrawEuromillions.n3 == num) |
-                (DrawEuromillions.n4 == num) |
-                (DrawEuromillions.n5 == num)
-            ).count()
-            
-            percentage = (count / total_draws) * 100 if total_draws > 0 else 0
-            
-            # Trouver la dernière apparition
-            last_draw = query.filter(
-                (DrawEuromillions.n1 == num) |
-                (DrawEuromillions.n2 == num) |
-                (DrawEuromillions.n3 == num) |
-                (DrawEuromillions.n4 == num) |
-                (DrawEuromillions.n5 == num)
-            ).order_by(DrawEuromillions.date.desc()).first()
-            
-            number_stats.append({
-                "numero": num,
-                "count": count,
-                "percentage": round(percentage, 1),
-                "last_appearance": last_draw.date.strftime('%Y-%m-%d') if last_draw else None
-            })
+        number_stats = [
+            appearance_stats(num, number_counts, number_last, total_draws)
+            for num in range(1, 51)
+        ]
         
         # Statistiques des étoiles (1-12)
-        star_stats = []
-        for star in range(1, 13):
-            count = query.filter(
-                (DrawEuromillions.e1 == star) |
-                (DrawEuromillions.e2 == star)
-            ).count()
-            
-            percentage = (count / total_draws) * 100 if total_draws > 0 else 0
-            
-            # Trouver la dernière apparition
-            last_draw = query.filter(
-                (DrawEuromillions.e1 == star) |
-                (DrawEuromillions.e2 == star)
-            ).order_by(DrawEuromillions.date.desc()).first()
-            
-            star_stats.append({
-                "numero": star,
-                "count": count,
-                "percentage": round(percentage, 1),
-                "last_appearance": last_draw.date.strftime('%Y-%m-%d') if last_draw else None
-            })
+        star_stats = [
+            appearance_stats(star, star_counts, star_last, total_draws)
+            for star in range(1, 13)
+        ]
         
         result = {
             "total_draws": total_draws,
@@ -920,7 +1052,7 @@ def get_quick_stats(
         }
         
         # Mettre en cache le résultat
-        cache_manager.set_quick_stats_cache('euromillions', result, year, month)
+        cache_result(result)
         
         # Terminer le chronomètre
         performance_metrics.end_timer(timer_id, True, {
@@ -929,24 +1061,21 @@ def get_quick_stats(
             'calculation_time': time.time()
         })
         
-        return {**result, "cached": False}
+        return FastJSONResponse({**result, "cached": False}, headers={"X-Cache": "MISS"})
         
     except Exception as e:
         performance_metrics.end_timer(timer_id, False, {'error': str(e)})
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
 
 @router.get("/performance-metrics")
-def get_performance_metrics(
-    days: int = Query(7, description="Nombre de jours pour l'analyse"),
-    db: Session = Depends(get_db)
-):
-    """Récupère les métriques de performance"""
+def get_performance_metrics(db: Session = Depends(get_db)):
+    """Récupère les métriques de performance (percentiles de latence par route et par opération)"""
     from app.performance_metrics import performance_metrics
     from app.cache_manager import cache_manager
     
     try:
-        # Métriques de performance générales
-        performance_summary = performance_metrics.get_performance_summary('euromillions', days)
+        # Latences p50/p95/p99 depuis les histogrammes du processus
+        latency = performance_metrics.get_latency_summary()
         
         # Métriques du cache
         cache_performance = performance_metrics.get_cache_performance()
@@ -954,11 +1083,14 @@ def get_performance_metrics(
         # Informations sur le cache
         cache_info = cache_manager.get_cache_info()
         
+        # État du pool de connexions à la base
+        from app.database import get_pool_status
+        
         return {
-            "performance_summary": performance_summary,
+            "latency": latency,
             "cache_performance": cache_performance,
             "cache_info": cache_info,
-            "analysis_period_days": days
+            "database_pool": get_pool_status()
         }
         
     except Exception as e:
@@ -997,43 +1129,17 @@ def generate_advanced_grids_endpoint(
 
 @router.get("/task-status/{task_id}")
 def get_task_status(task_id: str):
-    """Récupère le statut d'une tâche asynchrone"""
-    from app.celery_app import celery_app
+    """Récupère le statut d'une tâche asynchrone (Celery ou tâche de fond locale)"""
+    from app.background_jobs import get_task_status as get_background_task_status
     
     try:
-        task = celery_app.AsyncResult(task_id)
-        
-        if task.state == 'PENDING':
-            response = {
-                'task_id': task_id,
-                'state': task.state,
-                'status': 'En attente...'
-            }
-        elif task.state == 'PROGRESS':
-            response = {
-                'task_id': task_id,
-                'state': task.state,
-                'status': task.info.get('status', ''),
-                'current': task.info.get('current', 0),
-                'total': task.info.get('total', 100)
-            }
-        elif task.state == 'SUCCESS':
-            response = {
-                'task_id': task_id,
-                'state': task.state,
-                'status': 'Terminé avec succès',
-                'result': task.result
-            }
-        else:
-            response = {
-                'task_id': task_id,
-                'state': task.state,
-                'status': 'Échec',
-                'error': str(task.info)
-            }
-        
-        return response
+        status = get_background_task_status(task_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail=f"Tâche {task_id} introuvable")
+        return status
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération du statut: {str(e)}")
 
@@ -1043,9 +1149,10 @@ def get_gap_analysis(
 ):
     """Analyse les gaps (intervalles) pour prédire les numéros"""
     from app.gap_analysis import gap_analyzer
+    from app.cache_manager import cache_manager
     from ..models import DrawEuromillions
     
-    try:
+    def compute_gap_analysis():
         # Récupérer tous les tirages
         draws = db.query(DrawEuromillions).order_by(DrawEuromillions.date.desc()).all()
         
@@ -1068,6 +1175,9 @@ def get_gap_analysis(
             "gap_statistics": gap_statistics,
             "predictions": predictions
         }
+    
+    try:
+        return cache_manager.get_or_compute_analysis('euromillions', 'gap_analysis', compute_gap_analysis)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'analyse des gaps: {str(e)}")
@@ -1080,9 +1190,10 @@ def get_combination_analysis(
 ):
     """Analyse les combinaisons fréquentes"""
     from app.combination_analysis import combination_analyzer
+    from app.cache_manager import cache_manager
     from ..models import DrawEuromillions
     
-    try:
+    def compute_combination_analysis():
         # Récupérer tous les tirages
         draws = db.query(DrawEuromillions).order_by(DrawEuromillions.date.desc()).all()
         
@@ -1111,6 +1222,12 @@ def get_combination_analysis(
                 "max_size": max_size
             }
         }
+    
+    try:
+        return cache_manager.get_or_compute_analysis(
+            'euromillions', 'combination_analysis', compute_combination_analysis,
+            min_size=min_size, max_size=max_size
+        )
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'analyse des combinaisons: {str(e)}")
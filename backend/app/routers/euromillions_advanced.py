@@ -1,24 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
 from sqlalchemy.orm import Session
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ..database import get_db
-from ..euromillions_advanced_stats import EuromillionsAdvancedStats
-from ..euromillions_generator import EuromillionsAdvancedGenerator
+from ..cache_manager import cache_manager
 
 router = APIRouter(prefix="/euromillions/advanced", tags=["Euromillions Advanced"])
 
+def get_cached_comprehensive_stats(db: Session) -> Dict[str, Any]:
+    """Statistiques complètes depuis le cache (calculées et mises en cache si absentes)"""
+    from ..euromillions_advanced_stats import EuromillionsAdvancedStats
+    
+    return cache_manager.get_or_compute_analysis(
+        'euromillions', 'comprehensive', lambda: EuromillionsAdvancedStats(db).get_comprehensive_stats()
+    )
+
 @router.get("/comprehensive-stats")
 def get_comprehensive_stats(db: Session = Depends(get_db)):
     """Retourne toutes les statistiques avancées d'Euromillions"""
     try:
-        stats = EuromillionsAdvancedStats(db)
-        return stats.get_comprehensive_stats()
+        return get_cached_comprehensive_stats(db)
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
 
 @router.get("/payout-table")
 def get_payout_table(db: Session = Depends(get_db)):
     """Retourne le tableau de gains Euromillions"""
+    from ..euromillions_advanced_stats import EuromillionsAdvancedStats
+    
     try:
         stats = EuromillionsAdvancedStats(db)
         return {
@@ -31,6 +39,8 @@ def get_payout_table(db: Session = Depends(get_db)):
 @router.get("/frequent-combinations")
 def get_frequent_combinations(min_frequency: float = 0.05, db: Session = Depends(get_db)):
     """Retourne les combinaisons de numéros les plus fréquentes"""
+    from ..euromillions_advanced_stats import EuromillionsAdvancedStats
+    
     try:
         stats = EuromillionsAdvancedStats(db)
         combinations = stats.find_most_frequent_combinations(min_frequency)
@@ -45,6 +55,8 @@ def get_frequent_combinations(min_frequency: float = 0.05, db: Session = Depends
 @router.get("/patterns")
 def get_number_patterns(db: Session = Depends(get_db)):
     """Retourne l'analyse des patterns de numéros"""
+    from ..euromillions_advanced_stats import EuromillionsAdvancedStats
+    
     try:
         stats = EuromillionsAdvancedStats(db)
         patterns = stats.analyze_number_patterns()
@@ -58,6 +70,8 @@ def get_number_patterns(db: Session = Depends(get_db)):
 @router.get("/hot-cold-analysis")
 def get_hot_cold_analysis(recent_draws: int = 50, db: Session = Depends(get_db)):
     """Retourne l'analyse des numéros chauds/froids"""
+    from ..euromillions_advanced_stats import EuromillionsAdvancedStats
+    
     try:
         stats = EuromillionsAdvancedStats(db)
         analysis = stats.get_hot_cold_analysis(recent_draws)
@@ -71,6 +85,8 @@ def get_hot_cold_analysis(recent_draws: int = 50, db: Session = Depends(get_db))
 @router.get("/generate-grid")
 def generate_probability_grid(strategy: str = "balanced", db: Session = Depends(get_db)):
     """Génère une grille basée sur les probabilités avancées"""
+    from ..euromillions_generator import EuromillionsAdvancedGenerator
+    
     try:
         generator = EuromillionsAdvancedGenerator(db)
         grid = generator.generate_probability_based_grid(strategy)
@@ -103,6 +119,8 @@ def generate_probability_grid(strategy: str = "balanced", db: Session = Depends(
 @router.get("/generate-multiple-grids")
 def generate_multiple_grids(num_grids: int = 5, strategy: str = "balanced", db: Session = Depends(get_db)):
     """Génère plusieurs grilles avec différentes stratégies"""
+    from ..euromillions_generator import EuromillionsAdvancedGenerator
+    
     try:
         generator = EuromillionsAdvancedGenerator(db)
         grids = generator.generate_multiple_grids(num_grids, strategy)
@@ -114,9 +132,26 @@ def generate_multiple_grids(num_grids: int = 5, strategy: str = "balanced", db:
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de la génération multiple: {str(e)}")
 
+@router.get("/generate-multiple-grids-stream")
+def generate_multiple_grids_stream(
+    request: Request,
+    num_grids: int = Query(100, ge=1, le=1_000_000),
+    strategy: str = "balanced",
+    output_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|sse)$")
+):
+    """Génère plusieurs grilles avec différentes stratégies, envoyées en flux (NDJSON ou SSE)"""
+    from ..grid_stream import grid_stream_response, iter_advanced_grids, stream_format
+    
+    return grid_stream_response(
+        lambda: iter_advanced_grids(num_grids, strategy),
+        stream_format(output_format, request.headers.get('accept'))
+    )
+
 @router.post("/analyze-grid")
 def analyze_grid(grid: Dict[str, Any], db: Session = Depends(get_db)):
     """Analyse une grille spécifique"""
+    from ..euromillions_generator import EuromillionsAdvancedGenerator
+    
     try:
         numbers = grid.get("numbers", [])
         stars = grid.get("stars", [])
@@ -171,8 +206,7 @@ def get_available_strategies():
 def get_stats_summary(db: Session = Depends(get_db)):
     """Retourne un résumé des statistiques principales"""
     try:
-        stats = EuromillionsAdvancedStats(db)
-        comprehensive_stats = stats.get_comprehensive_stats()
+        comprehensive_stats = get_cached_comprehensive_stats(db)
         
         # Extraire les informations principales
         basic_stats = comprehensive_stats["basic_stats"]
@@ -198,13 +232,14 @@ def get_stats_summary(db: Session = Depends(get_db)):
 def get_yearly_analysis(year: int, db: Session = Depends(get_db)):
     """Retourne l'analyse pour une année spécifique"""
     try:
-        stats = EuromillionsAdvancedStats(db)
-        comprehensive_stats = stats.get_comprehensive_stats()
+        comprehensive_stats = get_cached_comprehensive_stats(db)
         
-        if year not in comprehensive_stats["yearly_stats"]:
-            raise HTTPException(status_code=404, detail=f"Aucune donnée disponible pour l'année {year}")
+        # Les clés annuelles deviennent des chaînes après un passage par le cache
+        yearly_stats = comprehensive_stats["yearly_stats"]
+        yearly_data = yearly_stats.get(year, yearly_stats.get(str(year)))
         
-        yearly_data = comprehensive_stats["yearly_stats"][year]
+        if yearly_data is None:
+            raise HTTPException(status_code=404, detail=f"Aucune donnée disponible pour l'année {year}")
         
         return {
             "year": year,
@@ -217,6 +252,8 @@ def get_yearly_analysis(year: int, db: Session = Depends(get_db)):
 @router.get("/combination-analysis")
 def get_combination_analysis(combination_type: str = "pairs", min_frequency: float = 0.1, db: Session = Depends(get_db)):
     """Analyse spécifique des combinaisons par type"""
+    from ..euromillions_advanced_stats import EuromillionsAdvancedStats
+    
     try:
         stats = EuromillionsAdvancedStats(db)
         all_combinations = stats.find_most_frequent_combinations(min_frequency)
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Depends, Query, HTTPException
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from ..database import SessionLocal
+from ..database import get_db
 from ..crud import (
     get_draws_by_year_euromillions, get_draws_by_year_loto,
     get_years_available_euromillions, get_years_available_loto,
@@ -11,13 +11,6 @@ from ..crud import (
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.get("/euromillions")
 def get_euromillions_history(
     year: Optional[int] = Query(None, description="Année spécifique (optionnel)"),
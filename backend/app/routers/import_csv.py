@@ -3,21 +3,13 @@ from fastapi.responses import JSONResponse
 from sqlalchemy.orm import Session
 import tempfile
 import os
-from ..database import SessionLocal
-from ..crud import insert_draw_euromillions, insert_draw_loto, insert_statistique
-from ..utils import parse_euromillions_csv, parse_loto_csv, parse_stats_csv
+from ..database import get_db
+from ..crud import bulk_insert_draws_euromillions, bulk_insert_draws_loto, insert_statistique
 
 router = APIRouter()
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
-
 @router.post("/")
-async def import_csv(
+def import_csv(
     file: UploadFile = File(...), 
     type: str = Form(...), 
     jeu: str = Form(None),  # Pour les stats, spécifier le jeu
@@ -31,9 +23,12 @@ async def import_csv(
     if type not in ["euromillions", "loto", "stats"]:
         raise HTTPException(status_code=400, detail="Type doit être 'euromillions', 'loto' ou 'stats'")
     
+    # Parseurs importés à la demande (pandas n'est pas chargé au démarrage)
+    from ..utils import parse_euromillions_csv, parse_loto_csv, parse_stats_csv
+    
     try:
         with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp:
-            content = await file.read()
+            content = file.file.read()
             tmp.write(content)
             tmp_path = tmp.name
         
@@ -42,15 +37,10 @@ async def import_csv(
                 draws = parse_euromillions_csv(tmp_path)
                 print(f"Parsing réussi: {len(draws)} tirages trouvés")
                 
-                imported_count = 0
-                for draw in draws:
-                    try:
-                        result = insert_draw_euromillions(db, draw)
-                        if result:
-                            imported_count += 1
-                    except Exception as insert_error:
-                        print(f"Erreur lors de l'insertion du tirage {draw}: {insert_error}")
-                        # Continuer avec les autres tirages
+                imported_count = bulk_insert_draws_euromillions(db, draws)["added_count"]
+                
+                from ..cache_warmup import schedule_cache_warmup
+                schedule_cache_warmup(['euromillions'])
                 
                 return JSONResponse(content={
                     "message": f"{imported_count} tirages Euromillions importés avec succès sur {len(draws)} trouvés",
@@ -61,11 +51,14 @@ async def import_csv(
             
         elif type == "loto":
             draws = parse_loto_csv(tmp_path)
-            for draw in draws:
-                insert_draw_loto(db, draw)
+            imported_count = bulk_insert_draws_loto(db, draws)["added_count"]
+            
+            from ..cache_warmup import schedule_cache_warmup
+            schedule_cache_warmup(['loto'])
+            
             return JSONResponse(content={
-                "message": f"{len(draws)} tirages Loto importés avec succès",
-                "count": len(draws)
+                "message": f"{imported_count} tirages Loto importés avec succès sur {len(draws)} trouvés",
+                "count": imported_count
             })
             
         elif type == "stats":
@@ -103,7 +96,7 @@ def get_imported_stats(jeu: str, db: Session = Depends(get_db)):
     }
 
 @router.post("/validate")
-async def validate_import(
+def validate_import(
     file: UploadFile = File(...),
     type: str = Form(...),
     db: Session = Depends(get_db)
@@ -128,8 +121,10 @@ async def validate_import(
                 "summary": "Type invalide"
             }
         
+        from ..utils import parse_euromillions_csv, parse_loto_csv
+        
         with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as tmp:
-            content = await file.read()
+            content = file.file.read()
             tmp.write(content)
             tmp_path = tmp.name
         
@@ -1,13 +1,11 @@
-from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Depends
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Query, UploadFile, File, Form, Depends, Body, Request
+from typing import Any, Dict, List, Optional
 from pydantic import BaseModel
 from datetime import datetime, date
 from sqlalchemy import func, extract, or_, and_, desc, asc
 from sqlalchemy.orm import Session
 from app.database import get_db
-from app.utils import parse_loto_csv
-from app.stats import StatistiquesAnalyzer
-import pandas as pd
+from app.stats import StatistiquesAnalyzer, appearance_stats, count_appearances
 import io
 
 router = APIRouter()
@@ -18,7 +16,7 @@ class DrawLotoCreate(BaseModel):
     complementaire: int
 
 @router.get("/")
-async def get_loto_draws(
+def get_loto_draws(
     limit: int = Query(100, description="Nombre de tirages à récupérer"),
     offset: int = Query(0, description="Offset pour la pagination"),
     sort_by: str = Query('date', description="Tri par: 'date' ou 'id'"),
@@ -75,7 +73,7 @@ async def get_loto_draws(
     }
 
 @router.get("/draws")
-async def get_loto_draws_alias(
+def get_loto_draws_alias(
     limit: int = Query(100, description="Nombre de tirages à récupérer"),
     offset: int = Query(0, description="Offset pour la pagination"),
     sort_by: str = Query('date', description="Tri par: 'date' ou 'id'"),
@@ -85,56 +83,151 @@ async def get_loto_draws_alias(
     db: Session = Depends(get_db)
 ):
     """Alias pour /draws - redirige vers l'endpoint principal"""
-    return await get_loto_draws(limit, offset, sort_by, sort_order, year, month, db)
+    return get_loto_draws(limit, offset, sort_by, sort_order, year, month, db)
 
 @router.post("/import")
-async def import_loto_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def import_loto_csv(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """Importer des tirages Loto depuis un fichier CSV"""
     try:
-        content = await file.read()
+        from app.utils import parse_loto_csv
         
-        # Créer un fichier temporaire pour le parsing
-        import tempfile
-        import os
+        content = file.file.read()
+        draws_data = parse_loto_csv(content)
         
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv', mode='wb') as temp_file:
-            temp_file.write(content)
-            temp_file_path = temp_file.name
+        from app.crud import bulk_insert_draws_loto
         
-        try:
-            draws_data = parse_loto_csv(temp_file_path)
-            
-            from app.models import DrawLoto
-            
-            added_count = 0
-            for draw_data in draws_data:
-                # Vérifier si le tirage existe déjà
-                existing_draw = db.query(DrawLoto).filter(
-                    DrawLoto.date == draw_data['date']
-                ).first()
-                
-                if not existing_draw:
-                    new_draw = DrawLoto(**draw_data)
-                    db.add(new_draw)
-                    added_count += 1
-            
-            db.commit()
-            
-            return {
-                "message": f"Import réussi. {added_count} tirages ajoutés.",
-                "added_count": added_count
-            }
-        finally:
-            # Nettoyer le fichier temporaire
-            if os.path.exists(temp_file_path):
-                os.unlink(temp_file_path)
-                
+        # Dates existantes chargées en une requête, insertion par paquets
+        import_result = bulk_insert_draws_loto(db, draws_data)
+        added_count = import_result["added_count"]
+        
+        # Invalider puis préchauffer les statistiques de ce jeu
+        from app.cache_warmup import schedule_cache_warmup
+        schedule_cache_warmup(['loto'])
+        
+        return {
+            "message": f"Import réussi. {added_count} tirages ajoutés.",
+            "added_count": added_count,
+            "skipped_count": import_result["skipped_count"] + import_result["duplicates_in_file"]
+        }
+        
+    except Exception as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+
+@router.post("/import-stream")
+def import_loto_csv_stream(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(5000, ge=100, le=100000, description="Nombre de lignes par paquet"),
+):
+    """
+    Importer un gros fichier CSV Loto par paquets de lignes
+    
+    Chaque paquet est validé puis inséré au fil de l'eau ; la progression est
+    renvoyée en NDJSON (une ligne JSON par paquet, puis une ligne de synthèse).
+    """
+    from fastapi.responses import StreamingResponse
+    from app.streaming_import import spool_upload_to_disk, stream_draws_import
+    
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Le fichier doit être un CSV")
+    
+    try:
+        file_path = spool_upload_to_disk(file.file)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la réception du fichier: {str(e)}")
+    
+    return StreamingResponse(
+        stream_draws_import(file_path, 'loto', chunk_size),
+        media_type="application/x-ndjson"
+    )
+
+@router.post("/import-columnar")
+def import_loto_columnar(file: UploadFile = File(...), db: Session = Depends(get_db)):
+    """Importer des tirages Loto depuis un fichier Parquet ou Arrow (colonnes typées)"""
+    import os
+    from app.columnar_io import columnar_format_for, parse_columnar_draws
+    from app.crud import bulk_insert_draws_loto
+    from app.streaming_import import spool_upload_to_disk
+    
+    file_format = columnar_format_for(file.filename)
+    if not file_format:
+        raise HTTPException(status_code=400, detail="Le fichier doit être au format Parquet (.parquet) ou Arrow (.arrow, .feather)")
+    
+    file_path = spool_upload_to_disk(file.file, suffix=os.path.splitext(file.filename)[1])
+    try:
+        draws_data, errors = parse_columnar_draws(file_path, file_format, 'loto')
+        import_result = bulk_insert_draws_loto(db, draws_data)
+        added_count = import_result["added_count"]
+        
+        if added_count:
+            # Invalider puis préchauffer les statistiques de ce jeu
+            from app.cache_warmup import schedule_cache_warmup
+            schedule_cache_warmup(['loto'])
+        
+        return {
+            "message": f"Import réussi. {added_count} tirages ajoutés.",
+            "added_count": added_count,
+            "skipped_count": import_result["skipped_count"] + import_result["duplicates_in_file"],
+            "error_count": len(errors),
+            "errors": errors[:100]
+        }
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        os.unlink(file_path)
+
+@router.post("/import-async")
+def import_loto_csv_async(
+    file: UploadFile = File(...),
+    chunk_size: int = Query(5000, ge=100, le=100000, description="Nombre de lignes par paquet"),
+):
+    """
+    Importer un fichier CSV Loto en tâche de fond
+    
+    Le fichier est déposé puis importé par une tâche (Celery ou locale) ; la réponse
+    est immédiate et la progression se suit via /task-status/{task_id}.
+    """
+    from config import settings
+    from app.background_jobs import submit_import_job
+    from app.streaming_import import spool_upload_to_disk
+    
+    if not file.filename.endswith('.csv'):
+        raise HTTPException(status_code=400, detail="Le fichier doit être un CSV")
+    
+    try:
+        file_path = spool_upload_to_disk(file.file, settings.IMPORT_UPLOAD_DIR)
+        task_id, mode = submit_import_job(file_path, 'loto', chunk_size)
+        
+        return {
+            "task_id": task_id,
+            "status": "started",
+            "mode": mode,
+            "message": f"Import du fichier {file.filename} lancé",
+            "check_status_url": f"/api/loto/task-status/{task_id}"
+        }
+        
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors du lancement de l'import: {str(e)}")
+
+@router.get("/task-status/{task_id}")
+def get_loto_task_status(task_id: str):
+    """Récupère le statut d'une tâche asynchrone (Celery ou tâche de fond locale)"""
+    from app.background_jobs import get_task_status
+    
+    try:
+        status = get_task_status(task_id)
+        if status is None:
+            raise HTTPException(status_code=404, detail=f"Tâche {task_id} introuvable")
+        return status
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération du statut: {str(e)}")
 
 @router.post("/validate-upload")
-async def validate_loto_upload(file: UploadFile = File(...), db: Session = Depends(get_db)):
+def validate_loto_upload(file: UploadFile = File(...), db: Session = Depends(get_db)):
     """Valider un fichier CSV avant import"""
     try:
         # Créer un fichier temporaire
@@ -142,7 +235,7 @@ async def validate_loto_upload(file: UploadFile = File(...), db: Session = Depen
         import os
         
         with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_file:
-            content = await file.read()
+            content = file.file.read()
             temp_file.write(content)
             temp_file_path = temp_file.name
         
@@ -176,7 +269,7 @@ async def validate_loto_upload(file: UploadFile = File(...), db: Session = Depen
         raise HTTPException(status_code=400, detail=f"Erreur lors de la validation: {str(e)}")
 
 @router.post("/import-excel")
-async def import_loto_excel(
+def import_loto_excel(
     file: UploadFile = File(...),
     db: Session = Depends(get_db)
 ):
@@ -187,7 +280,9 @@ async def import_loto_excel(
         raise HTTPException(status_code=400, detail="Format de fichier non supporté. Utilisez .xlsx ou .xls")
     
     try:
-        content = await file.read()
+        import pandas as pd
+        
+        content = file.file.read()
         
         # Lire le fichier Excel
         if file.filename.endswith('.xlsx'):
@@ -205,92 +300,18 @@ async def import_loto_excel(
                 detail=f"Colonnes manquantes: {', '.join(missing_columns)}"
             )
         
-        added_count = 0
-        skipped_count = 0
-        errors = []
-        
-        for index, row in df.iterrows():
-            try:
-                # Traitement de la date
-                date_value = row['Date du tirage']
-                if pd.isna(date_value):
-                    errors.append(f"Ligne {index + 2}: Date manquante")
-                    continue
-                
-                # Conversion de la date
-                if isinstance(date_value, str):
-                    # Essayer différents formats
-                    for fmt in ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y']:
-                        try:
-                            draw_date = datetime.strptime(date_value, fmt).date()
-                            break
-                        except ValueError:
-                            continue
-                    else:
-                        errors.append(f"Ligne {index + 2}: Format de date invalide: {date_value}")
-                        continue
-                else:
-                    draw_date = date_value.date()
-                
-                # Vérification des doublons de date
-                existing_draw = db.query(DrawLoto).filter(
-                    DrawLoto.date == draw_date
-                ).first()
-                
-                if existing_draw:
-                    skipped_count += 1
-                    continue
-                
-                # Extraction des numéros
-                numeros = []
-                for i in range(1, 7):  # 6 numéros pour le Loto
-                    numero = row[f'N°{i}']
-                    if pd.isna(numero) or not isinstance(numero, (int, float)):
-                        errors.append(f"Ligne {index + 2}: Numéro {i} invalide")
-                        break
-                    numeros.append(int(numero))
-                else:
-                    # Vérification des plages pour le Loto (1-49 pour les numéros principaux)
-                    if not all(1 <= n <= 49 for n in numeros):  # Changé de 45 à 49
-                        errors.append(f"Ligne {index + 2}: Numéros hors de la plage 1-49")
-                        continue
-                    
-                    if len(set(numeros)) != 6:
-                        errors.append(f"Ligne {index + 2}: Numéros en double")
-                        continue
-                    
-                    # Extraction du bonus
-                    bonus = row['Bonus']
-                    if pd.isna(bonus) or not isinstance(bonus, (int, float)):
-                        errors.append(f"Ligne {index + 2}: Bonus invalide")
-                        continue
-                    
-                    bonus = int(bonus)
-                    
-                    # Vérification de la plage pour le bonus (1-45)
-                    if not 1 <= bonus <= 45:
-                        errors.append(f"Ligne {index + 2}: Bonus hors de la plage 1-45")
-                        continue
-                    
-                    # Création du tirage
-                    new_draw = DrawLoto(
-                        date=draw_date,
-                        n1=numeros[0],
-                        n2=numeros[1],
-                        n3=numeros[2],
-                        n4=numeros[3],
-                        n5=numeros[4],
-                        n6=numeros[5],
-                        complementaire=bonus
-                    )
-                    
-                    db.add(new_draw)
-                    added_count += 1
-            
-            except Exception as e:
-                errors.append(f"Ligne {index + 2}: Erreur inattendue - {str(e)}")
+        from app.crud import bulk_insert_draws_loto
+        from app.utils import parse_loto_excel
         
-        db.commit()
+        # Validation vectorisée puis insertion en masse des tirages valides
+        draws_data, errors = parse_loto_excel(df)
+        import_result = bulk_insert_draws_loto(db, draws_data)
+        added_count = import_result["added_count"]
+        skipped_count = import_result["skipped_count"] + import_result["duplicates_in_file"]
+        
+        # Invalider puis préchauffer les statistiques de ce jeu
+        from app.cache_warmup import schedule_cache_warmup
+        schedule_cache_warmup(['loto'])
         
         return {
             "message": f"Import terminé. {added_count} tirages ajoutés, {skipped_count} ignorés.",
@@ -304,7 +325,7 @@ async def import_loto_excel(
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'import: {str(e)}")
 
 @router.get("/stats")
-async def get_loto_stats(
+def get_loto_stats(
     year: Optional[int] = Query(None, description="Filtrer par année"),
     month: Optional[int] = Query(None, description="Filtrer par mois"),
     db: Session = Depends(get_db)
@@ -386,7 +407,7 @@ async def get_loto_stats(
     }
 
 @router.post("/add-draw")
-async def add_single_draw(draw: DrawLotoCreate, db: Session = Depends(get_db)):
+def add_single_draw(draw: DrawLotoCreate, db: Session = Depends(get_db)):
     """Ajouter un tirage Loto manuellement"""
     from app.models import DrawLoto
     
@@ -449,6 +470,10 @@ async def add_single_draw(draw: DrawLotoCreate, db: Session = Depends(get_db)):
         db.commit()
         db.refresh(new_draw)
         
+        # Invalider puis préchauffer les statistiques de ce jeu
+        from app.cache_warmup import schedule_cache_warmup
+        schedule_cache_warmup(['loto'])
+        
         return {
             "message": "Tirage ajouté avec succès",
             "draw": new_draw
@@ -461,7 +486,7 @@ async def add_single_draw(draw: DrawLotoCreate, db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'ajout du tirage: {str(e)}")
 
 @router.get("/number/{number}")
-async def get_number_history(
+def get_number_history(
     number: int, 
     type: str = Query(..., description="Type: 'numero' ou 'bonus'"),
     limit: int = Query(10, description="Nombre de tirages par page"),
@@ -549,7 +574,7 @@ async def get_number_history(
     }
 
 @router.get("/detailed-stats")
-async def get_detailed_stats_loto(db: Session = Depends(get_db)):
+def get_detailed_stats_loto(db: Session = Depends(get_db)):
     """Récupérer les statistiques détaillées Loto"""
     from .loto_advanced_stats import LotoAdvancedStats
     
@@ -562,7 +587,7 @@ async def get_detailed_stats_loto(db: Session = Depends(get_db)):
     return stats
 
 @router.get("/generate")
-async def generate_loto_grids(
+def generate_loto_grids(
     num_grids: int = 3,
     mode: str = "weighted",
     db: Session = Depends(get_db)
@@ -586,8 +611,87 @@ async def generate_loto_grids(
     
     return {"grids": grids}
 
+@router.get("/generate-stream")
+def generate_loto_grids_stream(
+    request: Request,
+    num_grids: int = Query(1000, ge=1, le=1_000_000, description="Nombre de grilles"),
+    mode: str = Query("weighted", pattern="^(weighted|random|coverage)$", description="Mode de génération"),
+    output_format: Optional[str] = Query(None, alias="format", pattern="^(ndjson|sse)$",
+                                         description="ndjson ou sse (défaut : selon l'en-tête Accept)")
+):
+    """
+    Générer des grilles Loto en flux (NDJSON ou Server-Sent Events)
+    
+    Les grilles sont envoyées par paquets dès qu'elles sont produites ; le flux se
+    termine par une ligne (ou un événement) de synthèse.
+    """
+    from app.grid_stream import grid_stream_response, iter_game_grids, stream_format
+    
+    return grid_stream_response(
+        lambda: iter_game_grids('loto', num_grids, mode),
+        stream_format(output_format, request.headers.get('accept'))
+    )
+
+@router.get("/generate-constrained")
+def generate_loto_constrained_grids(
+    num_grids: int = Query(5, ge=1, le=1000, description="Nombre de grilles"),
+    odd: Optional[int] = Query(None, ge=0, le=6, description="Nombre de numéros impairs"),
+    low: Optional[int] = Query(None, ge=0, le=6, description="Nombre de numéros bas (1-22)"),
+    sum_min: Optional[int] = Query(None, ge=0, description="Somme minimale des numéros"),
+    sum_max: Optional[int] = Query(None, ge=0, description="Somme maximale des numéros"),
+    decades: Optional[str] = Query(None, pattern="^[0-6]{5}$",
+                                   description="Répartition par dizaines (1-10, 11-20, ...), ex. 21110"),
+    consecutive: Optional[int] = Query(None, ge=0, le=5, description="Nombre de paires de numéros consécutifs"),
+    max_run: Optional[int] = Query(None, ge=1, le=6, description="Longueur maximale d'une suite de numéros consécutifs"),
+    weighted: bool = Query(False, description="Pondérer les numéros par leurs sorties")
+):
+    """
+    Générer des grilles Loto sous contraintes (pairs/impairs, bas/hauts, somme, dizaines, suites)
+    
+    Tirage uniforme (ou pondéré) parmi toutes les combinaisons conformes, énumérées à
+    l'avance : le résultat respecte exactement les contraintes, sans nouvel essai.
+    """
+    try:
+        from app.combination_table import generate_constrained_grids
+        
+        constraints = {
+            'odd': odd, 'low': low, 'sum_min': sum_min, 'sum_max': sum_max,
+            'decades': decades, 'consecutive': consecutive, 'max_run': max_run,
+        }
+        return generate_constrained_grids('loto', num_grids, constraints, weighted=weighted)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la génération sous contraintes: {str(e)}")
+
+@router.post("/wheel")
+def build_loto_wheel(
+    numbers: List[int] = Body(..., embed=True, description="Numéros choisis (6 à 30, entre 1 et 49)"),
+    match: int = Body(3, embed=True, ge=1, le=6, description="Numéros gagnants garantis (k)"),
+    if_drawn: int = Body(3, embed=True, ge=1, le=6, description="Numéros choisis parmi les numéros tirés (m)"),
+    restarts: int = Body(4, embed=True, ge=1, le=8, description="Constructions indépendantes (la plus courte est gardée)"),
+    max_grids: int = Body(2000, embed=True, ge=1, le=5000, description="Nombre maximal de grilles (restarts x max_grids <= 20000)")
+):
+    """
+    Système réducteur Loto : grilles garantissant "k si m" sur les numéros choisis
+    
+    Si if_drawn des numéros tirés font partie des numéros choisis, au moins une grille
+    en contient match. "guaranteed" vaut false si max_grids ou la durée maximale
+    (WHEEL_TIME_BUDGET_SECONDS) a été atteint avant la couverture complète ("coverage"
+    donne alors la part des tirages couverts). Erreur 400 si la borne inférieure du
+    nombre de grilles ("lower_bound") dépasse max_grids.
+    """
+    try:
+        from app.wheeling import build_wheel
+        
+        return build_wheel('loto', numbers, match, if_drawn, restarts=restarts, max_grids=max_grids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la construction du système réducteur: {str(e)}")
+
 @router.post("/generate")
-async def generate_loto_grids_post(
+def generate_loto_grids_post(
     num_grids: int = 3,
     strategy: str = "random",
     db: Session = Depends(get_db)
@@ -614,15 +718,37 @@ async def generate_loto_grids_post(
 
 @router.get("/quick-stats")
 def get_quick_stats(
+    request: Request,
     year: Optional[int] = Query(None, description="Année spécifique"),
     month: Optional[int] = Query(None, description="Mois spécifique (1-12)"),
     db: Session = Depends(get_db)
 ):
     """Récupère les statistiques rapides des numéros Loto"""
     from app.models import DrawLoto
+    from app.cache_manager import cache_manager
+    from app.fast_json import FastJSONResponse, PreSerializedJSONResponse, accepts_gzip, dumps_json
     from sqlalchemy import extract, func
     
     try:
+        # Vérifier le cache d'abord : le corps est renvoyé tel quel, sans décodage
+        cache_key = cache_manager.quick_stats_response_key('loto', year, month)
+        cached_body = cache_manager.get_response_bytes(cache_key)
+        if cached_body:
+            body, gzipped = cached_body
+            return PreSerializedJSONResponse(
+                body, gzipped=gzipped, accept_gzip=accepts_gzip(request),
+                headers={"X-Cache": "HIT"}
+            )
+        
+        def cached_response(result: dict) -> FastJSONResponse:
+            """Met en cache la réponse finale encodée et renvoie la version non cachée"""
+            cache_manager.set_response_bytes(cache_key, dumps_json({
+                **result,
+                "cached": True,
+                "cache_info": "Données récupérées du cache"
+            }), ttl=900)
+            return FastJSONResponse({**result, "cached": False}, headers={"X-Cache": "MISS"})
+        
         # Construire la requête de base
         query = db.query(DrawLoto)
         
@@ -632,8 +758,14 @@ def get_quick_stats(
         if month:
             query = query.filter(extract('month', DrawLoto.date) == month)
         
-        # Compter le total de tirages
-        total_draws = query.count()
+        # Une seule requête : les numéros et le complémentaire de chaque tirage filtré
+        rows = query.with_entities(
+            DrawLoto.date,
+            DrawLoto.n1, DrawLoto.n2, DrawLoto.n3,
+            DrawLoto.n4, DrawLoto.n5, DrawLoto.n6,
+            DrawLoto.complementaire
+        ).all()
+        total_draws = len(rows)
         
         if total_draws == 0:
             # Générer des statistiques vides pour tous les numéros (1-45) et complémentaires (1-10)
@@ -655,140 +787,75 @@ def get_quick_stats(
                     "last_appearance": None
                 })
             
-            return {
+            return cached_response({
                 "total_draws": 0,
                 "numbers": number_stats,
                 "complementaires": complementaire_stats
-            }
+            })
+        
+        # Nombre de tirages contenant chaque numéro / complémentaire et date de dernière apparition
+        number_counts, number_last = count_appearances(rows, range(1, 7))
+        complementaire_counts, complementaire_last = count_appearances(rows, range(7, 8))
         
         # Statistiques des numéros (1-45)
-        number_stats = []
-        for num in range(1, 46):
-            count = query.filter(
-                (DrawLoto.n1 == num) |
-                (DrawLoto.n2 == num) |
-                (DrawLoto.n3 == num) |
-                (DrawLoto.n4 == num) |
-                (DrawLoto.n5 == num) |
-                (DrawLoto.n6 == num)
-            ).count()
-            
-            percentage = (count / total_draws) * 100 if total_draws > 0 else 0
-            
-            # Trouver la dernière apparition
-            last_draw = query.filter(
-                (DrawLoto.n1 == num) |
-                (DrawLoto.n2 == num) |
-                (DrawLoto.n3 == num) |
-                (DrawLoto.n4 == num) |
-                (DrawLoto.n5 == num) |
-                (DrawLoto.n6 == num)
-            ).order_by(DrawLoto.date.desc()).first()
-            
-            number_stats.append({
-                "numero": num,
-                "count": count,
-                "percentage": round(percentage, 1),
-                "last_appearance": last_draw.date.strftime('%Y-%m-%d') if last_draw else None
-            })
+        number_stats = [
+            appearance_stats(num, number_counts, number_last, total_draws)
+            for num in range(1, 46)
+        ]
         
         # Statistiques des numéros complémentaires (1-10)
-        complementaire_stats = []
-        for comp in range(1, 11):
-            count = query.filter(DrawLoto.complementaire == comp).count()
-            
-            percentage = (count / total_draws) * 100 if total_draws > 0 else 0
-            
-            # Trouver la dernière apparition
-            last_draw = query.filter(
-                DrawLoto.complementaire == comp
-            ).order_by(DrawLoto.date.desc()).first()
-            
-            complementaire_stats.append({
-                "numero": comp,
-                "count": count,
-                "percentage": round(percentage, 1),
-                "last_appearance": last_draw.date.strftime('%Y-%m-%d') if last_draw else None
-            })
+        complementaire_stats = [
+            appearance_stats(comp, complementaire_counts, complementaire_last, total_draws)
+            for comp in range(1, 11)
+        ]
         
-        return {
+        return cached_response({
             "total_draws": total_draws,
             "numbers": number_stats,
             "complementaires": complementaire_stats
-        }
+        })
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors du calcul des statistiques: {str(e)}")
 
 @router.get("/export")
-async def export_loto_data(
-    format: str = Query("csv", description="Format d'export: 'csv' ou 'excel'"),
+def export_loto_data(
+    format: str = Query("csv", description="Format d'export: 'csv', 'excel', 'parquet' ou 'arrow'"),
     year: Optional[int] = Query(None, description="Filtrer par année"),
+    table: str = Query("draws", description="Table exportée: 'draws', ou en parquet/arrow 'frequencies', 'pairs', 'gaps'"),
     db: Session = Depends(get_db)
 ):
-    """Exporter les données Loto en CSV ou Excel"""
-    from app.models import DrawLoto
+    """Exporter les données Loto (envoyées en flux, sans tout charger en mémoire)"""
     from fastapi.responses import StreamingResponse
+    from app.exporters import COLUMNAR_FORMATS, EXPORT_FORMATS, export_filename, has_draws_to_export, stream_draws_export
     
     try:
-        # Construire la requête de base
-        query = db.query(DrawLoto)
-        
-        # Appliquer le filtre par année si spécifié
-        if year:
-            query = query.filter(extract('year', DrawLoto.date) == year)
+        export_format = format.lower() if format.lower() in EXPORT_FORMATS else 'csv'
         
-        # Récupérer tous les tirages
-        draws = query.order_by(DrawLoto.date.desc()).all()
+        if table != 'draws':
+            from app.columnar_io import ANALYSIS_TABLES
+            if table not in ANALYSIS_TABLES or export_format not in COLUMNAR_FORMATS:
+                raise HTTPException(status_code=400, detail="Les tables d'analyse ('frequencies', 'pairs', 'gaps') s'exportent en 'parquet' ou 'arrow'")
         
-        if not draws:
+        if not has_draws_to_export(db, 'loto', year):
             raise HTTPException(status_code=404, detail="Aucun tirage trouvé pour l'export")
         
-        # Préparer les données pour l'export
-        data = []
-        for draw in draws:
-            data.append({
-                'Date': draw.date.strftime('%Y-%m-%d'),
-                'Numéro 1': draw.n1,
-                'Numéro 2': draw.n2,
-                'Numéro 3': draw.n3,
-                'Numéro 4': draw.n4,
-                'Numéro 5': draw.n5,
-                'Numéro 6': draw.n6,
-                'Complémentaire': draw.complementaire
-            })
+        if table == 'draws':
+            content = stream_draws_export('loto', export_format, year)
+            filename = export_filename('loto', year, export_format)
+        else:
+            from app.columnar_io import stream_analysis_table
+            content = stream_analysis_table(db, 'loto', table, export_format, year)
+            filename = export_filename('loto', year, export_format, table)
         
-        # Créer le DataFrame
-        df = pd.DataFrame(data)
+        return StreamingResponse(
+            content,
+            media_type=EXPORT_FORMATS[export_format][0],
+            headers={"Content-Disposition": f"attachment; filename={filename}"}
+        )
         
-        if format.lower() == 'excel':
-            # Export Excel
-            output = io.BytesIO()
-            with pd.ExcelWriter(output, engine='openpyxl') as writer:
-                df.to_excel(writer, sheet_name='Tirages Loto', index=False)
-            output.seek(0)
-            
-            filename = f"loto_tirages_{year if year else 'tous'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-            
-            return StreamingResponse(
-                io.BytesIO(output.getvalue()),
-                media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
-        else:
-            # Export CSV
-            output = io.StringIO()
-            df.to_csv(output, index=False, sep=',', encoding='utf-8')
-            output.seek(0)
-            
-            filename = f"loto_tirages_{year if year else 'tous'}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            
-            return StreamingResponse(
-                io.BytesIO(output.getvalue().encode('utf-8')),
-                media_type="text/csv",
-                headers={"Content-Disposition": f"attachment; filename={filename}"}
-            )
-            
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'export: {str(e)}")
 
@@ -820,28 +887,34 @@ def analyze_grid(
         # Calculer les statistiques de base
         from app.models import DrawLoto
         
-        total_draws = db.query(DrawLoto).count()
+        from sqlalchemy import case
+        
+        # Total et fréquences des 6 numéros et du complémentaire en une seule requête
+        def draws_matching(condition):
+            return func.coalesce(func.sum(case((condition, 1), else_=0)), 0)
+        
+        counts = db.query(
+            func.count(DrawLoto.id),
+            draws_matching(DrawLoto.complementaire == complementaire),
+            *(
+                draws_matching(or_(
+                    DrawLoto.n1 == num, DrawLoto.n2 == num, DrawLoto.n3 == num,
+                    DrawLoto.n4 == num, DrawLoto.n5 == num, DrawLoto.n6 == num
+                ))
+                for num in numeros
+            )
+        ).one()
+        total_draws, complementaire_count = counts[0], counts[1]
         
         # Fréquence des numéros dans la grille
         numero_frequencies = {}
-        for num in numeros:
-            count = db.query(DrawLoto).filter(
-                (DrawLoto.n1 == num) |
-                (DrawLoto.n2 == num) |
-                (DrawLoto.n3 == num) |
-                (DrawLoto.n4 == num) |
-                (DrawLoto.n5 == num) |
-                (DrawLoto.n6 == num)
-            ).count()
+        for num, count in zip(numeros, counts[2:]):
             numero_frequencies[num] = {
                 'count': count,
                 'percentage': (count / total_draws * 100) if total_draws > 0 else 0
             }
         
         # Fréquence du complémentaire
-        complementaire_count = db.query(DrawLoto).filter(
-            DrawLoto.complementaire == complementaire
-        ).count()
         
         complementaire_frequency = {
             'count': complementaire_count,
@@ -881,7 +954,7 @@ def get_available_years(db: Session = Depends(get_db)):
         raise HTTPException(status_code=500, detail=f"Erreur lors de la récupération des années: {str(e)}")
 
 @router.get("/search")
-async def search_loto_draws(
+def search_loto_draws(
     year: Optional[int] = None,
     month: Optional[int] = None,
     start_date: Optional[str] = None,
@@ -957,116 +1030,128 @@ async def search_loto_draws(
         raise HTTPException(status_code=500, detail=f"Erreur lors de la recherche: {str(e)}")
 
 @router.post("/import-multiple")
-async def import_multiple_loto_files(
+def import_multiple_loto_files(
     files: List[UploadFile] = File(...),
     db: Session = Depends(get_db)
 ):
-    """Importer plusieurs fichiers CSV Loto en une seule fois"""
-    import tempfile
-    import os
+    """
+    Importer plusieurs fichiers CSV Loto en une seule fois
     
-    results = []
-    total_added = 0
+    Les fichiers sont validés et parsés en parallèle (un processus par fichier),
+    puis tous les tirages valides sont insérés en une seule opération dédoublonnée.
+    """
+    import time
+    from app.crud import bulk_insert_draws_loto
+    from app.parallel_import import file_processing_pool, validate_and_parse_loto_file
+    
+    start_time = time.perf_counter()
+    uploads = _save_uploads_to_temp(files)
     
     try:
-        for file in files:
+        # Valider et parser tous les fichiers en parallèle (un processus par fichier)
+        parallel_start = time.perf_counter()
+        processed = file_processing_pool.map_files(
+            validate_and_parse_loto_file, [upload for upload in uploads if upload["path"]]
+        )
+        parallel_ms = round((time.perf_counter() - parallel_start) * 1000, 1)
+        processed_by_index = dict(zip([i for i, upload in enumerate(uploads) if upload["path"]], processed))
+        
+        # Fusionner les tirages valides dans l'ordre des fichiers (premier fichier prioritaire)
+        results = []
+        merged_draws = []
+        file_draw_dates = []
+        for index, upload in enumerate(uploads):
             file_result = {
-                "filename": file.filename,
+                "filename": upload["filename"],
                 "success": False,
                 "added_count": 0,
                 "errors": [],
-                "warnings": []
+                "warnings": [],
+                "timing": {}
             }
+            outcome = processed_by_index.get(index)
             
-            try:
-                content = await file.read()
-                
-                # Créer un fichier temporaire pour le parsing
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.csv', mode='wb') as temp_file:
-                    temp_file.write(content)
-                    temp_file_path = temp_file.name
-                
-                try:
-                    # Valider le fichier d'abord
-                    import sys
-                    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                    from upload_validator import UploadValidator
-                    
-                    validator = UploadValidator()
-                    validation_result = validator.validate_csv_file(temp_file_path, 'loto')
-                    
-                    if not validation_result['valid']:
-                        file_result["errors"] = validation_result['errors']
-                        file_result["warnings"] = validation_result['warnings']
-                        results.append(file_result)
-                        continue
-                    
-                    # Parser et importer les données
-                    draws_data = parse_loto_csv(temp_file_path)
-                    
-                    from app.models import DrawLoto
-                    
-                    added_count = 0
-                    for draw_data in draws_data:
-                        # Vérifier si le tirage existe déjà
-                        existing_draw = db.query(DrawLoto).filter(
-                            DrawLoto.date == draw_data['date']
-                        ).first()
-                        
-                        if not existing_draw:
-                            new_draw = DrawLoto(**draw_data)
-                            db.add(new_draw)
-                            added_count += 1
-                    
-                    file_result["success"] = True
-                    file_result["added_count"] = added_count
-                    total_added += added_count
-                    
-                    # Ajouter des informations sur les doublons
-                    if validation_result['duplicates'] > 0:
-                        file_result["warnings"].append(f"{validation_result['duplicates']} tirages en doublon ignorés")
-                    
-                finally:
-                    # Nettoyer le fichier temporaire
-                    if os.path.exists(temp_file_path):
-                        os.unlink(temp_file_path)
-                        
-            except Exception as e:
-                file_result["errors"].append(str(e))
+            if upload["error"]:
+                file_result["errors"].append(upload["error"])
+            elif outcome["error"]:
+                file_result["errors"].append(outcome["error"])
+            elif not outcome["validation"]["valid"]:
+                file_result["errors"] = outcome["validation"]["errors"]
+                file_result["warnings"] = outcome["validation"]["warnings"]
+            else:
+                file_result["success"] = True
+                merged_draws.extend(outcome["draws"])
+                if outcome["validation"]["duplicates"] > 0:
+                    file_result["warnings"].append(f"{outcome['validation']['duplicates']} tirages en doublon ignorés")
             
+            if outcome:
+                file_result["timing"] = outcome["timing"]
+            file_draw_dates.append([draw["date"] for draw in outcome["draws"]] if file_result["success"] else [])
             results.append(file_result)
         
-        # Valider tous les changements
-        db.commit()
+        # Une seule insertion en masse pour l'ensemble des fichiers
+        insert_start = time.perf_counter()
+        import_result = bulk_insert_draws_loto(db, merged_draws)
+        insert_ms = round((time.perf_counter() - insert_start) * 1000, 1)
+        
+        # Attribuer chaque tirage ajouté au premier fichier qui le contient
+        added_dates = set(import_result["added_dates"])
+        for file_result, dates in zip(results, file_draw_dates):
+            for draw_date in dates:
+                if draw_date in added_dates:
+                    file_result["added_count"] += 1
+                    added_dates.discard(draw_date)
+        total_added = import_result["added_count"]
+        
+        if total_added:
+            # Invalider puis préchauffer les statistiques de ce jeu
+            from app.cache_warmup import schedule_cache_warmup
+            schedule_cache_warmup(['loto'])
         
         return {
             "message": f"Import multiple terminé. {total_added} tirages ajoutés au total.",
             "total_added": total_added,
+            "skipped_count": import_result["skipped_count"] + import_result["duplicates_in_file"],
             "files_processed": len(files),
             "files_success": len([r for r in results if r["success"]]),
             "files_failed": len([r for r in results if not r["success"]]),
-            "results": results
+            "results": results,
+            "timing": {
+                "parallel_processing_ms": parallel_ms,
+                "insert_ms": insert_ms,
+                "total_ms": round((time.perf_counter() - start_time) * 1000, 1),
+                "workers": file_processing_pool.max_workers
+            }
         }
         
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Erreur lors de l'import multiple: {str(e)}")
+    finally:
+        _remove_temp_uploads(uploads)
 
 @router.post("/validate-multiple")
-async def validate_multiple_loto_files(
+def validate_multiple_loto_files(
     files: List[UploadFile] = File(...),
     db: Session = Depends(get_db)
 ):
-    """Valider plusieurs fichiers CSV Loto avant import"""
-    import tempfile
-    import os
+    """Valider plusieurs fichiers CSV Loto avant import (validation des fichiers en parallèle)"""
+    import time
+    from app.parallel_import import file_processing_pool, validate_loto_file
     
-    results = []
+    start_time = time.perf_counter()
+    uploads = _save_uploads_to_temp(files)
     
     try:
-        for file in files:
+        processed = file_processing_pool.map_files(
+            validate_loto_file, [upload for upload in uploads if upload["path"]]
+        )
+        processed_by_index = dict(zip([i for i, upload in enumerate(uploads) if upload["path"]], processed))
+        
+        results = []
+        for index, upload in enumerate(uploads):
             file_result = {
-                "filename": file.filename,
+                "filename": upload["filename"],
                 "valid": False,
                 "total_rows": 0,
                 "valid_rows": 0,
@@ -1075,36 +1160,20 @@ async def validate_multiple_loto_files(
                 "date_range": {},
                 "summary": {},
                 "errors": [],
-                "warnings": []
+                "warnings": [],
+                "timing": {}
             }
+            outcome = processed_by_index.get(index)
             
-            try:
-                content = await file.read()
-                
-                # Créer un fichier temporaire
-                with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_file:
-                    temp_file.write(content)
-                    temp_file_path = temp_file.name
-                
-                try:
-                    # Valider le fichier
-                    import sys
-                    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-                    from enhanced_upload_validator import EnhancedUploadValidator
-                    
-                    validator = EnhancedUploadValidator()
-                    validation_result = validator.validate_csv_file(temp_file_path, 'loto')
-                    
-                    file_result.update(validation_result)
-                    
-                finally:
-                    # Nettoyer le fichier temporaire
-                    if os.path.exists(temp_file_path):
-                        os.unlink(temp_file_path)
-                        
-            except Exception as e:
-                file_result["errors"].append(str(e))
+            if upload["error"]:
+                file_result["errors"].append(upload["error"])
+            elif outcome["error"]:
+                file_result["errors"].append(outcome["error"])
+            else:
+                file_result.update(outcome["validation"])
             
+            if outcome:
+                file_result["timing"] = outcome["timing"]
             results.append(file_result)
         
         # Résumé global
@@ -1123,8 +1192,39 @@ async def validate_multiple_loto_files(
                 "total_valid_rows": total_valid_rows,
                 "total_duplicates": total_duplicates
             },
-            "results": results
+            "results": results,
+            "timing": {
+                "total_ms": round((time.perf_counter() - start_time) * 1000, 1),
+                "workers": file_processing_pool.max_workers
+            }
         }
         
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Erreur lors de la validation multiple: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=f"Erreur lors de la validation multiple: {str(e)}")
+    finally:
+        _remove_temp_uploads(uploads)
+
+def _save_uploads_to_temp(files: List[UploadFile]) -> List[Dict[str, Any]]:
+    """Copie chaque upload dans un fichier temporaire pour le traitement par les processus"""
+    import tempfile
+    
+    uploads = []
+    for file in files:
+        upload = {"filename": file.filename, "path": None, "error": None}
+        try:
+            content = file.file.read()
+            with tempfile.NamedTemporaryFile(delete=False, suffix='.csv', mode='wb') as temp_file:
+                temp_file.write(content)
+                upload["path"] = temp_file.name
+        except Exception as e:
+            upload["error"] = str(e)
+        uploads.append(upload)
+    return uploads
+
+def _remove_temp_uploads(uploads: List[Dict[str, Any]]) -> None:
+    """Nettoie les fichiers temporaires des uploads"""
+    import os
+    
+    for upload in uploads:
+        if upload["path"] and os.path.exists(upload["path"]):
+            os.unlink(upload["path"]) 
\ No newline at end of file
@@ -9,66 +9,87 @@ from sqlalchemy.orm import Session
 from typing import Optional, List, Dict, Any
 from datetime import datetime, timedelta
 from ..database import get_db
-from ..loto_advanced_stats import LotoAdvancedStats
+from ..cache_manager import cache_manager
 from ..models import DrawLoto
 
 router = APIRouter(prefix="/api/loto/advanced", tags=["Loto Advanced Analytics"])
 
+def get_cached_comprehensive_stats(db: Session) -> Dict[str, Any]:
+    """Statistiques complètes depuis le cache (calculées et mises en cache si absentes)"""
+    from ..loto_advanced_stats import LotoAdvancedStats
+    
+    return cache_manager.get_or_compute_analysis(
+        'loto', 'comprehensive', lambda: LotoAdvancedStats(db).get_comprehensive_stats()
+    )
+
 @router.get("/comprehensive-stats")
-async def get_comprehensive_loto_stats(db: Session = Depends(get_db)):
+def get_comprehensive_loto_stats(db: Session = Depends(get_db)):
     """Récupère toutes les statistiques avancées du Loto"""
-    analyzer = LotoAdvancedStats(db)
-    return analyzer.get_comprehensive_stats()
+    return get_cached_comprehensive_stats(db)
 
 @router.get("/hot-cold-analysis")
-async def get_hot_cold_analysis(
+def get_hot_cold_analysis(
     recent_draws: int = Query(50, description="Nombre de tirages récents à analyser"),
     db: Session = Depends(get_db)
 ):
     """Analyse des numéros chauds et froids"""
+    from ..loto_advanced_stats import LotoAdvancedStats
+    
     analyzer = LotoAdvancedStats(db)
     return analyzer.get_hot_cold_analysis(recent_draws)
 
 @router.get("/frequent-combinations")
-async def get_frequent_combinations(
+def get_frequent_combinations(
     min_frequency: float = Query(0.05, description="Fréquence minimale pour inclure une combinaison"),
     db: Session = Depends(get_db)
 ):
     """Trouve les combinaisons de numéros les plus fréquentes"""
+    from ..loto_advanced_stats import LotoAdvancedStats
+    
     analyzer = LotoAdvancedStats(db)
     return analyzer.find_most_frequent_combinations(min_frequency)
 
 @router.get("/patterns")
-async def get_number_patterns(db: Session = Depends(get_db)):
+def get_number_patterns(db: Session = Depends(get_db)):
     """Analyse les patterns dans les numéros"""
+    from ..loto_advanced_stats import LotoAdvancedStats
+    
     analyzer = LotoAdvancedStats(db)
     return analyzer.analyze_number_patterns()
 
 @router.get("/sequences")
-async def get_sequence_analysis(db: Session = Depends(get_db)):
+def get_sequence_analysis(db: Session = Depends(get_db)):
     """Analyse les séquences de numéros"""
+    from ..loto_advanced_stats import LotoAdvancedStats
+    
     analyzer = LotoAdvancedStats(db)
     return analyzer.analyze_sequences()
 
 @router.get("/parity")
-async def get_parity_analysis(db: Session = Depends(get_db)):
+def get_parity_analysis(db: Session = Depends(get_db)):
     """Analyse la parité des numéros"""
+    from ..loto_advanced_stats import LotoAdvancedStats
+    
     analyzer = LotoAdvancedStats(db)
     return analyzer.analyze_parity()
 
 @router.get("/sums")
-async def get_sum_analysis(db: Session = Depends(get_db)):
+def get_sum_analysis(db: Session = Depends(get_db)):
     """Analyse des sommes des numéros"""
+    from ..loto_advanced_stats import LotoAdvancedStats
+    
     analyzer = LotoAdvancedStats(db)
     return analyzer.analyze_sums()
 
 @router.get("/number-trends/{number}")
-async def get_number_trends(
+def get_number_trends(
     number: int,
     days: int = Query(365, description="Période d'analyse en jours"),
     db: Session = Depends(get_db)
 ):
     """Analyse les tendances d'un numéro spécifique"""
+    from ..loto_advanced_stats import LotoAdvancedStats
+    
     if not 1 <= number <= 45:
         raise HTTPException(status_code=400, detail="Le numéro doit être entre 1 et 45")
     
@@ -76,13 +97,12 @@ async def get_number_trends(
     return analyzer.get_number_trends(number, days)
 
 @router.get("/yearly-breakdown")
-async def get_yearly_breakdown(
+def get_yearly_breakdown(
     year: Optional[int] = Query(None, description="Année spécifique"),
     db: Session = Depends(get_db)
 ):
     """Récupère les statistiques par année"""
-    analyzer = LotoAdvancedStats(db)
-    stats = analyzer.get_comprehensive_stats()
+    stats = get_cached_comprehensive_stats(db)
     
     if "error" in stats:
         raise HTTPException(status_code=404, detail=stats["error"])
@@ -90,17 +110,18 @@ async def get_yearly_breakdown(
     yearly_stats = stats.get("yearly_stats", {})
     
     if year:
-        if year not in yearly_stats:
+        # Les clés annuelles deviennent des chaînes après un passage par le cache
+        year_data = yearly_stats.get(year, yearly_stats.get(str(year)))
+        if year_data is None:
             raise HTTPException(status_code=404, detail=f"Aucune donnée pour l'année {year}")
-        return {year: yearly_stats[year]}
+        return {year: year_data}
     
     return yearly_stats
 
 @router.get("/performance-metrics")
-async def get_performance_metrics(db: Session = Depends(get_db)):
+def get_performance_metrics(db: Session = Depends(get_db)):
     """Récupère les métriques de performance des analyses"""
-    analyzer = LotoAdvancedStats(db)
-    stats = analyzer.get_comprehensive_stats()
+    stats = get_cached_comprehensive_stats(db)
     
     if "error" in stats:
         raise HTTPException(status_code=404, detail=stats["error"])
@@ -118,7 +139,7 @@ async def get_performance_metrics(db: Session = Depends(get_db)):
     }
 
 @router.get("/comparison")
-async def compare_periods(
+def compare_periods(
     period1_days: int = Query(30, description="Première période en jours"),
     period2_days: int = Query(90, description="Deuxième période en jours"),
     db: Session = Depends(get_db)
@@ -201,19 +222,44 @@ async def compare_periods(
     return changes
 
 @router.get("/export-analysis")
-async def export_analysis_data(
-    format: str = Query("json", description="Format d'export: 'json' ou 'csv'"),
+def export_analysis_data(
+    format: str = Query("json", description="Format d'export: 'json', 'csv' ou 'zip'"),
     include_patterns: bool = Query(True, description="Inclure l'analyse des patterns"),
     include_combinations: bool = Query(True, description="Inclure les combinaisons fréquentes"),
     db: Session = Depends(get_db)
 ):
-    """Exporte les données d'analyse dans différents formats"""
-    analyzer = LotoAdvancedStats(db)
-    stats = analyzer.get_comprehensive_stats()
+    """
+    Exporte les données d'analyse dans différents formats
+    
+    Les analyses proviennent du cache ; en CSV (un fichier multi-sections) ou en ZIP
+    (un CSV par table), les sections sont écrites et envoyées l'une après l'autre.
+    """
+    stats = get_cached_comprehensive_stats(db)
     
     if "error" in stats:
         raise HTTPException(status_code=404, detail=stats["error"])
     
+    if format.lower() in ("csv", "zip"):
+        from fastapi.responses import StreamingResponse
+        from ..analysis_export import ANALYSIS_SECTIONS, stream_analysis_csv, stream_analysis_zip
+        
+        sections = [section for _, section in ANALYSIS_SECTIONS
+                    if (include_patterns or section != 'patterns')
+                    and (include_combinations or section != 'combinations')]
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        
+        if format.lower() == "zip":
+            return StreamingResponse(
+                stream_analysis_zip(stats, sections),
+                media_type="application/zip",
+                headers={"Content-Disposition": f"attachment; filename=loto_analyse_{timestamp}.zip"}
+            )
+        return StreamingResponse(
+            stream_analysis_csv(stats, sections),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=loto_analyse_{timestamp}.csv"}
+        )
+    
     # Filtrer les données selon les paramètres
     export_data = {
         "basic_stats": stats.get("basic_stats", {}),
@@ -233,11 +279,6 @@ async def export_analysis_data(
     if include_combinations:
         export_data["frequent_combinations"] = stats.get("frequent_combinations", [])
     
-    if format.lower() == "csv":
-        # Pour l'instant, retourner JSON même pour CSV
-        # TODO: Implémenter la conversion CSV
-        return export_data
-    
     return export_data
 
 @router.get("/strategies")
@@ -303,7 +344,7 @@ def get_available_strategies():
     }
 
 @router.get("/generate-grid")
-async def generate_advanced_grid(
+def generate_advanced_grid(
     strategy: str = Query("random", description="Stratégie de génération"),
     db: Session = Depends(get_db)
 ):
@@ -0,0 +1,387 @@
+"""
+Stockage partagé des tirages entre les processus workers (uvicorn/gunicorn)
+Les tableaux d'un instantané (tirages et tables dérivées, voir draw_snapshot) sont copiés
+une seule fois dans un segment multiprocessing.shared_memory par un processus
+coordinateur ; les autres workers s'y attachent en lecture seule. Un segment de contrôle
+porte un compteur de génération : une mise à jour publie un nouveau segment puis
+incrémente le compteur, et chaque worker bascule d'un bloc sur la nouvelle version
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+import uuid
+from multiprocessing import shared_memory
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from config import settings
+from .draw_snapshot import DrawSnapshot, DrawSnapshotStore, draw_snapshots, draw_state, is_current
+
+# Segment de contrôle : compteur de génération (int64, impair pendant une publication)
+# suivi du nom du segment de données courant
+CONTROL_SIZE = 128
+CONTROL_NAME_OFFSET = 8
+
+# Alignement des tableaux dans le segment de données
+ARRAY_ALIGNMENT = 64
+
+GAME_CODES = {'euromillions': 'e', 'loto': 'l'}
+
+
+class _Segment:
+    """
+    Projection d'un segment de mémoire partagée existant, sans passer par le resource_tracker
+
+    SharedMemory enregistre tout segment ouvert auprès du resource_tracker, qui le
+    supprime à la sortie du processus : les lecteurs et le segment de contrôle (commun
+    à tous les processus) ouvrent donc le segment directement. writable=False donne une
+    projection en lecture seule ; create=True crée le segment s'il n'existe pas.
+    """
+
+    def __init__(self, name: str, writable: bool = False, create: bool = False, size: int = 0):
+        import _posixshmem
+        import mmap
+
+        flags = os.O_RDWR if writable else os.O_RDONLY
+        if create:
+            flags |= os.O_CREAT
+        fd = _posixshmem.shm_open('/' + name, flags, mode=0o600)
+        try:
+            if create and os.fstat(fd).st_size < size:
+                os.ftruncate(fd, size)
+            self.size = os.fstat(fd).st_size
+            self._mmap = mmap.mmap(fd, self.size, prot=mmap.PROT_READ | (mmap.PROT_WRITE if writable else 0))
+        finally:
+            os.close(fd)
+        self.name = name
+        self.buf = memoryview(self._mmap)
+
+    def close(self) -> None:
+        """Ferme la projection (BufferError si des vues numpy l'utilisent encore)"""
+        self.buf.release()
+        self._mmap.close()
+
+
+def _pack_snapshot(snapshot: DrawSnapshot, name: str) -> shared_memory.SharedMemory:
+    """Copie les tableaux de l'instantané dans un nouveau segment, précédés de leur description"""
+    layout, offset = [], 0
+    for array_name, array in snapshot.arrays.items():
+        offset = -(-offset // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+        layout.append({'name': array_name, 'dtype': array.dtype.str, 'shape': list(array.shape), 'offset': offset})
+        offset += array.nbytes
+
+    header = json.dumps({
+        'game_type': snapshot.game_type, 'generation': snapshot.generation, 'arrays': layout
+    }).encode('utf-8')
+    data_start = -(-(8 + len(header)) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+    segment = shared_memory.SharedMemory(name=name, create=True, size=max(data_start + offset, 1))
+    segment.buf[:8] = len(header).to_bytes(8, 'little')
+    segment.buf[8:8 + len(header)] = header
+    for entry, array in zip(layout, snapshot.arrays.values()):
+        target = np.ndarray(entry['shape'], dtype=array.dtype, buffer=segment.buf, offset=data_start + entry['offset'])
+        target[...] = array
+        del target
+    return segment
+
+
+def _unpack_snapshot(segment: '_Segment') -> DrawSnapshot:
+    """Instantané dont les tableaux sont des vues en lecture seule sur le segment"""
+    header_size = int.from_bytes(bytes(segment.buf[:8]), 'little')
+    header = json.loads(bytes(segment.buf[8:8 + header_size]).decode('utf-8'))
+    data_start = -(-(8 + header_size) // ARRAY_ALIGNMENT) * ARRAY_ALIGNMENT
+
+    arrays = {}
+    for entry in header['arrays']:
+        arrays[entry['name']] = np.ndarray(entry['shape'], dtype=np.dtype(entry['dtype']),
+                                           buffer=segment.buf, offset=data_start + entry['offset'])
+    return DrawSnapshot(header['game_type'], arrays, header['generation'])
+
+
+class _ControlBlock:
+    """Compteur de génération et nom du segment courant d'un jeu (protocole seqlock)"""
+
+    def __init__(self, name: str):
+        # Survit aux coordinateurs successifs ; supprimé par le dernier processus qui
+        # l'utilise (voir SharedDrawStore.close)
+        self.segment = _Segment(name, writable=True, create=True, size=CONTROL_SIZE)
+        self._counter = np.ndarray((1,), dtype=np.int64, buffer=self.segment.buf)
+
+    def close(self) -> None:
+        del self._counter
+        self.segment.close()
+
+    def read(self) -> Tuple[int, Optional[str]]:
+        """(génération, nom du segment) cohérents ; (0, None) si rien n'est publié"""
+        while True:
+            before = int(self._counter[0])
+            if before % 2:
+                time.sleep(0.0005)
+                continue
+            raw = bytes(self.segment.buf[CONTROL_NAME_OFFSET:CONTROL_SIZE]).rstrip(b'\0')
+            if int(self._counter[0]) == before:
+                return before, raw.decode('utf-8') or None
+
+    def write(self, segment_name: str) -> int:
+        """Publie un nouveau nom de segment ; retourne la nouvelle génération"""
+        encoded = segment_name.encode('utf-8')
+        self._counter[0] += 1
+        self.segment.buf[CONTROL_NAME_OFFSET:CONTROL_SIZE] = encoded.ljust(CONTROL_SIZE - CONTROL_NAME_OFFSET, b'\0')
+        self._counter[0] += 1
+        return int(self._counter[0])
+
+
+class SharedDrawStore:
+    """
+    Instantanés des tirages en mémoire partagée, une seule copie par hôte
+
+    Le premier processus qui obtient le verrou de fichier devient coordinateur : il tient
+    les instantanés à jour depuis la base (voir DrawSnapshotStore) et publie chaque
+    nouvelle version. Les autres processus s'attachent à la version publiée ; si elle est
+    en retard sur la base (publication en cours) ou absente, ils utilisent un instantané
+    local. Si le coordinateur s'arrête, le verrou est libéré et un autre worker prend le relais.
+    """
+
+    def __init__(self, snapshots: DrawSnapshotStore, prefix: str, enabled: bool = True,
+                 poll_interval: float = 5.0):
+        self.snapshots = snapshots
+        self.prefix = prefix
+        self.enabled = enabled
+        self.poll_interval = poll_interval
+        self._lock = threading.Lock()
+        self._lock_file = None
+        self._users_file = None
+        self._controls: Dict[str, _ControlBlock] = {}
+        self._owned: Dict[str, shared_memory.SharedMemory] = {}
+        self._attached: Dict[str, Tuple[int, _Segment, DrawSnapshot]] = {}
+        self._retired: List[_Segment] = []
+        self._stop = threading.Event()
+        self.stats = {'published': 0, 'attached': 0, 'local_fallbacks': 0, 'errors': 0}
+
+    # --- Rôle ---
+
+    @property
+    def is_coordinator(self) -> bool:
+        return self._lock_file is not None
+
+    def _try_become_coordinator(self) -> bool:
+        """Prend le verrou de coordinateur s'il est libre (appel non bloquant)"""
+        if self._lock_file is not None:
+            return True
+        import fcntl
+
+        lock_file = open(os.path.join(tempfile.gettempdir(), f'{self.prefix}.lock'), 'a')
+        try:
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            lock_file.close()
+            return False
+        self._lock_file = lock_file
+        print(f"🗂️ Processus {os.getpid()} coordinateur des tirages partagés")
+        return True
+
+    def _register_user(self) -> None:
+        """
+        Verrou partagé tenu par chaque processus qui utilise les segments de contrôle
+
+        Bloquant : si le dernier utilisateur est en train de supprimer les segments
+        (verrou exclusif, voir close), on attend qu'il ait fini avant de les recréer.
+        """
+        if self._users_file is not None:
+            return
+        import fcntl
+
+        users_file = open(os.path.join(tempfile.gettempdir(), f'{self.prefix}.users'), 'a')
+        fcntl.flock(users_file, fcntl.LOCK_SH)
+        self._users_file = users_file
+
+    def _release_controls(self) -> None:
+        """Ferme les segments de contrôle ; les supprime si aucun autre processus ne les utilise"""
+        import fcntl
+        import _posixshmem
+
+        for control in self._controls.values():
+            try:
+                control.close()
+            except BufferError:
+                pass
+        self._controls.clear()
+        if self._users_file is None:
+            return
+
+        try:
+            fcntl.flock(self._users_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            pass
+        else:
+            for code in GAME_CODES.values():
+                try:
+                    _posixshmem.shm_unlink(f'/{self.prefix}_{code}_ctl')
+                except FileNotFoundError:
+                    pass
+        self._users_file.close()
+        self._users_file = None
+
+    def _control(self, game_type: str) -> _ControlBlock:
+        if game_type not in self._controls:
+            self._register_user()
+            self._controls[game_type] = _ControlBlock(f'{self.prefix}_{GAME_CODES[game_type]}_ctl')
+        return self._controls[game_type]
+
+    # --- Publication (coordinateur) ---
+
+    def _publish(self, snapshot: DrawSnapshot) -> None:
+        """Copie l'instantané dans un nouveau segment, bascule le compteur puis libère l'ancien"""
+        game_type = snapshot.game_type
+        name = f'{self.prefix}_{GAME_CODES[game_type]}_{uuid.uuid4().hex[:8]}'
+        segment = _pack_snapshot(snapshot, name)
+        self._control(game_type).write(name)
+
+        # Les workers déjà attachés à l'ancien segment gardent leur projection
+        previous = self._owned.pop(game_type, None)
+        if previous is not None:
+            previous.close()
+            previous.unlink()
+        self._owned[game_type] = segment
+        self.stats['published'] += 1
+
+    # --- Lecture (tous les processus) ---
+
+    def _attach(self, game_type: str) -> Optional[DrawSnapshot]:
+        """Version publiée d'un jeu (nouvel attachement seulement si la génération a changé)"""
+        generation, name = self._control(game_type).read()
+        current = self._attached.get(game_type)
+        if current is not None and current[0] == generation:
+            return current[2]
+        if name is None:
+            return None
+
+        try:
+            segment = _Segment(name)
+        except FileNotFoundError:
+            # Segment retiré entre la lecture du contrôle et l'attachement : coordinateur arrêté
+            return None
+
+        self._attached[game_type] = (generation, segment, _unpack_snapshot(segment))
+        if current is not None:
+            self._retired.append(current[1])
+        self._release_retired()
+        self.stats['attached'] += 1
+        return self._attached[game_type][2]
+
+    def _release_retired(self) -> None:
+        """Ferme les anciens segments dont plus aucune vue n'est utilisée"""
+        still_used = []
+        for segment in self._retired:
+            try:
+                segment.close()
+            except BufferError:
+                still_used.append(segment)
+        self._retired = still_used
+
+    def get(self, db, game_type: str) -> DrawSnapshot:
+        """Instantané à jour d'un jeu, en mémoire partagée quand c'est possible"""
+        if not self.enabled:
+            return self.snapshots.get(db, game_type)
+
+        state = draw_state(db, game_type)
+        try:
+            with self._lock:
+                if self._try_become_coordinator():
+                    published = self._attach(game_type)
+                    if not is_current(published, state):
+                        self._publish(self.snapshots.get(db, game_type, state))
+                        published = self._attach(game_type)
+                    return published
+
+                published = self._attach(game_type)
+                if is_current(published, state):
+                    return published
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"⚠️ Mémoire partagée indisponible pour {game_type}: {e}")
+
+        self.stats['local_fallbacks'] += 1
+        return self.snapshots.get(db, game_type, state)
+
+    # --- Cycle de vie ---
+
+    def refresh(self, game_types=('euromillions', 'loto')) -> Dict[str, Dict]:
+        """Met à jour (coordinateur) ou rattache (autres workers) les instantanés des jeux"""
+        from .database import session_scope
+
+        refreshed = {}
+        for game_type in game_types:
+            try:
+                with session_scope() as db:
+                    refreshed[game_type] = self.get(db, game_type).describe()
+            except Exception as e:
+                print(f"⚠️ Instantané partagé {game_type} indisponible: {e}")
+        return refreshed
+
+    def start(self) -> None:
+        """Charge les instantanés puis surveille la base en arrière-plan (nouveaux tirages)"""
+        def worker():
+            while True:
+                self.refresh()
+                if self._stop.wait(self.poll_interval):
+                    return
+
+        self._stop.clear()
+        threading.Thread(target=worker, name="shared-draws", daemon=True).start()
+
+    def close(self) -> None:
+        """
+        Arrête la surveillance ; le coordinateur retire ses segments et libère le verrou
+
+        Le dernier processus à fermer supprime aussi les segments de contrôle.
+        """
+        self._stop.set()
+        with self._lock:
+            self._attached.clear()
+            for segment in self._owned.values():
+                try:
+                    segment.close()
+                except BufferError:
+                    pass
+                segment.unlink()
+            self._owned.clear()
+            if self._lock_file is not None:
+                self._lock_file.close()
+                self._lock_file = None
+            self._release_controls()
+
+    def status(self) -> Dict:
+        with self._lock:
+            return {
+                'enabled': self.enabled,
+                'role': 'coordinator' if self.is_coordinator else 'reader',
+                'pid': os.getpid(),
+                'games': {
+                    game_type: {
+                        'control_generation': generation,
+                        'segment': segment.name,
+                        'segment_bytes': segment.size,
+                        **snapshot.describe(),
+                    }
+                    for game_type, (generation, segment, snapshot) in self._attached.items()
+                },
+                **self.stats,
+            }
+
+
+def _default_prefix() -> str:
+    """Préfixe des segments propre à la base utilisée (plusieurs déploiements sur un même hôte)"""
+    return 'lotto_' + hashlib.md5(settings.DATABASE_URL.encode('utf-8')).hexdigest()[:8]
+
+
+# Instance globale
+shared_draws = SharedDrawStore(
+    draw_snapshots, prefix=settings.SHARED_DRAWS_PREFIX or _default_prefix(),
+    enabled=settings.SHARED_DRAWS_ENABLED, poll_interval=settings.SHARED_DRAWS_POLL_SECONDS
+)
@@ -1,9 +1,38 @@
 from sqlalchemy.orm import Session
 from collections import Counter, defaultdict
 from typing import Dict, List, Tuple
-import numpy as np
 from datetime import datetime
 from .models import DrawEuromillions, DrawLoto, Statistique
+from .utils import NUMBER_RANGES
+
+def count_appearances(rows, columns) -> Tuple[Dict[int, int], Dict]:
+    """
+    Nombre de tirages contenant chaque valeur et date de sa dernière apparition
+
+    rows : tuples (date, valeurs...) issus d'une seule requête ; columns : positions des
+    valeurs à compter dans chaque tuple (une valeur présente deux fois compte une fois).
+    """
+    counts, last_dates = {}, {}
+    for row in rows:
+        draw_date = row[0]
+        for value in {row[index] for index in columns if row[index] is not None}:
+            counts[value] = counts.get(value, 0) + 1
+            if draw_date and (value not in last_dates or draw_date > last_dates[value]):
+                last_dates[value] = draw_date
+    return counts, last_dates
+
+
+def appearance_stats(value: int, counts: Dict[int, int], last_dates: Dict, total_draws: int) -> Dict:
+    """Entrée des statistiques rapides d'un numéro (nombre, pourcentage, dernière apparition)"""
+    count = counts.get(value, 0)
+    last_date = last_dates.get(value)
+    return {
+        "numero": value,
+        "count": count,
+        "percentage": round((count / total_draws) * 100 if total_draws > 0 else 0, 1),
+        "last_appearance": last_date.strftime('%Y-%m-%d') if last_date else None
+    }
+
 
 class StatistiquesAnalyzer:
     def __init__(self, db: Session):
@@ -94,19 +123,19 @@ class StatistiquesAnalyzer:
         # Vérifier s'il y a des tirages
         if not draws or len(draws) == 0:
             return {
-                "numeros": {i: 0.0 for i in range(1, 46)},
-                "complementaires": {i: 0.0 for i in range(1, 11)},
+                "numeros": {i: 0.0 for i in range(1, 50)},
+                "complementaires": {i: 0.0 for i in range(1, NUMBER_RANGES['loto']['complementaire'] + 1)},
                 "total_draws": 0,
                 "date_range": {"start": None, "end": None},
                 "recent_draws": [],
-                "numeros_count": {i: 0 for i in range(1, 46)},
-                "complementaires_count": {i: 0 for i in range(1, 11)}
+                "numeros_count": {i: 0 for i in range(1, 50)},
+                "complementaires_count": {i: 0 for i in range(1, NUMBER_RANGES['loto']['complementaire'] + 1)}
             }
         
         numeros = []
         complementaires = []
-        numeros_count = {i: 0 for i in range(1, 46)}
-        complementaires_count = {i: 0 for i in range(1, 11)}
+        numeros_count = {i: 0 for i in range(1, 50)}
+        complementaires_count = {i: 0 for i in range(1, NUMBER_RANGES['loto']['complementaire'] + 1)}
         
         for draw in draws:
             numeros.extend([draw.n1, draw.n2, draw.n3, draw.n4, draw.n5, draw.n6])
@@ -121,13 +150,13 @@ class StatistiquesAnalyzer:
             numeros_count[draw.n6] += 1
             complementaires_count[draw.complementaire] += 1
         
-        # Fréquences des numéros (1-45)
+        # Fréquences des numéros (1-49)
         freq_numeros = Counter(numeros)
-        freq_numeros_normalized = {i: freq_numeros.get(i, 0) / len(draws) for i in range(1, 46)}
+        freq_numeros_normalized = {i: freq_numeros.get(i, 0) / len(draws) for i in range(1, 50)}
         
-        # Fréquences des complémentaires (1-10)
+        # Fréquences des complémentaires (1-45)
         freq_complementaires = Counter(complementaires)
-        freq_complementaires_normalized = {i: freq_complementaires.get(i, 0) / len(draws) for i in range(1, 11)}
+        freq_complementaires_normalized = {i: freq_complementaires.get(i, 0) / len(draws) for i in range(1, NUMBER_RANGES['loto']['complementaire'] + 1)}
         
         # Plage de dates
         dates = [draw.date for draw in draws]
@@ -257,7 +286,7 @@ class StatistiquesAnalyzer:
             return {
                 "hot_numeros": [],
                 "hot_complementaires": [],
-                "cold_numeros": [(i, 0) for i in range(1, 46)],
+                "cold_numeros": [(i, 0) for i in range(1, 50)],
                 "cold_complementaires": [(i, 0) for i in range(1, 46)]
             }
         
@@ -276,7 +305,7 @@ class StatistiquesAnalyzer:
         hot_complementaires = sorted(freq_complementaires.items(), key=lambda x: x[1], reverse=True)[:5]
         
         # Numéros froids
-        all_numeros = set(range(1, 46))
+        all_numeros = set(range(1, 50))
         all_complementaires = set(range(1, 46))
         
         cold_numeros = [(num, 0) for num in all_numeros - set(freq_numeros.keys())]
@@ -436,7 +465,7 @@ class StatistiquesAnalyzer:
         
         numeros = []
         complementaires = []
-        numeros_count = {i: 0 for i in range(1, 46)}
+        numeros_count = {i: 0 for i in range(1, 50)}
         complementaires_count = {i: 0 for i in range(1, 46)}
         
         for draw in draws:
@@ -0,0 +1,176 @@
+"""
+Import en flux des fichiers CSV de tirages
+Lit l'upload par paquets de lignes, valide et insère chaque paquet au fil de l'eau,
+et rapporte la progression en NDJSON (une ligne JSON par paquet) ou à une tâche de fond
+"""
+
+import json
+import os
+import shutil
+import tempfile
+import time
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional
+
+import pandas as pd
+
+from .crud import bulk_insert_draws_euromillions, bulk_insert_draws_loto
+from .database import SessionLocal
+from .utils import parse_draws_csv_chunk
+
+REQUIRED_CSV_COLUMNS = {
+    'euromillions': ['Date', 'Numéro 1', 'Numéro 2', 'Numéro 3', 'Numéro 4', 'Numéro 5', 'Etoile 1', 'Etoile 2'],
+    'loto': ['Date', 'Numéro 1', 'Numéro 2', 'Numéro 3', 'Numéro 4', 'Numéro 5', 'Numéro 6'],
+}
+
+# Taille des blocs lors de la copie de l'upload sur disque
+SPOOL_BLOCK_SIZE = 1024 * 1024
+
+# Nombre maximal d'erreurs conservées pour le rapport (les suivantes sont seulement comptées)
+MAX_REPORTED_ERRORS = 100
+
+
+def detect_csv_separator(stream: BinaryIO) -> str:
+    """Détecte le séparateur (virgule ou point-virgule) depuis la ligne d'en-tête, sans consommer le flux"""
+    position = stream.tell()
+    header = stream.readline().decode('utf-8', errors='ignore')
+    stream.seek(position)
+    return ';' if header.count(';') > header.count(',') else ','
+
+
+def spool_upload_to_disk(stream: BinaryIO, directory: Optional[str] = None, suffix: str = '.csv') -> str:
+    """
+    Copie un upload sur disque par blocs de taille fixe et retourne le chemin du fichier
+
+    Le fichier de l'upload est fermé par FastAPI dès la fin du handler : une réponse
+    en flux (ou une tâche de fond) doit donc relire une copie dont elle gère elle-même
+    la durée de vie. directory permet de partager le fichier avec un worker Celery.
+    """
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile(delete=False, suffix=suffix, dir=directory) as temp_file:
+        shutil.copyfileobj(stream, temp_file, SPOOL_BLOCK_SIZE)
+        return temp_file.name
+
+
+def count_data_rows(file_path: str) -> int:
+    """Lignes de données d'un CSV (en-tête exclu), comptées par blocs sans analyser le fichier"""
+    lines = 0
+    last_block = b''
+    with open(file_path, 'rb') as csv_file:
+        for block in iter(lambda: csv_file.read(SPOOL_BLOCK_SIZE), b''):
+            lines += block.count(b'\n')
+            last_block = block
+    if last_block and not last_block.endswith(b'\n'):
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def _progress_line(payload: Dict[str, Any]) -> str:
+    return json.dumps(payload, ensure_ascii=False, default=str) + "\n"
+
+
+def iter_draws_import(file_path: str, game_type: str, chunk_size: int = 5000,
+                      delete_after: bool = True) -> Iterator[Dict[str, Any]]:
+    """
+    Importe un CSV de tirages par paquets de chunk_size lignes
+
+    Chaque paquet est validé puis inséré en masse et validé en base (commit) avant
+    la lecture du suivant : la mémoire utilisée ne dépend que de la taille d'un paquet.
+    Produit un état de progression par paquet, puis un état final
+    (status 'completed' ou 'error'). La progression rapporte les lignes lues au nombre
+    de lignes du fichier (pandas lit le flux en avance : sa position ne suit pas les paquets).
+    Les caches du jeu sont invalidés dès qu'un tirage a été ajouté, même si l'import
+    s'interrompt ensuite (erreur, client déconnecté) : les paquets déjà traités sont en base.
+    """
+    bulk_insert = bulk_insert_draws_euromillions if game_type == 'euromillions' else bulk_insert_draws_loto
+    start_time = time.time()
+    totals = {"rows_read": 0, "added_count": 0, "skipped_count": 0, "error_count": 0}
+    errors: List[str] = []
+    total_rows = count_data_rows(file_path)
+    stream = open(file_path, 'rb')
+    db = SessionLocal()
+
+    try:
+        reader = pd.read_csv(stream, sep=detect_csv_separator(stream), chunksize=chunk_size, dtype=str)
+
+        for chunk_index, chunk in enumerate(reader):
+            if chunk_index == 0:
+                missing_columns = [col for col in REQUIRED_CSV_COLUMNS[game_type] if col not in chunk.columns]
+                if game_type == 'loto' and 'Complémentaire' not in chunk.columns and 'Bonus' not in chunk.columns:
+                    missing_columns.append('Complémentaire')
+                if missing_columns:
+                    yield {
+                        "status": "error",
+                        "error": f"Colonnes manquantes: {', '.join(missing_columns)}"
+                    }
+                    return
+
+            draws, chunk_errors = parse_draws_csv_chunk(chunk, game_type)
+            result = bulk_insert(db, draws)
+
+            totals["rows_read"] += len(chunk)
+            totals["added_count"] += result["added_count"]
+            totals["skipped_count"] += result["skipped_count"] + result["duplicates_in_file"]
+            totals["error_count"] += len(chunk_errors)
+            errors.extend(chunk_errors[:max(0, MAX_REPORTED_ERRORS - len(errors))])
+
+            progress = {"status": "progress", "chunk": chunk_index + 1, **totals}
+            if total_rows:
+                progress["progress"] = round(min(totals["rows_read"] / total_rows, 1.0) * 100, 1)
+            yield progress
+
+        yield {
+            "status": "completed",
+            "message": f"Import terminé. {totals['added_count']} tirages ajoutés, {totals['skipped_count']} ignorés.",
+            **totals,
+            "errors": errors,
+            "duration": round(time.time() - start_time, 3)
+        }
+
+    except Exception as e:
+        db.rollback()
+        yield {"status": "error", "error": f"Erreur lors de l'import: {str(e)}", **totals}
+    finally:
+        db.close()
+        stream.close()
+        if delete_after:
+            os.unlink(file_path)
+        if totals["added_count"]:
+            # Invalider puis préchauffer les statistiques de ce jeu
+            from .cache_warmup import schedule_cache_warmup
+            schedule_cache_warmup([game_type])
+
+
+def stream_draws_import(file_path: str, game_type: str, chunk_size: int = 5000,
+                        delete_after: bool = True) -> Iterator[str]:
+    """Import par paquets rapporté en NDJSON (une ligne JSON par paquet, puis une ligne de synthèse)"""
+    for payload in iter_draws_import(file_path, game_type, chunk_size, delete_after):
+        yield _progress_line(payload)
+
+
+def import_progress_meta(payload: Dict[str, Any]) -> Dict[str, Any]:
+    """Convertit un état de progression en métadonnées de tâche (format current/total/status)"""
+    return {
+        "current": payload.get("progress", 0),
+        "total": 100,
+        "status": f"{payload['rows_read']} lignes traitées, {payload['added_count']} tirages ajoutés",
+        **{key: payload[key] for key in ("chunk", "rows_read", "added_count", "skipped_count", "error_count")}
+    }
+
+
+def run_draws_import(file_path: str, game_type: str, chunk_size: int = 5000,
+                     on_progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """
+    Exécute un import complet (tâche de fond) et retourne l'état final
+
+    on_progress reçoit les métadonnées de progression après chaque paquet.
+    Le fichier est supprimé à la fin de l'import.
+    """
+    final_state = {"status": "error", "error": "Aucune donnée lue"}
+    for payload in iter_draws_import(file_path, game_type, chunk_size):
+        if payload["status"] == "progress":
+            if on_progress:
+                on_progress(import_progress_meta(payload))
+        else:
+            final_state = payload
+    return final_state
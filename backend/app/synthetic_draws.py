@@ -0,0 +1,272 @@
+"""
+Historiques de tirages synthétiques (benchmarks, tests de charge, tests à l'échelle)
+Les tirages sont valides (numéros distincts, triés, dans les plages du jeu) et datés aux
+jours de tirage réels : mardi et vendredi pour l'Euromillions, mercredi et samedi pour le
+Loto. Ils sont générés par paquets vectorisés (numpy) : un million de tirages se génère en
+quelques secondes avec une mémoire bornée par la taille d'un paquet. Un profil de biais
+fixe le poids de chaque numéro ; même graine et mêmes options donnent le même historique.
+Les tirages sont écrits en Parquet ou en CSV d'import, ou insérés en base par le chemin
+d'import en masse (bulk_insert_draws_*).
+"""
+
+from datetime import date, timedelta
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .utils import NUMBER_RANGES
+
+# Jours de tirage (0 = lundi), premier tirage réel, groupes de numéros (colonnes, maximum)
+SYNTHETIC_GAMES = {
+    'euromillions': {
+        'weekdays': (1, 4),
+        'launch': date(2004, 2, 13),
+        'groups': [(['n1', 'n2', 'n3', 'n4', 'n5'], NUMBER_RANGES['euromillions']['numero']),
+                   (['e1', 'e2'], NUMBER_RANGES['euromillions']['etoile'])],
+    },
+    'loto': {
+        'weekdays': (2, 5),
+        'launch': date(1976, 5, 19),
+        'groups': [(['n1', 'n2', 'n3', 'n4', 'n5', 'n6'], NUMBER_RANGES['loto']['numero']),
+                   (['complementaire'], NUMBER_RANGES['loto']['complementaire'])],
+    },
+}
+
+# Cadences : jours de tirage du jeu, ou un tirage par jour (historiques plus courts en années)
+CADENCES = ('game', 'daily')
+
+DEFAULT_CHUNK_SIZE = 50000
+
+# Plage de dates lue par l'import de fichiers (CSV, Excel, Parquet : horodatages pandas)
+IMPORTABLE_DATES = (date(1677, 9, 22), date(2262, 4, 11))
+
+
+def _uniform_weights(max_number: int, strength: float, rng: np.random.Generator) -> np.ndarray:
+    return np.ones(max_number)
+
+
+def _hot_weights(max_number: int, strength: float, rng: np.random.Generator) -> np.ndarray:
+    """Un numéro sur dix (tirés au sort) sort strength fois plus souvent"""
+    weights = np.ones(max_number)
+    weights[rng.choice(max_number, max(1, max_number // 10), replace=False)] = strength
+    return weights
+
+
+def _cold_weights(max_number: int, strength: float, rng: np.random.Generator) -> np.ndarray:
+    """Un numéro sur dix (tirés au sort) sort strength fois moins souvent"""
+    weights = np.ones(max_number)
+    weights[rng.choice(max_number, max(1, max_number // 10), replace=False)] = 1 / strength
+    return weights
+
+
+def _birthday_weights(max_number: int, strength: float, rng: np.random.Generator) -> np.ndarray:
+    """Numéros 1 à 31 (dates de naissance) strength fois plus fréquents"""
+    weights = np.ones(max_number)
+    weights[:min(31, max_number)] = strength
+    return weights
+
+
+def _random_weights(max_number: int, strength: float, rng: np.random.Generator) -> np.ndarray:
+    """Poids aléatoires entre 1 et strength (extrémités de la dérive)"""
+    return 1 + (strength - 1) * rng.random(max_number)
+
+
+# Profils de biais : nom -> (poids au début de l'historique, poids à la fin ou None si fixes, description)
+BIAS_PROFILES: Dict[str, Tuple[Callable, Optional[Callable], str]] = {
+    'uniform': (_uniform_weights, None, "Tirage équitable (aucun biais)"),
+    'hot': (_hot_weights, None, "10 % des numéros sortent strength fois plus souvent"),
+    'cold': (_cold_weights, None, "10 % des numéros sortent strength fois moins souvent"),
+    'birthday': (_birthday_weights, None, "Numéros 1 à 31 strength fois plus fréquents"),
+    'drift': (_random_weights, _random_weights,
+              "Poids aléatoires (1 à strength) qui glissent d'un jeu de poids à un autre au fil de l'historique"),
+}
+
+
+def _weekdays(game_type: str, cadence: str) -> Tuple[int, ...]:
+    if cadence not in CADENCES:
+        raise ValueError(f"Cadence inconnue: {cadence} (disponibles: {', '.join(CADENCES)})")
+    return tuple(range(7)) if cadence == 'daily' else SYNTHETIC_GAMES[game_type]['weekdays']
+
+
+def available_draws(game_type: str, start: date, cadence: str = 'game', until: date = date.max) -> int:
+    """Nombre de tirages datables entre start et until (inclus)"""
+    weekdays = _weekdays(game_type, cadence)
+    days = (until - start).days + 1
+    if days <= 0:
+        return 0
+    full_weeks, remainder = divmod(days, 7)
+    tail = sum(1 for offset in range(remainder) if (start.weekday() + offset) % 7 in weekdays)
+    return full_weeks * len(weekdays) + tail
+
+
+def is_importable(start: date, end: date) -> bool:
+    """Dates relisibles par l'import de fichiers (horodatages pandas en nanosecondes)"""
+    return IMPORTABLE_DATES[0] <= start and end <= IMPORTABLE_DATES[1]
+
+
+def default_start(game_type: str, count: int, cadence: str = 'game') -> date:
+    """
+    Premier jour de l'historique par défaut : lancement réel du jeu
+
+    Un historique trop long pour finir avant 2262 (limite de l'import de fichiers) est
+    avancé dans le passé tant qu'il reste importable ; au-delà (environ 60 000 tirages à la
+    cadence du jeu), il part du lancement et peut aller jusqu'à l'an 9999, puis est avancé
+    dans le passé (il n'est alors utilisable qu'en base ou en Parquet lu directement).
+    """
+    launch = SYNTHETIC_GAMES[game_type]['launch']
+    per_week = len(_weekdays(game_type, cadence))
+    for until in (IMPORTABLE_DATES[1], date.max):
+        missing = count - available_draws(game_type, launch, cadence, until)
+        try:
+            start = launch - timedelta(weeks=-(-missing // per_week)) if missing > 0 else launch
+        except OverflowError:
+            continue
+        if start >= IMPORTABLE_DATES[0] or until == date.max:
+            return start
+    raise ValueError(f"{count} tirages dépassent la plage de dates représentable (cadence daily ?)")
+
+
+def draw_dates(game_type: str, first: int, last: int, start: date, cadence: str = 'game') -> np.ndarray:
+    """
+    Dates des tirages d'indices first à last (exclu) depuis start, en datetime64[D]
+
+    Calcul direct (semaine, jour de tirage dans la semaine) : pas de parcours jour par jour.
+    """
+    weekdays = np.array(_weekdays(game_type, cadence))
+    monday = np.datetime64(start - timedelta(days=start.weekday()), 'D')
+    # Jours de tirage de la première semaine antérieurs à start
+    skipped = int((weekdays < start.weekday()).sum())
+    indices = np.arange(first, last) + skipped
+    weeks, positions = np.divmod(indices, len(weekdays))
+    return monday + (weeks * 7 + weekdays[positions]).astype('timedelta64[D]')
+
+
+def history_span(game_type: str, count: int, start: Optional[date] = None, cadence: str = 'game') -> Tuple[date, date]:
+    """Dates du premier et du dernier tirage d'un historique de count tirages"""
+    start = start or default_start(game_type, count, cadence)
+    return start, draw_dates(game_type, count - 1, count, start, cadence)[0].item()
+
+
+def sample_without_replacement(rng: np.random.Generator, weights: np.ndarray, rows: int, picks: int) -> np.ndarray:
+    """
+    picks numéros distincts par ligne, tirés sans remise selon weights, triés
+
+    Clés de Gumbel : les picks plus grandes valeurs de log(poids) + Gumbel suivent exactement
+    le tirage successif sans remise pondéré, pour toutes les lignes en une opération.
+    """
+    keys = np.log(weights) + rng.gumbel(size=(rows, len(weights)))
+    chosen = np.argpartition(-keys, picks - 1, axis=1)[:, :picks] + 1
+    chosen.sort(axis=1)
+    return chosen.astype(np.int8)
+
+
+def iter_synthetic_chunks(game_type: str, count: int, profile: str = 'uniform', strength: float = 2.0,
+                          seed: int = 42, start: Optional[date] = None, cadence: str = 'game',
+                          chunk_size: int = DEFAULT_CHUNK_SIZE) -> Iterator[Dict[str, np.ndarray]]:
+    """
+    Produit l'historique par paquets de chunk_size tirages : {'date': datetime64[D], 'n1': int8, ...}
+
+    Les tirages sont dans l'ordre chronologique. Pour le profil drift, les poids sont
+    interpolés au milieu de chaque paquet.
+    """
+    if game_type not in SYNTHETIC_GAMES:
+        raise ValueError(f"Jeu inconnu: {game_type}")
+    if profile not in BIAS_PROFILES:
+        raise ValueError(f"Profil de biais inconnu: {profile} (disponibles: {', '.join(BIAS_PROFILES)})")
+    if strength <= 0:
+        raise ValueError("strength doit être strictement positif")
+    start = start or default_start(game_type, count, cadence)
+    if count > available_draws(game_type, start, cadence):
+        raise ValueError(
+            f"{count} tirages ne tiennent pas avant l'an 9999 depuis le {start.isoformat()} "
+            f"(avancer la date de début ou utiliser la cadence daily)"
+        )
+
+    rng = np.random.default_rng([seed, list(SYNTHETIC_GAMES).index(game_type)])
+    start_weights, end_weights, _ = BIAS_PROFILES[profile]
+    groups = [
+        (columns, start_weights(max_number, strength, rng),
+         end_weights(max_number, strength, rng) if end_weights else None)
+        for columns, max_number in SYNTHETIC_GAMES[game_type]['groups']
+    ]
+
+    for first in range(0, count, chunk_size):
+        last = min(first + chunk_size, count)
+        chunk = {'date': draw_dates(game_type, first, last, start, cadence)}
+        progress = (first + last) / 2 / count
+        for columns, weights, final_weights in groups:
+            if final_weights is not None:
+                weights = (1 - progress) * weights + progress * final_weights
+            numbers = sample_without_replacement(rng, weights, last - first, len(columns))
+            chunk.update({column: numbers[:, index] for index, column in enumerate(columns)})
+        yield chunk
+
+
+def chunk_to_draws(chunk: Dict[str, np.ndarray]) -> List[Dict]:
+    """Paquet de tableaux -> tirages au format de l'import en masse (dates Python, entiers)"""
+    columns = {name: values.tolist() for name, values in chunk.items() if name != 'date'}
+    dates = chunk['date'].astype(object)
+    return [
+        {'date': draw_date, **{name: values[index] for name, values in columns.items()}}
+        for index, draw_date in enumerate(dates)
+    ]
+
+
+def write_synthetic_parquet(path: str, game_type: str, count: int, **options) -> int:
+    """Écrit l'historique en Parquet (schéma de l'export colonnes) ; retourne le nombre de tirages"""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+    from .columnar_io import draws_schema
+
+    schema = draws_schema(game_type)
+    written = 0
+    with pq.ParquetWriter(path, schema, compression='zstd') as writer:
+        for chunk in iter_synthetic_chunks(game_type, count, **options):
+            writer.write_table(pa.table({name: chunk[name] for name in schema.names}, schema=schema))
+            written += len(chunk['date'])
+    return written
+
+
+def write_synthetic_csv(path: str, game_type: str, count: int, **options) -> int:
+    """Écrit l'historique au format CSV d'import (en-têtes de l'export, séparateur ;) ; retourne le nombre de tirages"""
+    from .exporters import DRAW_EXPORT_COLUMNS
+
+    _, columns = DRAW_EXPORT_COLUMNS[game_type]
+    written = 0
+    with open(path, 'w', newline='', encoding='utf-8') as output:
+        output.write(';'.join(label for label, _ in columns) + '\n')
+        for chunk in iter_synthetic_chunks(game_type, count, **options):
+            values = np.column_stack([chunk[attribute] for _, attribute in columns[1:]])
+            dates = np.datetime_as_string(chunk['date'], unit='D')
+            output.writelines(
+                f"{draw_date};{';'.join(map(str, row))}\n" for draw_date, row in zip(dates, values.tolist())
+            )
+            written += len(dates)
+    return written
+
+
+def insert_synthetic_draws(db, game_type: str, count: int,
+                           on_progress: Optional[Callable[[Dict[str, int]], None]] = None,
+                           **options) -> Dict[str, int]:
+    """
+    Insère l'historique en base par l'import en masse (un commit par paquet)
+
+    Les dates déjà présentes sont ignorées, comme à l'import d'un fichier ; les caches
+    du jeu sont invalidés si des tirages ont été ajoutés.
+    """
+    from .crud import bulk_insert_draws_euromillions, bulk_insert_draws_loto
+
+    bulk_insert = bulk_insert_draws_euromillions if game_type == 'euromillions' else bulk_insert_draws_loto
+    totals = {'generated': 0, 'added_count': 0, 'skipped_count': 0}
+    for chunk in iter_synthetic_chunks(game_type, count, **options):
+        result = bulk_insert(db, chunk_to_draws(chunk), chunk_size=5000)
+        totals['generated'] += len(chunk['date'])
+        totals['added_count'] += result['added_count']
+        totals['skipped_count'] += result['skipped_count'] + result['duplicates_in_file']
+        if on_progress:
+            on_progress(totals)
+
+    if totals['added_count']:
+        from .cache_manager import cache_manager
+        cache_manager.invalidate_game_caches(game_type)
+    return totals
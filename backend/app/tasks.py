@@ -1,8 +1,8 @@
 from celery import current_task
-from ./celery_app import celery_app
-from ./cache_manager import cache_manager
-from ./database import SessionLocal
-from ./models import DrawEuromillions, DrawLoto
+from .celery_app import celery_app
+from .cache_manager import cache_manager
+from .database import SessionLocal, session_scope
+from .models import DrawEuromillions, DrawLoto
 from sqlalchemy import extract, func
 from typing import Dict, List, Optional
 import time
@@ -88,21 +88,44 @@ def generate_advanced_grids(self, game_type: str, strategy: str, params: Dict) -
             'message': 'Erreur lors de la génération des grilles'
         }
 
+@celery_app.task(bind=True)
+def import_draws_file(self, file_path: str, game_type: str, chunk_size: int = 5000) -> Dict:
+    """
+    Importe un fichier CSV de tirages en tâche de fond
+    
+    Args:
+        file_path: Chemin du fichier déposé (supprimé en fin d'import)
+        game_type: 'euromillions' ou 'loto'
+        chunk_size: Nombre de lignes par paquet
+    """
+    from .streaming_import import run_draws_import
+    
+    self.update_state(
+        state='PROGRESS',
+        meta={'current': 0, 'total': 100, 'status': 'Lecture du fichier...'}
+    )
+    
+    result = run_draws_import(
+        file_path, game_type, chunk_size,
+        on_progress=lambda meta: self.update_state(state='PROGRESS', meta=meta)
+    )
+    # Une exception place la tâche dans l'état FAILURE (un état 'error' renvoyé serait un SUCCESS)
+    if result.get('status') == 'error':
+        raise RuntimeError(f"Erreur lors de l'import du fichier: {result.get('error')}")
+    return result
+
 @celery_app.task
 def update_daily_statistics():
     """Met à jour les statistiques quotidiennes"""
     try:
-        db = SessionLocal()
-        
-        # Calculer les statistiques pour Euromillions
-        euromillions_stats = calculate_daily_stats_euromillions(db)
-        cache_manager.set_stats_cache('euromillions', euromillions_stats, ttl=86400)  # 24h
-        
-        # Calculer les statistiques pour Loto
-        loto_stats = calculate_daily_stats_loto(db)
-        cache_manager.set_stats_cache('lotto', loto_stats, ttl=86400)  # 24h
-        
-        db.close()
+        with session_scope() as db:
+            # Calculer les statistiques pour Euromillions
+            euromillions_stats = calculate_daily_stats_euromillions(db)
+            cache_manager.set_stats_cache('euromillions', euromillions_stats, ttl=86400)  # 24h
+            
+            # Calculer les statistiques pour Loto
+            loto_stats = calculate_daily_stats_loto(db)
+            cache_manager.set_stats_cache('lotto', loto_stats, ttl=86400)  # 24h
         
         return {
             'status': 'success',
@@ -140,42 +163,54 @@ def clean_old_cache():
         }
 
 @celery_app.task
-def generate_weekly_report():
-    """Génère un rapport hebdomadaire"""
+def warm_up_cache(game_types: Optional[List[str]] = None):
+    """Préchauffe le cache des statistiques (après un déploiement ou un import)"""
     try:
-        db = SessionLocal()
-        
-        # Calculer les statistiques de la semaine
-        week_start = datetime.now() - timedelta(days=7)
-        
-        euromillions_weekly = db.query(DrawEuromillions).filter(
-            DrawEuromillions.date >= week_start
-        ).all()
+        from .cache_warmup import cache_warmup
         
-        loto_weekly = db.query(DrawLoto).filter(
-            DrawLoto.date >= week_start
-        ).all()
+        return cache_warmup.run(game_types)
         
-        report = {
-            'period': 'weekly',
-            'start_date': week_start.isoformat(),
-            'end_date': datetime.now().isoformat(),
-            'euromillions': {
-                'total_draws': len(euromillions_weekly),
-                'most_frequent_numbers': get_most_frequent_numbers(euromillions_weekly, 'euromillions'),
-                'most_frequent_stars': get_most_frequent_stars(euromillions_weekly)
-            },
-            'lotto': {
-                'total_draws': len(loto_weekly),
-                'most_frequent_numbers': get_most_frequent_numbers(loto_weekly, 'lotto'),
-                'most_frequent_complementaires': get_most_frequent_complementaires(loto_weekly)
-            }
+    except Exception as e:
+        return {
+            'status': 'error',
+            'error': str(e),
+            'message': 'Erreur lors du préchauffage du cache'
         }
-        
-        # Sauvegarder le rapport
-        cache_manager.set('weekly_report', report, ttl=604800)  # 7 jours
-        
-        db.close()
+
+@celery_app.task
+def generate_weekly_report():
+    """Génère un rapport hebdomadaire"""
+    try:
+        with session_scope() as db:
+            # Calculer les statistiques de la semaine
+            week_start = datetime.now() - timedelta(days=7)
+            
+            euromillions_weekly = db.query(DrawEuromillions).filter(
+                DrawEuromillions.date >= week_start
+            ).all()
+            
+            loto_weekly = db.query(DrawLoto).filter(
+                DrawLoto.date >= week_start
+            ).all()
+            
+            report = {
+                'period': 'weekly',
+                'start_date': week_start.isoformat(),
+                'end_date': datetime.now().isoformat(),
+                'euromillions': {
+                    'total_draws': len(euromillions_weekly),
+                    'most_frequent_numbers': get_most_frequent_numbers(euromillions_weekly, 'euromillions'),
+                    'most_frequent_stars': get_most_frequent_stars(euromillions_weekly)
+                },
+                'lotto': {
+                    'total_draws': len(loto_weekly),
+                    'most_frequent_numbers': get_most_frequent_numbers(loto_weekly, 'lotto'),
+                    'most_frequent_complementaires': get_most_frequent_complementaires(loto_weekly)
+                }
+            }
+            
+            # Sauvegarder le rapport
+            cache_manager.set('weekly_report', report, ttl=604800)  # 7 jours
         
         return {
             'status': 'success',
@@ -1,129 +1,241 @@
+import io
 import pandas as pd
-from typing import List, Dict
-from datetime import datetime
+import numpy as np
+from typing import List, Dict, Tuple, Union
 
-def parse_euromillions_csv(file_path: str) -> List[Dict]:
+EUROMILLIONS_CSV_COLUMNS = {
+    'Numéro 1': 'n1', 'Numéro 2': 'n2', 'Numéro 3': 'n3', 'Numéro 4': 'n4', 'Numéro 5': 'n5',
+    'Etoile 1': 'e1', 'Etoile 2': 'e2'
+}
+
+LOTO_CSV_COLUMNS = {
+    'Numéro 1': 'n1', 'Numéro 2': 'n2', 'Numéro 3': 'n3', 'Numéro 4': 'n4', 'Numéro 5': 'n5',
+    'Numéro 6': 'n6'
+}
+
+EXCEL_DATE_FORMATS = ['%Y-%m-%d', '%d/%m/%Y', '%d-%m-%Y']
+
+# Numéro maximal de chaque groupe (le minimum est 1) : validation de l'import, instantanés,
+# génération de grilles et historiques synthétiques partagent ces plages
+NUMBER_RANGES = {
+    'euromillions': {'numero': 50, 'etoile': 12},
+    'loto': {'numero': 49, 'complementaire': 45},
+}
+
+def read_draws_csv(source: Union[str, bytes]) -> pd.DataFrame:
+    """Lit un CSV de tirages (chemin ou contenu brut) en détectant le séparateur"""
+    def read(**kwargs):
+        return pd.read_csv(io.BytesIO(source) if isinstance(source, bytes) else source, **kwargs)
+    
     try:
         # Essayer d'abord avec le séparateur par défaut (virgule)
-        try:
-            df = pd.read_csv(file_path)
-            # Vérifier si les colonnes sont correctement séparées
-            if len(df.columns) == 1 and ';' in str(df.columns[0]):
-                # Si une seule colonne avec des points-virgules, utiliser le point-virgule comme séparateur
-                df = pd.read_csv(file_path, sep=';')
-        except Exception:
-            # Si ça échoue, essayer avec le point-virgule
-            df = pd.read_csv(file_path, sep=';')
+        df = read()
+        # Vérifier si les colonnes sont correctement séparées
+        if len(df.columns) == 1 and ';' in str(df.columns[0]):
+            # Si une seule colonne avec des points-virgules, utiliser le point-virgule comme séparateur
+            df = read(sep=';')
+    except Exception:
+        # Si ça échoue, essayer avec le point-virgule
+        df = read(sep=';')
+    return df
+
+def parse_draw_dates(values: pd.Series) -> pd.Series:
+    """
+    Convertit une colonne de dates en objets date, de manière vectorisée
+    
+    Le format YYYY-MM-DD (avec ou sans heure) est traité en un seul passage ;
+    les autres formats passent par l'analyse générique de pandas.
+    Lève une ValueError si une date ne peut pas être interprétée.
+    """
+    as_text = values.astype(str).str.split(' ').str[0]
+    dates = pd.to_datetime(as_text, format='%Y-%m-%d', errors='coerce')
+    
+    remaining = dates.isna()
+    if remaining.any():
+        # Si le format ne correspond pas, essayer d'autres formats valeur par valeur
+        dates[remaining] = [pd.to_datetime(value) for value in values[remaining]]
+    
+    return dates.dt.date
+
+def _dataframe_to_draws(df: pd.DataFrame, columns: Dict[str, str]) -> List[Dict]:
+    """Construit la liste des tirages (dictionnaires) à partir des colonnes renommées"""
+    draws_df = df[list(columns)].rename(columns=columns).astype('int64')
+    draws_df.insert(0, 'date', parse_draw_dates(df['Date']))
+    return draws_df.to_dict('records')
+
+def parse_euromillions_csv(source: Union[str, bytes]) -> List[Dict]:
+    """Parse un CSV Euromillions (chemin ou contenu brut) en liste de tirages"""
+    try:
+        df = read_draws_csv(source)
         
         print(f"Colonnes trouvées dans le CSV: {list(df.columns)}")
         print(f"Premières lignes du CSV:")
         print(df.head())
         
-        draws = []
-        for _, row in df.iterrows():
-            # Gérer le format de date spécifique
-            date_str = row['Date']
-            if isinstance(date_str, str):
-                # Extraire juste la date (YYYY-MM-DD) du format complet
-                date_part = date_str.split(' ')[0]
-                try:
-                    parsed_date = datetime.strptime(date_part, '%Y-%m-%d').date()
-                except ValueError:
-                    # Si le format ne correspond pas, essayer d'autres formats
-                    parsed_date = pd.to_datetime(date_str).date()
-            else:
-                parsed_date = pd.to_datetime(date_str).date()
-            
-            draws.append({
-                'date': parsed_date,
-                'n1': int(row['Numéro 1']), 
-                'n2': int(row['Numéro 2']), 
-                'n3': int(row['Numéro 3']), 
-                'n4': int(row['Numéro 4']), 
-                'n5': int(row['Numéro 5']),
-                'e1': int(row['Etoile 1']), 
-                'e2': int(row['Etoile 2'])
-            })
-        return draws
+        return _dataframe_to_draws(df, EUROMILLIONS_CSV_COLUMNS)
     except Exception as e:
         print(f"Erreur lors du parsing du fichier CSV: {e}")
         print(f"Colonnes disponibles: {list(df.columns) if 'df' in locals() else 'Aucune'}")
         raise e
 
-def parse_loto_csv(file_path: str) -> List[Dict]:
+def parse_loto_csv(source: Union[str, bytes]) -> List[Dict]:
+    """Parse un CSV Loto (chemin ou contenu brut) en liste de tirages"""
     try:
-        # Essayer d'abord avec le séparateur par défaut (virgule)
-        try:
-            df = pd.read_csv(file_path)
-            # Vérifier si les colonnes sont correctement séparées
-            if len(df.columns) == 1 and ';' in str(df.columns[0]):
-                # Si une seule colonne avec des points-virgules, utiliser le point-virgule comme séparateur
-                df = pd.read_csv(file_path, sep=';')
-        except Exception:
-            # Si ça échoue, essayer avec le point-virgule
-            df = pd.read_csv(file_path, sep=';')
+        df = read_draws_csv(source)
     
         print(f"Colonnes trouvées dans le CSV Loto: {list(df.columns)}")
         print(f"Premières lignes du CSV Loto:")
         print(df.head())
-    
-        draws = []
-        for _, row in df.iterrows():
-            # Gérer le format de date spécifique
-            date_str = row['Date']
-            if isinstance(date_str, str):
-                # Extraire juste la date (YYYY-MM-DD) du format complet
-                date_part = date_str.split(' ')[0]
-                try:
-                    parsed_date = datetime.strptime(date_part, '%Y-%m-%d').date()
-                except ValueError:
-                    # Si le format ne correspond pas, essayer d'autres formats
-                    parsed_date = pd.to_datetime(date_str).date()
-            else:
-                parsed_date = pd.to_datetime(date_str).date()
-            
-            # Gérer les deux formats possibles pour le complémentaire/bonus
-            complementaire_key = 'Complémentaire' if 'Complémentaire' in row else 'Bonus'
-            
-            draws.append({
-                'date': parsed_date,
-                'n1': int(row['Numéro 1']), 
-                'n2': int(row['Numéro 2']), 
-                'n3': int(row['Numéro 3']), 
-                'n4': int(row['Numéro 4']), 
-                'n5': int(row['Numéro 5']),
-                'n6': int(row['Numéro 6']),
-                'complementaire': int(row[complementaire_key])
-            })
-        return draws
+        
+        # Gérer les deux formats possibles pour le complémentaire/bonus
+        complementaire_key = 'Complémentaire' if 'Complémentaire' in df.columns else 'Bonus'
+        
+        return _dataframe_to_draws(df, {**LOTO_CSV_COLUMNS, complementaire_key: 'complementaire'})
     except Exception as e:
         print(f"Erreur lors du parsing du fichier Loto CSV: {e}")
         print(f"Colonnes disponibles: {list(df.columns) if 'df' in locals() else 'Aucune'}")
         raise e
 
+def _parse_excel_dates(values: pd.Series) -> Tuple[pd.Series, pd.Series]:
+    """Convertit la colonne 'Date du tirage' d'un Excel ; retourne (dates, masque des valeurs manquantes)"""
+    missing = values.isna()
+    is_text = values.map(lambda value: isinstance(value, str))
+    
+    dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    # Valeurs déjà typées date par Excel
+    typed = ~missing & ~is_text
+    if typed.any():
+        dates[typed] = pd.to_datetime(values[typed], errors='coerce')
+    # Chaînes : essayer différents formats
+    for fmt in EXCEL_DATE_FORMATS:
+        pending = is_text & dates.isna()
+        if not pending.any():
+            break
+        dates[pending] = pd.to_datetime(values[pending], format=fmt, errors='coerce')
+    
+    return dates, missing
+
+def _excel_column_values(df: pd.DataFrame, column: str) -> Tuple[np.ndarray, np.ndarray]:
+    """Retourne (valeurs entières, masque invalide) pour une colonne numérique d'un Excel"""
+    numeric = pd.to_numeric(df[column], errors='coerce')
+    invalid = numeric.isna().to_numpy()
+    return numeric.fillna(0).astype('int64').to_numpy(), invalid
+
+def _first_invalid_column(invalid_columns: List[np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """Pour chaque ligne, indique si une colonne est invalide et laquelle (première rencontrée)"""
+    invalid = np.column_stack(invalid_columns)
+    return invalid.any(axis=1), invalid.argmax(axis=1)
+
+def _has_duplicates(values: np.ndarray) -> np.ndarray:
+    """Indique, pour chaque ligne d'une matrice, si elle contient des valeurs en double"""
+    ordered = np.sort(values, axis=1)
+    return (np.diff(ordered, axis=1) == 0).any(axis=1)
+
+def _parse_excel_draws(df: pd.DataFrame, number_count: int, max_number: int,
+                       extra_checks, sort_numbers: bool = False) -> Tuple[List[Dict], List[str]]:
+    """
+    Normalise un Excel de tirages de manière vectorisée
+    
+    Chaque ligne reçoit au plus une erreur, dans le même ordre de vérification
+    que l'ancien traitement ligne par ligne. Retourne (tirages valides, erreurs triées par ligne).
+    """
+    line_numbers = df.index.to_numpy() + 2
+    errors = {}
+    
+    def reject(mask: np.ndarray, message) -> None:
+        for position in np.flatnonzero(mask):
+            if position not in errors:
+                errors[position] = f"Ligne {line_numbers[position]}: {message(position)}"
+    
+    # Traitement de la date
+    dates, missing = _parse_excel_dates(df['Date du tirage'])
+    raw_dates = df['Date du tirage'].to_numpy()
+    reject(missing.to_numpy(), lambda i: "Date manquante")
+    reject(dates.isna().to_numpy(), lambda i: f"Format de date invalide: {raw_dates[i]}")
+    
+    # Extraction des numéros
+    columns = [_excel_column_values(df, f'N°{i}') for i in range(1, number_count + 1)]
+    numbers = np.column_stack([values for values, _ in columns])
+    any_invalid, first_invalid = _first_invalid_column([invalid for _, invalid in columns])
+    reject(any_invalid, lambda i: f"Numéro {first_invalid[i] + 1} invalide")
+    reject(((numbers < 1) | (numbers > max_number)).any(axis=1), lambda i: f"Numéros hors de la plage 1-{max_number}")
+    reject(_has_duplicates(numbers), lambda i: "Numéros en double")
+    
+    extra_values = extra_checks(df, reject)
+    
+    valid = np.ones(len(df), dtype=bool)
+    valid[list(errors)] = False
+    
+    if sort_numbers:
+        numbers = np.sort(numbers, axis=1)
+    
+    draws = pd.DataFrame({'date': dates.dt.date.to_numpy()[valid]})
+    for position in range(number_count):
+        draws[f'n{position + 1}'] = numbers[valid, position]
+    for column, values in extra_values.items():
+        draws[column] = values[valid]
+    
+    return draws.to_dict('records'), [errors[position] for position in sorted(errors)]
+
+def parse_euromillions_excel(df: pd.DataFrame) -> Tuple[List[Dict], List[str]]:
+    """Normalise un Excel Euromillions ; retourne (tirages valides, erreurs par ligne)"""
+    def check_stars(df, reject):
+        columns = [_excel_column_values(df, f'Étoile {i}') for i in range(1, 3)]
+        stars = np.column_stack([values for values, _ in columns])
+        any_invalid, first_invalid = _first_invalid_column([invalid for _, invalid in columns])
+        reject(any_invalid, lambda i: f"Étoile {first_invalid[i] + 1} invalide")
+        max_star = NUMBER_RANGES['euromillions']['etoile']
+        reject(((stars < 1) | (stars > max_star)).any(axis=1), lambda i: f"Étoiles hors de la plage 1-{max_star}")
+        reject(_has_duplicates(stars), lambda i: "Étoiles en double")
+        stars = np.sort(stars, axis=1)
+        return {'e1': stars[:, 0], 'e2': stars[:, 1]}
+    
+    # Les numéros et étoiles Euromillions sont stockés triés
+    return _parse_excel_draws(df, 5, NUMBER_RANGES['euromillions']['numero'], check_stars, sort_numbers=True)
+
+def parse_loto_excel(df: pd.DataFrame) -> Tuple[List[Dict], List[str]]:
+    """Normalise un Excel Loto ; retourne (tirages valides, erreurs par ligne)"""
+    def check_bonus(df, reject):
+        bonus, invalid = _excel_column_values(df, 'Bonus')
+        reject(invalid, lambda i: "Bonus invalide")
+        max_bonus = NUMBER_RANGES['loto']['complementaire']
+        reject((bonus < 1) | (bonus > max_bonus), lambda i: f"Bonus hors de la plage 1-{max_bonus}")
+        return {'complementaire': bonus}
+    
+    return _parse_excel_draws(df, 6, NUMBER_RANGES['loto']['numero'], check_bonus)
+
+# Correspondance des en-têtes CSV vers les en-têtes Excel (mêmes règles de validation)
+CSV_TO_EXCEL_COLUMNS = {
+    'Date': 'Date du tirage',
+    **{f'Numéro {i}': f'N°{i}' for i in range(1, 7)},
+    'Etoile 1': 'Étoile 1', 'Etoile 2': 'Étoile 2',
+    'Complémentaire': 'Bonus'
+}
+
+def parse_draws_csv_chunk(chunk: pd.DataFrame, game_type: str) -> Tuple[List[Dict], List[str]]:
+    """
+    Valide un paquet de lignes CSV avec les règles de l'import Excel
+    
+    Les numéros de ligne des erreurs suivent l'index du paquet (continu avec read_csv(chunksize=...)).
+    Retourne (tirages valides, erreurs par ligne).
+    """
+    chunk = chunk.rename(columns=CSV_TO_EXCEL_COLUMNS)
+    if pd.api.types.is_string_dtype(chunk['Date du tirage']):
+        # Ne garder que la partie date (YYYY-MM-DD) d'un horodatage complet
+        chunk['Date du tirage'] = chunk['Date du tirage'].str.split(' ').str[0]
+    
+    if game_type == 'euromillions':
+        return parse_euromillions_excel(chunk)
+    return parse_loto_excel(chunk)
+
 def parse_stats_csv(file_path: str, jeu: str) -> List[Dict]:
     try:
-        # Essayer d'abord avec le séparateur par défaut (virgule)
-        try:
-            df = pd.read_csv(file_path)
-            # Vérifier si les colonnes sont correctement séparées
-            if len(df.columns) == 1 and ';' in str(df.columns[0]):
-                # Si une seule colonne avec des points-virgules, utiliser le point-virgule comme séparateur
-                df = pd.read_csv(file_path, sep=';')
-        except Exception:
-            # Si ça échoue, essayer avec le point-virgule
-            df = pd.read_csv(file_path, sep=';')
-    
-        stats = []
-        for _, row in df.iterrows():
-            stats.append({
-                'jeu': jeu,
-                'numero': row['numero'],
-                'type': row['type'],
-                'frequence': row['frequence'],
-                'periode': row.get('periode', None)
-            })
-        return stats
+        df = read_draws_csv(file_path)
+    
+        stats_df = df[['numero', 'type', 'frequence']].copy()
+        stats_df.insert(0, 'jeu', jeu)
+        stats_df['periode'] = df['periode'] if 'periode' in df.columns else None
+        return stats_df.to_dict('records')
     except Exception as e:
         print(f"Erreur lors du parsing du fichier Stats CSV: {e}")
-        raise e 
\ No newline at end of file
+        raise e
@@ -0,0 +1,322 @@
+"""
+Systèmes réducteurs (wheeling) : grilles couvrant un ensemble de numéros choisis
+Pour un ensemble de v numéros, le système garantit "k si m" : si m des numéros tirés
+font partie de l'ensemble, au moins une grille en contient k. Les grilles sont choisies
+par couverture gloutonne : à chaque étape, la grille qui couvre le plus de tirages
+encore non couverts. Numéros, grilles candidates et tirages sont des masques de bits
+(une position par numéro de l'ensemble) : "la grille couvre le tirage" est un ET binaire
+suivi d'un comptage de bits, vectorisé sur tous les tirages restants.
+"""
+
+import math
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import get_context
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from config import settings
+
+# Taille maximale de l'ensemble de numéros (masques sur 64 bits, temps de calcul borné)
+MAX_WHEEL_POOL = 30
+
+# Grilles au-delà desquelles la construction s'arrête (garantie alors incomplète)
+DEFAULT_MAX_GRIDS = 2000
+
+# Constructions gloutonnes indépendantes (départages différents), la plus courte est gardée
+DEFAULT_RESTARTS = 4
+
+# Tirages à couvrir à partir desquels les constructions sont réparties sur des processus
+PARALLEL_DRAW_THRESHOLD = 10_000
+
+# Paires (candidate, tirage) évaluées au plus par étape gloutonne, et par bloc vectorisé
+MAX_STEP_PAIRS = 20_000_000
+GAIN_BLOCK_PAIRS = 2_000_000
+
+# Candidates évaluées au minimum par étape (même si presque tout reste à couvrir)
+MIN_STEP_CANDIDATES = 64
+
+# Grilles construites au plus par requête, toutes constructions confondues (restarts x max_grids)
+MAX_WHEEL_WORK = 20_000
+
+# Durée de conservation des systèmes calculés (ils ne dépendent pas des tirages)
+WHEEL_CACHE_TTL = 86400
+
+
+def schonheim_bound(pool_size: int, grid_size: int, match: int, if_drawn: int) -> int:
+    """
+    Nombre minimal de grilles d'un système "match si if_drawn" sur pool_size numéros
+
+    Borne de comptage : chaque grille couvre au plus sum C(g, j) C(v - g, m - j) tirages
+    (j >= match) ; pour match == if_drawn, borne de Schönheim (plus forte) :
+    ceil(v/g ceil((v-1)/(g-1) ... ceil((v-t+1)/(g-t+1)))).
+    """
+    per_grid = sum(math.comb(grid_size, common) * math.comb(pool_size - grid_size, if_drawn - common)
+                   for common in range(match, min(grid_size, if_drawn) + 1))
+    bound = -(-math.comb(pool_size, if_drawn) // per_grid)
+    if match == if_drawn:
+        schonheim = 1
+        for level in range(match - 1, -1, -1):
+            schonheim = -(-(pool_size - level) * schonheim // (grid_size - level))
+        bound = max(bound, schonheim)
+    return bound
+
+
+def subset_masks(pool_size: int, size: int) -> np.ndarray:
+    """Masques de bits de tous les sous-ensembles de size positions parmi pool_size"""
+    from .combination_table import enumerate_combinations
+
+    positions = enumerate_combinations(pool_size, size).astype(np.uint64) - np.uint64(1)
+    return np.bitwise_or.reduce(np.left_shift(np.uint64(1), positions), axis=1)
+
+
+def covered(grid_mask: np.uint64, draws: np.ndarray, match: int) -> np.ndarray:
+    """Tirages (masques) ayant au moins match numéros communs avec la grille"""
+    return np.bitwise_count(np.bitwise_and(draws, grid_mask)) >= match
+
+
+def _position_masks(positions: np.ndarray, size: int, combinations: Dict) -> np.ndarray:
+    """Masques de tous les sous-ensembles de size positions parmi celles données"""
+    from .combination_table import enumerate_combinations
+
+    if size == 0:
+        return np.zeros(1, dtype=np.uint64)
+    key = (len(positions), size)
+    if key not in combinations:
+        combinations[key] = enumerate_combinations(len(positions), size).astype(np.intp) - 1
+    bits = np.left_shift(np.uint64(1), positions.astype(np.uint64))
+    return np.bitwise_or.reduce(bits[combinations[key]], axis=1)
+
+
+def covering_grids(draw_mask: int, pool_size: int, grid_size: int, match: int,
+                   combinations: Optional[Dict] = None) -> np.ndarray:
+    """
+    Masques de toutes les grilles ayant au moins match numéros communs avec un tirage
+
+    Chaque grille est écrite une seule fois : j numéros du tirage (j >= match) et
+    grid_size - j numéros hors du tirage.
+    """
+    combinations = {} if combinations is None else combinations
+    inside = np.array(mask_positions(draw_mask))
+    outside = np.array([position for position in range(pool_size) if not draw_mask >> position & 1])
+    parts = []
+    for common in range(match, min(grid_size, len(inside)) + 1):
+        rest = grid_size - common
+        if rest > len(outside):
+            continue
+        inner = _position_masks(inside, common, combinations)
+        outer = _position_masks(outside, rest, combinations)
+        parts.append(np.bitwise_or(inner[:, None], outer[None, :]).ravel())
+    return np.concatenate(parts)
+
+
+def _gains(candidates: np.ndarray, uncovered: np.ndarray, match: int) -> np.ndarray:
+    """Tirages non couverts que couvrirait chaque candidate (blocs de GAIN_BLOCK_PAIRS paires)"""
+    gains = np.empty(len(candidates), dtype=np.int64)
+    step = max(1, GAIN_BLOCK_PAIRS // len(uncovered))
+    for first in range(0, len(candidates), step):
+        block = candidates[first:first + step, None]
+        gains[first:first + step] = (np.bitwise_count(np.bitwise_and(block, uncovered[None, :])) >= match).sum(axis=1)
+    return gains
+
+
+def greedy_wheel(pool_size: int, grid_size: int, match: int, if_drawn: int,
+                 seed: int = 0, max_grids: int = DEFAULT_MAX_GRIDS,
+                 deadline: Optional[float] = None) -> List[int]:
+    """
+    Couverture gloutonne guidée par les tirages : masques des grilles retenues
+
+    À chaque étape, un tirage non couvert est choisi au hasard ; parmi les grilles qui
+    le couvrent (énumérées directement en masques), celle qui couvre le plus de tirages
+    encore non couverts est retenue. Chaque étape couvre donc au moins un tirage, et son
+    coût est borné par MAX_STEP_PAIRS : au-delà, un échantillon des candidates est évalué
+    (premières étapes, où presque tout reste à couvrir) ; les dernières étapes sont exactes.
+    La graine fixe les tirages choisis, les échantillons et les départages. La construction
+    s'arrête (incomplète) à max_grids grilles ou passé deadline (horodatage time.time(),
+    commun aux processus du pool).
+    """
+    rng = np.random.default_rng(seed)
+    uncovered = subset_masks(pool_size, if_drawn)
+    combinations: Dict = {}
+
+    grids: List[int] = []
+    while len(uncovered) and len(grids) < max_grids and (deadline is None or time.time() < deadline):
+        target = int(uncovered[rng.integers(len(uncovered))])
+        candidates = covering_grids(target, pool_size, grid_size, match, combinations)
+        budget = max(MIN_STEP_CANDIDATES, MAX_STEP_PAIRS // len(uncovered))
+        if len(candidates) > budget:
+            candidates = candidates[rng.choice(len(candidates), size=budget, replace=False)]
+        else:
+            candidates = candidates[rng.permutation(len(candidates))]
+
+        best = candidates[int(np.argmax(_gains(candidates, uncovered, match)))]
+        grids.append(int(best))
+        uncovered = uncovered[~covered(best, uncovered, match)]
+
+    return _without_redundant_grids(grids, pool_size, match, if_drawn) if not len(uncovered) else grids
+
+
+def _without_redundant_grids(grids: List[int], pool_size: int, match: int, if_drawn: int) -> List[int]:
+    """Retire les grilles dont tous les tirages couverts le sont aussi par d'autres (dernières d'abord)"""
+    draws = subset_masks(pool_size, if_drawn)
+    coverage = np.array([covered(np.uint64(grid), draws, match) for grid in grids])
+    multiplicity = coverage.sum(axis=0)
+    kept = np.ones(len(grids), dtype=bool)
+    for index in range(len(grids) - 1, -1, -1):
+        if np.all(multiplicity[coverage[index]] >= 2):
+            kept[index] = False
+            multiplicity -= coverage[index]
+    return [grid for grid, keep in zip(grids, kept) if keep]
+
+
+def wheel_coverage(grids: Sequence[int], pool_size: int, match: int, if_drawn: int) -> float:
+    """Part des tirages "m numéros de l'ensemble" couverts par les grilles (1.0 : garantie complète)"""
+    uncovered = subset_masks(pool_size, if_drawn)
+    total = len(uncovered)
+    for grid in grids:
+        uncovered = uncovered[~covered(np.uint64(grid), uncovered, match)]
+    return 1.0 - len(uncovered) / total
+
+
+def mask_positions(mask: int) -> List[int]:
+    """Positions (0..63) des bits d'un masque"""
+    return [position for position in range(mask.bit_length()) if mask >> position & 1]
+
+
+class WheelingPool:
+    """
+    Pool de processus des constructions gloutonnes
+
+    Créé à la première utilisation puis réutilisé ; processus lancés en mode 'spawn'
+    (voir FileProcessingPool). En cas d'indisponibilité, les constructions se font en séquence.
+    """
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max(1, max_workers)
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                self._executor = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=get_context('spawn'))
+            return self._executor
+
+    def _reset_executor(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+    def best_wheel(self, pool_size: int, grid_size: int, match: int, if_drawn: int,
+                   restarts: int, max_grids: int, time_budget: Optional[float] = None) -> List[int]:
+        """
+        Plus court des systèmes complets obtenus avec les graines 0..restarts-1 (en parallèle
+        si le calcul est lourd), à défaut celui qui couvre le plus de tirages
+
+        time_budget (secondes) borne la durée totale : les constructions en cours s'arrêtent
+        à l'échéance, celles qui n'ont pas commencé sont abandonnées (la première est toujours lancée).
+        """
+        deadline = time.time() + time_budget if time_budget else None
+        arguments = [(pool_size, grid_size, match, if_drawn, seed, max_grids, deadline) for seed in range(restarts)]
+        if restarts <= 1 or self.max_workers == 1 or math.comb(pool_size, if_drawn) < PARALLEL_DRAW_THRESHOLD:
+            results = []
+            for args in arguments:
+                if results and deadline is not None and time.time() >= deadline:
+                    break
+                results.append(greedy_wheel(*args))
+        else:
+            try:
+                executor = self._get_executor()
+                futures = [executor.submit(greedy_wheel, *args) for args in arguments]
+                results = [future.result() for future in futures]
+            except (BrokenProcessPool, OSError, RuntimeError) as e:
+                print(f"⚠️ Pool de processus indisponible, construction séquentielle: {e}")
+                self._reset_executor()
+                results = [greedy_wheel(*args) for args in arguments]
+
+        coverages = [wheel_coverage(grids, pool_size, match, if_drawn) for grids in results]
+        complete = [grids for grids, coverage in zip(results, coverages) if coverage == 1.0]
+        if complete:
+            return min(complete, key=len)
+        return results[int(np.argmax(coverages))]
+
+    def shutdown(self) -> None:
+        self._reset_executor()
+
+
+def build_wheel(game_type: str, numbers: Sequence[int], match: int, if_drawn: int,
+                restarts: int = DEFAULT_RESTARTS, max_grids: int = DEFAULT_MAX_GRIDS) -> Dict[str, Any]:
+    """
+    Système réducteur "match si if_drawn" sur les numéros choisis
+
+    Le système ne dépend que du nombre de numéros : il est calculé sur des positions,
+    mis en cache s'il est complet ou arrêté à max_grids, puis appliqué aux numéros choisis. ValueError si les paramètres sont
+    incohérents (ensemble trop petit ou trop grand, garantie impossible) ou si le calcul
+    demandé est hors limites (restarts x max_grids, borne inférieure au-delà de max_grids).
+    La construction est bornée à WHEEL_TIME_BUDGET_SECONDS ; les autres groupes de la
+    grille (étoiles, numéro complémentaire) sont tirés uniformément.
+    """
+    from .cache_manager import cache_manager
+    from .grid_stream import GRID_GROUPS
+    from .synthetic_draws import sample_without_replacement
+
+    field, _, grid_size, max_number = GRID_GROUPS[game_type][0]
+    pool = sorted(set(numbers))
+    if len(pool) != len(numbers):
+        raise ValueError("Les numéros choisis doivent être distincts")
+    if any(number < 1 or number > max_number for number in pool):
+        raise ValueError(f"Les numéros doivent être compris entre 1 et {max_number}")
+    if not grid_size <= len(pool) <= MAX_WHEEL_POOL:
+        raise ValueError(f"Choisir entre {grid_size} et {MAX_WHEEL_POOL} numéros")
+    if not 1 <= match <= if_drawn <= grid_size:
+        raise ValueError(f"Garantie impossible: {match} si {if_drawn} (1 <= k <= m <= {grid_size})")
+    if restarts * max_grids > MAX_WHEEL_WORK:
+        raise ValueError(f"restarts x max_grids limité à {MAX_WHEEL_WORK} ({restarts} x {max_grids} demandés)")
+    lower_bound = schonheim_bound(len(pool), grid_size, match, if_drawn)
+    if lower_bound > max_grids:
+        raise ValueError(f"Au moins {lower_bound} grilles sont nécessaires pour garantir {match} si {if_drawn} "
+                         f"sur {len(pool)} numéros (max_grids: {max_grids})")
+
+    start_time = time.perf_counter()
+    params = {'pool_size': len(pool), 'match': match, 'if_drawn': if_drawn,
+              'restarts': restarts, 'max_grids': max_grids}
+    design = cache_manager.get_analysis_cache(game_type, 'wheel', **params)
+    computed = design is None
+    if computed:
+        design = wheeling_pool.best_wheel(len(pool), grid_size, match, if_drawn, restarts, max_grids,
+                                          time_budget=settings.WHEEL_TIME_BUDGET_SECONDS)
+    coverage = wheel_coverage(design, len(pool), match, if_drawn)
+    # Un système interrompu par la durée maximale n'est pas mis en cache : un nouvel essai
+    # (ou une durée plus longue) peut le compléter ; complet ou arrêté à max_grids, il est définitif
+    if computed and (coverage == 1.0 or len(design) >= max_grids):
+        cache_manager.set_analysis_cache(game_type, 'wheel', design, WHEEL_CACHE_TTL, **params)
+
+    grids = [
+        {field: [pool[position] for position in mask_positions(mask)], 'type': 'wheel'}
+        for mask in design
+    ]
+    rng = np.random.default_rng()
+    for extra_field, _, picks, extra_max in GRID_GROUPS[game_type][1:]:
+        values = sample_without_replacement(rng, np.ones(extra_max), len(grids), picks).tolist()
+        for grid, value in zip(grids, values):
+            grid[extra_field] = value if picks > 1 else value[0]
+
+    return {
+        'numbers': pool,
+        'guarantee': {'match': match, 'if_drawn': if_drawn},
+        'guaranteed': coverage == 1.0,
+        'coverage': round(coverage, 6),
+        'grid_count': len(grids),
+        'lower_bound': lower_bound,
+        'full_wheel_grids': math.comb(len(pool), grid_size),
+        'grids': grids,
+        'duration': round(time.perf_counter() - start_time, 3),
+    }
+
+
+# Instance globale
+wheeling_pool = WheelingPool(settings.WHEEL_MAX_WORKERS)
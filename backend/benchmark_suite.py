@@ -0,0 +1,372 @@
+#!/usr/bin/env python3
+"""
+Suite de benchmarks hors ligne : statistiques, analyses, génération, simulation, scoring,
+import et export
+
+Pour chaque taille d'historique (1k, 10k et 100k tirages par défaut), des tirages
+synthétiques reproductibles (app.synthetic_draws) sont importés dans une base SQLite
+temporaire par le chemin d'import en masse, puis chaque benchmark est exécuté plusieurs
+fois dans le processus (sans serveur, sans Redis ni préchauffage). Les résultats sont
+écrits en JSON et peuvent être comparés à une référence (--baseline) : le script échoue
+en cas de régression.
+
+    python benchmark_suite.py --sizes 1000,10000 --output bench.json
+    python benchmark_suite.py --sizes 1000,10000 --baseline bench.json
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_SIZES = [1000, 10000, 100000]
+DEFAULT_REPEAT = 3
+DEFAULT_SEED = 42
+
+# Ralentissement (médiane / médiane de référence) au-delà duquel un benchmark est en régression
+DEFAULT_REGRESSION_THRESHOLD = 1.25
+
+# Au-delà de cette durée (secondes), un benchmark n'est pas répété (historiques de 100k tirages)
+SLOW_RUN_SECONDS = 5.0
+
+# Écarts sous ce seuil (secondes) ignorés lors de la comparaison : bruit de mesure
+MIN_COMPARED_SECONDS = 0.005
+
+
+def _prepare_environment(work_dir: str) -> None:
+    """Base SQLite temporaire, ni préchauffage ni instantanés partagés (avant tout import de app)"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(work_dir, 'benchmark.db')}"
+    os.environ['CACHE_WARMUP_ENABLED'] = 'False'
+    os.environ['SNAPSHOT_PERSIST'] = 'False'
+    os.environ['SHARED_DRAWS_ENABLED'] = 'False'
+    os.environ['DB_QUERY_WARN_THRESHOLD'] = '0'
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def write_history_csv(path: str, game_type: str, count: int, seed: int) -> None:
+    """
+    Écrit un CSV d'import de count tirages synthétiques (même graine : même historique)
+
+    Les historiques trop longs pour la cadence réelle dans la plage de dates de l'import
+    de fichiers (environ 60 000 tirages) passent à un tirage par jour. ValueError si
+    l'historique ne tient pas dans cette plage (dates au-delà de 2262 non relisibles).
+    """
+    from app.synthetic_draws import (IMPORTABLE_DATES, available_draws, history_span,
+                                     is_importable, write_synthetic_csv)
+
+    fits = count <= available_draws(game_type, IMPORTABLE_DATES[0], 'game', IMPORTABLE_DATES[1])
+    cadence = 'game' if fits else 'daily'
+    start, end = history_span(game_type, count, cadence=cadence)
+    if not is_importable(start, end):
+        raise ValueError(f"{count} tirages {game_type} dépassent la plage importable "
+                         f"({IMPORTABLE_DATES[0]} - {IMPORTABLE_DATES[1]}): {start} - {end}")
+    write_synthetic_csv(path, game_type, count, seed=seed, start=start, cadence=cadence)
+
+
+class BenchmarkRunner:
+    """Exécute les benchmarks d'une taille d'historique et accumule les résultats"""
+
+    def __init__(self, repeat: int, seed: int, only: Optional[List[str]] = None):
+        self.repeat = repeat
+        self.seed = seed
+        self.only = only
+        self.results: List[Dict] = []
+
+    def record_error(self, group: str, name: str, game_type: str, size: int, error: Exception) -> None:
+        self.results.append({
+            'name': f"{group}.{name}", 'group': group, 'game': game_type, 'size': size,
+            'error': f"{type(error).__name__}: {error}",
+        })
+        print(f"  {'échec':>13}  {game_type:<12} {group}.{name}: {type(error).__name__}: {error}")
+
+    def measure(self, group: str, name: str, game_type: str, size: int,
+                func: Callable[[], object], repeat: Optional[int] = None) -> bool:
+        """Mesure func ; False (erreur enregistrée dans les résultats) si elle échoue"""
+        if self.only and group not in self.only:
+            return True
+        import numpy as np
+
+        timings = []
+        for run in range(repeat or self.repeat):
+            random.seed(self.seed + run)
+            np.random.seed(self.seed + run)
+            start_time = time.perf_counter()
+            try:
+                func()
+            except Exception as e:
+                self.record_error(group, name, game_type, size, e)
+                return False
+            timings.append(time.perf_counter() - start_time)
+            if timings[-1] > SLOW_RUN_SECONDS:
+                break
+
+        result = {
+            'name': f"{group}.{name}",
+            'group': group,
+            'game': game_type,
+            'size': size,
+            'runs': len(timings),
+            'min_s': round(min(timings), 6),
+            'median_s': round(statistics.median(timings), 6),
+            'mean_s': round(statistics.fmean(timings), 6),
+            'max_s': round(max(timings), 6),
+        }
+        self.results.append(result)
+        print(f"  {result['median_s'] * 1000:10.1f} ms  {game_type:<12} {result['name']}")
+        return True
+
+
+def _reset_tables() -> None:
+    from app.database import engine
+    from app.models import Base
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+
+
+def _import_history(runner: BenchmarkRunner, work_dir: str, game_type: str, size: int) -> bool:
+    """
+    Importe l'historique synthétique (mesuré sur une base vide : l'import sert aussi de peuplement)
+
+    False si l'historique n'a pas pu être écrit ou importé entièrement : l'échec est
+    enregistré dans les résultats et les autres benchmarks de cette taille ne sont pas lancés.
+    """
+    from app.streaming_import import run_draws_import
+
+    csv_path = os.path.join(work_dir, f"{game_type}_{size}.csv")
+    try:
+        write_history_csv(csv_path, game_type, size, runner.seed)
+    except ValueError as e:
+        runner.record_error('import', 'csv_bulk', game_type, size, e)
+        return False
+    import_path = os.path.join(work_dir, 'import.csv')
+
+    def import_history():
+        # run_draws_import supprime le fichier importé : une copie est importée à chaque fois
+        shutil.copyfile(csv_path, import_path)
+        _reset_tables()
+        state = run_draws_import(import_path, game_type, chunk_size=5000)
+        if state.get('status') != 'completed' or state.get('added_count') != size:
+            raise RuntimeError(f"Import {game_type} incomplet: {state}")
+
+    if runner.only and 'import' not in runner.only:
+        try:
+            import_history()
+        except Exception as e:
+            runner.record_error('import', 'csv_bulk', game_type, size, e)
+            return False
+        return True
+    return runner.measure('import', 'csv_bulk', game_type, size, import_history, repeat=1)
+
+
+def _run_game(runner: BenchmarkRunner, game_type: str, size: int) -> None:
+    from app.combination_analysis import CombinationAnalysis
+    from app.database import SessionLocal
+    from app.exporters import stream_draws_export
+    from app.gap_analysis import GapAnalysis
+    from app.generator import GridGenerator
+    from app.grid_scoring import GridScoring
+    from app.models import DrawEuromillions, DrawLoto
+    from app.simulation import MonteCarloSimulator
+    from app.stats import StatistiquesAnalyzer
+    from app.synthetic_draws import SYNTHETIC_GAMES
+
+    suffix = 'euromillions' if game_type == 'euromillions' else 'loto'
+    model = DrawEuromillions if game_type == 'euromillions' else DrawLoto
+    db = SessionLocal()
+    try:
+        analyzer = StatistiquesAnalyzer(db)
+        runner.measure('stats', 'frequencies', game_type, size,
+                       getattr(analyzer, f"calculate_frequencies_{suffix}"))
+        runner.measure('stats', 'frequent_pairs', game_type, size,
+                       getattr(analyzer, f"find_frequent_pairs_{suffix}"))
+        runner.measure('stats', 'hot_cold', game_type, size,
+                       getattr(analyzer, f"get_hot_cold_numbers_{suffix}"))
+
+        draws = db.query(model).all()
+        gap_analysis = GapAnalysis().analyze_number_gaps(draws, game_type)
+        combination_analysis = CombinationAnalysis().analyze_combinations(draws, game_type)
+        runner.measure('gaps', 'analyze_number_gaps', game_type, size,
+                       lambda: GapAnalysis().analyze_number_gaps(draws, game_type))
+        runner.measure('combinations', 'analyze_combinations', game_type, size,
+                       lambda: CombinationAnalysis().analyze_combinations(draws, game_type))
+
+        (columns, max_number), _ = SYNTHETIC_GAMES[game_type]['groups']
+        numbers_count = len(columns)
+        grid_rng = random.Random(runner.seed)
+        grids = [sorted(grid_rng.sample(range(1, max_number + 1), numbers_count)) for _ in range(20)]
+        runner.measure('scoring', 'score_20_grids', game_type, size, lambda: [
+            GridScoring().score_grid(grid, game_type, gap_analysis, combination_analysis, draws)
+            for grid in grids
+        ])
+
+        simulator = MonteCarloSimulator(db)
+        if game_type == 'euromillions':
+            simulation_grids = [{'numeros': grid, 'etoiles': [1, 2]} for grid in grids[:5]]
+        else:
+            simulation_grids = [{'numeros': grid, 'complementaire': 1} for grid in grids[:5]]
+        runner.measure('simulation', 'monte_carlo_5x1000', game_type, size,
+                       lambda: getattr(simulator, f"simulate_{suffix}")(simulation_grids, num_simulations=1000))
+
+        generator = GridGenerator(db)
+        for mode in ('weighted', 'coverage', 'random'):
+            runner.measure('generation', f"{mode}_10_grids", game_type, size,
+                           lambda mode=mode: generator.generate_multiple_grids(game_type, 10, mode, use_imported_stats=False))
+        if game_type == 'euromillions':
+            from app.euromillions_generator import EuromillionsAdvancedGenerator
+            runner.measure('generation', 'advanced_balanced_5_grids', game_type, size,
+                           lambda: EuromillionsAdvancedGenerator(db).generate_multiple_grids(5, 'balanced'))
+    finally:
+        db.close()
+
+    for export_format in ('csv', 'excel', 'parquet'):
+        runner.measure('export', export_format, game_type, size,
+                       lambda export_format=export_format: sum(
+                           len(block) for block in stream_draws_export(game_type, export_format)
+                       ), repeat=1 if size >= 100000 else None)
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=BACKEND_DIR,
+                              capture_output=True, text=True, check=True).stdout.strip() or None
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_suite(sizes: List[int], games: List[str], repeat: int, seed: int,
+              only: Optional[List[str]] = None) -> Dict:
+    """Exécute la suite complète et retourne le document de résultats (sérialisable en JSON)"""
+    work_dir = tempfile.mkdtemp(prefix='lotto_bench_')
+    try:
+        _prepare_environment(work_dir)
+        runner = BenchmarkRunner(repeat, seed, only)
+        with warnings.catch_warnings():
+            # Avertissements numpy des analyses (corrélations de séries constantes)
+            warnings.simplefilter('ignore', RuntimeWarning)
+            for size in sizes:
+                for game_type in games:
+                    print(f"\n📊 {game_type} - {size} tirages")
+                    if _import_history(runner, work_dir, game_type, size):
+                        _run_game(runner, game_type, size)
+                    else:
+                        print(f"  ⚠️ Historique incomplet : benchmarks {game_type} {size} ignorés")
+        return {
+            'meta': {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'git_commit': _git_commit(),
+                'python': platform.python_version(),
+                'platform': platform.platform(),
+                'cpu_count': os.cpu_count(),
+                'sizes': sizes,
+                'games': games,
+                'repeat': repeat,
+                'seed': seed,
+            },
+            'results': runner.results,
+        }
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
+def compare_with_baseline(results: Dict, baseline: Dict,
+                          threshold: float = DEFAULT_REGRESSION_THRESHOLD) -> List[Dict]:
+    """
+    Compare les médianes aux résultats de référence (mêmes nom, jeu et taille)
+
+    Un benchmark en erreur dans les résultats courants est retourné avec sa cause
+    ('error') : il fait échouer la comparaison, même sans référence.
+    """
+    reference = {(item['name'], item['game'], item['size']): item for item in baseline.get('results', [])}
+    comparisons = []
+    for item in results['results']:
+        if 'error' in item:
+            comparisons.append({'name': item['name'], 'game': item['game'], 'size': item['size'],
+                                'error': item['error'], 'regression': False, 'improvement': False})
+            continue
+        previous = reference.get((item['name'], item['game'], item['size']))
+        if previous is None or 'error' in previous:
+            continue
+        ratio = item['median_s'] / previous['median_s'] if previous['median_s'] else float('inf')
+        significant = abs(item['median_s'] - previous['median_s']) >= MIN_COMPARED_SECONDS
+        comparisons.append({
+            'name': item['name'],
+            'game': item['game'],
+            'size': item['size'],
+            'baseline_s': previous['median_s'],
+            'current_s': item['median_s'],
+            'ratio': round(ratio, 3),
+            'regression': significant and ratio > threshold,
+            'improvement': significant and ratio < 1 / threshold,
+        })
+    return comparisons
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks hors ligne du backend")
+    parser.add_argument('--sizes', default=','.join(str(size) for size in DEFAULT_SIZES),
+                        help="Tailles d'historique séparées par des virgules")
+    parser.add_argument('--games', default='euromillions,loto', help="Jeux mesurés")
+    parser.add_argument('--only', default='',
+                        help="Groupes mesurés : import,stats,gaps,combinations,scoring,simulation,generation,export")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="Mesures par benchmark")
+    parser.add_argument('--seed', type=int, default=DEFAULT_SEED, help="Graine des données et des générateurs")
+    parser.add_argument('--output', default='', help="Fichier JSON des résultats")
+    parser.add_argument('--baseline', default='', help="Résultats de référence à comparer")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Ralentissement toléré (médiane / référence)")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size]
+    games = [game for game in args.games.split(',') if game]
+    only = [group for group in args.only.split(',') if group] or None
+
+    print("⏱️ Benchmarks hors ligne")
+    print("=" * 50)
+    results = run_suite(sizes, games, args.repeat, args.seed, only)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump(results, output, indent=2, ensure_ascii=False)
+        print(f"\n💾 Résultats enregistrés dans {args.output}")
+
+    if not args.baseline:
+        return 0
+
+    with open(args.baseline, encoding='utf-8') as baseline_file:
+        comparisons = compare_with_baseline(results, json.load(baseline_file), args.threshold)
+
+    print(f"\n📈 Comparaison avec {args.baseline} (seuil x{args.threshold})")
+    for item in comparisons:
+        if 'error' in item:
+            print(f"  ❌ {'échec':>37}  {item['game']:<12} {item['size']:>7} {item['name']}: {item['error']}")
+            continue
+        marker = '❌' if item['regression'] else ('🚀' if item['improvement'] else '✅')
+        print(f"  {marker} x{item['ratio']:<6} {item['baseline_s'] * 1000:9.1f} ms -> "
+              f"{item['current_s'] * 1000:9.1f} ms  {item['game']:<12} {item['size']:>7} {item['name']}")
+
+    errors = [item for item in comparisons if 'error' in item]
+    regressions = [item for item in comparisons if item['regression']]
+    if errors:
+        print(f"❌ {len(errors)} benchmark(s) en erreur")
+    if regressions:
+        print(f"❌ {len(regressions)} régression(s) de performance")
+    if errors or regressions:
+        return 1
+    print("✅ Aucune régression de performance")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Construit les tables énumérées des combinaisons (génération sous contraintes)
+
+Les tables sont sinon construites au démarrage du serveur (une fois par hôte, voir
+COMBINATION_TABLE_PRELOAD) ; les préparer au déploiement évite ce délai et le pic mémoire
+(quelques secondes et plusieurs centaines de Mo pour les 13 983 816 combinaisons Loto).
+
+    python build_combination_tables.py
+    python build_combination_tables.py --game loto --directory /var/lib/lotto/combinations
+"""
+
+import argparse
+import os
+import sys
+import time
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def main() -> int:
+    from config import settings
+    from app.combination_table import COMBINATION_GROUPS, CombinationTable, table_build_lock
+
+    parser = argparse.ArgumentParser(description="Tables énumérées des combinaisons et de leurs caractéristiques")
+    parser.add_argument('--game', choices=sorted({game for game, _ in COMBINATION_GROUPS}),
+                        help="Jeu (défaut : tous)")
+    parser.add_argument('--directory', default=settings.COMBINATION_TABLE_DIR,
+                        help="Dossier des tables (défaut : COMBINATION_TABLE_DIR)")
+    args = parser.parse_args()
+
+    for game_type, kind in COMBINATION_GROUPS:
+        if args.game and game_type != args.game:
+            continue
+        start_time = time.perf_counter()
+        try:
+            # Même verrou que les workers : un worker qui démarre attend la table enregistrée
+            with table_build_lock(args.directory, game_type, kind):
+                table = CombinationTable.build(game_type, kind)
+                target = table.save(args.directory)
+        except OSError as e:
+            print(f"❌ {game_type}/{kind}: {e}")
+            return 1
+        size_mb = table.describe()['size_bytes'] / 1024 / 1024
+        print(f"✅ {game_type}/{kind}: {len(table)} combinaisons ({size_mb:.1f} Mo) dans {target} "
+              f"en {time.perf_counter() - start_time:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Vérifie le nombre de requêtes SQL des routes sensibles aux N+1
+
+Appelle chaque route dans le processus (TestClient, base configurée par DATABASE_URL)
+et lit l'en-tête X-DB-Query-Count : échoue si une route dépasse son budget.
+Le cache Redis est ignoré (en-tête X-Cache HIT) : seules les réponses calculées comptent.
+"""
+
+import argparse
+import os
+import sys
+from typing import List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+# (méthode, chemin, corps JSON, nombre maximal de requêtes SQL)
+QUERY_BUDGETS: List[Tuple[str, str, Optional[dict], int]] = [
+    ('GET', '/api/euromillions/quick-stats?year=2099', None, 2),
+    ('GET', '/api/euromillions/quick-stats?month=1', None, 2),
+    ('GET', '/api/loto/quick-stats?month=1', None, 2),
+    ('GET', '/api/euromillions/search/stats', None, 4),
+    ('POST', '/api/loto/analyze-grid', {'numeros': [1, 7, 13, 25, 38, 49], 'complementaire': 5}, 2),
+    ('GET', '/api/euromillions/draws?limit=50', None, 3),
+    ('GET', '/api/loto/draws?limit=50', None, 3),
+]
+
+
+def check_query_counts(scale: int = 1) -> List[Tuple[str, int, int, bool]]:
+    """Retourne (route, requêtes exécutées, budget, respecté) pour chaque route contrôlée"""
+    from fastapi.testclient import TestClient
+    from app.main import app
+    from app.query_counter import assert_response_queries
+
+    client = TestClient(app)
+    results = []
+    for method, path, body, budget in QUERY_BUDGETS:
+        response = client.request(method, path, json=body)
+        label = f"{method} {path}"
+        if response.headers.get('X-Cache', '').upper().startswith('HIT'):
+            print(f"  ⏭️ {label}: réponse servie par le cache, ignorée")
+            continue
+        try:
+            count = assert_response_queries(response, budget * scale, label)
+            results.append((label, count, budget * scale, True))
+        except AssertionError as e:
+            print(f"  ❌ {e}")
+            results.append((label, int(response.headers.get('X-DB-Query-Count', -1)), budget * scale, False))
+    return results
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Budget de requêtes SQL par route")
+    parser.add_argument('--scale', type=int, default=1, help="Multiplie tous les budgets")
+    args = parser.parse_args()
+
+    print("🔎 Nombre de requêtes SQL par route")
+    print("=" * 50)
+
+    results = check_query_counts(args.scale)
+    for label, count, budget, ok in results:
+        print(f"  {'✅' if ok else '❌'} {count:4d} / {budget:<4d} {label}")
+
+    if not all(ok for *_, ok in results):
+        print("❌ Budget de requêtes dépassé (N+1 probable)")
+        return 1
+    print("✅ Budgets de requêtes respectés")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
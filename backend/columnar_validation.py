@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+Moteur de validation colonne par colonne pour les fichiers CSV de tirages.
+Utilisé par UploadValidator et EnhancedUploadValidator : chaque contrôle (plages,
+unicité dans la ligne, jour de tirage, doublons) s'applique à une colonne entière
+au lieu d'être répété ligne par ligne.
+"""
+
+import sqlite3
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+# Jours de tirage habituels (0 = lundi)
+DRAW_WEEKDAYS = {
+    'euromillions': {1, 4},   # mardi, vendredi
+    'loto': {0, 2, 5},        # lundi, mercredi, samedi
+}
+
+WEEKDAY_NAMES = ['lundi', 'mardi', 'mercredi', 'jeudi', 'vendredi', 'samedi', 'dimanche']
+
+DRAW_TABLES = {
+    'euromillions': ('draws_euromillions', ['n1', 'n2', 'n3', 'n4', 'n5', 'e1', 'e2']),
+    'loto': ('draws_loto', ['n1', 'n2', 'n3', 'n4', 'n5', 'n6', 'complementaire']),
+}
+
+
+class ValidationIssues:
+    """
+    Collecte les erreurs ou avertissements d'un fichier, contrôle par contrôle
+
+    Chaque contrôle est enregistré avec son ordre d'exécution : le rapport final est
+    trié par ligne puis par contrôle, comme avec l'ancienne validation ligne par ligne.
+    """
+
+    def __init__(self, line_numbers: np.ndarray):
+        self.line_numbers = line_numbers
+        self._issues = []  # (position, ordre du contrôle, message)
+        self._order = 0
+        self.flagged = np.zeros(len(line_numbers), dtype=bool)
+
+    def add(self, mask: np.ndarray, message: Callable[[int], str]) -> None:
+        """Ajoute un message pour chaque ligne du masque ; message(position) donne le texte"""
+        self._order += 1
+        for position in np.flatnonzero(mask):
+            self._issues.append((position, self._order, f"Ligne {self.line_numbers[position]}: {message(position)}"))
+        self.flagged |= mask
+
+    def messages(self) -> List[str]:
+        return [message for _, _, message in sorted(self._issues)]
+
+
+def strip_column(values: pd.Series) -> pd.Series:
+    """Retourne la colonne en texte sans espaces, les valeurs manquantes devenant ''"""
+    return values.astype(object).where(values.notna(), '').astype(str).str.strip()
+
+
+def parse_dates(values: pd.Series, formats: List[str]) -> pd.Series:
+    """Convertit une colonne de texte en dates en essayant les formats dans l'ordre"""
+    dates = pd.Series(pd.NaT, index=values.index, dtype='datetime64[ns]')
+    for fmt in formats:
+        pending = dates.isna() & (values != '')
+        if not pending.any():
+            break
+        dates[pending] = pd.to_datetime(values[pending], format=fmt, errors='coerce')
+    return dates
+
+
+def parse_integers(values: pd.Series, strict: bool = True) -> pd.Series:
+    """
+    Convertit une colonne en entiers (valeurs invalides à NaN)
+
+    strict : n'accepte que des entiers écrits tels quels (comme int('12')) ;
+    sinon toute valeur numérique est acceptée et tronquée (comme int(12.0)).
+    """
+    if strict:
+        text = strip_column(values)
+        return pd.to_numeric(text.where(text.str.fullmatch(r'[+-]?\d+'), None), errors='coerce')
+    return np.trunc(pd.to_numeric(values, errors='coerce'))
+
+
+def check_number_columns(issues: ValidationIssues, numbers: Dict[str, pd.Series], low: int, high: int) -> None:
+    """Contrôle, colonne par colonne, que chaque numéro est présent et dans la plage [low, high]"""
+    for column, values in numbers.items():
+        invalid = values.isna().to_numpy()
+        issues.add(invalid, lambda i, column=column: f"{column} invalide")
+        out_of_range = (~invalid) & ((values < low) | (values > high)).to_numpy()
+        issues.add(out_of_range, lambda i, column=column, values=values.to_numpy():
+                   f"{column} doit être entre {low} et {high} (valeur: {int(values[i])})")
+
+
+def rows_with_repeats(numbers: Dict[str, pd.Series]) -> np.ndarray:
+    """
+    Lignes dont les numéros valides ne sont pas tous distincts
+
+    Une valeur invalide compte comme manquante : la ligne est alors signalée aussi,
+    comme le faisait le contrôle len(set(numeros)) != attendu.
+    """
+    matrix = np.column_stack([values.to_numpy(dtype=float) for values in numbers.values()])
+    ordered = np.sort(matrix, axis=1)  # les NaN sont placés en fin de ligne
+    has_repeat = (np.diff(ordered, axis=1) == 0).any(axis=1)
+    return has_repeat | np.isnan(matrix).any(axis=1)
+
+
+def check_draw_weekdays(warnings: ValidationIssues, dates: pd.Series, game_type: str) -> None:
+    """Avertit pour les dates qui ne tombent pas un jour de tirage habituel"""
+    weekdays = dates.dt.weekday
+    unusual = (dates.notna() & ~weekdays.isin(list(DRAW_WEEKDAYS[game_type]))).to_numpy()
+    weekday_values = weekdays.to_numpy()
+    warnings.add(unusual, lambda i: f"Jour de tirage inhabituel ({WEEKDAY_NAMES[int(weekday_values[i])]}) pour {game_type}")
+
+
+def check_duplicate_dates(warnings: ValidationIssues, dates: pd.Series) -> int:
+    """Avertit pour les dates présentes plusieurs fois dans le fichier ; retourne le nombre de répétitions"""
+    known = dates.notna()
+    repeated = (known & dates.duplicated()).to_numpy()
+    if repeated.any():
+        first_lines = pd.Series(warnings.line_numbers, index=dates.index)[known].groupby(dates[known]).transform('first')
+        first_lines = first_lines.reindex(dates.index).to_numpy()
+        date_values = dates.dt.strftime('%Y-%m-%d').to_numpy()
+        warnings.add(repeated, lambda i: f"Date {date_values[i]} déjà présente dans le fichier (ligne {int(first_lines[i])})")
+    return int(repeated.sum())
+
+
+def count_existing_draws(db_path: str, game_type: str, draws: pd.DataFrame) -> int:
+    """
+    Compte les tirages du fichier déjà présents à l'identique en base
+
+    Une seule requête charge les tirages de la plage de dates du fichier,
+    puis la comparaison se fait par jointure.
+    """
+    if draws.empty:
+        return 0
+
+    table, columns = DRAW_TABLES[game_type]
+    min_date, max_date = draws['date'].min(), draws['date'].max()
+
+    conn = sqlite3.connect(db_path)
+    try:
+        existing = pd.read_sql_query(
+            f"SELECT date, {', '.join(columns)} FROM {table} WHERE date BETWEEN ? AND ?",
+            conn, params=(min_date, max_date)
+        )
+    except Exception as e:
+        print(f"Erreur lors de la vérification des doublons: {e}")
+        return 0
+    finally:
+        conn.close()
+
+    if existing.empty:
+        return 0
+
+    existing['date'] = existing['date'].astype(str).str[:10]
+    existing = existing.drop_duplicates()
+    keys = ['date'] + columns
+    matched = draws[keys].astype({column: 'int64' for column in columns}).merge(
+        existing.astype({column: 'int64' for column in columns}), on=keys, how='inner'
+    )
+    return len(matched)
+
+
+def yearly_breakdown(years: pd.Series) -> Dict[str, int]:
+    """Nombre de tirages par année, dans l'ordre d'apparition dans le fichier"""
+    counts = years.groupby(years, sort=False).size()
+    return {str(year): int(count) for year, count in counts.items()}
+
+
+def line_numbers_for(df: pd.DataFrame) -> np.ndarray:
+    """Numéros de ligne du fichier (+2 : lignes numérotées à partir de 1 et en-tête sauté)"""
+    return np.arange(len(df)) + 2
+
+
+def date_strings(dates: pd.Series, mask: Optional[np.ndarray] = None) -> pd.Series:
+    """Dates au format YYYY-MM-DD (éventuellement restreintes à un masque de lignes)"""
+    selected = dates if mask is None else dates[mask]
+    return selected.dt.strftime('%Y-%m-%d')
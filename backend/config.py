@@ -1,4 +1,5 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 # Charger les variables d'environnement depuis .env
@@ -20,5 +21,67 @@ class Settings:
     DEBUG = os.getenv("DEBUG", "True").lower() == "true"
     HOST = os.getenv("HOST", "0.0.0.0")
     PORT = int(os.getenv("PORT", "8000"))
+    
+    # Pool de connexions à la base de données
+    DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+    DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "10"))
+    DB_POOL_TIMEOUT = int(os.getenv("DB_POOL_TIMEOUT", "30"))
+    DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))
+    DB_POOL_PRE_PING = os.getenv("DB_POOL_PRE_PING", "True").lower() == "true"
+    
+    # Requêtes SQL par requête HTTP : en-têtes X-DB-Query-Count / X-DB-Query-Time et
+    # avertissement au-delà du seuil (détection des N+1)
+    DB_QUERY_HEADERS = os.getenv("DB_QUERY_HEADERS", "True").lower() == "true"
+    DB_QUERY_WARN_THRESHOLD = int(os.getenv("DB_QUERY_WARN_THRESHOLD", "20"))
+    
+    # Profilage à la demande (en-tête X-Profile ou paramètre _profile portant le jeton) ;
+    # jeton vide : profilage désactivé, aucun middleware installé
+    PROFILING_TOKEN = os.getenv("PROFILING_TOKEN", "")
+    PROFILING_INTERVAL_MS = float(os.getenv("PROFILING_INTERVAL_MS", "2"))
+    PROFILING_MAX_SECONDS = float(os.getenv("PROFILING_MAX_SECONDS", "60"))
+    PROFILING_MAX_RESULTS = int(os.getenv("PROFILING_MAX_RESULTS", "50"))
+    
+    # Options SQLite : journal WAL, cache partagé, attente sur verrou (secondes)
+    SQLITE_WAL = os.getenv("SQLITE_WAL", "True").lower() == "true"
+    SQLITE_SHARED_CACHE = os.getenv("SQLITE_SHARED_CACHE", "False").lower() == "true"
+    SQLITE_BUSY_TIMEOUT = int(os.getenv("SQLITE_BUSY_TIMEOUT", "30"))
+    
+    # Nombre maximal de requêtes traitées simultanément dans le pool de threads
+    # (les routes accèdent à la base de manière synchrone, hors de la boucle d'événements)
+    API_THREADPOOL_SIZE = int(os.getenv("API_THREADPOOL_SIZE", "20"))
+    
+    # Préchauffage du cache (au démarrage et après chaque import)
+    CACHE_WARMUP_ENABLED = os.getenv("CACHE_WARMUP_ENABLED", "True").lower() == "true"
+    CACHE_WARMUP_MAX_WORKERS = int(os.getenv("CACHE_WARMUP_MAX_WORKERS", "2"))
+    
+    # Nombre de processus pour le traitement parallèle des imports multi-fichiers
+    IMPORT_MAX_WORKERS = int(os.getenv("IMPORT_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+    
+    # Exécuter les tâches de fond via Celery (sinon dans le processus de l'API)
+    USE_CELERY = os.getenv("USE_CELERY", "False").lower() == "true"
+    
+    # Dossier des fichiers en attente d'import en tâche de fond (partagé avec les workers Celery)
+    IMPORT_UPLOAD_DIR = os.getenv("IMPORT_UPLOAD_DIR", os.path.join(tempfile.gettempdir(), "lotto_imports"))
+    
+    # Instantanés des tirages et agrégats (.npy projetés en mémoire) partagés par les instances
+    SNAPSHOT_DIR = os.getenv("SNAPSHOT_DIR", "./snapshots")
+    SNAPSHOT_PERSIST = os.getenv("SNAPSHOT_PERSIST", "True").lower() == "true"
+    
+    # Instantanés en mémoire partagée entre les workers d'un même hôte
+    # (préfixe vide : dérivé de DATABASE_URL ; surveillance de la base en secondes)
+    SHARED_DRAWS_ENABLED = os.getenv("SHARED_DRAWS_ENABLED", "True").lower() == "true"
+    SHARED_DRAWS_PREFIX = os.getenv("SHARED_DRAWS_PREFIX", "")
+    SHARED_DRAWS_POLL_SECONDS = float(os.getenv("SHARED_DRAWS_POLL_SECONDS", "5"))
+    
+    # Tables énumérées des combinaisons et de leurs caractéristiques (.npy projetés en mémoire)
+    COMBINATION_TABLE_DIR = os.getenv("COMBINATION_TABLE_DIR", "./snapshots/combinations")
+    COMBINATION_TABLE_PERSIST = os.getenv("COMBINATION_TABLE_PERSIST", "True").lower() == "true"
+    # Préparation des tables au démarrage, en arrière-plan (sinon à la première requête)
+    COMBINATION_TABLE_PRELOAD = os.getenv("COMBINATION_TABLE_PRELOAD", "True").lower() == "true"
+    
+    # Nombre de processus pour la construction des systèmes réducteurs (wheeling) volumineux
+    WHEEL_MAX_WORKERS = int(os.getenv("WHEEL_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+    # Durée maximale (secondes) d'une construction, toutes graines confondues (système alors incomplet)
+    WHEEL_TIME_BUDGET_SECONDS = float(os.getenv("WHEEL_TIME_BUDGET_SECONDS", "10"))
 
 settings = Settings() 
\ No newline at end of file
@@ -4,13 +4,27 @@ Validateur amélioré pour les uploads de fichiers CSV de tirages Loto
 Plus flexible avec les formats de colonnes
 """
 
-import csv
-import sqlite3
 import pandas as pd
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Dict
 import os
 
+from columnar_validation import (
+    ValidationIssues, check_draw_weekdays, check_duplicate_dates, check_number_columns,
+    count_existing_draws, date_strings, line_numbers_for, parse_dates, parse_integers,
+    rows_with_repeats, strip_column, yearly_breakdown
+)
+
+DATE_FORMATS = [
+    '%Y-%m-%d',
+    '%d/%m/%Y',
+    '%d/%m/%y',
+    '%d-%m-%Y',
+    '%d-%m-%y',
+    '%Y/%m/%d',
+    '%d.%m.%Y',
+    '%d.%m.%y'
+]
+
 class EnhancedUploadValidator:
     """Validateur amélioré pour les uploads de fichiers CSV de tirages"""
     
@@ -36,6 +50,7 @@ class EnhancedUploadValidator:
             'errors': [],
             'warnings': [],
             'duplicates': 0,
+            'duplicates_in_file': 0,
             'date_range': {'min': None, 'max': None},
             'summary': {},
             'format_detected': None
@@ -52,56 +67,53 @@ class EnhancedUploadValidator:
             
             # Lire le fichier avec le format détecté
             df = pd.read_csv(file_path, encoding=format_info.get('encoding', 'utf-8'), sep=format_info.get('separator', ','))
+            mapping = format_info['mapping']
             
-            # Analyser chaque ligne
-            valid_rows = []
-            invalid_rows = []
+            # Valider toutes les lignes, colonne par colonne
+            line_numbers = line_numbers_for(df)
+            errors = ValidationIssues(line_numbers)
+            warnings = ValidationIssues(line_numbers)
             
-            for index, row in df.iterrows():
-                row_number = index + 2  # +2 car on commence à 1 et on a sauté l'en-tête
-                row_validation = self._validate_row_enhanced(row, game_type, row_number, format_info['mapping'])
-                
-                if row_validation['valid']:
-                    valid_rows.append(row)
-                else:
-                    invalid_rows.append(row)
-                    result['errors'].extend(row_validation['errors'])
-                
-                # Ajouter les warnings de la ligne
-                if 'warnings' in row_validation:
-                    result['warnings'].extend(row_validation['warnings'])
+            dates = self._validate_dates_enhanced(df[mapping['date']], errors)
+            
+            # Valider les numéros selon le type de jeu
+            draws = None
+            if game_type == 'loto':
+                draws = self._validate_loto_numbers_enhanced(df, errors, mapping)
+            
+            check_draw_weekdays(warnings, dates, game_type)
+            result['duplicates_in_file'] = check_duplicate_dates(warnings, dates)
             
+            valid_mask = ~errors.flagged
+            result['errors'].extend(errors.messages())
+            result['warnings'].extend(warnings.messages())
             result['total_rows'] = len(df)
-            result['valid_rows'] = len(valid_rows)
-            result['invalid_rows'] = len(invalid_rows)
+            result['valid_rows'] = int(valid_mask.sum())
+            result['invalid_rows'] = int((~valid_mask).sum())
             
-            # Vérifier les doublons potentiels
-            if valid_rows:
-                duplicates = self._check_duplicates_enhanced(valid_rows, game_type, format_info['mapping'])
+            # Vérifier les doublons potentiels (une seule requête)
+            if result['valid_rows'] and draws is not None:
+                draws.insert(0, 'date', date_strings(dates))
+                duplicates = count_existing_draws(self.db_path, game_type, draws[valid_mask])
                 result['duplicates'] = duplicates
                 
                 if duplicates > 0:
                     result['warnings'].append(f"{duplicates} tirages potentiellement en doublon détectés")
             
             # Analyser la plage de dates
-            if valid_rows:
-                dates = []
-                for row in valid_rows:
-                    date_str = str(row[format_info['mapping']['date']])
-                    try:
-                        # Essayer différents formats de date
-                        parsed_date = self._parse_date_flexible(date_str)
-                        if parsed_date:
-                            dates.append(parsed_date)
-                    except:
-                        pass
-                
-                if dates:
-                    result['date_range']['min'] = min(dates).strftime('%Y-%m-%d')
-                    result['date_range']['max'] = max(dates).strftime('%Y-%m-%d')
+            valid_dates = dates[valid_mask].dropna()
+            if not valid_dates.empty:
+                result['date_range']['min'] = valid_dates.min().strftime('%Y-%m-%d')
+                result['date_range']['max'] = valid_dates.max().strftime('%Y-%m-%d')
             
             # Générer un résumé
-            result['summary'] = self._generate_summary_enhanced(valid_rows, game_type, format_info['mapping'])
+            if result['valid_rows']:
+                years = valid_dates.dt.year.astype(str)
+                result['summary'] = {
+                    'total_draws': result['valid_rows'],
+                    'years_covered': years.nunique(),
+                    'yearly_breakdown': yearly_breakdown(years)
+                }
             
             # Le fichier est valide s'il n'y a pas d'erreurs critiques
             result['valid'] = len(result['errors']) == 0
@@ -183,146 +195,37 @@ class EnhancedUploadValidator:
         
         return result
     
-    def _parse_date_flexible(self, date_str: str) -> Optional[datetime]:
-        """Parse une date avec plusieurs formats possibles"""
-        date_formats = [
-            '%Y-%m-%d',
-            '%d/%m/%Y',
-            '%d/%m/%y',
-            '%d-%m-%Y',
-            '%d-%m-%y',
-            '%Y/%m/%d',
-            '%d.%m.%Y',
-            '%d.%m.%y'
-        ]
+    def _validate_dates_enhanced(self, values: pd.Series, errors: ValidationIssues) -> pd.Series:
+        """Valide la colonne date (formats multiples, pas de date future) et retourne les dates interprétées"""
+        date_text = strip_column(values)
+        missing = ((date_text == '') | (date_text == 'nan')).to_numpy()
+        errors.add(missing, lambda i: "Date manquante")
         
-        for fmt in date_formats:
-            try:
-                return datetime.strptime(date_str.strip(), fmt)
-            except ValueError:
-                continue
-        
-        return None
+        dates = parse_dates(date_text.where(~missing, ''), DATE_FORMATS)
+        text_values = date_text.to_numpy()
+        errors.add(~missing & dates.isna().to_numpy(), lambda i: f"Format de date invalide ({text_values[i]})")
+        errors.add((dates > pd.Timestamp.now()).to_numpy(), lambda i: f"Date dans le futur ({text_values[i]})")
+        return dates
     
-    def _validate_row_enhanced(self, row: pd.Series, game_type: str, row_number: int, mapping: Dict) -> Dict:
-        """Valide une ligne avec le mapping détecté"""
-        result = {'valid': True, 'errors': [], 'warnings': []}
-        
-        try:
-            # Valider la date
-            date_str = str(row[mapping['date']]).strip()
-            if not date_str or date_str == 'nan':
-                result['errors'].append(f"Ligne {row_number}: Date manquante")
-                result['valid'] = False
-            else:
-                parsed_date = self._parse_date_flexible(date_str)
-                if not parsed_date:
-                    result['errors'].append(f"Ligne {row_number}: Format de date invalide ({date_str})")
-                    result['valid'] = False
-                elif parsed_date > datetime.now():
-                    result['errors'].append(f"Ligne {row_number}: Date dans le futur ({date_str})")
-                    result['valid'] = False
-            
-            # Valider les numéros selon le type de jeu
-            if game_type == 'loto':
-                self._validate_loto_numbers_enhanced(row, row_number, result, mapping)
-                
-        except Exception as e:
-            result['errors'].append(f"Ligne {row_number}: Erreur de validation - {str(e)}")
-            result['valid'] = False
-        
-        return result
-    
-    def _validate_loto_numbers_enhanced(self, row: pd.Series, row_number: int, result: Dict, mapping: Dict):
+    def _validate_loto_numbers_enhanced(self, df: pd.DataFrame, errors: ValidationIssues, mapping: Dict) -> pd.DataFrame:
         """Valide les numéros pour Loto avec mapping flexible"""
-        numbers = []
-        
         # Valider les 6 numéros principaux (1-45)
-        for i in range(1, 7):
-            num_key = mapping[f'numero{i}']
-            try:
-                num = int(row[num_key])
-                if num < 1 or num > 45:
-                    result['errors'].append(f"Ligne {row_number}: {num_key} doit être entre 1 et 45 (valeur: {num})")
-                    result['valid'] = False
-                numbers.append(num)
-            except (ValueError, TypeError):
-                result['errors'].append(f"Ligne {row_number}: {num_key} invalide")
-                result['valid'] = False
+        numbers = {mapping[f'numero{i}']: parse_integers(df[mapping[f'numero{i}']], strict=False) for i in range(1, 7)}
+        check_number_columns(errors, numbers, 1, 45)
         
         # Valider le numéro bonus (1-45 pour le Lotto)
         complementaire_key = mapping['complementaire']
-        try:
-            complementaire = int(row[complementaire_key])
-            # Le numéro bonus du Lotto est tiré dans la plage 1-45
-            if complementaire < 1 or complementaire > 45:
-                result['errors'].append(f"Ligne {row_number}: {complementaire_key} doit être entre 1 et 45 (valeur: {complementaire})")
-                result['valid'] = False
-        except (ValueError, TypeError):
-            result['errors'].append(f"Ligne {row_number}: {complementaire_key} invalide")
-            result['valid'] = False
+        complementaire = parse_integers(df[complementaire_key], strict=False)
+        check_number_columns(errors, {complementaire_key: complementaire}, 1, 45)
         
         # Vérifier les doublons
-        if len(set(numbers)) != 6:
-            result['errors'].append(f"Ligne {row_number}: Numéros en doublon détectés")
-            result['valid'] = False
-    
-    def _check_duplicates_enhanced(self, valid_rows: List[pd.Series], game_type: str, mapping: Dict) -> int:
-        """Vérifie les doublons avec mapping flexible"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        duplicates = 0
-        
-        try:
-            for row in valid_rows:
-                date_str = str(row[mapping['date']])
-                parsed_date = self._parse_date_flexible(date_str)
-                if not parsed_date:
-                    continue
-                
-                date_formatted = parsed_date.strftime('%Y-%m-%d')
-                
-                if game_type == 'loto':
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM draws_loto 
-                        WHERE date = ? AND n1 = ? AND n2 = ? AND n3 = ? AND n4 = ? AND n5 = ? AND n6 = ? AND complementaire = ?
-                    """, (
-                        date_formatted,
-                        int(row[mapping['numero1']]), int(row[mapping['numero2']]), int(row[mapping['numero3']]),
-                        int(row[mapping['numero4']]), int(row[mapping['numero5']]), int(row[mapping['numero6']]),
-                        int(row[mapping['complementaire']])
-                    ))
-                
-                if cursor.fetchone()[0] > 0:
-                    duplicates += 1
-                    
-        except Exception as e:
-            print(f"Erreur lors de la vérification des doublons: {e}")
-        finally:
-            conn.close()
+        errors.add(rows_with_repeats(numbers), lambda i: "Numéros en doublon détectés")
         
-        return duplicates
-    
-    def _generate_summary_enhanced(self, valid_rows: List[pd.Series], game_type: str, mapping: Dict) -> Dict:
-        """Génère un résumé avec mapping flexible"""
-        if not valid_rows:
-            return {}
-        
-        # Compter par année
-        years = {}
-        for row in valid_rows:
-            date_str = str(row[mapping['date']])
-            parsed_date = self._parse_date_flexible(date_str)
-            if parsed_date:
-                year = str(parsed_date.year)
-                years[year] = years.get(year, 0) + 1
-        
-        return {
-            'total_draws': len(valid_rows),
-            'years_covered': len(years),
-            'yearly_breakdown': years
-        }
+        columns = list(numbers.values())
+        return pd.DataFrame({
+            **{f'n{i}': columns[i - 1] for i in range(1, 7)},
+            'complementaire': complementaire
+        })
 
 def print_enhanced_validation_report(validation_result: Dict, file_path: str):
     """Affiche un rapport de validation amélioré"""
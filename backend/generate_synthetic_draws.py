@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Génère un historique synthétique de tirages (tests à l'échelle, benchmarks, tests de charge)
+
+Écrit un fichier Parquet ou CSV d'import, ou insère directement les tirages dans la base
+configurée (DATABASE_URL) par l'import en masse. Même graine : même historique.
+
+    python generate_synthetic_draws.py euromillions 1000000 --output em_1m.parquet
+    python generate_synthetic_draws.py loto 50000 --profile hot --strength 3 --database
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import date
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BACKEND_DIR)
+
+
+def main() -> int:
+    from app.synthetic_draws import (
+        BIAS_PROFILES, CADENCES, DEFAULT_CHUNK_SIZE, IMPORTABLE_DATES, SYNTHETIC_GAMES, history_span, is_importable
+    )
+
+    parser = argparse.ArgumentParser(
+        description="Historique synthétique de tirages",
+        epilog="Profils de biais : " + " ; ".join(
+            f"{name} = {description}" for name, (_, _, description) in BIAS_PROFILES.items()
+        )
+    )
+    parser.add_argument('game', choices=list(SYNTHETIC_GAMES), help="Jeu")
+    parser.add_argument('count', type=int, help="Nombre de tirages")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument('--output', help="Fichier de sortie (.parquet ou .csv)")
+    target.add_argument('--database', action='store_true', help="Insère les tirages dans la base configurée")
+    parser.add_argument('--profile', choices=list(BIAS_PROFILES), default='uniform', help="Profil de biais")
+    parser.add_argument('--strength', type=float, default=2.0, help="Intensité du biais")
+    parser.add_argument('--seed', type=int, default=42, help="Graine aléatoire")
+    parser.add_argument('--start', type=date.fromisoformat,
+                        help="Date du premier tirage (AAAA-MM-JJ, défaut : lancement du jeu)")
+    parser.add_argument('--cadence', choices=CADENCES, default='game',
+                        help="Jours de tirage du jeu ou un tirage par jour")
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE, help="Tirages par paquet")
+    args = parser.parse_args()
+
+    if args.count <= 0:
+        parser.error("count doit être strictement positif")
+    options = {
+        'profile': args.profile, 'strength': args.strength, 'seed': args.seed,
+        'start': args.start, 'cadence': args.cadence, 'chunk_size': args.chunk_size,
+    }
+
+    print(f"🎲 {args.count} tirages {args.game} synthétiques (profil {args.profile}, graine {args.seed})")
+    start_time = time.perf_counter()
+    try:
+        first_date, last_date = history_span(args.game, args.count, args.start, args.cadence)
+        print(f"📅 Du {first_date.isoformat()} au {last_date.isoformat()}")
+        if args.output and not is_importable(first_date, last_date):
+            print(f"⚠️ Dates hors de la plage {IMPORTABLE_DATES[0].year}-{IMPORTABLE_DATES[1].year} : "
+                  f"fichier non réimportable par l'import de fichiers (--database ou --cadence daily)")
+
+        if args.database:
+            from app.database import SessionLocal, engine
+            from app.models import Base
+            from app.synthetic_draws import insert_synthetic_draws
+
+            Base.metadata.create_all(bind=engine)
+            db = SessionLocal()
+            try:
+                totals = insert_synthetic_draws(
+                    db, args.game, args.count,
+                    on_progress=lambda totals: print(f"  📥 {totals['generated']}/{args.count} tirages générés", end='\r'),
+                    **options
+                )
+            finally:
+                db.close()
+            print(f"\n✅ {totals['added_count']} tirages ajoutés, {totals['skipped_count']} dates déjà présentes ignorées")
+        else:
+            from app.synthetic_draws import write_synthetic_csv, write_synthetic_parquet
+
+            extension = os.path.splitext(args.output)[1].lower()
+            if extension not in ('.parquet', '.csv'):
+                parser.error("--output doit se terminer par .parquet ou .csv")
+            writer = write_synthetic_parquet if extension == '.parquet' else write_synthetic_csv
+            written = writer(args.output, args.game, args.count, **options)
+            size_mb = os.path.getsize(args.output) / 1024 / 1024
+            print(f"✅ {written} tirages écrits dans {args.output} ({size_mb:.1f} Mo)")
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+
+    print(f"⏱️ {time.perf_counter() - start_time:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,425 @@
+#!/usr/bin/env python3
+"""
+Test de charge du backend : mélange réaliste de requêtes et paliers de concurrence
+
+Des clients concurrents (boucle fermée : chaque client envoie sa requête suivante dès la
+réponse reçue) tirent au sort des appels de tableau de bord, de génération, de scoring
+et d'import selon des poids (--mix). Pour chaque palier de concurrence, le script
+rapporte le débit et les percentiles p50/p95/p99 par route.
+
+Trois cibles :
+  - dans le processus (défaut) : l'application est appelée sans réseau (httpx + ASGI),
+    sur une base SQLite temporaire peuplée de --history tirages synthétiques par jeu ;
+    le palier est joué avec et sans le cache Redis (--cache on,off ; la passe avec cache
+    échoue si Redis n'est pas joignable, --cache off la retire) ;
+  - --uvicorn : même base temporaire, servie par un uvicorn local lancé par le script ;
+  - --url : serveur déjà démarré (base et cache tels que configurés). Aucune écriture par
+    défaut : la catégorie import est retirée du mélange, sauf avec --allow-writes (le premier
+    import ajoute alors des tirages synthétiques datés de 1800 à la base du serveur).
+
+    python load_test.py --concurrency 1,8,32 --duration 15
+    python load_test.py --uvicorn --workers 2 --concurrency 16,64
+    python load_test.py --url http://127.0.0.1:8000 --mix dashboard=80,generate=20
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import warnings
+from datetime import date, datetime
+from typing import Callable, Dict, List, Optional, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_CONCURRENCY = [1, 8, 32]
+DEFAULT_DURATION = 10.0
+DEFAULT_HISTORY = 5000
+
+# Part des catégories dans le mélange (pic de fréquentation : surtout des tableaux de bord)
+DEFAULT_MIX = {'dashboard': 60, 'generate': 20, 'score': 15, 'import': 5}
+
+# Tirages de chaque fichier importé (mêmes dates à chaque import : seul le premier ajoute)
+IMPORT_DRAWS = 200
+IMPORT_START = date(1800, 1, 7)
+
+REQUEST_TIMEOUT = 60.0
+
+
+def _euromillions_grid(rng: random.Random) -> List[int]:
+    return sorted(rng.sample(range(1, 51), 5))
+
+
+def _loto_grid(rng: random.Random) -> Dict:
+    return {'numeros': sorted(rng.sample(range(1, 50), 6)), 'complementaire': rng.randint(1, 10)}
+
+
+# Requêtes du mélange : (catégorie, méthode, chemin, poids dans la catégorie, corps JSON ou None)
+REQUEST_MIX: List[Tuple[str, str, str, int, Optional[Callable[[random.Random], object]]]] = [
+    ('dashboard', 'GET', '/api/euromillions/quick-stats', 4, None),
+    ('dashboard', 'GET', '/api/loto/quick-stats', 3, None),
+    ('dashboard', 'GET', '/api/advanced-stats/summary-dashboard', 2, None),
+    ('dashboard', 'GET', '/api/euromillions/years', 1, None),
+    ('dashboard', 'GET', '/api/euromillions/draws?limit=50', 1, None),
+    ('dashboard', 'GET', '/api/loto/draws?limit=50', 1, None),
+    ('generate', 'GET', '/api/euromillions/generate?num_grids=5&mode=weighted', 3, None),
+    ('generate', 'GET', '/api/euromillions/generate?num_grids=5&mode=coverage', 1, None),
+    ('generate', 'GET', '/api/loto/generate?num_grids=5&mode=random', 2, None),
+    ('score', 'POST', '/api/euromillions/score-grid', 2, _euromillions_grid),
+    ('score', 'POST', '/api/loto/analyze-grid', 1, _loto_grid),
+    ('import', 'POST', '/api/euromillions/import-stream', 1, None),
+    ('import', 'POST', '/api/loto/import-stream', 1, None),
+]
+
+
+def parse_mix(value: str) -> Dict[str, float]:
+    """'dashboard=60,generate=20' -> poids par catégorie (catégories absentes : poids nul)"""
+    mix = {category: 0.0 for category in DEFAULT_MIX}
+    for item in filter(None, value.split(',')):
+        category, _, weight = item.partition('=')
+        if category not in mix:
+            raise argparse.ArgumentTypeError(f"Catégorie inconnue: {category} ({', '.join(mix)})")
+        mix[category] = float(weight)
+    if not any(mix.values()):
+        raise argparse.ArgumentTypeError("Au moins une catégorie doit avoir un poids positif")
+    return mix
+
+
+def build_requests(mix: Dict[str, float]) -> Tuple[List[Tuple], List[float]]:
+    """Requêtes du mélange et poids effectifs (poids de la catégorie réparti entre ses requêtes)"""
+    category_totals: Dict[str, int] = {}
+    for category, _, _, weight, _ in REQUEST_MIX:
+        category_totals[category] = category_totals.get(category, 0) + weight
+    requests, weights = [], []
+    for entry in REQUEST_MIX:
+        category, _, _, weight, _ = entry
+        if mix.get(category):
+            requests.append(entry)
+            weights.append(mix[category] * weight / category_totals[category])
+    return requests, weights
+
+
+def _route_name(method: str, path: str) -> str:
+    return f"{method} {path.split('?', 1)[0]}"
+
+
+def _prepare_environment(work_dir: str) -> None:
+    """Base SQLite temporaire, sans préchauffage ni instantanés partagés (avant tout import de app)"""
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(work_dir, 'load_test.db')}"
+    os.environ['CACHE_WARMUP_ENABLED'] = 'False'
+    os.environ['SNAPSHOT_PERSIST'] = 'False'
+    os.environ['SHARED_DRAWS_ENABLED'] = 'False'
+    os.environ['DB_QUERY_WARN_THRESHOLD'] = '0'
+    sys.path.insert(0, BACKEND_DIR)
+
+
+def _seed_database(history: int, seed: int) -> None:
+    from app.database import SessionLocal, engine
+    from app.models import Base
+    from app.synthetic_draws import insert_synthetic_draws
+
+    Base.metadata.create_all(bind=engine)
+    db = SessionLocal()
+    try:
+        for game_type in ('euromillions', 'loto'):
+            totals = insert_synthetic_draws(db, game_type, history, seed=seed)
+            print(f"📥 {totals['added_count']} tirages {game_type} synthétiques en base")
+    finally:
+        db.close()
+
+
+def _import_files(work_dir: str, seed: int) -> Dict[str, bytes]:
+    """Contenu des CSV importés par le mélange, par chemin d'import"""
+    from app.synthetic_draws import write_synthetic_csv
+
+    files = {}
+    for game_type in ('euromillions', 'loto'):
+        path = os.path.join(work_dir, f"import_{game_type}.csv")
+        write_synthetic_csv(path, game_type, IMPORT_DRAWS, seed=seed, start=IMPORT_START)
+        with open(path, 'rb') as csv_file:
+            files[f"/api/{game_type}/import-stream"] = csv_file.read()
+    return files
+
+
+class LoadGenerator:
+    """Joue le mélange de requêtes à une concurrence donnée et mesure chaque réponse"""
+
+    def __init__(self, client, requests: List[Tuple], weights: List[float],
+                 import_files: Dict[str, bytes], seed: int):
+        self.client = client
+        self.requests = requests
+        self.weights = weights
+        self.import_files = import_files
+        self.seed = seed
+
+    async def send(self, request: Tuple, rng: random.Random):
+        _, method, path, _, body = request
+        if path in self.import_files:
+            files = {'file': ('load_test.csv', self.import_files[path], 'text/csv')}
+            return await self.client.request(method, path, files=files)
+        return await self.client.request(method, path, json=body(rng) if body else None)
+
+    async def warm_up(self) -> None:
+        """Une requête de chaque type, non mesurée (routes, imports paresseux, cache)"""
+        rng = random.Random(self.seed)
+        for request in self.requests:
+            try:
+                await self.send(request, rng)
+            except Exception as e:
+                print(f"  ⚠️ Préchauffage {_route_name(request[1], request[2])}: {type(e).__name__}: {e}")
+
+    async def _client_loop(self, store, deadline: float, rng: random.Random) -> None:
+        while time.perf_counter() < deadline:
+            request = rng.choices(self.requests, self.weights)[0]
+            route = _route_name(request[1], request[2])
+            start_time = time.perf_counter()
+            try:
+                response = await self.send(request, rng)
+                await response.aread()
+            except Exception as e:
+                store.record('route', route, time.perf_counter() - start_time, type(e).__name__)
+                continue
+            cache_header = response.headers.get('X-Cache', '').upper()
+            store.record('route', route, time.perf_counter() - start_time, f"{response.status_code // 100}xx",
+                         cache_hit=cache_header.startswith('HIT') if cache_header else None)
+
+    async def run(self, concurrency: int, duration: float) -> Dict:
+        from app.latency_metrics import LatencyStore
+
+        store = LatencyStore()
+        start_time = time.perf_counter()
+        deadline = start_time + duration
+        await asyncio.gather(*(
+            self._client_loop(store, deadline, random.Random(f"{self.seed}:{concurrency}:{index}"))
+            for index in range(concurrency)
+        ))
+        return summarize_level(store, concurrency, time.perf_counter() - start_time)
+
+
+def summarize_level(store, concurrency: int, elapsed: float) -> Dict:
+    """Débit, erreurs et percentiles (toutes routes et par route) d'un palier"""
+    from app.latency_metrics import LatencyHistogram
+
+    total = LatencyHistogram()
+    errors = 0
+    for series in store.series('route').values():
+        for index, count in enumerate(series.latency.counts):
+            total.counts[index] += count
+        total.count += series.latency.count
+        total.total += series.latency.total
+        total.max = max(total.max, series.latency.max)
+        errors += sum(count for status, count in series.statuses.items() if status != '2xx')
+    return {
+        'concurrency': concurrency,
+        'elapsed_s': round(elapsed, 3),
+        'requests': total.count,
+        'errors': errors,
+        'error_rate': round(errors / total.count, 4) if total.count else 0.0,
+        'throughput_rps': round(total.count / elapsed, 2) if elapsed else 0.0,
+        **{key: value for key, value in total.summary().items() if key != 'count'},
+        'routes': store.summary('route'),
+    }
+
+
+def print_level(result: Dict) -> None:
+    print(f"  👥 {result['concurrency']:>4} clients  {result['throughput_rps']:8.1f} req/s  "
+          f"p50 {result['p50_ms']:8.1f} ms  p95 {result['p95_ms']:8.1f} ms  p99 {result['p99_ms']:8.1f} ms  "
+          f"erreurs {result['errors']}/{result['requests']}")
+    for route, summary in result['routes'].items():
+        hit_rate = summary['cache_hit_rate']
+        cache = f"  cache {hit_rate:5.1f} %" if hit_rate is not None else ''
+        failures = sum(count for status, count in summary['statuses'].items() if status != '2xx')
+        print(f"       {summary['count']:6d}  p50 {summary['p50_ms']:8.1f}  p95 {summary['p95_ms']:8.1f}  "
+              f"p99 {summary['p99_ms']:8.1f} ms{cache}{f'  ❌ {failures}' if failures else ''}  {route}")
+
+
+async def run_sweep(client, label: str, concurrency_levels: List[int], duration: float,
+                    requests: List[Tuple], weights: List[float], import_files: Dict[str, bytes],
+                    seed: int) -> Dict:
+    generator = LoadGenerator(client, requests, weights, import_files, seed)
+    print(f"\n🚦 {label}")
+    await generator.warm_up()
+    levels = []
+    for concurrency in concurrency_levels:
+        result = await generator.run(concurrency, duration)
+        print_level(result)
+        levels.append(result)
+    return {'label': label, 'levels': levels}
+
+
+async def run_in_process(cache_modes: List[str], **sweep_options) -> List[Dict]:
+    """
+    Application appelée dans le processus (cycle de vie startup/shutdown compris)
+
+    RuntimeError si la passe avec cache est demandée sans Redis connecté : elle serait
+    jouée sans cache et ses résultats trompeurs.
+    """
+    import httpx
+    from app.cache_manager import cache_manager
+    from app.main import app
+
+    cache_manager.wait_until_ready()
+    redis_connected = cache_manager.connected
+    if 'on' in cache_modes and not redis_connected:
+        raise RuntimeError("Redis non connecté : passe avec cache impossible (relancer avec --cache off)")
+    sweeps = []
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url='http://load-test',
+                                     timeout=REQUEST_TIMEOUT) as client:
+            for mode in cache_modes:
+                cache_manager.connected = redis_connected and mode == 'on'
+                try:
+                    sweeps.append(await run_sweep(
+                        client, f"Dans le processus, cache {'activé' if mode == 'on' else 'désactivé'}",
+                        **sweep_options
+                    ))
+                finally:
+                    cache_manager.connected = redis_connected
+    return sweeps
+
+
+async def run_against_url(url: str, label: str, **sweep_options) -> List[Dict]:
+    import httpx
+
+    limits = httpx.Limits(max_connections=max(sweep_options['concurrency_levels']) + 10)
+    async with httpx.AsyncClient(base_url=url, timeout=REQUEST_TIMEOUT, limits=limits) as client:
+        return [await run_sweep(client, label, **sweep_options)]
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def start_uvicorn(workers: int, timeout: float = 60.0) -> Tuple[subprocess.Popen, str]:
+    """Lance un uvicorn local sur un port libre (même environnement) et attend qu'il réponde"""
+    import httpx
+
+    port = _free_port()
+    process = subprocess.Popen(
+        [sys.executable, '-m', 'uvicorn', 'app.main:app', '--host', '127.0.0.1', '--port', str(port),
+         '--workers', str(workers), '--log-level', 'warning', '--no-access-log'],
+        cwd=BACKEND_DIR
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"uvicorn s'est arrêté au démarrage (code {process.returncode})")
+        try:
+            httpx.get(f"{url}/api/draw-store", timeout=2)
+            return process, url
+        except httpx.TransportError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"uvicorn ne répond pas après {timeout:.0f} s")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Test de charge du backend (paliers de concurrence)")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument('--url', help="Serveur déjà démarré (ex. http://127.0.0.1:8000)")
+    target.add_argument('--uvicorn', action='store_true', help="Lance un uvicorn local sur une base temporaire")
+    parser.add_argument('--workers', type=int, default=1, help="Workers du uvicorn lancé (--uvicorn)")
+    parser.add_argument('--concurrency', default=','.join(map(str, DEFAULT_CONCURRENCY)),
+                        help="Paliers de clients concurrents, séparés par des virgules")
+    parser.add_argument('--duration', type=float, default=DEFAULT_DURATION, help="Durée de chaque palier (s)")
+    parser.add_argument('--mix', type=parse_mix,
+                        help="Poids des catégories : dashboard, generate, score, import "
+                             "(défaut : " + ','.join(f"{category}={weight}" for category, weight in DEFAULT_MIX.items()) + ")")
+    parser.add_argument('--allow-writes', action='store_true',
+                        help="Avec --url : autorise les imports (écritures dans la base du serveur)")
+    parser.add_argument('--cache', default='off,on',
+                        help="Passes dans le processus : off (sans cache), on (cache Redis, requis)")
+    parser.add_argument('--history', type=int, default=DEFAULT_HISTORY,
+                        help="Tirages synthétiques par jeu dans la base temporaire")
+    parser.add_argument('--seed', type=int, default=42, help="Graine des données et du mélange")
+    parser.add_argument('--output', help="Fichier JSON des résultats")
+    parser.add_argument('--max-error-rate', type=float, default=0.01,
+                        help="Taux d'erreurs maximal toléré par palier (échec au-delà)")
+    parser.add_argument('--max-p99-ms', type=float, help="p99 maximal toléré par palier, toutes routes (ms)")
+    args = parser.parse_args()
+
+    concurrency_levels = [int(level) for level in args.concurrency.split(',') if level]
+    cache_modes = [mode for mode in args.cache.split(',') if mode]
+    if any(mode not in ('on', 'off') for mode in cache_modes):
+        parser.error("--cache accepte on et off")
+    if args.mix is None:
+        args.mix = {category: float(weight) for category, weight in DEFAULT_MIX.items()}
+        if args.url and not args.allow_writes:
+            args.mix['import'] = 0.0
+            print("ℹ️ --url sans --allow-writes : imports retirés du mélange (aucune écriture sur le serveur)")
+    elif args.url and args.mix['import'] and not args.allow_writes:
+        parser.error("--mix avec import sur --url écrit dans la base du serveur : ajouter --allow-writes")
+    requests, weights = build_requests(args.mix)
+
+    # Corrélations numpy sur des historiques synthétiques (écarts-types nuls) : bruit sans intérêt ici
+    warnings.simplefilter('ignore', RuntimeWarning)
+
+    print("🏋️ Test de charge")
+    print("=" * 50)
+    work_dir = tempfile.mkdtemp(prefix='lotto_load_')
+    uvicorn_process = None
+    try:
+        _prepare_environment(work_dir)
+        if not args.url:
+            _seed_database(args.history, args.seed)
+        sweep_options = {
+            'concurrency_levels': concurrency_levels, 'duration': args.duration,
+            'requests': requests, 'weights': weights,
+            'import_files': _import_files(work_dir, args.seed) if args.mix['import'] else {},
+            'seed': args.seed,
+        }
+        if args.url:
+            sweeps = asyncio.run(run_against_url(args.url, f"Serveur {args.url}", **sweep_options))
+        elif args.uvicorn:
+            uvicorn_process, url = start_uvicorn(args.workers)
+            sweeps = asyncio.run(run_against_url(url, f"uvicorn local ({args.workers} worker(s))", **sweep_options))
+        else:
+            sweeps = asyncio.run(run_in_process(cache_modes, **sweep_options))
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return 1
+    finally:
+        if uvicorn_process is not None:
+            uvicorn_process.terminate()
+            uvicorn_process.wait(timeout=30)
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            json.dump({
+                'meta': {
+                    'created_at': datetime.now().isoformat(timespec='seconds'),
+                    'target': args.url or ('uvicorn' if args.uvicorn else 'in-process'),
+                    'concurrency': concurrency_levels, 'duration_s': args.duration,
+                    'mix': args.mix, 'history': None if args.url else args.history, 'seed': args.seed,
+                },
+                'sweeps': sweeps,
+            }, output, indent=2, ensure_ascii=False)
+        print(f"\n💾 Résultats écrits dans {args.output}")
+
+    failures = [
+        f"{sweep['label']}, {level['concurrency']} clients"
+        for sweep in sweeps for level in sweep['levels']
+        if level['error_rate'] > args.max_error_rate
+        or (args.max_p99_ms is not None and level['p99_ms'] > args.max_p99_ms)
+    ]
+    if failures:
+        print(f"\n❌ Seuils dépassés : {'; '.join(failures)}")
+        return 1
+    print("\n✅ Seuils respectés")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Mesure le temps d'import de app.main (démarrage à froid)
+
+Lance `python -X importtime -c "import app.main"` dans un processus neuf, affiche le
+temps total et les modules les plus coûteux, puis échoue si le budget est dépassé.
+Budget en millisecondes : option --budget ou variable IMPORT_TIME_BUDGET_MS.
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+DEFAULT_BUDGET_MS = 1500
+
+# Dépendances lourdes qui ne doivent plus être chargées à l'import de app.main
+HEAVY_MODULES = ['pandas', 'numpy', 'supabase', 'pyarrow', 'openpyxl']
+
+
+def run_importtime(module: str = 'app.main') -> List[Tuple[int, int, str]]:
+    """Importe le module dans un processus neuf et retourne (propre µs, cumulé µs, module)"""
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=BACKEND_DIR, capture_output=True, text=True
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"Import de {module} impossible:\n{result.stderr}")
+
+    entries = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        entries.append((int(self_us), int(cumulative_us), name))
+    return entries
+
+
+def summarize(entries: List[Tuple[int, int, str]], module: str = 'app.main') -> Dict:
+    """
+    Temps total du module, paquets les plus coûteux et dépendances lourdes chargées
+
+    Les temps propres sont regroupés par paquet de premier niveau : l'indentation de
+    -X importtime n'est pas fiable quand un thread importe en parallèle (connexion Redis).
+    """
+    total_us = next((cumulative for _, cumulative, name in entries if name.strip() == module), 0)
+    packages: Dict[str, int] = {}
+    for self_us, _, name in entries:
+        package = name.strip().split('.')[0]
+        packages[package] = packages.get(package, 0) + self_us
+    loaded = {name.strip() for _, _, name in entries}
+    return {
+        'total_ms': total_us / 1000,
+        'top_packages': sorted(((name, self_us / 1000) for name, self_us in packages.items()),
+                               key=lambda item: item[1], reverse=True),
+        'heavy_loaded': [name for name in HEAVY_MODULES if name in loaded],
+    }
+
+
+def measure_import_time(runs: int = 3, top: int = 15) -> Dict:
+    """Meilleur temps sur plusieurs processus neufs (le premier réchauffe le cache disque)"""
+    summaries = [summarize(run_importtime()) for _ in range(runs)]
+    best = min(summaries, key=lambda summary: summary['total_ms'])
+    best['top_packages'] = best['top_packages'][:top]
+    best['runs_ms'] = [round(summary['total_ms'], 1) for summary in summaries]
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Mesure du temps d'import de app.main")
+    parser.add_argument('--budget', type=float,
+                        default=float(os.getenv('IMPORT_TIME_BUDGET_MS', DEFAULT_BUDGET_MS)),
+                        help="Budget en millisecondes")
+    parser.add_argument('--runs', type=int, default=3, help="Nombre de mesures")
+    parser.add_argument('--top', type=int, default=15, help="Nombre de paquets affichés")
+    args = parser.parse_args()
+
+    print("⏱️ Mesure du temps d'import de app.main")
+    print("=" * 50)
+
+    summary = measure_import_time(args.runs, args.top)
+
+    print(f"\n📦 Paquets les plus coûteux (temps d'import propre):")
+    for name, duration_ms in summary['top_packages']:
+        print(f"  {duration_ms:8.1f} ms  {name}")
+
+    if summary['heavy_loaded']:
+        print(f"\n⚠️ Dépendances lourdes chargées au démarrage: {', '.join(summary['heavy_loaded'])}")
+    else:
+        print(f"\n✅ Aucune dépendance lourde chargée au démarrage ({', '.join(HEAVY_MODULES)})")
+
+    print(f"\n📊 Mesures: {', '.join(f'{value} ms' for value in summary['runs_ms'])}")
+    print(f"📊 Meilleur temps: {summary['total_ms']:.1f} ms (budget: {args.budget:.0f} ms)")
+
+    if summary['total_ms'] > args.budget:
+        print("❌ Budget de démarrage dépassé")
+        return 1
+    print("✅ Budget de démarrage respecté")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
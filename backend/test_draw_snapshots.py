@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Script de test : les instantanés des tirages suivent les modifications de la base
+
+Ajoute un tirage Euromillions de test, le modifie, le remplace (même nombre de tirages et
+même date maximale), et vérifie à chaque étape la table des fréquences exportée
+(calculée depuis l'instantané partagé). Le tirage de test est supprimé à la fin.
+"""
+
+import io
+import sys
+
+import requests
+
+BASE_URL = "http://localhost:8000/api/euromillions"
+
+# Date sans tirage réel (un mardi)
+TEST_DATE = "2099-12-29"
+
+
+def numero_count(number: int) -> int:
+    """Sorties d'un numéro selon la table des fréquences exportée en Parquet"""
+    import pyarrow.parquet as pq
+
+    response = requests.get(f"{BASE_URL}/export", params={"format": "parquet", "table": "frequencies"})
+    response.raise_for_status()
+    table = pq.read_table(io.BytesIO(response.content)).to_pandas()
+    row = table[(table["kind"] == "numero") & (table["number"] == number)]
+    return int(row["count"].iloc[0])
+
+
+def add_draw(numeros):
+    response = requests.post(f"{BASE_URL}/add-draw", json={"date": TEST_DATE, "numeros": numeros, "etoiles": [1, 2]})
+    response.raise_for_status()
+    return response.json()["draw"]["id"]
+
+
+def delete_draw(draw_id: int) -> None:
+    requests.delete(f"{BASE_URL}/delete-draw/{draw_id}").raise_for_status()
+
+
+def check(label: str, expected: int, actual: int) -> bool:
+    ok = expected == actual
+    print(f"{'✅' if ok else '❌'} {label}: {actual} (attendu {expected})")
+    return ok
+
+
+def main() -> int:
+    print("🧪 TEST DE FRAÎCHEUR DES INSTANTANÉS")
+    print("=" * 50)
+
+    try:
+        baseline = numero_count(1)
+    except requests.RequestException as e:
+        print(f"❌ Serveur indisponible ou aucun tirage: {e}")
+        return 1
+
+    draw_id = add_draw([20, 21, 22, 23, 24])
+    results = []
+    try:
+        results.append(check("Après ajout (numéro 1 absent)", baseline, numero_count(1)))
+
+        response = requests.put(f"{BASE_URL}/update-draw/{draw_id}",
+                                json={"date": TEST_DATE, "numeros": [1, 2, 3, 4, 5], "etoiles": [1, 2]})
+        response.raise_for_status()
+        results.append(check("Après modification des numéros (update-draw)", baseline + 1, numero_count(1)))
+
+        # Suppression puis ajout : même nombre de tirages, même date maximale
+        delete_draw(draw_id)
+        draw_id = add_draw([30, 31, 32, 33, 34])
+        results.append(check("Après suppression puis ajout", baseline, numero_count(1)))
+    finally:
+        delete_draw(draw_id)
+
+    return 0 if all(results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Script de test des systèmes réducteurs (wheeling), dans le processus
+
+Pour chaque système annoncé "guaranteed", vérifie par énumération directe (itertools,
+sans les masques de bits du module) que chaque tirage de m numéros de l'ensemble a au
+moins k numéros communs avec une grille. Vérifie aussi qu'un système interrompu par la
+durée maximale n'est pas mis en cache.
+"""
+
+import os
+import sys
+from itertools import combinations
+
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+from config import settings
+from app.wheeling import build_wheel
+
+CASES = [
+    ('euromillions', list(range(1, 11)), 3, 3),
+    ('euromillions', [2, 7, 11, 19, 23, 31, 38, 44, 50], 2, 3),
+    ('loto', list(range(5, 17)), 3, 4),
+    ('loto', list(range(1, 15)), 4, 4),
+]
+
+
+def uncovered_draws(result) -> int:
+    """Tirages de m numéros de l'ensemble sans grille ayant k numéros communs"""
+    match = result['guarantee']['match']
+    grids = [set(grid['numeros']) for grid in result['grids']]
+    return sum(
+        1 for draw in combinations(result['numbers'], result['guarantee']['if_drawn'])
+        if not any(len(grid.intersection(draw)) >= match for grid in grids)
+    )
+
+
+def main() -> int:
+    print("🧪 TEST DES SYSTÈMES RÉDUCTEURS")
+    print("=" * 50)
+    ok = True
+
+    for game_type, numbers, match, if_drawn in CASES:
+        result = build_wheel(game_type, numbers, match, if_drawn, restarts=2)
+        missing = uncovered_draws(result)
+        valid = not result['guaranteed'] or missing == 0
+        ok &= valid and result['guaranteed']
+        print(f"{'✅' if valid and result['guaranteed'] else '❌'} {game_type} {len(numbers)} numéros, "
+              f"{match} si {if_drawn}: {result['grid_count']} grilles, {missing} tirage(s) non couvert(s)")
+
+    # Système interrompu par la durée maximale : un second appel doit le recalculer
+    budget = settings.WHEEL_TIME_BUDGET_SECONDS
+    settings.WHEEL_TIME_BUDGET_SECONDS = 0.01
+    try:
+        first = build_wheel('loto', list(range(1, 31)), 4, 5, restarts=1, max_grids=5000)
+    finally:
+        settings.WHEEL_TIME_BUDGET_SECONDS = budget
+    second = build_wheel('loto', list(range(1, 31)), 4, 5, restarts=1, max_grids=5000)
+    recomputed = second['grid_count'] > first['grid_count']
+    ok &= recomputed
+    print(f"{'✅' if recomputed else '❌'} Système interrompu non mis en cache: "
+          f"{first['grid_count']} puis {second['grid_count']} grilles")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -3,10 +3,15 @@
 Système de validation pour les uploads de fichiers CSV de tirages.
 """
 
-import csv
-import sqlite3
-from datetime import datetime
-from typing import Dict, List, Tuple, Optional
+from typing import Dict, List, Tuple
+
+import pandas as pd
+
+from columnar_validation import (
+    ValidationIssues, check_draw_weekdays, check_duplicate_dates, check_number_columns,
+    count_existing_draws, line_numbers_for, parse_dates, parse_integers, rows_with_repeats,
+    strip_column, yearly_breakdown
+)
 
 class UploadValidator:
     """Classe pour valider les uploads de fichiers CSV de tirages"""
@@ -33,60 +38,72 @@ class UploadValidator:
             'errors': [],
             'warnings': [],
             'duplicates': 0,
+            'duplicates_in_file': 0,
             'date_range': {'min': None, 'max': None},
             'summary': {}
         }
         
         try:
-            # Lire le fichier CSV
-            with open(file_path, 'r', encoding='utf-8') as file:
-                reader = csv.DictReader(file)
-                
-                # Vérifier les colonnes requises
-                columns_valid, missing_columns = self._check_required_columns(reader.fieldnames, game_type)
-                
-                if not columns_valid:
-                    result['errors'].append(f"Colonnes manquantes: {', '.join(missing_columns)}")
-                    return result
-                
-                # Analyser chaque ligne
-                row_number = 1  # Commencer à 1 car on a sauté l'en-tête
-                valid_rows = []
-                invalid_rows = []
-                
-                for row in reader:
-                    row_number += 1
-                    row_validation = self._validate_row(row, game_type, row_number)
-                    
-                    if row_validation['valid']:
-                        valid_rows.append(row)
-                    else:
-                        invalid_rows.append(row)
-                        result['errors'].extend(row_validation['errors'])
+            # Lire le fichier CSV (toutes les valeurs en texte, comme csv.DictReader)
+            df = pd.read_csv(file_path, encoding='utf-8', dtype=str, keep_default_na=False)
+            
+            # Vérifier les colonnes requises
+            columns_valid, missing_columns = self._check_required_columns(list(df.columns), game_type)
+            
+            if not columns_valid:
+                result['errors'].append(f"Colonnes manquantes: {', '.join(missing_columns)}")
+                return result
+            
+            # Valider toutes les lignes, colonne par colonne
+            line_numbers = line_numbers_for(df)
+            errors = ValidationIssues(line_numbers)
+            warnings = ValidationIssues(line_numbers)
+            
+            date_text = strip_column(df['Date'])
+            dates = self._validate_dates(date_text, errors, warnings)
+            
+            if game_type == 'euromillions':
+                draws = self._validate_euromillions_numbers(df, errors)
+            elif game_type == 'loto':
+                draws = self._validate_loto_numbers(df, errors)
+            else:
+                raise ValueError(f"Type de jeu non supporté: {game_type}")
+            
+            check_draw_weekdays(warnings, dates, game_type)
+            result['duplicates_in_file'] = check_duplicate_dates(warnings, dates)
+            
+            valid_mask = ~errors.flagged
+            result['errors'] = errors.messages()
+            result['warnings'] = warnings.messages()
+            result['total_rows'] = len(df)
+            result['valid_rows'] = int(valid_mask.sum())
+            result['invalid_rows'] = int((~valid_mask).sum())
+            
+            if result['valid_rows']:
+                valid_dates = date_text[valid_mask]
+                draws.insert(0, 'date', valid_dates)
                 
-                result['total_rows'] = row_number - 1  # Soustraire l'en-tête
-                result['valid_rows'] = len(valid_rows)
-                result['invalid_rows'] = len(invalid_rows)
+                # Vérifier les doublons potentiels (une seule requête)
+                duplicates = count_existing_draws(self.db_path, game_type, draws[valid_mask])
+                result['duplicates'] = duplicates
                 
-                # Vérifier les doublons potentiels
-                if valid_rows:
-                    duplicates = self._check_duplicates(valid_rows, game_type)
-                    result['duplicates'] = duplicates
-                    
-                    if duplicates > 0:
-                        result['warnings'].append(f"{duplicates} tirages potentiellement en doublon détectés")
+                if duplicates > 0:
+                    result['warnings'].append(f"{duplicates} tirages potentiellement en doublon détectés")
                 
                 # Analyser la plage de dates
-                if valid_rows:
-                    dates = [datetime.strptime(row['Date'], '%Y-%m-%d') for row in valid_rows]
-                    result['date_range']['min'] = min(dates).strftime('%Y-%m-%d')
-                    result['date_range']['max'] = max(dates).strftime('%Y-%m-%d')
+                result['date_range']['min'] = valid_dates.min()
+                result['date_range']['max'] = valid_dates.max()
                 
                 # Générer un résumé
-                result['summary'] = self._generate_summary(valid_rows, game_type)
-                
-                # Le fichier est valide s'il n'y a pas d'erreurs critiques
-                result['valid'] = len(result['errors']) == 0
+                result['summary'] = {
+                    'total_draws': result['valid_rows'],
+                    'years_covered': valid_dates.str[:4].nunique(),
+                    'yearly_breakdown': yearly_breakdown(valid_dates.str[:4]),
+                    'date_range': dict(result['date_range'])
+                }
+            
+            # Le fichier est valide s'il n'y a pas d'erreurs critiques
+            result['valid'] = len(result['errors']) == 0
                 
         except Exception as e:
             result['errors'].append(f"Erreur lors de la lecture du fichier: {str(e)}")
@@ -127,176 +144,54 @@ class UploadValidator:
             missing_columns = [col for col in required_columns if col not in fieldnames]
             return len(missing_columns) == 0, missing_columns
     
-    def _validate_row(self, row: Dict, game_type: str, row_number: int) -> Dict:
-        """Valide une ligne individuelle"""
-        result = {'valid': True, 'errors': []}
-        
-        try:
-            # Valider la date
-            date_str = row.get('Date', '').strip()
-            if not date_str:
-                result['errors'].append(f"Ligne {row_number}: Date manquante")
-                result['valid'] = False
-            else:
-                try:
-                    date_obj = datetime.strptime(date_str, '%Y-%m-%d')
-                    # Vérifier que la date est raisonnable (pas dans le futur)
-                    if date_obj > datetime.now():
-                        result['warnings'].append(f"Ligne {row_number}: Date dans le futur ({date_str})")
-                except ValueError:
-                    result['errors'].append(f"Ligne {row_number}: Format de date invalide ({date_str})")
-                    result['valid'] = False
-            
-            # Valider les numéros selon le type de jeu
-            if game_type == 'euromillions':
-                self._validate_euromillions_numbers(row, row_number, result)
-            elif game_type == 'loto':
-                self._validate_loto_numbers(row, row_number, result)
-                
-        except Exception as e:
-            result['errors'].append(f"Ligne {row_number}: Erreur de validation - {str(e)}")
-            result['valid'] = False
-        
-        return result
+    def _validate_dates(self, date_text: pd.Series, errors: ValidationIssues, warnings: ValidationIssues) -> pd.Series:
+        """Valide la colonne Date (format YYYY-MM-DD) et retourne les dates interprétées"""
+        missing = (date_text == '').to_numpy()
+        errors.add(missing, lambda i: "Date manquante")
+        
+        dates = parse_dates(date_text, ['%Y-%m-%d'])
+        text_values = date_text.to_numpy()
+        errors.add(~missing & dates.isna().to_numpy(), lambda i: f"Format de date invalide ({text_values[i]})")
+        
+        # Vérifier que la date est raisonnable (pas dans le futur)
+        future = (dates > pd.Timestamp.now()).to_numpy()
+        warnings.add(future, lambda i: f"Date dans le futur ({text_values[i]})")
+        return dates
     
-    def _validate_euromillions_numbers(self, row: Dict, row_number: int, result: Dict):
-        """Valide les numéros pour Euromillions"""
-        numbers = []
-        stars = []
-        
-        # Valider les 5 numéros principaux (1-50)
-        for i in range(1, 6):
-            num_key = f'Numéro {i}'
-            try:
-                num = int(row.get(num_key, ''))
-                if num < 1 or num > 50:
-                    result['errors'].append(f"Ligne {row_number}: {num_key} doit être entre 1 et 50 (valeur: {num})")
-                    result['valid'] = False
-                numbers.append(num)
-            except (ValueError, TypeError):
-                result['errors'].append(f"Ligne {row_number}: {num_key} invalide")
-                result['valid'] = False
+    def _validate_euromillions_numbers(self, df: pd.DataFrame, errors: ValidationIssues) -> pd.DataFrame:
+        """Valide les numéros (1-50) et étoiles (1-12) pour Euromillions"""
+        numbers = {f'Numéro {i}': parse_integers(df[f'Numéro {i}']) for i in range(1, 6)}
+        stars = {f'Etoile {i}': parse_integers(df[f'Etoile {i}']) for i in range(1, 3)}
         
-        # Valider les 2 étoiles (1-12)
-        for i in range(1, 3):
-            star_key = f'Etoile {i}'
-            try:
-                star = int(row.get(star_key, ''))
-                if star < 1 or star > 12:
-                    result['errors'].append(f"Ligne {row_number}: {star_key} doit être entre 1 et 12 (valeur: {star})")
-                    result['valid'] = False
-                stars.append(star)
-            except (ValueError, TypeError):
-                result['errors'].append(f"Ligne {row_number}: {star_key} invalide")
-                result['valid'] = False
+        check_number_columns(errors, numbers, 1, 50)
+        check_number_columns(errors, stars, 1, 12)
         
         # Vérifier les doublons
-        if len(set(numbers)) != 5:
-            result['errors'].append(f"Ligne {row_number}: Numéros en doublon détectés")
-            result['valid'] = False
+        errors.add(rows_with_repeats(numbers), lambda i: "Numéros en doublon détectés")
+        errors.add(rows_with_repeats(stars), lambda i: "Étoiles en doublon détectées")
         
-        if len(set(stars)) != 2:
-            result['errors'].append(f"Ligne {row_number}: Étoiles en doublon détectées")
-            result['valid'] = False
+        return pd.DataFrame({
+            **{f'n{i}': numbers[f'Numéro {i}'] for i in range(1, 6)},
+            **{f'e{i}': stars[f'Etoile {i}'] for i in range(1, 3)}
+        })
     
-    def _validate_loto_numbers(self, row: Dict, row_number: int, result: Dict):
-        """Valide les numéros pour Loto"""
-        numbers = []
+    def _validate_loto_numbers(self, df: pd.DataFrame, errors: ValidationIssues) -> pd.DataFrame:
+        """Valide les numéros (1-45) et le complémentaire/bonus (1-10) pour Loto"""
+        numbers = {f'Numéro {i}': parse_integers(df[f'Numéro {i}']) for i in range(1, 7)}
+        check_number_columns(errors, numbers, 1, 45)
         
-        # Valider les 6 numéros principaux (1-45)
-        for i in range(1, 7):
-            num_key = f'Numéro {i}'
-            try:
-                num = int(row.get(num_key, ''))
-                if num < 1 or num > 45:
-                    result['errors'].append(f"Ligne {row_number}: {num_key} doit être entre 1 et 45 (valeur: {num})")
-                    result['valid'] = False
-                numbers.append(num)
-            except (ValueError, TypeError):
-                result['errors'].append(f"Ligne {row_number}: {num_key} invalide")
-                result['valid'] = False
-        
-        # Valider le numéro complémentaire/bonus (1-10)
-        complementaire_key = 'Complémentaire' if 'Complémentaire' in row else 'Bonus'
-        try:
-            complementaire = int(row.get(complementaire_key, ''))
-            if complementaire < 1 or complementaire > 10:
-                result['errors'].append(f"Ligne {row_number}: {complementaire_key} doit être entre 1 et 10 (valeur: {complementaire})")
-                result['valid'] = False
-        except (ValueError, TypeError):
-            result['errors'].append(f"Ligne {row_number}: {complementaire_key} invalide")
-            result['valid'] = False
+        # Gérer les deux formats possibles pour le complémentaire/bonus
+        complementaire_key = 'Complémentaire' if 'Complémentaire' in df.columns else 'Bonus'
+        complementaire = parse_integers(df[complementaire_key])
+        check_number_columns(errors, {complementaire_key: complementaire}, 1, 10)
         
         # Vérifier les doublons
-        if len(set(numbers)) != 6:
-            result['errors'].append(f"Ligne {row_number}: Numéros en doublon détectés")
-            result['valid'] = False
-    
-    def _check_duplicates(self, valid_rows: List[Dict], game_type: str) -> int:
-        """Vérifie les doublons potentiels avec la base de données"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        errors.add(rows_with_repeats(numbers), lambda i: "Numéros en doublon détectés")
         
-        duplicates = 0
-        
-        try:
-            for row in valid_rows:
-                date_str = row['Date']
-                
-                if game_type == 'euromillions':
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM draws_euromillions 
-                        WHERE date = ? AND n1 = ? AND n2 = ? AND n3 = ? AND n4 = ? AND n5 = ? AND e1 = ? AND e2 = ?
-                    """, (
-                        date_str,
-                        int(row['Numéro 1']), int(row['Numéro 2']), int(row['Numéro 3']),
-                        int(row['Numéro 4']), int(row['Numéro 5']),
-                        int(row['Etoile 1']), int(row['Etoile 2'])
-                    ))
-                elif game_type == 'loto':
-                    # Gérer les deux formats possibles pour le complémentaire/bonus
-                    complementaire_key = 'Complémentaire' if 'Complémentaire' in row else 'Bonus'
-                    
-                    cursor.execute("""
-                        SELECT COUNT(*) FROM draws_loto 
-                        WHERE date = ? AND n1 = ? AND n2 = ? AND n3 = ? AND n4 = ? AND n5 = ? AND n6 = ? AND complementaire = ?
-                    """, (
-                        date_str,
-                        int(row['Numéro 1']), int(row['Numéro 2']), int(row['Numéro 3']),
-                        int(row['Numéro 4']), int(row['Numéro 5']), int(row['Numéro 6']),
-                        int(row[complementaire_key])
-                    ))
-                
-                if cursor.fetchone()[0] > 0:
-                    duplicates += 1
-                    
-        except Exception as e:
-            print(f"Erreur lors de la vérification des doublons: {e}")
-        finally:
-            conn.close()
-        
-        return duplicates
-    
-    def _generate_summary(self, valid_rows: List[Dict], game_type: str) -> Dict:
-        """Génère un résumé des données valides"""
-        if not valid_rows:
-            return {}
-        
-        # Compter par année
-        years = {}
-        for row in valid_rows:
-            year = row['Date'][:4]
-            years[year] = years.get(year, 0) + 1
-        
-        return {
-            'total_draws': len(valid_rows),
-            'years_covered': len(years),
-            'yearly_breakdown': years,
-            'date_range': {
-                'min': min(row['Date'] for row in valid_rows),
-                'max': max(row['Date'] for row in valid_rows)
-            }
-        }
+        return pd.DataFrame({
+            **{f'n{i}': numbers[f'Numéro {i}'] for i in range(1, 7)},
+            'complementaire': complementaire
+        })
 
 def print_validation_report(validation_result: Dict, file_path: str):
     """Affiche un rapport de validation formaté"""